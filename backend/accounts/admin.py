@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import User, ProvisioningJob
 
 class CustomUserAdmin(UserAdmin):
     model = User
@@ -66,4 +66,11 @@ class CustomUserAdmin(UserAdmin):
         'updated_at'
         )
 
-admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(User, CustomUserAdmin)
+
+
+@admin.register(ProvisioningJob)
+class ProvisioningJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'processed', 'total', 'created_count', 'error_count', 'requested_by', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('report', 'error', 'started_at', 'finished_at')
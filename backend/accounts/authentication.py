@@ -0,0 +1,60 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import TOKEN_VERSION_CLAIM, get_token_version, remember_token_version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication sin consulta a la BD por petición.
+
+    El usuario se arma con los claims del token (accounts.tokens.user_claims)
+    como una instancia de User con el resto de campos diferidos: funciona en
+    FKs (historial, logs) y carga perezosamente user.person o la contraseña solo
+    si una vista los usa. La BD solo se consulta cuando la versión del token no
+    está en caché; si no coincide, el token se rechaza por revocado.
+    Los tokens emitidos antes de agregar los claims siguen el camino normal.
+    """
+
+    CLAIM_FIELDS = ('username', 'person_id', 'is_staff', 'is_superuser', TOKEN_VERSION_CLAIM)
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in self.CLAIM_FIELDS):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = self.user_model._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        state = get_token_version(user_id)
+        if state is None:
+            state = self.user_model.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+            if state is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            remember_token_version(user_id, *state)
+
+        version, is_active = state
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if validated_token[TOKEN_VERSION_CLAIM] != version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return self.user_from_claims(user_id, validated_token)
+
+    def user_from_claims(self, user_id, claims):
+        data = {
+            'id': user_id,
+            'username': claims['username'],
+            'is_active': True,
+            'is_staff': claims['is_staff'],
+            'is_superuser': claims['is_superuser'],
+            'person_id': claims['person_id'],
+            'token_version': claims[TOKEN_VERSION_CLAIM],
+        }
+        # from_db espera los valores en el orden de los campos del modelo
+        fields = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in data]
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, fields, [data[name] for name in fields])
@@ -0,0 +1,52 @@
+"""
+Hash de contraseñas en paralelo (PBKDF2 es trabajo de CPU).
+
+Este módulo no importa modelos: los procesos del pool se crean con 'spawn'
+y lo importan antes de que el registro de apps esté listo.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # 'spawn' no hereda hilos ni conexiones del servidor; cada proceso configura Django
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def worker_count():
+    return settings.ACCOUNTS_PROVISIONING_WORKERS or os.cpu_count() or 1
+
+
+def create_hasher_pool():
+    """ProcessPoolExecutor para hash_passwords, o None si no conviene/no se puede usar."""
+    workers = worker_count()
+    if workers <= 1:
+        return None
+    try:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    except (OSError, NotImplementedError) as e:
+        # Entornos sin soporte de multiprocessing: se calcula en el proceso actual
+        logger.warning("Process pool unavailable, hashing inline: %s", e)
+        return None
+
+
+def hash_passwords(passwords, pool=None):
+    """make_password para una lista, repartido entre los procesos del pool si existe."""
+    if pool is None or len(passwords) < 2:
+        return [make_password(p) for p in passwords]
+    chunksize = max(1, len(passwords) // (worker_count() * 4))
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from accounts.models import ProvisioningJob
+from accounts.services import start_provisioning_job, run_provisioning_job
+
+
+class Command(BaseCommand):
+    help = 'Creates user accounts for every active employee without one (same job as the bulk endpoint, run inline)'
+
+    def handle(self, *args, **options):
+        job, created = start_provisioning_job(background=False)
+        if not created:
+            self.stdout.write(self.style.WARNING(f'Job #{job.pk} is already running ({job.processed}/{job.total}).'))
+            return
+
+        self.stdout.write(f'Provisioning {job.total} account(s) as job #{job.pk}...')
+        run_provisioning_job(job.pk)
+        job.refresh_from_db()
+
+        if job.status == ProvisioningJob.Status.FAILED:
+            self.stderr.write(self.style.ERROR(f'Job #{job.pk} failed: {job.error}'))
+            return
+        for error in job.report.get('errors', []):
+            self.stdout.write(f"  {error['person_name']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {job.created_count} account(s), {job.error_count} error(s).'
+        ))
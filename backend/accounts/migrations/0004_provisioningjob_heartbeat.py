@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+STALE_JOB_ERROR = "El proceso se interrumpió antes de terminar (reinicio del servidor). Vuelva a intentarlo."
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Deja en curso solo el job PEN/RUN más reciente para poder crear la restricción."""
+    from django.utils import timezone
+
+    ProvisioningJob = apps.get_model('accounts', 'ProvisioningJob')
+    active = ProvisioningJob.objects.filter(status__in=['PEN', 'RUN']).order_by('-created_at', '-pk')
+    newest = active.values_list('pk', flat=True).first()
+    active.exclude(pk=newest).update(status='ERR', error=STALE_JOB_ERROR, finished_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provisioningjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='provisioningjob',
+            constraint=models.UniqueConstraint(models.Value(True), condition=models.Q(('status__in', ['PEN', 'RUN'])), name='one_active_provisioning_job', violation_error_message='Ya hay una creación masiva de cuentas en curso.'),
+        ),
+    ]
@@ -47,6 +47,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    token_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Se incrementa para invalidar los tokens JWT ya emitidos (ver accounts.tokens)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -55,5 +59,84 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = []
 
+    # Datos copiados en los claims del JWT: si cambian, los tokens emitidos dejan de ser válidos
+    TOKEN_FIELDS = ('password', 'username', 'is_active', 'is_staff', 'is_superuser', 'person_id')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Guardamos los valores originales (sin forzar la carga de campos diferidos)
+        self.__original_token_state = self._token_state()
+
+    def _token_state(self):
+        return {field: self.__dict__[field] for field in self.TOKEN_FIELDS if field in self.__dict__}
+
+    def _token_data_changed(self):
+        if self._password is not None:  # set_password()
+            return True
+        current = self._token_state()
+        return any(current.get(field) != value for field, value in self.__original_token_state.items())
+
+    def save(self, *args, **kwargs):
+        revoke = not self._state.adding and self._token_data_changed()
+        if revoke:
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self.__original_token_state = self._token_state()
+        if revoke:
+            from .tokens import forget_token_version
+            forget_token_version(self.pk)
+
     def __str__(self):
         return self.username
+
+
+class ProvisioningJob(models.Model):
+    """
+    Creación masiva de cuentas para empleados activos, ejecutada en segundo plano.
+    El cliente consulta el progreso (processed/total) y al terminar obtiene el reporte.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PEN', 'Pendiente'
+        RUNNING = 'RUN', 'En Ejecución'
+        DONE = 'DON', 'Completado'
+        FAILED = 'ERR', 'Fallido'
+
+    requested_by = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='provisioning_jobs'
+    )
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.PENDING)
+    total = models.PositiveIntegerField(default=0, help_text="Personas a procesar")
+    processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # {'created_accounts': [...], 'errors': [...]}
+    report = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Latido: el hilo lo actualiza en cada lote (ver accounts.services.fail_stale_jobs)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Un solo job pendiente o en ejecución a la vez, aunque lleguen dos peticiones juntas
+            models.UniqueConstraint(
+                models.Value(True),
+                condition=models.Q(status__in=['PEN', 'RUN']),
+                name='one_active_provisioning_job',
+                violation_error_message="Ya hay una creación masiva de cuentas en curso.",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Provisioning #{self.pk} ({self.get_status_display()})"
@@ -6,7 +6,7 @@ from core.models import (
 )
 # FIX: Importamos check_uniqueness para blindar el username contra Errores 500
 from core.serializers import PersonSerializer, check_uniqueness
-from .models import User
+from .models import User, ProvisioningJob
 from dj_rest_auth.serializers import LoginSerializer
 from django.utils.translation import gettext_lazy as _
 
@@ -172,6 +172,25 @@ class EmployeeCreationSerializer(serializers.ModelSerializer):
         
         return new_user
 
+class ProvisioningJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProvisioningJob
+        fields = [
+            'id', 'status', 'status_display', 'total', 'processed', 'progress',
+            'created_count', 'error_count', 'report', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+
+    def get_progress(self, obj):
+        """Porcentaje completado (0-100)"""
+        if not obj.total:
+            return 100 if obj.status == ProvisioningJob.Status.DONE else 0
+        return round(obj.processed * 100 / obj.total)
+
+
 class CustomUserDetailsSerializer(serializers.ModelSerializer):
     """
     Serializer para ver detalles del usuario logueado.
@@ -0,0 +1,226 @@
+"""
+Aprovisionamiento masivo de cuentas de usuario para empleados activos.
+
+En lugar de crear usuario por usuario (consulta de cédula, bucle de colisiones
+y hash PBKDF2 por cada persona), se precargan en bloque las cédulas y los
+usernames existentes, las colisiones se resuelven en memoria, los hashes se
+calculan en un pool de procesos (es trabajo de CPU) y los usuarios se insertan
+con bulk_create por lotes. El trabajo corre en segundo plano sobre un
+ProvisioningJob que el cliente consulta para conocer el progreso.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .hashing import create_hasher_pool, hash_passwords
+from .models import User, ProvisioningJob
+from .usernames import (
+    UsernameIndex, UsernameConflict, base_username, clean_document_number, save_with_unique_username
+)
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ['ACT', 'SUS', 'PER', 'REP']
+
+# Un job PENDING/RUNNING sin latido (updated_at) durante este tiempo se considera
+# abandonado (ej. reinicio del servidor); el hilo lo actualiza en cada lote
+STALE_JOB_AFTER = timedelta(minutes=15)
+
+STALE_JOB_ERROR = "El proceso se interrumpió antes de terminar (reinicio del servidor). Vuelva a intentarlo."
+
+
+def pending_persons():
+    """Personas con contrato activo que aún no tienen cuenta de usuario."""
+    from core.models import Person
+    from employment.models import Employment
+
+    active_person_ids = Employment.objects.filter(
+        current_status__in=ACTIVE_STATUSES
+    ).values('person_id')
+
+    return Person.objects.filter(
+        id__in=active_person_ids,
+        user_account__isnull=True
+    ).only('id', 'first_name', 'paternal_surname').order_by('id')
+
+
+# --- JOB ---
+
+def fail_stale_jobs():
+    """
+    Marca como fallidos los jobs PENDING/RUNNING cuyo último latido es
+    anterior a STALE_JOB_AFTER: su hilo murió sin registrar el final y, de lo
+    contrario, el cliente los vería en curso para siempre.
+    """
+    now = timezone.now()
+    return ProvisioningJob.objects.filter(
+        status__in=[ProvisioningJob.Status.PENDING, ProvisioningJob.Status.RUNNING],
+        updated_at__lt=now - STALE_JOB_AFTER,
+    ).update(status=ProvisioningJob.Status.FAILED, error=STALE_JOB_ERROR, finished_at=now, updated_at=now)
+
+
+def active_job():
+    fail_stale_jobs()
+    return ProvisioningJob.objects.filter(
+        status__in=[ProvisioningJob.Status.PENDING, ProvisioningJob.Status.RUNNING],
+    ).first()
+
+
+def start_provisioning_job(user=None, background=True):
+    """
+    Crea el job (o devuelve el que ya está en curso) y lo lanza en un hilo
+    al confirmar la transacción. La restricción one_active_provisioning_job
+    impide que dos peticiones simultáneas creen cada una su job: la que
+    pierde devuelve el de la otra.
+
+    Returns:
+        Tupla (job, created)
+    """
+    job = active_job()
+    if job:
+        return job, False
+
+    try:
+        with transaction.atomic():
+            job = ProvisioningJob.objects.create(
+                requested_by=user if user and user.is_authenticated else None,
+                total=pending_persons().count(),
+            )
+    except IntegrityError:
+        job = active_job()
+        if job is None:
+            raise
+        return job, False
+    if background:
+        transaction.on_commit(
+            lambda: threading.Thread(target=run_provisioning_job, args=(job.pk,), daemon=True).start()
+        )
+    return job, True
+
+
+def run_provisioning_job(job_id):
+    """Punto de entrada del hilo (o del comando `provision_employee_accounts`)."""
+    try:
+        return provision_employee_accounts(ProvisioningJob.objects.get(pk=job_id))
+    except Exception as e:
+        logger.exception("Provisioning job %s failed", job_id)
+        ProvisioningJob.objects.filter(pk=job_id).update(
+            status=ProvisioningJob.Status.FAILED, error=str(e), finished_at=timezone.now()
+        )
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def _save_progress(job, **fields):
+    # update() no aplica auto_now: el latido se registra a mano
+    fields['updated_at'] = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    ProvisioningJob.objects.filter(pk=job.pk).update(**fields)
+
+
+def _insert_batch(users, bases, index):
+    """
+    Inserta un lote con bulk_create. Si otro proceso tomó un username o una
+    persona mientras tanto, el lote se reintenta fila por fila
+    (save_with_unique_username elige otro sufijo si choca el username).
+
+    Returns:
+        Tupla (creados, errores)
+    """
+    try:
+        with transaction.atomic():
+            return User.objects.bulk_create(users), []
+    except IntegrityError:
+        pass
+
+    created, errors = [], []
+    for user, base in zip(users, bases):
+        try:
+            created.append(save_with_unique_username(user, base, index))
+        except (IntegrityError, UsernameConflict) as e:
+            errors.append((user, str(e)))
+    return created, errors
+
+
+def provision_employee_accounts(job):
+    """
+    Crea cuentas para todos los empleados activos sin usuario.
+    Username según base_username(); password inicial = número de cédula.
+    """
+    from core.models import NationalId
+
+    batch_size = settings.ACCOUNTS_PROVISIONING_BATCH_SIZE
+    _save_progress(job, status=ProvisioningJob.Status.RUNNING, started_at=timezone.now())
+
+    persons = list(pending_persons())
+    # Una consulta para todas las cédulas y otra para todos los usernames
+    cedulas = dict(
+        NationalId.objects.filter(
+            person_id__in=pending_persons().values('id'),
+            category='CEDULA',
+            is_primary=True
+        ).values_list('person_id', 'number')
+    )
+    index = UsernameIndex.load_all()
+
+    created_accounts, errors = [], []
+    _save_progress(job, total=len(persons))
+
+    pool = create_hasher_pool()
+    try:
+        for start in range(0, len(persons), batch_size):
+            batch, bases, passwords = [], [], []
+            for person in persons[start:start + batch_size]:
+                number = cedulas.get(person.id)
+                if not number:
+                    errors.append({
+                        'person_id': person.id,
+                        'person_name': str(person),
+                        'error': 'No tiene cédula registrada'
+                    })
+                    continue
+                cedula_number = clean_document_number(number)
+                base = base_username(person, cedula_number)
+                batch.append(User(username=index.claim(base), person=person, is_active=True, is_staff=False))
+                bases.append(base)
+                passwords.append(cedula_number)
+
+            for user, hashed in zip(batch, hash_passwords(passwords, pool)):
+                user.password = hashed
+
+            created, failed = _insert_batch(batch, bases, index)
+            created_accounts += [
+                {'person_id': u.person_id, 'person_name': str(u.person), 'username': u.username}
+                for u in created
+            ]
+            errors += [
+                {'person_id': u.person_id, 'person_name': str(u.person), 'error': message}
+                for u, message in failed
+            ]
+            _save_progress(
+                job,
+                processed=min(start + batch_size, len(persons)),
+                created_count=len(created_accounts),
+                error_count=len(errors),
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    _save_progress(
+        job,
+        status=ProvisioningJob.Status.DONE,
+        processed=len(persons),
+        created_count=len(created_accounts),
+        error_count=len(errors),
+        report={'created_accounts': created_accounts, 'errors': errors},
+        finished_at=timezone.now(),
+    )
+    return job
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import User
+from .tokens import forget_token_version
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user_token_version(sender, instance, **kwargs):
+    """Sin la versión en caché, el siguiente uso de sus tokens consulta la BD y falla."""
+    forget_token_version(instance.pk)
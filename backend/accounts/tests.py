@@ -1,3 +1,192 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from core.models import Person
+from .authentication import ClaimsJWTAuthentication
+from .models import User, ProvisioningJob
+from .services import STALE_JOB_AFTER, provision_employee_accounts, start_provisioning_job
+from .tokens import UserClaimsTokenSerializer, get_token_version, revoke_tokens
+from .usernames import UsernameIndex, base_username, create_user_for_person, save_with_unique_username
+
+
+class UsernameGenerationTests(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create(first_name='Ángel', paternal_surname='Núñez')
+
+    def test_base_username(self):
+        self.assertEqual(base_username(self.person, '12345678'), 'anunez5678')
+        self.assertEqual(base_username(self.person, '12'), 'anunez0012')
+
+    def test_claim_picks_first_free_suffix(self):
+        index = UsernameIndex(['anunez5678', 'anunez56781', 'anunez56783'])
+        self.assertEqual(index.claim('anunez5678'), 'anunez56782')
+        self.assertEqual(index.claim('anunez5678'), 'anunez56784')
+
+    def test_for_base_is_a_single_query(self):
+        User.objects.create_user('anunez5678', 'x')
+        User.objects.create_user('anunez56781', 'x')
+        with CaptureQueriesContext(connection) as ctx:
+            index = UsernameIndex.for_base('anunez5678')
+            index.claim('anunez5678')
+        self.assertEqual(len(ctx), 1)
+        self.assertIn('LIKE', ctx.captured_queries[0]['sql'])
+
+    def test_retries_when_index_is_stale(self):
+        # Otro proceso insertó el username después de leer el índice
+        index = UsernameIndex.for_base('anunez5678')
+        User.objects.create_user('anunez5678', 'x')
+
+        user = User(person=self.person)
+        user.set_password('12345678')
+        save_with_unique_username(user, 'anunez5678', index)
+
+        self.assertEqual(user.username, 'anunez56781')
+        self.assertTrue(user.check_password('12345678'))
+
+    def test_person_with_account_is_not_retried(self):
+        create_user_for_person(self.person, '12345678')
+        with self.assertRaises(IntegrityError):
+            create_user_for_person(self.person, '12345678')
+        self.assertEqual(User.objects.filter(username__startswith='anunez5678').count(), 1)
+
+
+class ConcurrentUsernameGenerationTests(TransactionTestCase):
+    THREADS = 8
+
+    def test_concurrent_accounts_with_same_base_get_distinct_usernames(self):
+        # SQLite declara test_db_allows_multiple_connections = False aunque la BD de pruebas
+        # sea un archivo (SQLITE_TEST_DB_FILE=1, ver config.settings); solo en memoria no sirve
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("La BD de pruebas en memoria no admite varias conexiones (use SQLITE_TEST_DB_FILE=1).")
+        persons = [
+            Person.objects.create(first_name='José', paternal_surname='Pérez')
+            for _ in range(self.THREADS)
+        ]
+        barrier = threading.Barrier(self.THREADS)
+        results, errors = [], []
+
+        def worker(person):
+            try:
+                barrier.wait()
+                results.append(create_user_for_person(person, '12345678').username)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(p,)) for p in persons]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(results),
+            sorted(['jperez5678'] + [f'jperez5678{i}' for i in range(1, self.THREADS)])
+        )
+        self.assertEqual(User.objects.filter(person__in=persons).count(), self.THREADS)
+
+
+class TokenRevocationTests(TestCase):
+    """Revocación de los access tokens por versión (accounts.tokens, ClaimsJWTAuthentication)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana', 'x', person=Person.objects.create(first_name='Ana', paternal_surname='Pérez'))
+        self.token = str(UserClaimsTokenSerializer.get_token(self.user).access_token)
+
+    def authenticate(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return ClaimsJWTAuthentication().authenticate(request)
+
+    def assertRevoked(self, code):
+        with self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate()
+        self.assertEqual(ctx.exception.detail['code'], code)
+
+    def test_valid_token_needs_no_query(self):
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual((user.pk, user.person_id), (self.user.pk, self.user.person_id))
+
+    def test_password_change_revokes(self):
+        self.user.set_password('otra')
+        self.user.save()
+        self.assertRevoked('token_revoked')
+
+    def test_deactivation_revokes(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertRevoked('user_inactive')
+
+        # También con update() masivo a través de revoke_tokens
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        revoke_tokens(User.objects.filter(pk=self.user.pk))
+        self.assertRevoked('token_revoked')
+
+    def test_deletion_revokes(self):
+        self.authenticate()
+        self.assertIsNotNone(get_token_version(self.user.pk))
+        self.user.delete()
+        self.assertIsNone(get_token_version(self.user.pk))
+        self.assertRevoked('user_not_found')
+
+
+class ProvisioningJobTests(TestCase):
+    """Jobs de creación masiva de cuentas abandonados por su hilo (accounts.services)."""
+
+    def setUp(self):
+        self.job = ProvisioningJob.objects.create(status=ProvisioningJob.Status.RUNNING)
+        self.make_stale(self.job)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+
+    def make_stale(self, job):
+        ProvisioningJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - STALE_JOB_AFTER - timedelta(minutes=1))
+
+    def test_stale_job_is_reported_as_failed(self):
+        response = self.client.get(f'/api/accounts/users/provisioning-jobs/{self.job.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], ProvisioningJob.Status.FAILED)
+        self.assertTrue(response.data['error'])
+        self.assertIsNotNone(response.data['finished_at'])
+
+    def test_stale_job_does_not_block_a_new_one(self):
+        job, created = start_provisioning_job(background=False)
+        self.assertTrue(created)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, ProvisioningJob.Status.FAILED)
+        self.assertEqual(start_provisioning_job(background=False), (job, False))
+
+    def test_staleness_follows_the_heartbeat(self):
+        """Un job largo que sigue avanzando no se da por abandonado aunque se haya creado hace mucho."""
+        ProvisioningJob.objects.filter(pk=self.job.pk).update(
+            created_at=timezone.now() - 2 * STALE_JOB_AFTER, updated_at=timezone.now()
+        )
+        self.assertEqual(start_provisioning_job(background=False), (self.job, False))
+
+        # El hilo registra el latido con cada avance
+        self.make_stale(self.job)
+        provision_employee_accounts(ProvisioningJob.objects.get(pk=self.job.pk))
+        self.job.refresh_from_db()
+        self.assertGreater(self.job.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_only_one_active_job(self):
+        ProvisioningJob.objects.filter(pk=self.job.pk).update(updated_at=timezone.now())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProvisioningJob.objects.create()
+
+        # La petición que pierde la carrera (ya pasó active_job()) devuelve el job de la otra
+        with patch('accounts.services.active_job', side_effect=[None, self.job]):
+            self.assertEqual(start_provisioning_job(background=False), (self.job, False))
+        self.assertEqual(ProvisioningJob.objects.count(), 1)
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Claims propios del JWT y control de revocación por versión.
+
+El access token lleva los datos que casi todas las vistas necesitan
+(person_id, is_staff, is_superuser, username) y `ver`, copia de
+User.token_version. User.save() incrementa la versión cuando cambian la
+contraseña, el estado o los permisos, con lo que los tokens anteriores quedan
+revocados. La versión vigente de cada usuario se guarda en caché para que
+ClaimsJWTAuthentication valide sin consultar la BD.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def _version_key(user_id):
+    return f"accounts:token-version:{user_id}"
+
+
+def user_claims(user):
+    return {
+        'username': user.username,
+        'person_id': user.person_id,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        TOKEN_VERSION_CLAIM: user.token_version,
+    }
+
+
+def remember_token_version(user_id, version, is_active=True):
+    cache.set(_version_key(user_id), (version, is_active), settings.JWT_TOKEN_VERSION_CACHE_TIMEOUT)
+
+
+def get_token_version(user_id):
+    """(version, is_active) desde caché, o None si no se conoce."""
+    return cache.get(_version_key(user_id))
+
+
+def forget_token_version(user_id):
+    """Descarta la versión cacheada; la siguiente petición la relee de la BD."""
+    key = _version_key(user_id)
+    cache.delete(key)
+    # Tras el commit, por si otra petición la recargó con el valor anterior entretanto
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def revoke_tokens(queryset):
+    """
+    Revoca los tokens de todos los usuarios del queryset. Para actualizaciones
+    masivas con update(), que no pasan por User.save().
+    """
+    user_ids = list(queryset.values_list('pk', flat=True))
+    queryset.model.objects.filter(pk__in=user_ids).update(token_version=F('token_version') + 1)
+    for user_id in user_ids:
+        forget_token_version(user_id)
+    return len(user_ids)
+
+
+class UserClaimsTokenSerializer(TokenObtainPairSerializer):
+    """JWT_TOKEN_CLAIMS_SERIALIZER de dj-rest-auth: agrega los claims de user_claims()."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        remember_token_version(user.pk, user.token_version, user.is_active)
+        return token
@@ -0,0 +1,110 @@
+"""
+Generación de usernames: Primera Letra Nombre + Primer Apellido + Últimos 4 dígitos Cédula.
+
+Único punto donde vive la fórmula; lo usan PersonViewSet.create_user_account y
+la creación masiva (accounts.services). Para encontrar un sufijo libre se leen
+con una sola consulta (LIKE 'base%') los usernames que comparten la base y el
+siguiente sufijo se elige en memoria. Si otro proceso inserta el mismo username
+entre la lectura y el INSERT, la violación de unicidad se captura y se reintenta.
+"""
+
+import unicodedata
+
+from django.db import IntegrityError, transaction
+
+from .models import User
+
+MAX_RETRIES = 5
+
+
+class UsernameConflict(Exception):
+    """No se consiguió un username libre tras MAX_RETRIES intentos."""
+
+
+def normalize_text(text):
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn').lower()
+
+
+def clean_document_number(number):
+    """Número de cédula sin puntos ni guiones"""
+    return number.replace('.', '').replace('-', '').strip()
+
+
+def base_username(person, cedula_number):
+    first_initial = normalize_text(person.first_name[0])
+    surname = normalize_text(person.paternal_surname)
+    last_4_digits = cedula_number[-4:].zfill(4)
+    return f"{first_initial}{surname}{last_4_digits}".strip().lower()
+
+
+class UsernameIndex:
+    """
+    Conjunto en memoria de usernames ocupados.
+    claim(base) devuelve base, base1, base2... (el primero libre) y lo reserva.
+    """
+
+    def __init__(self, usernames=()):
+        self._usernames = set(usernames)
+
+    @classmethod
+    def for_base(cls, base):
+        """Una consulta: todos los usernames que empiezan por `base`."""
+        return cls(User.objects.filter(username__startswith=base).values_list('username', flat=True))
+
+    @classmethod
+    def load_all(cls):
+        """Una consulta con todos los usernames (creación masiva)."""
+        return cls(User.objects.values_list('username', flat=True))
+
+    def claim(self, base):
+        username = base
+        counter = 1
+        while username in self._usernames:
+            username = f"{base}{counter}"
+            counter += 1
+        self._usernames.add(username)
+        return username
+
+    def refresh(self, base):
+        """Agrega los usernames de `base` que otro proceso insertó (tras perder una carrera)."""
+        self._usernames |= UsernameIndex.for_base(base)._usernames
+
+
+def save_with_unique_username(user, base, index=None, max_retries=MAX_RETRIES):
+    """
+    Inserta `user` con el primer username libre para `base` (o con el que ya
+    trae asignado, si se reservó antes con index.claim).
+
+    Cada intento va en su propio savepoint. Si el INSERT choca con la unicidad
+    del username, se relee la base y se prueba el siguiente sufijo. Cualquier
+    otra violación (ej. la persona ya tiene cuenta) se propaga.
+
+    Raises:
+        IntegrityError: la violación no se debe al username
+        UsernameConflict: se agotaron los reintentos
+    """
+    index = index or UsernameIndex.for_base(base)
+    if not user.username:
+        user.username = index.claim(base)
+    for _ in range(max_retries):
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+            return user
+        except IntegrityError:
+            user.pk = None
+            if not User.objects.filter(username=user.username).exists():
+                raise
+            index.refresh(base)
+            user.username = index.claim(base)
+    raise UsernameConflict(f"No se pudo generar un username libre para '{base}'.")
+
+
+def create_user_for_person(person, cedula_number, password=None, **extra_fields):
+    """
+    Crea la cuenta de `person` con el username generado.
+    Password inicial = número de cédula si no se indica otra.
+    """
+    user = User(person=person, **extra_fields)
+    user.set_password(password or cedula_number)
+    return save_with_unique_username(user, base_username(person, cedula_number))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import JobPosting, Candidate, CandidateEducation
+from .models import JobPosting, Candidate, CandidateEducation, OutboundEmail, ApplicationIntake
 
 
 @admin.register(JobPosting)
@@ -64,3 +64,18 @@ class CandidateAdmin(admin.ModelAdmin):
     def full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
     full_name.short_description = 'Nombre Completo'
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'template']
+    search_fields = ['recipient', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+
+
+@admin.register(ApplicationIntake)
+class ApplicationIntakeAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_posting', 'status', 'attempts', 'client_ip', 'created_at', 'processed_at']
+    list_filter = ['status', 'job_posting']
+    readonly_fields = ['created_at', 'processed_at', 'errors', 'candidate']
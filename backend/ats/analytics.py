@@ -0,0 +1,317 @@
+"""
+Analítica del embudo de reclutamiento a partir de CandidateLog.
+
+Cada registro con `stage` es una transición; la etapa de origen y el momento
+en que el candidato entró en ella salen de LAG(...) OVER (PARTITION BY
+candidate ORDER BY timestamp). El primer cambio parte de NEW, desde la
+postulación (Candidate.created_at).
+
+Las transiciones se agregan por (día, vacante, origen, destino) con conteo,
+suma de duraciones e histograma por tramos (DURATION_BUCKETS), lo que permite
+sumar días y sacar medianas/percentiles sin volver a leer los registros:
+
+- Los días cerrados se consolidan en FunnelDailyStat (comando
+  `refresh_funnel_stats`, o al pedirlos por primera vez) y se marcan en
+  FunnelStatDay. Una consulta solo agrega los días que faltan, sin tocar los
+  ya guardados; si dos consultas consolidan el mismo día a la vez, la segunda
+  ignora las filas que ya existen.
+- El día en curso siempre se calcula en vivo.
+
+Los días consolidados no se recalculan solos si se borran candidatos o se
+reasignan vacantes: ejecutar `refresh_funnel_stats --start ...` en ese caso.
+"""
+
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import Lag, TruncDate
+from django.utils import timezone
+
+from .models import JobPosting, Candidate, CandidateLog, FunnelDailyStat, FunnelStatDay
+
+HOUR = 3600
+
+# Límites superiores de los tramos del histograma (segundos); el último tramo es abierto
+DURATION_BUCKETS = tuple(h * HOUR for h in (
+    1, 2, 4, 8, 12, 24, 36, 48, 72, 96, 120, 168, 240, 336, 504, 720, 1080, 1440, 2160, 4320
+))
+
+# Orden del embudo: avanzar es pasar a una etapa posterior de esta lista
+FUNNEL_STAGES = ('NEW', 'REV', 'INT', 'OFF', 'HIRED')
+
+GROUP_FIELDS = {
+    'job_posting': ('id', 'title'),
+    'position': ('position_id', 'position__job_title__name'),
+    'department': ('position__department_id', 'position__department__name'),
+}
+
+
+def _day_bounds(start, end):
+    """[inicio, fin) en hora local para filtrar por índice en lugar de con __date."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _empty_histogram():
+    return [0] * (len(DURATION_BUCKETS) + 1)
+
+
+def _add(stat, stage_seconds, cycle_seconds):
+    stat.count += 1
+    stat.stage_seconds += stage_seconds
+    stat.stage_histogram[bisect_right(DURATION_BUCKETS, stage_seconds)] += 1
+    stat.cycle_seconds += cycle_seconds
+    stat.cycle_histogram[bisect_right(DURATION_BUCKETS, cycle_seconds)] += 1
+
+
+def compute_daily_stats(start, end, postings=None):
+    """
+    Calcula en vivo las transiciones de los días [start, end].
+
+    Args:
+        start, end: Fechas locales (inclusive)
+        postings: QuerySet de JobPosting para restringir el cálculo (opcional)
+
+    Returns:
+        Lista de FunnelDailyStat sin guardar
+    """
+    since, until = _day_bounds(start, end)
+    stats = {}
+
+    def stat(day, job_posting_id, from_stage, to_stage):
+        key = (day, job_posting_id, from_stage, to_stage)
+        if key not in stats:
+            stats[key] = FunnelDailyStat(
+                day=day, job_posting_id=job_posting_id, from_stage=from_stage, to_stage=to_stage,
+                stage_histogram=_empty_histogram(), cycle_histogram=_empty_histogram()
+            )
+        return stats[key]
+
+    # Postulaciones: entradas a NEW
+    applications = Candidate.objects.order_by().filter(created_at__gte=since, created_at__lt=until)
+    if postings is not None:
+        applications = applications.filter(job_posting__in=postings)
+    for day, job_posting_id, total in applications.values('job_posting_id', day=TruncDate('created_at')).annotate(
+        total=Count('id')
+    ).values_list('day', 'job_posting_id', 'total'):
+        stat(day, job_posting_id, '', 'NEW').count += total
+
+    # Transiciones: la ventana recorre todo el historial de los candidatos que se
+    # movieron en el rango, para que LAG vea también el registro anterior al rango
+    logs = CandidateLog.objects.order_by().filter(stage__isnull=False)
+    moved = logs.filter(timestamp__gte=since, timestamp__lt=until)
+    if postings is not None:
+        moved = moved.filter(candidate__job_posting__in=postings)
+    timeline = {'partition_by': [F('candidate_id')], 'order_by': [F('timestamp').asc(), F('id').asc()]}
+    rows = logs.filter(candidate_id__in=moved.values('candidate_id')).annotate(
+        from_stage=Window(Lag('stage'), **timeline),
+        entered_at=Window(Lag('timestamp'), **timeline),
+        day=TruncDate('timestamp'),
+    ).values_list(
+        'day', 'candidate__job_posting_id', 'from_stage', 'stage',
+        'timestamp', 'entered_at', 'candidate__created_at'
+    )
+    for day, job_posting_id, from_stage, to_stage, moved_at, entered_at, applied_at in rows:
+        if not since <= moved_at < until:
+            continue
+        cycle = max(int((moved_at - applied_at).total_seconds()), 0)
+        stage_time = max(int((moved_at - entered_at).total_seconds()), 0) if entered_at else cycle
+        _add(stat(day, job_posting_id, from_stage or 'NEW', to_stage), stage_time, cycle)
+
+    return list(stats.values())
+
+
+@transaction.atomic
+def refresh_daily_stats(start, end):
+    """
+    Recalcula y guarda FunnelDailyStat para los días [start, end] (todas las vacantes).
+
+    Returns:
+        Número de filas guardadas
+    """
+    stats = compute_daily_stats(start, end)
+    FunnelDailyStat.objects.filter(day__range=(start, end)).delete()
+    FunnelStatDay.objects.filter(day__range=(start, end)).delete()
+    FunnelDailyStat.objects.bulk_create(stats, batch_size=500)
+    FunnelStatDay.objects.bulk_create([
+        FunnelStatDay(day=start + timedelta(days=i)) for i in range((end - start).days + 1)
+    ])
+    return len(stats)
+
+
+@transaction.atomic
+def store_missing_days(days):
+    """
+    Consolida los días cerrados `days` (ordenados) que aún no están en
+    FunnelStatDay. A diferencia de refresh_daily_stats no borra nada: los días
+    ya guardados se dejan como están y las filas que otra petición haya
+    insertado mientras tanto se ignoran.
+    """
+    wanted = set(days)
+    stats = [stat for stat in compute_daily_stats(days[0], days[-1]) if stat.day in wanted]
+    FunnelDailyStat.objects.bulk_create(stats, batch_size=500, ignore_conflicts=True)
+    FunnelStatDay.objects.bulk_create([FunnelStatDay(day=day) for day in days], ignore_conflicts=True)
+
+
+def daily_stats(start, end, postings=None):
+    """
+    Estadísticas diarias del rango: días cerrados desde FunnelDailyStat
+    (consolidando antes los que falten) y el día en curso en vivo.
+    """
+    today = timezone.localdate()
+    closed_end = min(end, today - timedelta(days=1))
+    stats = []
+
+    if start <= closed_end:
+        done = set(FunnelStatDay.objects.filter(day__range=(start, closed_end)).values_list('day', flat=True))
+        missing = [
+            day for day in (start + timedelta(days=i) for i in range((closed_end - start).days + 1))
+            if day not in done
+        ]
+        if missing:
+            store_missing_days(missing)
+        stored = FunnelDailyStat.objects.filter(day__range=(start, closed_end))
+        if postings is not None:
+            stored = stored.filter(job_posting__in=postings)
+        stats.extend(stored)
+
+    if end >= today:
+        stats.extend(compute_daily_stats(max(start, today), end, postings))
+    return stats
+
+
+def _percentile(histogram, total, q):
+    """Percentil aproximado: interpolación lineal dentro del tramo (horas)."""
+    target = q * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        if count and seen + count >= target:
+            lower = DURATION_BUCKETS[i - 1] if i else 0
+            if i == len(DURATION_BUCKETS):
+                return round(lower / HOUR, 1)
+            upper = DURATION_BUCKETS[i]
+            return round((lower + (upper - lower) * (target - seen) / count) / HOUR, 1)
+        seen += count
+    return None
+
+
+def _duration_summary(histogram, seconds):
+    total = sum(histogram)
+    if not total:
+        return {'count': 0, 'avg_hours': None, 'median_hours': None, 'p90_hours': None}
+    return {
+        'count': total,
+        'avg_hours': round(seconds / total / HOUR, 1),
+        'median_hours': _percentile(histogram, total, 0.5),
+        'p90_hours': _percentile(histogram, total, 0.9),
+    }
+
+
+class _Funnel:
+    """Acumulador de las transiciones de un grupo."""
+
+    def __init__(self):
+        self.applications = 0
+        self.entered = Counter()
+        self.exits = defaultdict(Counter)
+        self.stage_histograms = defaultdict(_empty_histogram)
+        self.stage_seconds = Counter()
+        self.hire_histogram = _empty_histogram()
+        self.hire_seconds = 0
+
+    def add(self, stat):
+        self.entered[stat.to_stage] += stat.count
+        if not stat.from_stage:
+            self.applications += stat.count
+            return
+        self.exits[stat.from_stage][stat.to_stage] += stat.count
+        self.stage_seconds[stat.from_stage] += stat.stage_seconds
+        histogram = self.stage_histograms[stat.from_stage]
+        for i, count in enumerate(stat.stage_histogram):
+            histogram[i] += count
+        if stat.to_stage == 'HIRED':
+            self.hire_seconds += stat.cycle_seconds
+            for i, count in enumerate(stat.cycle_histogram):
+                self.hire_histogram[i] += count
+
+    def as_dict(self):
+        stages = []
+        for stage, label in Candidate.STAGE_CHOICES:
+            exits = self.exits.get(stage, Counter())
+            if not self.entered[stage] and not exits:
+                continue
+            advanced = sum(
+                count for target, count in exits.items()
+                if stage in FUNNEL_STAGES and target in FUNNEL_STAGES
+                and FUNNEL_STAGES.index(target) > FUNNEL_STAGES.index(stage)
+            )
+            stages.append({
+                'stage': stage,
+                'label': label,
+                'entered': self.entered[stage],
+                'exited': sum(exits.values()),
+                'exits': dict(exits),
+                'conversion_rate': round(advanced / self.entered[stage], 4) if self.entered[stage] else None,
+                'time_in_stage': _duration_summary(
+                    self.stage_histograms.get(stage, _empty_histogram()), self.stage_seconds[stage]
+                ),
+            })
+        hired = self.entered['HIRED']
+        return {
+            'applications': self.applications,
+            'hired': hired,
+            'hire_rate': round(hired / self.applications, 4) if self.applications else None,
+            'time_to_hire': _duration_summary(self.hire_histogram, self.hire_seconds),
+            'stages': stages,
+        }
+
+
+def funnel_report(start, end, group_by='job_posting', postings=None):
+    """
+    Embudo de reclutamiento del rango [start, end].
+
+    Args:
+        start, end: Fechas locales (inclusive)
+        group_by: 'job_posting', 'position' o 'department'
+        postings: QuerySet de JobPosting para filtrar (opcional)
+
+    Returns:
+        Dict: {start, end, group_by, totals, groups: [{id, name, applications,
+        hired, hire_rate, time_to_hire, stages: [...]}]}
+    """
+    if group_by not in GROUP_FIELDS:
+        raise ValueError(f"group_by inválido: {group_by}")
+    stats = daily_stats(start, end, postings)
+
+    id_field, name_field = GROUP_FIELDS[group_by]
+    group_of = {
+        pk: (group_id, name)
+        for pk, group_id, name in JobPosting.objects.filter(
+            pk__in={s.job_posting_id for s in stats}
+        ).values_list('id', id_field, name_field)
+    }
+
+    totals = _Funnel()
+    groups = defaultdict(_Funnel)
+    for stat in stats:
+        totals.add(stat)
+        groups[group_of.get(stat.job_posting_id, (None, None))].add(stat)
+
+    results = []
+    for (group_id, name), funnel in groups.items():
+        results.append({'id': group_id, 'name': name or 'Sin asignar', **funnel.as_dict()})
+    results.sort(key=lambda g: (-g['applications'], g['name']))
+
+    return {
+        'start': start,
+        'end': end,
+        'group_by': group_by,
+        'totals': totals.as_dict(),
+        'groups': results,
+    }
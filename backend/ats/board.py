@@ -0,0 +1,106 @@
+"""
+Tablero (kanban) de candidatos de una vacante.
+
+En lugar de un listado paginado por etapa (una consulta de página y un
+COUNT(*) por columna), el tablero se arma con dos consultas fijas:
+
+1. Conteo por etapa con un único GROUP BY.
+2. Los primeros K candidatos de cada etapa con
+   ROW_NUMBER() OVER (PARTITION BY stage ORDER BY created_at DESC, id DESC).
+
+Cada columna trae su propio cursor para "cargar más": es la clave
+(created_at, id) del último candidato entregado, así la siguiente página es
+un rango sobre el índice (job_posting, stage) sin OFFSET y no se desfasa si
+entran candidatos nuevos mientras el reclutador navega.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Candidate
+
+# Candidatos por columna si no se indica `limit`
+DEFAULT_COLUMN_SIZE = 20
+MAX_COLUMN_SIZE = 100
+
+BOARD_ORDERING = (F('created_at').desc(), F('id').desc())
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(candidate):
+    """Cursor opaco con la clave de orden (created_at, id) del candidato."""
+    key = json.dumps([candidate.created_at.isoformat(), candidate.pk])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Cursor inválido.")
+
+
+def _board_queryset(job_posting):
+    # Los campos que usa CandidateListSerializer, sin N+1 en phone_area_code
+    return Candidate.objects.filter(job_posting=job_posting).select_related('job_posting', 'phone_area_code')
+
+
+def _column(stage, count, candidates, limit):
+    """Columna del tablero; `candidates` trae limit + 1 filas para saber si hay más."""
+    page = candidates[:limit]
+    return {
+        'stage': stage,
+        'label': dict(Candidate.STAGE_CHOICES)[stage],
+        'count': count,
+        'candidates': page,
+        'next_cursor': encode_cursor(page[-1]) if len(candidates) > limit else None,
+    }
+
+
+def pipeline_board(job_posting, limit=DEFAULT_COLUMN_SIZE):
+    """
+    Tablero completo: todas las etapas de STAGE_CHOICES, vacías incluidas.
+
+    Returns:
+        Lista de columnas {stage, label, count, candidates, next_cursor}
+    """
+    counts = dict(
+        Candidate.objects.filter(job_posting=job_posting).order_by()
+        .values_list('stage').annotate(total=Count('id'))
+    )
+    by_stage = {stage: [] for stage, _ in Candidate.STAGE_CHOICES}
+    if counts:
+        ranked = _board_queryset(job_posting).annotate(
+            position=Window(RowNumber(), partition_by=[F('stage')], order_by=BOARD_ORDERING)
+        ).filter(position__lte=limit + 1).order_by('stage', 'position')
+        for candidate in ranked:
+            by_stage[candidate.stage].append(candidate)
+
+    return [
+        _column(stage, counts.get(stage, 0), by_stage[stage], limit)
+        for stage, _ in Candidate.STAGE_CHOICES
+    ]
+
+
+def stage_page(job_posting, stage, cursor=None, limit=DEFAULT_COLUMN_SIZE):
+    """
+    Siguiente página de una columna a partir de su cursor (keyset).
+
+    Returns:
+        Columna {stage, label, count, candidates, next_cursor}; count es None
+        porque el conteo ya lo trajo el tablero.
+    """
+    queryset = _board_queryset(job_posting).filter(stage=stage).order_by(*BOARD_ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return _column(stage, None, list(queryset[:limit + 1]), limit)
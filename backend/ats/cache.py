@@ -0,0 +1,83 @@
+"""
+Caché de respuestas del portal público de vacantes.
+
+La clave incluye una versión global (que se incrementa cuando cambia una
+vacante o la posición que describe) y la fecha del día, de modo que el filtro
+de fecha de cierre se reevalúa al cambiar de día sin invalidar nada a mano.
+
+Con el backend de caché en memoria local cada worker tiene su propia copia;
+en producción se recomienda CACHE_URL apuntando a Redis/Memcached para que la
+invalidación sea compartida.
+"""
+
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'ats:public-jobs:version'
+
+
+def public_today():
+    """Fecha usada por el filtro de vacantes activas (misma referencia que la vista)."""
+    return timezone.now().date()
+
+
+def _seconds_until_tomorrow():
+    now = timezone.now()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), time.min, tzinfo=now.tzinfo)
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_public_jobs():
+    """Invalida todas las respuestas cacheadas del portal público."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # La clave no existía (o expiró): cualquier versión nueva sirve
+        cache.set(VERSION_KEY, get_version() + 1, None)
+
+
+def _cache_key(request):
+    raw = f"{get_version()}:{public_today().isoformat()}:{request.get_full_path()}"
+    return 'ats:public-jobs:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cached_public_response(request, build_response):
+    """
+    Devuelve la respuesta cacheada para esta URL o la construye con build_response().
+    Agrega ETag y Cache-Control para que navegadores y proxies también cacheen.
+    """
+    key = _cache_key(request)
+    etag = f'"{key.rsplit(":", 1)[1]}"'
+    max_age = min(settings.ATS_PUBLIC_JOBS_MAX_AGE, _seconds_until_tomorrow())
+
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        data = cache.get(key)
+        if data is None:
+            response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            timeout = min(settings.ATS_PUBLIC_JOBS_CACHE_TIMEOUT, _seconds_until_tomorrow())
+            cache.set(key, data, timeout)
+        response = Response(data)
+
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
@@ -0,0 +1,246 @@
+"""
+Extracción de texto de CVs e índice de búsqueda de texto completo.
+
+El texto se extrae con herramientas locales (pdftotext de poppler para PDF,
+el XML del paquete para DOCX), se normaliza sin acentos y en minúsculas
+(core.db_utils.remove_accents) y se guarda en CVIndexEntry. El motor mantiene
+el índice invertido (ver la migración ats 0014):
+
+- SQLite: tabla FTS5 `ats_cv_fts`, ordenada por bm25()
+- PostgreSQL: columna `search_vector` (tsvector 'spanish') con índice GIN, ordenada por ts_rank()
+- Otros motores: LIKE por término, sin ranking
+
+El indexado corre en segundo plano (`manage.py index_cvs`): cada lote busca
+candidatos y personas cuyo archivo no coincide con CVIndexEntry.source, así
+no hace falta marcar nada al guardar un CV. Las postulaciones públicas ya
+traen el texto extraído y se indexan al promoverse (ats.intake).
+"""
+
+import logging
+import re
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from xml.etree import ElementTree
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from core.db_utils import remove_accents
+from .models import Candidate, CVIndexEntry
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo para las herramientas externas (segundos)
+TOOL_TIMEOUT = 60
+
+# Términos de búsqueda considerados (el resto se ignora)
+MAX_QUERY_TERMS = 8
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+# --- EXTRACCIÓN ---
+
+def extract_pdf_text(path):
+    """Texto plano del PDF con pdftotext; cadena vacía si no se puede extraer."""
+    if not shutil.which('pdftotext'):
+        return ''
+    try:
+        result = subprocess.run(
+            ['pdftotext', '-layout', '-enc', 'UTF-8', str(path), '-'],
+            capture_output=True, timeout=TOOL_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        return ''
+    if result.returncode != 0:
+        return ''
+    return result.stdout.decode('utf-8', errors='replace').strip()
+
+
+def extract_docx_text(path):
+    """Texto de los párrafos de word/document.xml; cadena vacía si no es un DOCX válido."""
+    try:
+        with zipfile.ZipFile(path) as package:
+            root = ElementTree.fromstring(package.read('word/document.xml'))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return ''
+    paragraphs = (
+        ''.join(node.text or '' for node in paragraph.iter(f'{WORD_NS}t'))
+        for paragraph in root.iter(f'{WORD_NS}p')
+    )
+    return '\n'.join(p for p in paragraphs if p).strip()
+
+
+EXTRACTORS = {'.pdf': extract_pdf_text, '.docx': extract_docx_text}
+
+
+def extract_cv_text(path, name=None):
+    """Texto del CV según la extensión de `name` (o de `path`); PDF por defecto."""
+    suffix = Path(name or str(path)).suffix.lower()
+    return EXTRACTORS.get(suffix, extract_pdf_text)(path)
+
+
+def normalize_cv_text(text):
+    """Sin acentos, en minúsculas y con los espacios colapsados."""
+    return ' '.join(remove_accents(text or '').lower().split())
+
+
+@contextmanager
+def _local_path(field_file):
+    """Ruta en disco del archivo; si el almacenamiento no es local, una copia temporal."""
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        path = None
+    if path:
+        yield path
+        return
+    suffix = Path(field_file.name).suffix
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp, field_file.open('rb') as source:
+        shutil.copyfileobj(source, tmp)
+        tmp.flush()
+        yield tmp.name
+
+
+# --- INDEXADO ---
+
+def index_cv_text(owner, text):
+    """
+    Guarda (o reemplaza) la entrada del índice de un Candidate o Person con
+    el texto ya extraído. Devuelve la CVIndexEntry.
+    """
+    key = 'candidate' if isinstance(owner, Candidate) else 'person'
+    normalized = normalize_cv_text(text)
+    entry, _ = CVIndexEntry.objects.update_or_create(
+        **{key: owner},
+        defaults={
+            'source': owner.cv_file.name,
+            'text': normalized,
+            'status': 'INDEXED' if normalized else 'EMPTY',
+        }
+    )
+    return entry
+
+
+def stale_cvs(model):
+    """Registros de `model` (Candidate o Person) con CV sin indexar o cuyo archivo cambió."""
+    key = 'candidate' if model is Candidate else 'person'
+    indexed = CVIndexEntry.objects.filter(**{key: OuterRef('pk'), 'source': OuterRef('cv_file')})
+    return model.objects.order_by().exclude(cv_file='').exclude(cv_file__isnull=True).filter(~Exists(indexed))
+
+
+def index_pending_cvs(batch_size=50):
+    """
+    Extrae e indexa un lote de CVs pendientes (candidatos primero).
+
+    Returns:
+        Dict: {indexed, empty, failed}
+    """
+    from core.models import Person
+
+    result = {'indexed': 0, 'empty': 0, 'failed': 0}
+    remaining = batch_size
+    for model in (Candidate, Person):
+        if remaining <= 0:
+            break
+        batch = list(stale_cvs(model)[:remaining])
+        remaining -= len(batch)
+        for owner in batch:
+            try:
+                with _local_path(owner.cv_file) as path:
+                    text = extract_cv_text(path, owner.cv_file.name)
+            except Exception:
+                # Archivo ausente o ilegible (zipfile también lanza NotImplementedError
+                # o RuntimeError): se registra vacío para no reintentar hasta que se
+                # suba otro archivo, y el lote sigue
+                logger.warning("Could not read CV %s", owner.cv_file.name, exc_info=True)
+                index_cv_text(owner, '')
+                result['failed'] += 1
+                continue
+            if model is Candidate and text and not owner.cv_text:
+                Candidate.objects.filter(pk=owner.pk).update(cv_text=text)
+            entry = index_cv_text(owner, text)
+            result['indexed' if entry.status == 'INDEXED' else 'empty'] += 1
+    return result
+
+
+# --- BÚSQUEDA ---
+
+def query_terms(query):
+    """Términos normalizados de la búsqueda (solo letras y dígitos, sin operadores)."""
+    return re.findall(r'\w+', normalize_cv_text(query))[:MAX_QUERY_TERMS]
+
+
+def search_cvs(query, kind='candidate', stage=None, job_posting=None, limit=20, offset=0):
+    """
+    Búsqueda por relevancia en los CVs indexados.
+
+    Todos los términos deben aparecer (como prefijo: "desarroll" encuentra
+    "desarrollador").
+
+    Args:
+        query: Texto libre
+        kind: 'candidate' o 'person'
+        stage, job_posting: Filtros de candidatos (ej. stage='POOL' para el banco de elegibles)
+        limit, offset: Ventana de resultados
+
+    Returns:
+        Lista de (id del candidato o persona, puntaje), de mayor a menor relevancia
+    """
+    if kind not in ('candidate', 'person'):
+        raise ValueError(f"kind inválido: {kind}")
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    owner = f'e.{kind}_id'
+    joins, where, params = '', [f'{owner} IS NOT NULL'], []
+    if kind == 'candidate' and (stage or job_posting):
+        joins = 'JOIN ats_candidate c ON c.id = e.candidate_id'
+        if stage:
+            where.append('c.stage = %s')
+            params.append(stage)
+        if job_posting:
+            where.append('c.job_posting_id = %s')
+            params.append(job_posting)
+
+    if connection.vendor == 'sqlite':
+        sql = f"""
+            SELECT {owner}, -bm25(ats_cv_fts) AS score
+            FROM ats_cv_fts JOIN ats_cvindexentry e ON e.id = ats_cv_fts.rowid {joins}
+            WHERE ats_cv_fts MATCH %s AND {' AND '.join(where)}
+            ORDER BY bm25(ats_cv_fts) LIMIT %s OFFSET %s
+        """
+        params = [' '.join(f'"{t}"*' for t in terms), *params]
+    elif connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT {owner}, ts_rank(e.search_vector, q) AS score
+            FROM ats_cvindexentry e {joins}, to_tsquery('spanish', %s) q
+            WHERE e.search_vector @@ q AND {' AND '.join(where)}
+            ORDER BY score DESC LIMIT %s OFFSET %s
+        """
+        params = [' & '.join(f'{t}:*' for t in terms), *params]
+    else:
+        sql = f"""
+            SELECT {owner}, 0 AS score FROM ats_cvindexentry e {joins}
+            WHERE {' AND '.join(where + ['e.text LIKE %s'] * len(terms))}
+            ORDER BY e.id LIMIT %s OFFSET %s
+        """
+        params = [*params, *(f'%{t}%' for t in terms)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit, offset])
+        return [(pk, float(score)) for pk, score in cursor.fetchall()]
+
+
+def snippet(text, terms, width=160):
+    """Fragmento del texto normalizado alrededor del primer término encontrado."""
+    positions = [text.find(t) for t in terms if t in text]
+    if not positions:
+        return text[:width]
+    start = max(min(positions) - width // 4, 0)
+    return ('…' if start else '') + text[start:start + width] + ('…' if start + width < len(text) else '')
@@ -0,0 +1,97 @@
+"""
+Detección de duplicados para las postulaciones públicas.
+
+Una postulación se rechaza si su correo, cédula o teléfono ya pertenecen a una
+persona registrada, o si el correo ya se postuló a la misma vacante. En lugar
+de una consulta EXISTS por tabla, find_conflicts() arma un único UNION ALL
+sobre las tablas de identidad: cada rama devuelve el nombre del conflicto y se
+resuelve con un índice (ver los índices de PersonEmail, NationalId,
+PersonPhone y Candidate).
+
+Las claves se normalizan antes de consultar: correo en minúsculas y sin
+espacios, cédula como (prefijo, número sin puntos) y teléfono solo con dígitos.
+"""
+
+import re
+
+from django.db.models import CharField, Value
+from django.db.models.functions import Lower
+
+NATIONAL_ID_RE = re.compile(r'^([VEJGP])-?(\d+)$')
+
+# Orden de prioridad: si el correo es de un empleado no se dice "ya te postulaste"
+CONFLICT_ORDER = ('email', 'national_id', 'phone', 'applied')
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def normalize_phone(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def parse_national_id(value):
+    """
+    Separa "V-12.345.678", "v12345678" o "12345678" en (prefijo, número).
+
+    Returns:
+        Tupla (document_type, number), o None si el formato no es reconocible.
+        Sin prefijo se asume 'V'.
+    """
+    cleaned = re.sub(r'[\s.]', '', str(value or '')).upper()
+    if cleaned.isdigit():
+        cleaned = f'V{cleaned}'
+    match = NATIONAL_ID_RE.match(cleaned)
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _probe(queryset, name):
+    # order_by(): el ordering por defecto (Candidate) no se admite dentro de un UNION
+    return queryset.order_by().annotate(
+        conflict=Value(name, output_field=CharField())
+    ).values_list('conflict', flat=True)
+
+
+def find_conflicts(email=None, national_id=None, phone=None, job_posting=None):
+    """
+    Busca en una sola consulta qué datos de la postulación ya existen.
+
+    Args:
+        email: Correo normalizado (normalize_email)
+        national_id: Tupla (document_type, number) de parse_national_id
+        phone: Tupla (PhoneCarrierCode, subscriber_number normalizado)
+        job_posting: Vacante a la que se postula (duplicado por correo)
+
+    Returns:
+        Lista de conflictos en orden de CONFLICT_ORDER
+        ('email', 'national_id', 'phone', 'applied').
+    """
+    from core.models import NationalId, PersonEmail, PersonPhone
+    from .models import Candidate
+
+    probes = []
+    if email:
+        probes.append(_probe(
+            PersonEmail.objects.alias(email_key=Lower('email_address')).filter(email_key=email), 'email'
+        ))
+        if job_posting:
+            probes.append(_probe(
+                Candidate.objects.alias(email_key=Lower('email')).filter(job_posting=job_posting, email_key=email),
+                'applied'
+            ))
+    if national_id:
+        document_type, number = national_id
+        probes.append(_probe(NationalId.objects.filter(document_type=document_type, number=number), 'national_id'))
+    if phone:
+        carrier_code, subscriber_number = phone
+        probes.append(_probe(
+            PersonPhone.objects.filter(carrier_code=carrier_code, subscriber_number=subscriber_number), 'phone'
+        ))
+
+    if not probes:
+        return []
+    found = set(probes[0].union(*probes[1:], all=True))
+    return [name for name in CONFLICT_ORDER if name in found]
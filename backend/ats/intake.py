@@ -0,0 +1,238 @@
+"""
+Recepción asíncrona de postulaciones públicas.
+
+La petición solo valida el formato, mueve los archivos subidos al directorio
+de spool (ATS_APPLICATION_SPOOL_ROOT/<id>/) y guarda una ApplicationIntake:
+no hay consultas de duplicados, ni Pillow, ni copias al almacenamiento final.
+
+El worker (`manage.py process_applications`) toma lotes pendientes y por cada
+postulación:
+1. Escanea los archivos con el hook ATS_APPLICATION_VIRUS_SCANNER
+2. Valida todo con CandidateCreateSerializer (duplicados, foto, educación)
+3. Extrae el texto del CV, crea el Candidate y lo indexa (ats.cv_search)
+4. Genera la miniatura de la primera página del CV
+
+Las herramientas externas (pdftotext/pdftoppm de poppler, clamdscan) son
+opcionales: si no están instaladas el paso se omite.
+"""
+
+import logging
+import shutil
+import subprocess
+from contextlib import ExitStack
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.images import RENDITIONS, RENDITION_FORMAT, RENDITION_QUALITY, rendition_name
+from .cv_search import TOOL_TIMEOUT, extract_cv_text, index_cv_text
+from .models import ApplicationIntake
+from .serializers import CandidateCreateSerializer
+
+logger = logging.getLogger(__name__)
+
+# Campo del formulario -> nombre del archivo en el spool
+SPOOLED_FILES = {'cv_file': 'cv', 'avatar': 'avatar'}
+
+
+def spool_dir(intake):
+    return Path(settings.ATS_APPLICATION_SPOOL_ROOT) / str(intake.pk)
+
+
+def _spool_upload(upload, path):
+    """Mueve el archivo temporal del parser multipart (rename) o lo copia si estaba en memoria."""
+    if hasattr(upload, 'temporary_file_path'):
+        shutil.move(upload.temporary_file_path(), path)
+        return
+    with open(path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+
+
+def receive_application(job_posting, payload, files, client_ip=None):
+    """
+    Guarda una postulación para procesarla después.
+
+    Args:
+        job_posting: Vacante (ya verificada como publicada)
+        payload: Campos de texto del formulario (serializable a JSON)
+        files: Dict {'cv_file': UploadedFile, 'avatar': UploadedFile | None}
+
+    Returns:
+        ApplicationIntake en estado PENDING
+    """
+    intake = ApplicationIntake(
+        job_posting=job_posting,
+        payload=payload,
+        cv_name=files['cv_file'].name,
+        avatar_name=files['avatar'].name if files.get('avatar') else '',
+        client_ip=client_ip,
+    )
+    directory = spool_dir(intake)
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        for field, filename in SPOOLED_FILES.items():
+            if files.get(field):
+                _spool_upload(files[field], directory / filename)
+        intake.save(force_insert=True)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return intake
+
+
+# --- HOOKS LOCALES ---
+
+def clamav_scan(path):
+    """Hook de antivirus con clamdscan. Devuelve el motivo si el archivo está infectado."""
+    if not shutil.which('clamdscan'):
+        raise RuntimeError("clamdscan no está instalado")
+    result = subprocess.run(
+        ['clamdscan', '--fdpass', '--no-summary', str(path)],
+        capture_output=True, text=True, timeout=TOOL_TIMEOUT
+    )
+    if result.returncode == 1:
+        return result.stdout.strip().rsplit(':', 1)[-1].strip() or 'Archivo infectado'
+    if result.returncode != 0:
+        # Error del escáner: se reintenta más tarde en lugar de aceptar el archivo
+        raise RuntimeError(result.stderr.strip() or f"clamdscan terminó con código {result.returncode}")
+    return None
+
+
+def scan_file(path):
+    """Motivo de rechazo según ATS_APPLICATION_VIRUS_SCANNER, o None si está limpio (o sin escáner)."""
+    scanner = settings.ATS_APPLICATION_VIRUS_SCANNER
+    if not scanner:
+        return None
+    return import_string(scanner)(path)
+
+
+def cv_thumbnail(path):
+    """Primera página del PDF como miniatura (bytes WebP), o None sin pdftoppm."""
+    if not shutil.which('pdftoppm'):
+        return None
+    from PIL import Image
+
+    try:
+        result = subprocess.run(
+            ['pdftoppm', '-png', '-f', '1', '-l', '1', '-scale-to', str(RENDITIONS['medium']), str(path), '-'],
+            capture_output=True, timeout=TOOL_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    with Image.open(BytesIO(result.stdout)) as img:
+        img.thumbnail((RENDITIONS['thumb'], RENDITIONS['thumb']), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        img.convert('RGB').save(buffer, RENDITION_FORMAT, quality=RENDITION_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+# --- WORKER ---
+
+def _reject(intake, errors):
+    intake.status = 'REJECTED'
+    intake.errors = errors
+    intake.processed_at = timezone.now()
+    intake.save(update_fields=['status', 'errors', 'processed_at', 'attempts'])
+
+
+def process_application(intake):
+    """
+    Convierte una ApplicationIntake en Candidate (o la rechaza con sus errores).
+    Los errores inesperados se propagan para que el llamador reintente.
+    """
+    directory = spool_dir(intake)
+    paths = {field: directory / filename for field, filename in SPOOLED_FILES.items()}
+    names = {'cv_file': intake.cv_name, 'avatar': intake.avatar_name}
+
+    with ExitStack() as stack:
+        files = {}
+        for field, path in paths.items():
+            if not names[field]:
+                continue
+            reason = scan_file(path)
+            if reason:
+                _reject(intake, {field: [f"El archivo fue rechazado por el antivirus: {reason}"]})
+                return intake
+            files[field] = File(stack.enter_context(open(path, 'rb')), name=names[field])
+
+        serializer = CandidateCreateSerializer(data={**intake.payload, **files})
+        if not serializer.is_valid():
+            _reject(intake, serializer.errors)
+            return intake
+        if serializer.validated_data['job_posting'].status != 'PUBLISHED':
+            _reject(intake, {'job_posting': ['Esta vacante no está disponible para postulaciones.']})
+            return intake
+
+        cv_text = extract_cv_text(paths['cv_file'], names['cv_file'])
+        with transaction.atomic():
+            candidate = serializer.save(cv_text=cv_text)
+            index_cv_text(candidate, cv_text)
+            intake.status = 'ACCEPTED'
+            intake.errors = {}
+            intake.candidate = candidate
+            intake.processed_at = timezone.now()
+            intake.save(update_fields=['status', 'errors', 'candidate', 'processed_at', 'attempts'])
+
+    thumbnail = cv_thumbnail(paths['cv_file'])
+    if thumbnail:
+        storage = candidate.cv_file.storage
+        storage.save(rendition_name(candidate.cv_file.name, 'thumb'), ContentFile(thumbnail))
+    return intake
+
+
+def _backoff(attempts):
+    return timedelta(minutes=2 ** attempts)
+
+
+def process_pending_applications(batch_size=20):
+    """
+    Procesa un lote de postulaciones pendientes.
+
+    Returns:
+        Dict: {accepted, rejected, retried, failed}
+    """
+    max_attempts = settings.ATS_APPLICATION_MAX_ATTEMPTS
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Mismo esquema que ats.utils.deliver_pending_emails: skip_locked + reserva temporal
+        batch = list(
+            ApplicationIntake.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        ApplicationIntake.objects.filter(pk__in=[i.pk for i in batch]).update(
+            next_attempt_at=now + timedelta(minutes=10)
+        )
+
+    result = {'accepted': 0, 'rejected': 0, 'retried': 0, 'failed': 0}
+    for intake in batch:
+        intake.attempts += 1
+        try:
+            process_application(intake)
+        except Exception:
+            logger.exception("Error processing application %s", intake.pk)
+            if intake.attempts >= max_attempts:
+                intake.status = 'FAILED'
+                intake.processed_at = timezone.now()
+                result['failed'] += 1
+            else:
+                intake.next_attempt_at = timezone.now() + _backoff(intake.attempts)
+                result['retried'] += 1
+            intake.errors = {'detail': ['No se pudo procesar la postulación.']}
+            intake.save(update_fields=['status', 'errors', 'attempts', 'next_attempt_at', 'processed_at'])
+            continue
+
+        result['accepted' if intake.status == 'ACCEPTED' else 'rejected'] += 1
+        shutil.rmtree(spool_dir(intake), ignore_errors=True)
+    return result
@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from ats.cv_search import index_pending_cvs
+
+
+class Command(BaseCommand):
+    help = (
+        'Extracts text from new or replaced CVs (candidates and persons, PDF/DOCX) '
+        'and adds it to the full-text search index'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new CVs')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between polls when idle (--loop)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            result = index_pending_cvs(batch_size=batch_size)
+            processed = sum(result.values())
+            if processed:
+                self.stdout.write(
+                    f"indexed={result['indexed']} empty={result['empty']} failed={result['failed']}"
+                )
+            if not options['loop']:
+                break
+            # Si el lote vino lleno, hay más pendientes: seguir sin esperar
+            if processed < batch_size:
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from ats.intake import process_pending_applications
+
+
+class Command(BaseCommand):
+    help = 'Validates, scans and promotes queued public applications into candidates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll the intake queue')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls when idle (--loop)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            result = process_pending_applications(batch_size=batch_size)
+            processed = sum(result.values())
+            if processed:
+                self.stdout.write(
+                    f"accepted={result['accepted']} rejected={result['rejected']} "
+                    f"retried={result['retried']} failed={result['failed']}"
+                )
+            if not options['loop']:
+                break
+            # Si el lote vino lleno, hay más pendientes: seguir sin esperar
+            if processed < batch_size:
+                time.sleep(options['interval'])
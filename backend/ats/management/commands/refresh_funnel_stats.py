@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ats.analytics import refresh_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the pre-aggregated recruitment funnel table (FunnelDailyStat) for closed days. '
+        'Run nightly; by default it refreshes yesterday and the day before.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Closed days to refresh, ending yesterday (default: 2)')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD); overrides --days')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD, default: yesterday)')
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        end = min(options['end'] or yesterday, yesterday)
+        start = options['start'] or end - timedelta(days=options['days'] - 1)
+        if start > end:
+            raise CommandError('Nothing to refresh: the range has no closed days.')
+
+        rows = refresh_daily_stats(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {start} .. {end}: {rows} rows'))
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from ats.utils import deliver_pending_emails
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued ATS emails in batches, reusing one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll the outbox')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds between polls when idle (--loop)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            result = deliver_pending_emails(batch_size=batch_size)
+            processed = sum(result.values())
+            if processed:
+                self.stdout.write(
+                    f"sent={result['sent']} retried={result['retried']} failed={result['failed']}"
+                )
+            if not options['loop']:
+                break
+            # Si el lote vino lleno, hay más pendientes: seguir sin esperar
+            if processed < batch_size:
+                time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0008_alter_candidate_phone_area_code_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Destinatario')),
+                ('template', models.CharField(default='status_change', help_text='Nombre de la plantilla en ats/templates/ats/emails/', max_length=50, verbose_name='Plantilla')),
+                ('context', models.JSONField(blank=True, default=dict, help_text='Datos para renderizar la plantilla al momento del envío', verbose_name='Contexto')),
+                ('subject', models.CharField(max_length=255, verbose_name='Asunto')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('SENT', 'Enviado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo Intento')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Último Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado el')),
+                ('candidate', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='ats.candidate', verbose_name='Candidato')),
+            ],
+            options={
+                'verbose_name': 'Correo Saliente',
+                'verbose_name_plural': 'Correos Salientes',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='ats_outbox_pending_idx')],
+            },
+        ),
+    ]
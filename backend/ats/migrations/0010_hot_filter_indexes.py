@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0009_outboundemail'),
+        ('core', '0014_hot_filter_indexes'),
+        ('organization', '0009_historicalposition_is_manager_position_is_manager'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['job_posting', 'stage'], name='ats_candidate_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['status', 'published_date', 'closing_date'], name='ats_posting_public_idx'),
+        ),
+    ]
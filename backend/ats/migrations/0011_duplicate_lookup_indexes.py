@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:16
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0010_hot_filter_indexes'),
+        ('core', '0015_duplicate_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(models.F('job_posting'), django.db.models.functions.text.Lower('email'), name='ats_candidate_email_idx'),
+        ),
+    ]
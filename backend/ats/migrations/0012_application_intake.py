@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:18
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0011_duplicate_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='cv_text',
+            field=models.TextField(blank=True, default='', help_text='Extraído del PDF al procesar la postulación (ats.intake)', verbose_name='Texto del CV'),
+        ),
+        migrations.AddField(
+            model_name='historicalcandidate',
+            name='cv_text',
+            field=models.TextField(blank=True, default='', help_text='Extraído del PDF al procesar la postulación (ats.intake)', verbose_name='Texto del CV'),
+        ),
+        migrations.CreateModel(
+            name='ApplicationIntake',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('payload', models.JSONField(default=dict, help_text='Campos de texto tal como se recibieron (sin archivos)', verbose_name='Datos del Formulario')),
+                ('cv_name', models.CharField(max_length=255, verbose_name='Nombre del CV')),
+                ('avatar_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Nombre de la Foto')),
+                ('client_ip', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP de Origen')),
+                ('status', models.CharField(choices=[('PENDING', 'Recibida'), ('ACCEPTED', 'Aceptada'), ('REJECTED', 'Rechazada'), ('FAILED', 'Error de Procesamiento')], default='PENDING', max_length=10, verbose_name='Estado')),
+                ('errors', models.JSONField(blank=True, default=dict, help_text='Errores de validación por campo, visibles para el postulante', verbose_name='Errores')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo Intento')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Procesada el')),
+                ('candidate', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='intake', to='ats.candidate', verbose_name='Candidato')),
+                ('job_posting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intakes', to='ats.jobposting', verbose_name='Vacante')),
+            ],
+            options={
+                'verbose_name': 'Postulación Recibida',
+                'verbose_name_plural': 'Postulaciones Recibidas',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='ats_intake_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+STAGE_RE = r'[Cc]ambio (?:masivo )?a etapa ([A-Z]+)'
+
+
+def backfill_log_stage(apps, schema_editor):
+    """
+    Completa CandidateLog.stage en los registros existentes a partir del texto
+    de details ("Cambio a etapa X", "Cambio masivo a etapa X") y de la acción HIRED.
+    """
+    import re
+
+    CandidateLog = apps.get_model('ats', 'CandidateLog')
+    CandidateLog.objects.filter(action='HIRED').update(stage='HIRED')
+
+    pattern = re.compile(STAGE_RE)
+    by_stage = {}
+    for pk, details in CandidateLog.objects.filter(action='STAGE_CHANGE').values_list('pk', 'details').iterator():
+        match = pattern.search(details or '')
+        if match:
+            by_stage.setdefault(match.group(1), []).append(pk)
+    for stage, pks in by_stage.items():
+        for i in range(0, len(pks), 500):
+            CandidateLog.objects.filter(pk__in=pks[i:i + 500]).update(stage=stage)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0012_application_intake'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunnelDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('from_stage', models.CharField(blank=True, default='', max_length=10, verbose_name='Etapa de Origen')),
+                ('to_stage', models.CharField(choices=[('NEW', 'Nuevo'), ('REV', 'En Revisión'), ('INT', 'Entrevista/Pruebas'), ('OFF', 'Oferta Enviada'), ('HIRED', 'Contratado'), ('REJ', 'Rechazado'), ('POOL', 'Banco de Elegibles')], max_length=10, verbose_name='Etapa de Destino')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Transiciones')),
+                ('stage_seconds', models.BigIntegerField(default=0)),
+                ('stage_histogram', models.JSONField(default=list)),
+                ('cycle_seconds', models.BigIntegerField(default=0)),
+                ('cycle_histogram', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Estadística Diaria del Embudo',
+                'verbose_name_plural': 'Estadísticas Diarias del Embudo',
+            },
+        ),
+        migrations.CreateModel(
+            name='FunnelStatDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Día')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Consolidado el')),
+            ],
+            options={
+                'verbose_name': 'Día Consolidado del Embudo',
+                'verbose_name_plural': 'Días Consolidados del Embudo',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddField(
+            model_name='candidatelog',
+            name='stage',
+            field=models.CharField(blank=True, choices=[('NEW', 'Nuevo'), ('REV', 'En Revisión'), ('INT', 'Entrevista/Pruebas'), ('OFF', 'Oferta Enviada'), ('HIRED', 'Contratado'), ('REJ', 'Rechazado'), ('POOL', 'Banco de Elegibles')], max_length=10, null=True, verbose_name='Etapa Resultante'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatelog',
+            index=models.Index(fields=['candidate', 'timestamp'], name='ats_candlog_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatelog',
+            index=models.Index(fields=['timestamp'], name='ats_candlog_timestamp_idx'),
+        ),
+        migrations.AddField(
+            model_name='funneldailystat',
+            name='job_posting',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='funnel_stats', to='ats.jobposting', verbose_name='Vacante'),
+        ),
+        migrations.AddConstraint(
+            model_name='funneldailystat',
+            constraint=models.UniqueConstraint(fields=('day', 'job_posting', 'from_stage', 'to_stage'), name='ats_funnel_stat_unique'),
+        ),
+        migrations.RunPython(backfill_log_stage, migrations.RunPython.noop),
+    ]
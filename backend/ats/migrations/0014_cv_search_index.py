@@ -0,0 +1,90 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Índice de texto completo según el motor (ver ats.cv_search). En SQLite es una
+# tabla FTS5 de contenido externo sincronizada por triggers; en PostgreSQL una
+# columna tsvector generada con índice GIN.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE ats_cv_fts USING fts5(
+        text, content='ats_cvindexentry', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER ats_cv_fts_insert AFTER INSERT ON ats_cvindexentry BEGIN
+        INSERT INTO ats_cv_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER ats_cv_fts_delete AFTER DELETE ON ats_cvindexentry BEGIN
+        INSERT INTO ats_cv_fts(ats_cv_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER ats_cv_fts_update AFTER UPDATE OF text ON ats_cvindexentry BEGIN
+        INSERT INTO ats_cv_fts(ats_cv_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO ats_cv_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS ats_cv_fts_update",
+    "DROP TRIGGER IF EXISTS ats_cv_fts_delete",
+    "DROP TRIGGER IF EXISTS ats_cv_fts_insert",
+    "DROP TABLE IF EXISTS ats_cv_fts",
+]
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE ats_cvindexentry ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('spanish', text)) STORED
+    """,
+    "CREATE INDEX ats_cv_search_vector_idx ON ats_cvindexentry USING GIN (search_vector)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS ats_cv_search_vector_idx",
+    "ALTER TABLE ats_cvindexentry DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0013_funnel_analytics'),
+        ('core', '0015_duplicate_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Nombre del archivo del que se extrajo el texto; si cambia, se vuelve a indexar', max_length=255, verbose_name='Archivo Indexado')),
+                ('text', models.TextField(blank=True, default='', verbose_name='Texto Normalizado')),
+                ('status', models.CharField(choices=[('INDEXED', 'Indexado'), ('EMPTY', 'Sin Texto')], default='INDEXED', max_length=10, verbose_name='Estado')),
+                ('indexed_at', models.DateTimeField(auto_now=True, verbose_name='Indexado el')),
+                ('candidate', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cv_index', to='ats.candidate', verbose_name='Candidato')),
+                ('person', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cv_index', to='core.person', verbose_name='Persona')),
+            ],
+            options={
+                'verbose_name': 'Índice de CV',
+                'verbose_name_plural': 'Índice de CVs',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('candidate__isnull', False), ('person__isnull', True)), models.Q(('candidate__isnull', True), ('person__isnull', False)), _connector='OR'), name='ats_cv_index_single_owner')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0014_cv_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateFitProfile',
+            fields=[
+                ('candidate', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fit_profile', serialize=False, to='ats.candidate', verbose_name='Candidato')),
+                ('version', models.CharField(max_length=64)),
+                ('text_terms', models.JSONField(default=dict)),
+                ('text_norm', models.FloatField(default=0)),
+                ('education_terms', models.JSONField(default=dict)),
+                ('education_norm', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Perfil de Afinidad',
+                'verbose_name_plural': 'Perfiles de Afinidad',
+            },
+        ),
+    ]
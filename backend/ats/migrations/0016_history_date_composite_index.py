@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0015_candidate_fit_profile'),
+        ('core', '0016_history_date_composite_index'),
+        ('organization', '0011_as_of_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicalcandidate',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='historicaljobposting',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='historicalcandidate',
+            index=models.Index(fields=['history_date', 'id'], name='ats_histori_history_83e669_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicaljobposting',
+            index=models.Index(fields=['history_date', 'id'], name='ats_histori_history_640c2e_idx'),
+        ),
+    ]
@@ -1,4 +1,8 @@
+import uuid
+
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
@@ -84,6 +88,10 @@ class JobPosting(models.Model):
         verbose_name = "Vacante"
         verbose_name_plural = "Vacantes"
         ordering = ['-created_at']
+        indexes = [
+            # Bolsa de empleo pública: publicadas, ya iniciadas y no cerradas
+            models.Index(fields=['status', 'published_date', 'closing_date'], name='ats_posting_public_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
@@ -115,6 +123,18 @@ class Candidate(models.Model):
         ('POOL', 'Banco de Elegibles'),
     ]
     
+    # Máquina de estados: etapa actual -> etapas a las que puede moverse.
+    # HIRED solo se alcanza mediante ats.services.hire_candidates.
+    STAGE_TRANSITIONS = {
+        'NEW': ['REV', 'INT', 'REJ', 'POOL'],
+        'REV': ['NEW', 'INT', 'REJ', 'POOL'],
+        'INT': ['REV', 'OFF', 'REJ', 'POOL'],
+        'OFF': ['INT', 'REJ', 'POOL'],
+        'REJ': ['REV', 'POOL'],
+        'POOL': ['REV', 'INT', 'REJ'],
+        'HIRED': [],
+    }
+    
     # Relación con la vacante
     job_posting = models.ForeignKey(
         JobPosting,
@@ -178,6 +198,12 @@ class Candidate(models.Model):
         verbose_name="Currículum (PDF)",
         help_text="Archivo PDF del currículum"
     )
+    cv_text = models.TextField(
+        blank=True,
+        default='',
+        verbose_name="Texto del CV",
+        help_text="Extraído del PDF al procesar la postulación (ats.intake)"
+    )
     
     # Campos dinámicos opcionales (según configuración de JobPosting)
     education_details = models.TextField(
@@ -215,6 +241,12 @@ class Candidate(models.Model):
         ordering = ['-created_at']
         # Evitar duplicados: misma persona aplicando a la misma vacante
         unique_together = [('job_posting', 'email')]
+        indexes = [
+            # Candidatos de una vacante filtrados por etapa (pipeline)
+            models.Index(fields=['job_posting', 'stage'], name='ats_candidate_stage_idx'),
+            # Postulación repetida a la misma vacante sin distinguir mayúsculas (ats.duplicates)
+            models.Index(F('job_posting'), Lower('email'), name='ats_candidate_email_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.job_posting.title}"
@@ -297,15 +329,291 @@ class CandidateLog(models.Model):
         null=True,
         verbose_name="Detalles"
     )
+    # Etapa a la que pasó el candidato (STAGE_CHANGE/HIRED); la etapa de origen
+    # es la del registro anterior (LAG en ats.analytics)
+    stage = models.CharField(
+        max_length=10,
+        choices=Candidate.STAGE_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name="Etapa Resultante"
+    )
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = "Registro de Actividad"
         verbose_name_plural = "Registros de Actividad"
         ordering = ['-timestamp']
+        indexes = [
+            # Particiones del embudo: registros de cada candidato en orden
+            models.Index(fields=['candidate', 'timestamp'], name='ats_candlog_timeline_idx'),
+            models.Index(fields=['timestamp'], name='ats_candlog_timestamp_idx'),
+        ]
     
     def __str__(self):
         return f"{self.candidate} - {self.action} - {self.timestamp}"
 
 
+class ApplicationIntake(models.Model):
+    """
+    Postulación pública recibida y aún no convertida en Candidate.
+    La vista solo guarda los datos y mueve los archivos al directorio de spool;
+    el comando `process_applications` valida, escanea, extrae el texto del CV y
+    crea el candidato (ver ats.intake).
+    """
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Recibida'),
+        ('ACCEPTED', 'Aceptada'),
+        ('REJECTED', 'Rechazada'),
+        ('FAILED', 'Error de Procesamiento'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job_posting = models.ForeignKey(
+        JobPosting,
+        on_delete=models.CASCADE,
+        related_name='intakes',
+        verbose_name="Vacante"
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name="Datos del Formulario",
+        help_text="Campos de texto tal como se recibieron (sin archivos)"
+    )
+    cv_name = models.CharField(max_length=255, verbose_name="Nombre del CV")
+    avatar_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Nombre de la Foto")
+    client_ip = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP de Origen")
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        verbose_name="Estado"
+    )
+    errors = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Errores",
+        help_text="Errores de validación por campo, visibles para el postulante"
+    )
+    candidate = models.OneToOneField(
+        Candidate,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='intake',
+        verbose_name="Candidato"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Próximo Intento")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Procesada el")
+    
+    class Meta:
+        verbose_name = "Postulación Recibida"
+        verbose_name_plural = "Postulaciones Recibidas"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='ats_intake_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.payload.get('email', '')} - {self.job_posting_id} ({self.get_status_display()})"
+
 
+class OutboundEmail(models.Model):
+    """
+    Bandeja de salida de correos del ATS.
+    Las vistas solo encolan; el comando `send_outbox` entrega en lotes
+    reutilizando una conexión SMTP, con reintentos y backoff exponencial.
+    """
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('SENT', 'Enviado'),
+        ('FAILED', 'Fallido'),
+    ]
+    
+    candidate = models.ForeignKey(
+        Candidate,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+        verbose_name="Candidato"
+    )
+    recipient = models.EmailField(verbose_name="Destinatario")
+    template = models.CharField(
+        max_length=50,
+        default='status_change',
+        verbose_name="Plantilla",
+        help_text="Nombre de la plantilla en ats/templates/ats/emails/"
+    )
+    context = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Contexto",
+        help_text="Datos para renderizar la plantilla al momento del envío"
+    )
+    subject = models.CharField(max_length=255, verbose_name="Asunto")
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        verbose_name="Estado"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Próximo Intento")
+    last_error = models.TextField(blank=True, null=True, verbose_name="Último Error")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado el")
+    
+    class Meta:
+        verbose_name = "Correo Saliente"
+        verbose_name_plural = "Correos Salientes"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='ats_outbox_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipient} - {self.subject} ({self.get_status_display()})"
+
+
+class FunnelDailyStat(models.Model):
+    """
+    Transiciones de etapa agregadas por día y vacante (ver ats.analytics).
+    from_stage vacío = postulación recibida (entrada a NEW).
+    Los histogramas cuentan duraciones por tramo de ats.analytics.DURATION_BUCKETS.
+    """
+    
+    day = models.DateField(verbose_name="Día")
+    job_posting = models.ForeignKey(
+        JobPosting,
+        on_delete=models.CASCADE,
+        related_name='funnel_stats',
+        verbose_name="Vacante"
+    )
+    from_stage = models.CharField(max_length=10, blank=True, default='', verbose_name="Etapa de Origen")
+    to_stage = models.CharField(max_length=10, choices=Candidate.STAGE_CHOICES, verbose_name="Etapa de Destino")
+    count = models.PositiveIntegerField(default=0, verbose_name="Transiciones")
+    
+    # Tiempo que pasaron los candidatos en from_stage antes de moverse
+    stage_seconds = models.BigIntegerField(default=0)
+    stage_histogram = models.JSONField(default=list)
+    # Tiempo desde la postulación hasta llegar a to_stage
+    cycle_seconds = models.BigIntegerField(default=0)
+    cycle_histogram = models.JSONField(default=list)
+    
+    class Meta:
+        verbose_name = "Estadística Diaria del Embudo"
+        verbose_name_plural = "Estadísticas Diarias del Embudo"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'job_posting', 'from_stage', 'to_stage'], name='ats_funnel_stat_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.job_posting_id}: {self.from_stage or '-'} -> {self.to_stage} ({self.count})"
+
+
+class FunnelStatDay(models.Model):
+    """Días ya consolidados en FunnelDailyStat (los demás se calculan en vivo)."""
+    
+    day = models.DateField(unique=True, verbose_name="Día")
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name="Consolidado el")
+    
+    class Meta:
+        verbose_name = "Día Consolidado del Embudo"
+        verbose_name_plural = "Días Consolidados del Embudo"
+        ordering = ['-day']
+    
+    def __str__(self):
+        return str(self.day)
+
+
+class CVIndexEntry(models.Model):
+    """
+    Texto normalizado del CV de un candidato o de una persona para la búsqueda
+    de texto completo (ver ats.cv_search). La tabla FTS5 (SQLite) o la columna
+    tsvector (PostgreSQL) se mantienen desde la base de datos, no desde Django.
+    """
+    
+    STATUS_CHOICES = [
+        ('INDEXED', 'Indexado'),
+        ('EMPTY', 'Sin Texto'),
+    ]
+    
+    candidate = models.OneToOneField(
+        Candidate,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='cv_index',
+        verbose_name="Candidato"
+    )
+    person = models.OneToOneField(
+        'core.Person',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='cv_index',
+        verbose_name="Persona"
+    )
+    source = models.CharField(
+        max_length=255,
+        verbose_name="Archivo Indexado",
+        help_text="Nombre del archivo del que se extrajo el texto; si cambia, se vuelve a indexar"
+    )
+    text = models.TextField(blank=True, default='', verbose_name="Texto Normalizado")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='INDEXED', verbose_name="Estado")
+    indexed_at = models.DateTimeField(auto_now=True, verbose_name="Indexado el")
+    
+    class Meta:
+        verbose_name = "Índice de CV"
+        verbose_name_plural = "Índice de CVs"
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(candidate__isnull=False, person__isnull=True)
+                | models.Q(candidate__isnull=True, person__isnull=False),
+                name='ats_cv_index_single_owner'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.candidate or self.person} ({self.get_status_display()})"
+
+
+class CandidateFitProfile(models.Model):
+    """
+    Vector de términos precalculado de un candidato para el puntaje de
+    afinidad con una posición (ver ats.scoring). Se reconstruye cuando cambia
+    `version` (candidato o CV reindexado).
+    """
+    
+    candidate = models.OneToOneField(
+        Candidate,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fit_profile',
+        verbose_name="Candidato"
+    )
+    version = models.CharField(max_length=64)
+    # {término: peso}; la norma se guarda para no recorrer el vector al puntuar
+    text_terms = models.JSONField(default=dict)
+    text_norm = models.FloatField(default=0)
+    education_terms = models.JSONField(default=dict)
+    education_norm = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Perfil de Afinidad"
+        verbose_name_plural = "Perfiles de Afinidad"
+    
+    def __str__(self):
+        return f"{self.candidate_id} ({len(self.text_terms)} términos)"
@@ -0,0 +1,249 @@
+"""
+Puntaje de afinidad candidato-posición para la preselección de candidatos.
+
+Cada lado se reduce a un vector de términos (sin acentos, en minúsculas,
+sin palabras vacías, peso 1 + log(tf)):
+
+- Posición: título y descripción de la vacante, cargo, departamento,
+  objetivo, funciones y requisitos (los requisitos cuentan doble).
+- Candidato: texto del CV (ats.cv_search) y, por separado, su educación
+  (nivel y área). El vector se guarda en CandidateFitProfile y solo se
+  recalcula si cambió el candidato o su CV.
+
+Al puntuar se arma una matriz candidatos x términos de la posición y se
+calcula de una vez, con NumPy, la similitud coseno de cada candidato contra
+la posición (ponderada por IDF dentro del grupo evaluado). El puntaje final
+combina CV y educación según FIT_WEIGHTS.
+
+El ranking completo se guarda en caché con una clave que incluye la versión
+de la vacante: cambia si se edita la vacante, su posición, requisitos o
+funciones, o si entra, cambia o se reindexa algún candidato del grupo.
+"""
+
+import hashlib
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from core.db_utils import remove_accents
+from .models import Candidate, CandidateEducation, CandidateFitProfile
+
+TOKEN_RE = re.compile(r'[a-z0-9]{3,}')
+
+STOPWORDS = frozenset('''
+    los las del con por para una uno unos unas que como sus mas entre sobre desde sin este esta
+    estos estas ser son ese esa eso donde cuando otros otras todo todos toda todas tambien muy
+    cada segun hasta durante nivel area manejo conocimiento conocimientos experiencia
+    the and for with
+'''.split())
+
+# Peso de cada componente en el puntaje final
+FIT_WEIGHTS = {'text': 0.7, 'education': 0.3}
+
+# Peso de los términos de los requisitos frente al resto del cargo
+REQUIREMENT_WEIGHT = 2.0
+
+# Términos coincidentes que se informan por candidato
+MATCHED_TERMS = 8
+
+SCORE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(remove_accents(text or '').lower()) if t not in STOPWORDS]
+
+
+def term_vector(*texts, weight=1.0):
+    """{término: peso} con tf sublineal (1 + log tf)."""
+    counts = Counter(t for text in texts for t in tokenize(text))
+    return {term: weight * (1 + math.log(tf)) for term, tf in counts.items()}
+
+
+def _norm(vector):
+    return math.sqrt(sum(w * w for w in vector.values()))
+
+
+# --- POSICIÓN ---
+
+def position_vector(job_posting):
+    """Vector de términos de la vacante y su posición."""
+    vector = term_vector(job_posting.title, job_posting.description)
+    position = job_posting.position
+    if position:
+        extra = term_vector(
+            position.job_title.name if position.job_title else '',
+            position.department.name if position.department else '',
+            position.objective,
+            *(f.description for f in position.functions.all()),
+        )
+        requirements = term_vector(*(r.description for r in position.requirements.all()), weight=REQUIREMENT_WEIGHT)
+        for source in (extra, requirements):
+            for term, w in source.items():
+                vector[term] = vector.get(term, 0) + w
+    return vector
+
+
+def posting_version(job_posting, candidates):
+    """
+    Firma de todo lo que afecta al ranking: vacante, posición, requisitos,
+    funciones y el grupo de candidatos (cantidad, último cambio y último CV indexado).
+    """
+    from organization.models import Position
+
+    parts = [job_posting.pk, job_posting.updated_at.isoformat()]
+    if job_posting.position_id:
+        position = Position.objects.filter(pk=job_posting.position_id).aggregate(
+            changed=Max('updated_at'),
+            requirement_count=Count('requirements', distinct=True),
+            requirements_changed=Max('requirements__updated_at'),
+            function_count=Count('functions', distinct=True),
+            functions_changed=Max('functions__updated_at'),
+        )
+        parts += [str(v) for v in position.values()]
+    group = candidates.order_by().aggregate(
+        count=Count('id'), changed=Max('updated_at'), indexed=Max('cv_index__indexed_at')
+    )
+    parts += [str(v) for v in group.values()]
+    return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+# --- CANDIDATOS ---
+
+def _profile_version(candidate):
+    index = getattr(candidate, 'cv_index', None)
+    indexed = index.indexed_at.isoformat() if index else ''
+    return hashlib.md5(f"{candidate.updated_at.isoformat()}|{indexed}".encode()).hexdigest()
+
+
+def _candidate_text(candidate):
+    index = getattr(candidate, 'cv_index', None)
+    return ' '.join(filter(None, [index.text if index else candidate.cv_text, candidate.education_details]))
+
+
+def load_profiles(candidates):
+    """
+    CandidateFitProfile de cada candidato del queryset, reconstruyendo en lote
+    los que falten o estén desactualizados.
+
+    Returns:
+        Lista de (candidate, profile)
+    """
+    rows = list(candidates.select_related('fit_profile', 'cv_index'))
+    stale = []
+    for candidate in rows:
+        version = _profile_version(candidate)
+        profile = getattr(candidate, 'fit_profile', None)
+        if profile is None or profile.version != version:
+            stale.append((candidate, version))
+
+    if stale:
+        education = {}
+        for item in CandidateEducation.objects.filter(candidate__in=[c for c, _ in stale]).order_by():
+            education.setdefault(item.candidate_id, []).append(f"{item.level_name} {item.field_name}")
+        profiles = []
+        for candidate, version in stale:
+            text_terms = term_vector(_candidate_text(candidate))
+            education_terms = term_vector(*education.get(candidate.pk, []))
+            profile = CandidateFitProfile(
+                candidate=candidate, version=version,
+                text_terms=text_terms, text_norm=_norm(text_terms),
+                education_terms=education_terms, education_norm=_norm(education_terms),
+            )
+            candidate.fit_profile = profile
+            profiles.append(profile)
+        CandidateFitProfile.objects.bulk_create(
+            profiles, batch_size=500, update_conflicts=True, unique_fields=['candidate'],
+            update_fields=['version', 'text_terms', 'text_norm', 'education_terms', 'education_norm', 'updated_at'],
+        )
+    return [(candidate, candidate.fit_profile) for candidate in rows]
+
+
+# --- PUNTAJE ---
+
+def _cosine(matrix, norms, weights):
+    """Coseno de cada fila de `matrix` contra el vector de la posición `weights`."""
+    position_norm = np.linalg.norm(weights)
+    if not position_norm:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+    safe_norms = np.where(norms > 0, norms, 1.0)
+    return (matrix @ weights) / (safe_norms * position_norm)
+
+
+def score_profiles(vector, profiles):
+    """
+    Puntúa todos los perfiles contra el vector de la posición en una pasada.
+
+    Returns:
+        Lista de dicts {candidate_id, score, text_score, education_score,
+        matched_terms} ordenada de mayor a menor puntaje
+    """
+    if not profiles or not vector:
+        return []
+    terms = sorted(vector)
+    n, v = len(profiles), len(terms)
+
+    text = np.zeros((n, v), dtype=np.float32)
+    education = np.zeros((n, v), dtype=np.float32)
+    for i, (_, profile) in enumerate(profiles):
+        text_terms, education_terms = profile.text_terms, profile.education_terms
+        text[i] = [text_terms.get(t, 0.0) for t in terms]
+        education[i] = [education_terms.get(t, 0.0) for t in terms]
+    text_norms = np.array([p.text_norm for _, p in profiles], dtype=np.float32)
+    education_norms = np.array([p.education_norm for _, p in profiles], dtype=np.float32)
+
+    # IDF dentro del grupo: un término que todos tienen no distingue a nadie
+    document_frequency = np.count_nonzero((text + education) > 0, axis=0)
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1
+    weights = np.array([vector[t] for t in terms], dtype=np.float32) * idf
+
+    text_scores = _cosine(text, text_norms, weights)
+    education_scores = _cosine(education, education_norms, weights)
+    scores = FIT_WEIGHTS['text'] * text_scores + FIT_WEIGHTS['education'] * education_scores
+
+    # Términos que más aportan a cada candidato
+    contribution = (text + education) * weights
+    top_terms = np.argsort(-contribution, axis=1)[:, :MATCHED_TERMS]
+
+    ranking = []
+    for i in np.argsort(-scores, kind='stable'):
+        candidate, _ = profiles[i]
+        ranking.append({
+            'candidate_id': candidate.pk,
+            'score': round(float(scores[i]), 4),
+            'text_score': round(float(text_scores[i]), 4),
+            'education_score': round(float(education_scores[i]), 4),
+            'matched_terms': [terms[j] for j in top_terms[i] if contribution[i, j] > 0],
+        })
+    return ranking
+
+
+def scoring_group(job_posting, scope='posting'):
+    """Candidatos a evaluar: los de la vacante o todo el banco de elegibles (POOL)."""
+    if scope == 'pool':
+        return Candidate.objects.filter(stage='POOL')
+    return Candidate.objects.filter(job_posting=job_posting).exclude(stage__in=['HIRED', 'REJ'])
+
+
+def rank_candidates(job_posting, scope='posting'):
+    """
+    Ranking de afinidad de un grupo de candidatos con la vacante, desde la
+    caché si la versión de la vacante no cambió.
+
+    Returns:
+        Tupla (version, ranking); ver score_profiles
+    """
+    candidates = scoring_group(job_posting, scope)
+    version = posting_version(job_posting, candidates)
+    key = f'ats:fit:{job_posting.pk}:{scope}:{version}'
+    ranking = cache.get(key)
+    if ranking is None:
+        posting = type(job_posting).objects.select_related('position__job_title', 'position__department').prefetch_related(
+            'position__functions', 'position__requirements'
+        ).get(pk=job_posting.pk)
+        ranking = score_profiles(position_vector(posting), load_profiles(candidates))
+        cache.set(key, ranking, SCORE_CACHE_TIMEOUT)
+    return version, ranking
@@ -1,7 +1,15 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import JobPosting, Candidate, CandidateEducation, CandidateLog
+from .board import DEFAULT_COLUMN_SIZE, MAX_COLUMN_SIZE
+from .duplicates import find_conflicts, normalize_email, normalize_phone, parse_national_id
+from .models import JobPosting, Candidate, CandidateEducation, CandidateLog, ApplicationIntake
 from organization.models import Position, Department
 from core.models import PhoneCarrierCode
+from core.serializers import ImageRenditionsField
 
 
 # --- Serializers para Educación y Experiencia (Anidados) ---
@@ -38,6 +46,9 @@ class JobPostingListSerializer(serializers.ModelSerializer):
         ]
     
     def get_candidates_count(self, obj):
+        # Usa la anotación del queryset si existe (evita un COUNT por vacante)
+        if hasattr(obj, 'candidates_count'):
+            return obj.candidates_count
         return obj.candidates.count()
 
 
@@ -93,6 +104,9 @@ class JobPostingAdminSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_candidates_count(self, obj):
+        # Usa la anotación del queryset si existe (evita un COUNT por vacante)
+        if hasattr(obj, 'candidates_count'):
+            return obj.candidates_count
         return obj.candidates.count()
 
     def validate(self, data):
@@ -143,6 +157,48 @@ class JobPostingAdminSerializer(serializers.ModelSerializer):
 
 # --- Serializers para Candidate ---
 
+def flatten_application_data(data):
+    """
+    Si data es un QueryDict (multipart), lo convierte a dict estándar para
+    evitar problemas al asignar listas de objetos (education), y parsea
+    education si viene como JSON string.
+    """
+    if hasattr(data, 'dict') or hasattr(data, '_mutable'):
+        data_dict = {}
+        for key, value in data.items():
+            data_dict[key] = value
+        data = data_dict
+    
+    if 'education' in data and isinstance(data['education'], str):
+        import json
+        try:
+            data['education'] = json.loads(data['education'])
+        except json.JSONDecodeError:
+            data['education'] = []
+    return data
+
+
+_REGISTERED = "Si ya trabajas en la institución, por favor contacta al departamento de RRHH."
+
+# Conflicto de ats.duplicates -> (campo, mensaje)
+DUPLICATE_ERRORS = {
+    'email': ('email', f"Este correo electrónico ya está registrado en el sistema. {_REGISTERED}"),
+    'national_id': ('national_id', f"Esta cédula ya está registrada en el sistema. {_REGISTERED}"),
+    'phone': ('phone_subscriber', f"Este número de teléfono ya está registrado en el sistema. {_REGISTERED}"),
+    'applied': ('email', 'Ya te has postulado a esta vacante con este correo electrónico.'),
+}
+
+
+def raise_for_conflicts(conflicts):
+    """ValidationError con el primer mensaje de DUPLICATE_ERRORS por campo, si hay conflictos"""
+    errors = {}
+    for conflict in conflicts:
+        field, message = DUPLICATE_ERRORS[conflict]
+        errors.setdefault(field, message)
+    if errors:
+        raise serializers.ValidationError(errors)
+
+
 class CandidateCreateSerializer(serializers.ModelSerializer):
     """Serializer para crear candidato desde el portal público (postulación)"""
     education = CandidateEducationSerializer(many=True, required=False)
@@ -159,67 +215,27 @@ class CandidateCreateSerializer(serializers.ModelSerializer):
             'phone_area_code': {'required': False},
             'phone_subscriber': {'required': False},
         }
+        # El duplicado (vacante, correo) se detecta en validate() junto con el resto
+        validators = []
     
     def validate_email(self, value):
-        """Validar que el email no pertenezca a un empleado existente"""
-        from core.models import PersonEmail
-        
-        if PersonEmail.objects.filter(email_address=value).exists():
-            raise serializers.ValidationError(
-                "Este correo electrónico ya está registrado en el sistema. "
-                "Si ya trabajas en la institución, por favor contacta al departamento de RRHH."
-            )
-        return value
-    
+        return normalize_email(value)
+
     def validate_national_id(self, value):
-        """Validar que la cédula no pertenezca a un empleado existente"""
-        from core.models import NationalId
-        import re
-        
-        # El valor puede venir como "V-12345678" o solo "12345678"
-        # Limpiar y parsear
-        cleaned = value.strip().upper()
-        
-        # Intentar extraer tipo y número
-        match = re.match(r'^([VEJGP])-?(\d+)$', cleaned)
-        if match:
-            doc_type = match.group(1)
-            doc_number = match.group(2)
-            
-            # Verificar si ya existe en NationalId
-            if NationalId.objects.filter(document_type=doc_type, number=doc_number).exists():
-                raise serializers.ValidationError(
-                    "Esta cédula ya está registrada en el sistema. "
-                    "Si ya trabajas en la institución, por favor contacta al departamento de RRHH."
-                )
-        
-        return value
+        """El valor puede venir como "V-12.345.678" o solo "12345678": se guarda como "V-12345678" """
+        parsed = parse_national_id(value)
+        if parsed:
+            return '-'.join(parsed)
+        return value.strip()
+
+    def validate_phone_subscriber(self, value):
+        return normalize_phone(value) or None
 
     def to_internal_value(self, data):
-        # Si data es un QueryDict (multipart), convertir a dict estándar
-        # para evitar problemas al asignar listas de objetos (education)
-        if hasattr(data, 'dict') or hasattr(data, '_mutable'):
-            data_dict = {}
-            for key, value in data.items():
-                data_dict[key] = value
-            data = data_dict
-        
-        # Parsear education si viene como JSON string
-        if 'education' in data and isinstance(data['education'], str):
-            import json
-            try:
-                data['education'] = json.loads(data['education'])
-            except json.JSONDecodeError:
-                data['education'] = []
-            
-        return super().to_internal_value(data)
+        return super().to_internal_value(flatten_application_data(data))
     
     def validate(self, data):
-        """Validación cruzada de teléfono y otros campos"""
-        from core.models import PersonPhone
-        
-
-        
+        """Validación cruzada de teléfono y duplicados (una sola consulta, ver ats.duplicates)"""
         # Validar que se proporcione teléfono (en algún formato)
         phone_area_code = data.get('phone_area_code')
         phone_subscriber = data.get('phone_subscriber')
@@ -238,27 +254,15 @@ class CandidateCreateSerializer(serializers.ModelSerializer):
                 'phone': 'Debes proporcionar un número de teléfono.'
             })
         
-        # Si se usa el nuevo formato, validar contra PersonPhone
-        if has_new_format:
-            if PersonPhone.objects.filter(carrier_code=phone_area_code, subscriber_number=phone_subscriber).exists():
-                raise serializers.ValidationError({
-                    'phone_subscriber': (
-                        "Este número de teléfono ya está registrado en el sistema. "
-                        "Si ya trabajas en la institución, por favor contacta al departamento de RRHH."
-                    )
-                })
-        
-        # Validación de email duplicado en misma vacante
+        # Correo, cédula y teléfono (nuevo formato) contra personas registradas,
+        # y correo contra postulaciones previas a la misma vacante
         job_posting = data.get('job_posting')
-        if job_posting and data.get('email'):
-            existing = Candidate.objects.filter(
-                job_posting=job_posting,
-                email=data['email']
-            )
-            if existing.exists():
-                raise serializers.ValidationError({
-                    'email': 'Ya te has postulado a esta vacante con este correo electrónico.'
-                })
+        raise_for_conflicts(find_conflicts(
+            email=data.get('email'),
+            national_id=parse_national_id(data.get('national_id')),
+            phone=(phone_area_code, phone_subscriber) if has_new_format else None,
+            job_posting=job_posting,
+        ))
         
         if job_posting:
             # Validar que se incluya educación si la vacante lo requiere
@@ -282,21 +286,101 @@ class CandidateCreateSerializer(serializers.ModelSerializer):
             except json.JSONDecodeError:
                 education_data = []
         
-        # Crear el candidato
-        candidate = Candidate.objects.create(**validated_data)
-        
-        # Crear educación
-        for edu in education_data:
-            CandidateEducation.objects.create(candidate=candidate, **edu)
+        with transaction.atomic():
+            # Crear el candidato
+            candidate = Candidate.objects.create(**validated_data)
+            
+            # Crear educación (un solo INSERT)
+            CandidateEducation.objects.bulk_create([
+                CandidateEducation(candidate=candidate, **edu) for edu in education_data
+            ])
         
         return candidate
 
 
+class ApplicationIntakeSerializer(serializers.Serializer):
+    """
+    Validación rápida de la postulación pública: formato, teléfono, tamaño de
+    archivos y duplicados (una sola consulta, ver ats.duplicates), sin abrir
+    los archivos, para que esos errores lleguen como 400 en la misma petición.
+    La validación completa (CandidateCreateSerializer) la repite el worker
+    (ver ats.intake).
+    """
+    TEXT_FIELDS = (
+        'job_posting', 'first_name', 'last_name', 'email', 'national_id',
+        'phone_area_code', 'phone_subscriber', 'phone', 'education',
+    )
+    
+    job_posting = serializers.PrimaryKeyRelatedField(queryset=JobPosting.objects.all())
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    email = serializers.EmailField()
+    national_id = serializers.CharField(max_length=20)
+    # El código de área se resuelve en el worker (sin consulta aquí)
+    phone_area_code = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    phone_subscriber = serializers.CharField(max_length=20, required=False, allow_blank=True, allow_null=True)
+    phone = serializers.CharField(max_length=20, required=False, allow_blank=True, allow_null=True)
+    education = CandidateEducationSerializer(many=True, required=False)
+    cv_file = serializers.FileField()
+    avatar = serializers.FileField(required=False, allow_null=True)
+    
+    def to_internal_value(self, data):
+        return super().to_internal_value(flatten_application_data(data))
+    
+    def _validate_size(self, value):
+        if value and value.size > settings.ATS_APPLICATION_MAX_FILE_SIZE:
+            raise serializers.ValidationError(
+                f"El archivo excede el máximo de {settings.ATS_APPLICATION_MAX_FILE_SIZE // (1024 * 1024)} MB."
+            )
+        return value
+    
+    validate_cv_file = _validate_size
+    validate_avatar = _validate_size
+    
+    def validate(self, data):
+        has_new_format = bool(data.get('phone_area_code') and data.get('phone_subscriber'))
+        has_old_format = bool(data.get('phone') and data['phone'].strip())
+        if not (has_new_format or has_old_format):
+            raise serializers.ValidationError({
+                'phone': 'Debes proporcionar un número de teléfono.'
+            })
+        if data['job_posting'].ask_education and not data.get('education'):
+            raise serializers.ValidationError({
+                'education': 'Esta vacante requiere información educativa.'
+            })
+        
+        area_code = str(data.get('phone_area_code') or '')
+        raise_for_conflicts(find_conflicts(
+            email=normalize_email(data['email']),
+            national_id=parse_national_id(data['national_id']),
+            phone=(area_code, normalize_phone(data['phone_subscriber'])) if has_new_format and area_code.isdigit() else None,
+            job_posting=data['job_posting'],
+        ))
+        return data
+    
+    @property
+    def payload(self):
+        """Campos de texto tal como llegaron, para revalidarlos en el worker"""
+        data = flatten_application_data(self.initial_data)
+        return {name: data[name] for name in self.TEXT_FIELDS if name in data}
+
+
+class ApplicationStatusSerializer(serializers.ModelSerializer):
+    """Estado de una postulación para el postulante (sin datos personales)"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    job_posting_title = serializers.CharField(source='job_posting.title', read_only=True)
+    
+    class Meta:
+        model = ApplicationIntake
+        fields = ['id', 'job_posting', 'job_posting_title', 'status', 'status_display', 'errors', 'created_at', 'processed_at']
+
+
 class CandidateListSerializer(serializers.ModelSerializer):
     """Serializer para listar candidatos (vista administrativa)"""
     job_posting_title = serializers.CharField(source='job_posting.title', read_only=True)
     stage_display = serializers.CharField(source='get_stage_display', read_only=True)
     phone_area_code = PhoneCarrierCodeSerializer(read_only=True)
+    avatar_renditions = ImageRenditionsField(source='avatar')
     
     class Meta:
         model = Candidate
@@ -304,7 +388,7 @@ class CandidateListSerializer(serializers.ModelSerializer):
             'id', 'first_name', 'last_name', 'email', 'phone',
             'job_posting', 'job_posting_title',
             'stage', 'stage_display',
-            'created_at', 'updated_at', 'avatar',
+            'created_at', 'updated_at', 'avatar', 'avatar_renditions',
             'national_id', 'phone_area_code', 'phone_subscriber'
         ]
 
@@ -316,6 +400,7 @@ class CandidateDetailSerializer(serializers.ModelSerializer):
     education = CandidateEducationSerializer(many=True, read_only=True)
     phone_area_code = PhoneCarrierCodeSerializer(read_only=True)
     cv_url = serializers.SerializerMethodField()
+    avatar_renditions = ImageRenditionsField(source='avatar')
     
     class Meta:
         model = Candidate
@@ -335,6 +420,28 @@ class CandidateStageUpdateSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
 
+class BulkStageChangeSerializer(serializers.Serializer):
+    """
+    Serializer para cambios de etapa masivos.
+    Se seleccionan candidatos por IDs, por vacante, o ambos (intersección).
+    """
+    stage = serializers.ChoiceField(choices=[c for c in Candidate.STAGE_CHOICES if c[0] != 'HIRED'])
+    candidate_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    job_posting = serializers.PrimaryKeyRelatedField(queryset=JobPosting.objects.all(), required=False)
+    from_stages = serializers.ListField(
+        child=serializers.ChoiceField(choices=Candidate.STAGE_CHOICES),
+        required=False,
+        help_text="Solo mover candidatos que estén en estas etapas"
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    notify = serializers.BooleanField(required=False, default=True)
+
+    def validate(self, data):
+        if not data.get('candidate_ids') and not data.get('job_posting'):
+            raise serializers.ValidationError("Debe proporcionar candidate_ids o job_posting.")
+        return data
+
+
 class HireCandidateSerializer(serializers.Serializer):
     """Serializer para el proceso de contratación"""
     hire_date = serializers.DateField()
@@ -346,13 +453,68 @@ class HireCandidateSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
 
+class BulkHireSerializer(HireCandidateSerializer):
+    """Contratación masiva: mismas condiciones de contrato para todos los candidatos"""
+    candidate_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    notify = serializers.BooleanField(required=False, default=True)
+
+
+class CVSearchQuerySerializer(serializers.Serializer):
+    """Parámetros de la búsqueda en CVs (ats.cv_search.search_cvs)"""
+    q = serializers.CharField(max_length=200)
+    stage = serializers.ChoiceField(choices=Candidate.STAGE_CHOICES, required=False)
+    job_posting = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=20)
+    offset = serializers.IntegerField(required=False, min_value=0, default=0)
+
+
+class ShortlistQuerySerializer(serializers.Serializer):
+    """Parámetros de la preselección por afinidad (ats.scoring)"""
+    scope = serializers.ChoiceField(choices=['posting', 'pool'], default='posting')
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=20)
+    min_score = serializers.FloatField(required=False, min_value=0, max_value=1, default=0)
+
+
+class PipelineBoardQuerySerializer(serializers.Serializer):
+    """Parámetros del tablero de candidatos (ats.board)"""
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_COLUMN_SIZE, default=DEFAULT_COLUMN_SIZE)
+    stage = serializers.ChoiceField(choices=Candidate.STAGE_CHOICES, required=False)
+    cursor = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if data.get('cursor') and not data.get('stage'):
+            raise serializers.ValidationError("El cursor requiere indicar la etapa (stage).")
+        return data
+
+
+class FunnelReportQuerySerializer(serializers.Serializer):
+    """Parámetros del reporte de embudo (ats.analytics.funnel_report)"""
+    MAX_DAYS = 731
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    group_by = serializers.ChoiceField(choices=['job_posting', 'position', 'department'], default='job_posting')
+    job_posting = serializers.IntegerField(required=False)
+    position = serializers.IntegerField(required=False)
+    department = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        data.setdefault('end', timezone.localdate())
+        data.setdefault('start', data['end'] - timedelta(days=89))
+        if data['start'] > data['end']:
+            raise serializers.ValidationError("La fecha inicial no puede ser posterior a la final.")
+        if (data['end'] - data['start']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"El rango no puede superar {self.MAX_DAYS} días.")
+        return data
+
+
 class CandidateLogSerializer(serializers.ModelSerializer):
     """Serializer para el historial de cambios"""
     user_name = serializers.SerializerMethodField()
     
     class Meta:
         model = CandidateLog
-        fields = ['id', 'user', 'user_name', 'action', 'details', 'timestamp']
+        fields = ['id', 'user', 'user_name', 'action', 'details', 'stage', 'timestamp']
         
     def get_user_name(self, obj):
         if obj.user:
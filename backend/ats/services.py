@@ -1,182 +1,514 @@
+from collections import defaultdict
+
 from django.db import transaction
-from django.db.models import F
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+from django.utils import timezone
 from django.core.exceptions import ValidationError
-from core.models import Person
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+from core.models import Person, NationalId, PersonEmail, PersonPhone
+from organization.history import bulk_update_positions
+from organization.models import Position
 from talent.models import PersonEducation, EducationLevel, FieldOfStudy
+from employment.identity import ACTIVE_STATUSES, invalidate_identity
+from employment.workforce import apply_status_logs
 from employment.models import (
-    Employment, 
+    Employment,
+    EmploymentStatusLog,
     RoleChoices, 
     EmploymentTypeChoices, 
-    EmploymentStatusChoices
+    EmploymentStatusChoices,
+    is_active_status,
 )
-from .models import Candidate, CandidateEducation
+from .cache import invalidate_public_jobs
+from .duplicates import normalize_email, normalize_phone, parse_national_id
+from .models import JobPosting, Candidate, CandidateLog
+
+
+HIRABLE_STAGES = ('OFF', 'INT')
+
+
+def _validate_hire_data(hire_data):
+    """Códigos de Choice y fechas del contrato (una vez por lote, no por candidato)."""
+    role = hire_data.get('role', RoleChoices.EMPLOYEE)
+    employment_type = hire_data.get('employment_type', EmploymentTypeChoices.PERMANENT)
+    employment_status = hire_data.get('employment_status', EmploymentStatusChoices.ACTIVE)
+    
+    if role not in dict(RoleChoices.choices):
+        raise ValidationError(f"Rol inválido: {role}")
+    if employment_type not in dict(EmploymentTypeChoices.choices):
+        raise ValidationError(f"Tipo de empleo inválido: {employment_type}")
+    if employment_status not in dict(EmploymentStatusChoices.choices):
+        raise ValidationError(f"Estatus inválido: {employment_status}")
+    
+    end_date = hire_data.get('end_date')
+    # Mismo criterio que Employment.save(): un estatus no vigente cierra el contrato hoy
+    if not is_active_status(employment_status) and not end_date:
+        end_date = timezone.now().date()
+    if end_date and end_date < hire_data['hire_date']:
+        raise ValidationError("La fecha de egreso no puede ser anterior a la fecha de ingreso.")
+    return role, employment_type, employment_status, end_date
+
+
+def _match_existing_persons(candidates):
+    """
+    Personas ya registradas por cédula o correo normalizados (reingresos).
+    Dos consultas para todo el lote; la cédula tiene prioridad sobre el correo.
+    
+    Returns:
+        Tupla (persona_por_cedula, persona_por_correo) con claves normalizadas
+    """
+    numbers_by_type = defaultdict(set)
+    emails = set()
+    for candidate in candidates:
+        if candidate.nid_key:
+            numbers_by_type[candidate.nid_key[0]].add(candidate.nid_key[1])
+        if candidate.email_key:
+            emails.add(candidate.email_key)
+    
+    by_nid = {}
+    if numbers_by_type:
+        nid_filter = Q()
+        for document_type, numbers in numbers_by_type.items():
+            nid_filter |= Q(document_type=document_type, number__in=numbers)
+        by_nid = {
+            (document_type, number): person_id
+            for document_type, number, person_id in NationalId.objects.filter(nid_filter)
+            .values_list('document_type', 'number', 'person_id')
+        }
+    by_email = {}
+    if emails:
+        by_email = dict(
+            PersonEmail.objects.annotate(email_key=Lower('email_address'))
+            .filter(email_key__in=emails)
+            .values_list('email_key', 'person_id')
+        )
+    return by_nid, by_email
+
+
+def _education_catalogs(education_rows):
+    """
+    EducationLevel y FieldOfStudy para todas las filas: se consultan y crean
+    por conjuntos (sin get_or_create por fila).
+    
+    Returns:
+        Tupla ({nombre: EducationLevel}, {(level_id, nombre): FieldOfStudy})
+    """
+    level_names = {edu.level_name for edu in education_rows}
+    levels = {level.name: level for level in EducationLevel.objects.filter(name__in=level_names)}
+    missing = level_names - set(levels)
+    if missing:
+        # ignore_conflicts: otra contratación simultánea pudo crear el mismo nivel
+        EducationLevel.objects.bulk_create([EducationLevel(name=name) for name in missing], ignore_conflicts=True)
+        levels.update({level.name: level for level in EducationLevel.objects.filter(name__in=missing)})
+    
+    wanted = {(levels[edu.level_name].pk, edu.field_name) for edu in education_rows}
+    field_filter = Q()
+    for level_id, name in wanted:
+        field_filter |= Q(education_level_id=level_id, name=name)
+    fields = {}
+    if wanted:
+        fields = {(f.education_level_id, f.name): f for f in FieldOfStudy.objects.filter(field_filter)}
+    missing = wanted - set(fields)
+    if missing:
+        FieldOfStudy.objects.bulk_create(
+            [FieldOfStudy(education_level_id=level_id, name=name) for level_id, name in missing],
+            ignore_conflicts=True
+        )
+        field_filter = Q()
+        for level_id, name in missing:
+            field_filter |= Q(education_level_id=level_id, name=name)
+        fields.update({(f.education_level_id, f.name): f for f in FieldOfStudy.objects.filter(field_filter)})
+    return levels, fields
 
 
 @transaction.atomic
-def hire_candidate(candidate, hire_data):
+def hire_candidates(candidate_ids, hire_data, user=None, notify=True):
     """
-    Transacción atómica para contratar un candidato.
+    Contratación de uno o varios candidatos en una sola transacción, con un
+    número de consultas que no depende de cuántos se contraten.
     
     Proceso:
-    1. Validar cupos disponibles
-    2. Crear Person (migrar identidad)
-    3. Migrar educación a PersonEducation
-    4. Crear Employment
-    5. Actualizar estado del candidato
-    6. Decrementar vacantes
-    7. Detectar otros finalistas
+    1. Bloquear las posiciones y validar cupos disponibles
+    2. Reutilizar la Person existente (misma cédula o correo: reingreso) o crearla
+    3. Crear cédula, correo y teléfono de las personas nuevas
+    4. Migrar educación a PersonEducation (catálogos precargados)
+    5. Crear los contratos (Employment), su historial y su log de estatus
+    6. Descontar vacantes y cerrar las vacantes de posiciones llenas
+    7. Marcar candidatos como HIRED, registrar historial y encolar correos
+    8. Detectar otros finalistas
     
     Args:
-        candidate: Instancia de Candidate
-        hire_data: Dict con {hire_date, role, employment_type, employment_status, salary, notes}
-                   Ahora los valores son códigos de Choice (ej: 'EMP', 'FIJ', 'ACT')
+        candidate_ids: IDs de candidatos (deben estar en Oferta o Entrevista)
+        hire_data: Dict con {hire_date, role, employment_type, employment_status, end_date, notes}
+                   Los valores son códigos de Choice (ej: 'EMP', 'FIJ', 'ACT')
+        user: Usuario que ejecuta la contratación (historial)
+        notify: Encolar el correo de contratación a cada candidato
     
     Returns:
-        Dict: {person, employment, other_finalists}
+        Dict: {hired: [{candidate, person, employment, reused_person}],
+               skipped: [{id, reason}], other_finalists: {job_posting_id: [Candidate]},
+               remaining_vacancies: {position_id: int}}
     
     Raises:
-        ValidationError: Si no hay cupos disponibles
+        ValidationError: Si los datos del contrato son inválidos
     """
+    from .utils import enqueue_status_change_emails
     
-    # 1. Validar cupos disponibles con bloqueo optimista
-    position = candidate.job_posting.position
+    role, employment_type, employment_status, end_date = _validate_hire_data(hire_data)
+    occupies_seat = is_active_status(employment_status)
+    hire_date = hire_data['hire_date']
     
-    if not position:
-        raise ValidationError("La vacante no tiene una posición asignada.")
+    candidates = list(
+        Candidate.objects.filter(pk__in=candidate_ids)
+        .select_related('job_posting', 'phone_area_code')
+        .prefetch_related('education')
+    )
+    found = {c.pk for c in candidates}
+    skipped = [{'id': pk, 'reason': 'No encontrado'} for pk in candidate_ids if pk not in found]
+    
+    # 1. Bloqueo de filas de las posiciones para evitar condiciones de carrera
+    position_ids = {c.job_posting.position_id for c in candidates if c.job_posting.position_id}
+    positions = {p.pk: p for p in Position.objects.select_for_update().filter(pk__in=position_ids)}
     
-    # Bloqueo de fila para evitar condiciones de carrera
-    position = position.__class__.objects.select_for_update().get(pk=position.pk)
+    eligible = []
+    for candidate in candidates:
+        position = positions.get(candidate.job_posting.position_id)
+        if candidate.stage not in HIRABLE_STAGES:
+            skipped.append({'id': candidate.pk, 'reason': 'El candidato debe estar en etapa de Oferta o Entrevista para ser contratado.'})
+        elif position is None:
+            skipped.append({'id': candidate.pk, 'reason': 'La vacante no tiene una posición asignada.'})
+        elif position.vacancies <= 0:
+            skipped.append({
+                'id': candidate.pk,
+                'reason': f"No hay cupos disponibles para la posición '{position}'. Vacantes actuales: {position.vacancies}"
+            })
+        else:
+            if occupies_seat:
+                position.vacancies -= 1
+            candidate.position = position
+            candidate.nid_key = parse_national_id(candidate.national_id)
+            candidate.email_key = normalize_email(candidate.email)
+            eligible.append(candidate)
     
-    if position.vacancies <= 0:
-        raise ValidationError(
-            f"No hay cupos disponibles para la posición '{position}'. "
-            f"Vacantes actuales: {position.vacancies}"
+    # 2. Identidad: reingresos por cédula/correo (también entre candidatos del mismo lote)
+    by_nid, by_email = _match_existing_persons(eligible)
+    if occupies_seat and (by_nid or by_email):
+        # Un reingreso no puede duplicar un contrato vigente en la misma posición
+        busy = set(
+            Employment.objects.filter(
+                person_id__in=set(by_nid.values()) | set(by_email.values()),
+                position_id__in=positions,
+                current_status__in=ACTIVE_STATUSES,
+            ).values_list('person_id', 'position_id')
         )
+    else:
+        busy = set()
     
-    # 2. Migración de identidad (Core) - Crear Person
-    # Person solo tiene: first_name, second_name, paternal_surname, maternal_surname, 
-    # salutation, gender, marital_status, birthdate, country_of_birth, photo
-    person = Person.objects.create(
-        first_name=candidate.first_name,
-        paternal_surname=candidate.last_name,
-        # Los campos opcionales se pueden agregar después
-    )
+    new_persons = {}
+    hires = []
+    for candidate in eligible:
+        person_id = by_nid.get(candidate.nid_key) or by_email.get(candidate.email_key)
+        if person_id and (person_id, candidate.position.pk) in busy:
+            if occupies_seat:
+                candidate.position.vacancies += 1
+            skipped.append({
+                'id': candidate.pk,
+                'reason': f"La persona ya tiene un contrato vigente en el cargo '{candidate.position}'."
+            })
+            continue
+        person = new_persons.get(candidate.nid_key) or new_persons.get(candidate.email_key)
+        if person_id is None and person is None:
+            person = Person(first_name=candidate.first_name, paternal_surname=candidate.last_name)
+            for key in (candidate.nid_key, candidate.email_key):
+                if key:
+                    new_persons[key] = person
+        if person_id:
+            busy.add((person_id, candidate.position.pk))
+        hires.append({'candidate': candidate, 'person_id': person_id, 'person': person})
     
-    # 2.1 Crear NationalId (cédula) si existe
-    if hasattr(candidate, 'national_id') and candidate.national_id:
-        from core.models import NationalId
-        # Parseamos el national_id del candidato (formato: V-12345678)
-        national_id_str = str(candidate.national_id)
-        if '-' in national_id_str:
-            prefix, number = national_id_str.split('-', 1)
-        else:
-            prefix = 'V'  # Default
-            number = national_id_str
-        
-        NationalId.objects.create(
-            person=person,
-            category='CEDULA',
-            document_type=prefix,
-            number=number,
-            is_primary=True
-        )
+    if not hires:
+        return {'hired': [], 'skipped': skipped, 'other_finalists': {}, 'remaining_vacancies': {}}
     
-    # 2.2 Crear PersonEmail si existe
-    if candidate.email:
-        from core.models import PersonEmail
-        PersonEmail.objects.create(
-            person=person,
-            email_address=candidate.email,
-            is_primary=True
-        )
+    created = list({id(p): p for p in new_persons.values()}.values())
+    bulk_create_with_history(created, Person, default_user=user)
+    for hire in hires:
+        if hire['person_id'] is None:
+            hire['person_id'] = hire['person'].pk
     
+    # 3. Documentos de contacto solo para personas nuevas (una vez por persona)
+    national_ids, emails, phones = [], [], []
+    taken_emails = set(by_email)
+    phone_pairs = {
+        (c.phone_area_code_id, normalize_phone(c.phone_subscriber))
+        for c in eligible if c.phone_area_code_id and c.phone_subscriber
+    }
+    taken_phones = set()
+    if phone_pairs:
+        phone_filter = Q()
+        for carrier_code_id, subscriber in phone_pairs:
+            phone_filter |= Q(carrier_code_id=carrier_code_id, subscriber_number=subscriber)
+        taken_phones = set(PersonPhone.objects.filter(phone_filter).values_list('carrier_code_id', 'subscriber_number'))
     
-    # 2.3 Crear PersonPhone si existe
-    if hasattr(candidate, 'phone') and candidate.phone:
-        from core.models import PersonPhone
-        # Parsear el teléfono (asumiendo formato simple number o con código)
-        phone_str = str(candidate.phone)
-        PersonPhone.objects.create(
-            person=person,
-            subscriber_number=phone_str,
-            is_primary=True
-        )
+    seen = set()
+    for hire in hires:
+        candidate, person = hire['candidate'], hire['person']
+        if person is None or person.pk in seen:
+            continue
+        seen.add(person.pk)
+        if candidate.nid_key:
+            national_ids.append(NationalId(
+                person=person, category='CEDULA', document_type=candidate.nid_key[0],
+                number=candidate.nid_key[1], is_primary=True
+            ))
+        if candidate.email_key and candidate.email_key not in taken_emails:
+            taken_emails.add(candidate.email_key)
+            emails.append(PersonEmail(person=person, email_address=candidate.email_key, is_primary=True))
+        if candidate.phone_area_code_id and candidate.phone_subscriber:
+            pair = (candidate.phone_area_code_id, normalize_phone(candidate.phone_subscriber))
+            if pair not in taken_phones:
+                taken_phones.add(pair)
+                phones.append(PersonPhone(
+                    person=person, carrier_code_id=pair[0], subscriber_number=pair[1], is_primary=True
+                ))
+        elif candidate.phone:
+            # Formato antiguo (sin código de área)
+            phones.append(PersonPhone(person=person, subscriber_number=normalize_phone(candidate.phone)[-10:], is_primary=True))
+    NationalId.objects.bulk_create(national_ids)
+    PersonEmail.objects.bulk_create(emails)
+    PersonPhone.objects.bulk_create(phones)
     
-    # 3. Migración del CV (simplificado para desarrollo local)
-    # El archivo permanece en su ubicación original
-    # En producción: aquí se movería a un bucket privado
+    # 4. Migración de educación (Talent). El CV permanece en su ubicación original
+    education_rows = [edu for hire in hires for edu in hire['candidate'].education.all()]
+    if education_rows:
+        levels, fields = _education_catalogs(education_rows)
+        PersonEducation.objects.bulk_create([
+            PersonEducation(
+                person_id=hire['person_id'],
+                school_name=edu.school_name,
+                level=levels[edu.level_name],
+                field_of_study=fields[(levels[edu.level_name].pk, edu.field_name)],
+                start_date=edu.start_date,
+                end_date=edu.end_date,
+            )
+            for hire in hires for edu in hire['candidate'].education.all()
+        ])
     
-    # 4. Migración de educación (Talent)
-    for edu in candidate.education.all():
-        # Intentar encontrar EducationLevel y FieldOfStudy existentes
-        education_level, _ = EducationLevel.objects.get_or_create(
-            name=edu.level_name
+    # 5. Contratos (bulk_create no pasa por Employment.save: lo validado arriba lo reemplaza)
+    employments = [
+        Employment(
+            person_id=hire['person_id'],
+            position=hire['candidate'].position,
+            role=role,
+            employment_type=employment_type,
+            current_status=employment_status,
+            hire_date=hire_date,
+            end_date=end_date,
         )
-        field_of_study, _ = FieldOfStudy.objects.get_or_create(
-            name=edu.field_name
-        )
-        
-        PersonEducation.objects.create(
-            person=person,
-            school_name=edu.school_name,
-            level=education_level,
-            field_of_study=field_of_study,
-            start_date=edu.start_date,
-            end_date=edu.end_date
+        for hire in hires
+    ]
+    bulk_create_with_history(employments, Employment, default_user=user)
+    status_logs = EmploymentStatusLog.objects.bulk_create([
+        EmploymentStatusLog(
+            employment=employment,
+            status=employment_status,
+            start_date=timezone.now().date(),
+            reason="Ingreso inicial / Contratación",
         )
+        for employment in employments
+    ])
+    # bulk_create no dispara la señal que actualiza las series de dotación
+    apply_status_logs(status_logs)
+    for hire, employment in zip(hires, employments):
+        hire['employment'] = employment
+        invalidate_identity(hire['person_id'])
     
-    # 5. Validar que los valores de Choice sean válidos
-    role = hire_data.get('role', RoleChoices.EMPLOYEE)
-    employment_type = hire_data.get('employment_type', EmploymentTypeChoices.PERMANENT)
-    employment_status = hire_data.get('employment_status', EmploymentStatusChoices.ACTIVE)
+    # 6. Vacantes: un UPDATE para todas las posiciones; las llenas cierran sus vacantes publicadas
+    touched = list({hire['candidate'].position.pk: hire['candidate'].position for hire in hires}.values())
+    if occupies_seat:
+        # Con historial: la estructura a la fecha (organization.as_of) lee las vacantes de ahí
+        bulk_update_positions(touched, ['vacancies'], user=user)
+        filled = [p.pk for p in touched if p.vacancies <= 0]
+        closing = list(JobPosting.objects.filter(position_id__in=filled, status='PUBLISHED')) if filled else []
+        if closing:
+            for posting in closing:
+                posting.status = 'CLOSED'
+            bulk_update_with_history(closing, JobPosting, ['status'], default_user=user)
+            invalidate_public_jobs()
     
-    # Validar que sean valores válidos de Choices
-    if role not in dict(RoleChoices.choices):
-        raise ValidationError(f"Rol inválido: {role}")
-    if employment_type not in dict(EmploymentTypeChoices.choices):
-        raise ValidationError(f"Tipo de empleo inválido: {employment_type}")
-    if employment_status not in dict(EmploymentStatusChoices.choices):
-        raise ValidationError(f"Estatus inválido: {employment_status}")
-    
-    # 6. Crear contrato (Employment)
-    employment = Employment.objects.create(
-        person=person,
-        position=position,
-        role=role,
-        employment_type=employment_type,
-        current_status=employment_status,
-        hire_date=hire_data['hire_date'],
-        end_date=hire_data.get('end_date')  # Opcional para contratos temporales
+    # 7. Candidatos contratados: un UPDATE, historial y correos en lote
+    hired_ids = [hire['candidate'].pk for hire in hires]
+    Candidate.objects.filter(pk__in=hired_ids).update(
+        stage='HIRED',
+        notes=Concat(Coalesce(F('notes'), Value('')), Value(f"\n[CONTRATADO] {hire_date}")),
+        updated_at=timezone.now(),
     )
+    hired_candidates = list(Candidate.objects.filter(pk__in=hired_ids).select_related('job_posting'))
+    Candidate.history.bulk_history_create(hired_candidates, update=True, default_user=user)
+    CandidateLog.objects.bulk_create([
+        CandidateLog(candidate=c, user=user, action='HIRED', details="Candidato contratado exitosamente", stage='HIRED')
+        for c in hired_candidates
+    ])
+    if notify:
+        enqueue_status_change_emails(hired_candidates, 'HIRED')
     
-    # 7. Actualizar estado del candidato
-    candidate.stage = 'HIRED'
-    candidate.notes = (candidate.notes or '') + f"\n[CONTRATADO] {hire_data['hire_date']}"
-    candidate.save()
+    # 8. Otros finalistas de las mismas vacantes (una consulta)
+    other_finalists = defaultdict(list)
+    for finalist in Candidate.objects.filter(
+        job_posting_id__in={hire['candidate'].job_posting_id for hire in hires},
+        stage__in=HIRABLE_STAGES,
+    ):
+        other_finalists[finalist.job_posting_id].append(finalist)
     
-    # 8. Decrementar vacante (de forma atómica)
-    # AHORA SE MANEJA AUTOMÁTICAMENTE EN Employment.save()
-    # position.refresh_from_db()
-    # position.vacancies -= 1
-    # position.save()
+    reused = {hire['candidate'].pk for hire in hires if hire['person'] is None}
+    hired_by_id = {c.pk: c for c in hired_candidates}
+    return {
+        'hired': [
+            {
+                'candidate': hired_by_id[hire['candidate'].pk],
+                'person_id': hire['person_id'],
+                'employment': hire['employment'],
+                'reused_person': hire['candidate'].pk in reused,
+            }
+            for hire in hires
+        ],
+        'skipped': skipped,
+        'other_finalists': dict(other_finalists),
+        'remaining_vacancies': {p.pk: p.vacancies for p in touched},
+    }
+
+
+def hire_candidate(candidate, hire_data, user=None):
+    """
+    Contratar un solo candidato (ver hire_candidates).
     
-    # 9. Detectar otros finalistas (candidatos en etapas avanzadas)
-    other_finalists = Candidate.objects.filter(
-        job_posting=candidate.job_posting,
-        stage__in=['OFF', 'INT']
-    ).exclude(pk=candidate.pk)
+    Returns:
+        Dict: {person_id, employment, reused_person, other_finalists, remaining_vacancies}
     
+    Raises:
+        ValidationError: Si no hay cupos disponibles o el candidato no es contratable
+    """
+    result = hire_candidates([candidate.pk], hire_data, user=user)
+    if result['skipped']:
+        raise ValidationError(result['skipped'][0]['reason'])
+    hire = result['hired'][0]
+    position_id = hire['employment'].position_id
     return {
-        'person': person,
-        'employment': employment,
-        'other_finalists': list(other_finalists),
-        'remaining_vacancies': position.vacancies
+        'person_id': hire['person_id'],
+        'employment': hire['employment'],
+        'reused_person': hire['reused_person'],
+        'other_finalists': result['other_finalists'].get(candidate.job_posting_id, []),
+        'remaining_vacancies': result['remaining_vacancies'][position_id],
     }
 
 
-def move_finalists_to_pool(candidate_ids):
+def validate_stage_change(new_stage, current_stage=None):
+    """
+    Valida la etapa destino y, si se indica, la transición desde `current_stage`.
+    
+    Raises:
+        ValidationError: HIRED (solo con hire_candidate), etapa inexistente o transición no permitida
+    """
+    if new_stage == 'HIRED':
+        raise ValidationError("La contratación se registra con la acción Contratar.")
+    if new_stage not in dict(Candidate.STAGE_CHOICES):
+        raise ValidationError(f"Etapa inválida: {new_stage}")
+    if current_stage is not None and new_stage not in Candidate.STAGE_TRANSITIONS.get(current_stage, []):
+        raise ValidationError(transition_error(current_stage, new_stage))
+
+
+def transition_error(current_stage, new_stage):
+    labels = dict(Candidate.STAGE_CHOICES)
+    return f"No se puede pasar de {labels[current_stage]} a {labels[new_stage]}."
+
+
+@transaction.atomic
+def bulk_change_stage(new_stage, candidate_ids=None, job_posting=None, from_stages=None,
+                      notes='', user=None, notify=True):
+    """
+    Cambio de etapa masivo en una sola transacción.
+    
+    Valida cada candidato contra Candidate.STAGE_TRANSITIONS, aplica el cambio
+    con un único UPDATE, registra el historial (simple_history y CandidateLog)
+    con bulk_create y encola las notificaciones en lote.
+    
+    Args:
+        new_stage: Código de etapa destino (no puede ser HIRED)
+        candidate_ids: Lista de IDs (opcional si se indica job_posting)
+        job_posting: JobPosting o ID para operar sobre todos sus candidatos
+        from_stages: Restringe a candidatos que estén en estas etapas
+        notes: Nota que se agrega a cada candidato
+        user: Usuario que ejecuta la acción (para el historial)
+        notify: Encolar correo de notificación a cada candidato movido
+    
+    Returns:
+        Dict: {updated_ids, skipped: [{id, stage, reason}]}
+    """
+    from .utils import enqueue_status_change_emails
+    
+    validate_stage_change(new_stage)
+    
+    queryset = Candidate.objects.all()
+    if candidate_ids is not None:
+        queryset = queryset.filter(id__in=candidate_ids)
+    if job_posting is not None:
+        queryset = queryset.filter(job_posting=job_posting)
+    
+    allowed_sources = {
+        stage for stage, targets in Candidate.STAGE_TRANSITIONS.items() if new_stage in targets
+    }
+    if from_stages:
+        allowed_sources &= set(from_stages)
+    
+    # Bloqueo de filas y clasificación en memoria (1 query)
+    current = list(queryset.select_for_update().values_list('id', 'stage'))
+    eligible_ids = [pk for pk, stage in current if stage in allowed_sources]
+    skipped = [
+        {
+            'id': pk,
+            'stage': stage,
+            'reason': transition_error(stage, new_stage)
+        }
+        for pk, stage in current if stage not in allowed_sources
+    ]
+    if candidate_ids is not None:
+        found = {pk for pk, _ in current}
+        skipped += [{'id': pk, 'stage': None, 'reason': 'No encontrado'} for pk in candidate_ids if pk not in found]
+    
+    if not eligible_ids:
+        return {'updated_ids': [], 'skipped': skipped}
+    
+    note = f"\n[{new_stage}] {notes}" if notes else ''
+    update_fields = {'stage': new_stage, 'updated_at': timezone.now()}
+    if note:
+        update_fields['notes'] = Concat(Coalesce(F('notes'), Value('')), Value(note))
+    Candidate.objects.filter(id__in=eligible_ids).update(**update_fields)
+    
+    updated = list(Candidate.objects.filter(id__in=eligible_ids).select_related('job_posting'))
+    
+    # Historial (update() no dispara las señales de simple_history)
+    Candidate.history.bulk_history_create(updated, update=True, default_user=user)
+    CandidateLog.objects.bulk_create([
+        CandidateLog(
+            candidate=c,
+            user=user,
+            action='STAGE_CHANGE',
+            details=f"Cambio masivo a etapa {new_stage}. Notas: {notes}",
+            stage=new_stage
+        )
+        for c in updated
+    ])
+    
+    if notify:
+        enqueue_status_change_emails(updated, new_stage)
+    
+    return {'updated_ids': eligible_ids, 'skipped': skipped}
+
+
+def move_finalists_to_pool(candidate_ids, user=None, notify=False):
     """
     Mover candidatos finalistas al banco de elegibles.
+    Caso particular de bulk_change_stage (solo desde OFF/INT).
     
     Args:
         candidate_ids: Lista de IDs de candidatos
@@ -184,12 +516,12 @@ def move_finalists_to_pool(candidate_ids):
     Returns:
         int: Número de candidatos movidos
     """
-    updated = Candidate.objects.filter(
-        id__in=candidate_ids,
-        stage__in=['OFF', 'INT']
-    ).update(
-        stage='POOL',
-        notes=F('notes') + '\n[Movido a Banco de Elegibles automáticamente]'
+    result = bulk_change_stage(
+        'POOL',
+        candidate_ids=candidate_ids,
+        from_stages=['OFF', 'INT'],
+        notes='Movido a Banco de Elegibles automáticamente',
+        user=user,
+        notify=notify,
     )
-    
-    return updated
+    return len(result['updated_ids'])
@@ -1,7 +1,13 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from organization.models import Position
+from organization.models import Position, PositionRequirement, PositionFunction, Department, JobTitle
 from .models import JobPosting
+from .cache import invalidate_public_jobs
+
+logger = logging.getLogger(__name__)
+
 
 @receiver(post_save, sender=Position)
 def close_job_posting_if_filled(sender, instance, **kwargs):
@@ -15,7 +21,28 @@ def close_job_posting_if_filled(sender, instance, **kwargs):
             status='PUBLISHED'
         )
         
-        if active_postings.exists():
-            # Cerrarlas
-            active_postings.update(status='CLOSED')
-            print(f"INFO: Se cerraron {active_postings.count()} publicaciones para la posición '{instance}' por falta de cupos.")
+        # Cerrarlas (update() no dispara post_save: invalidamos la caché aquí)
+        closed = active_postings.update(status='CLOSED')
+        if closed:
+            invalidate_public_jobs()
+            logger.info("Closed %s job posting(s) for position '%s': no vacancies left", closed, instance)
+
+
+# --- Invalidación de la caché del portal público ---
+# Cualquier cambio en una vacante o en los datos de la posición que muestra
+# (nombre del cargo, departamento, requisitos, funciones) invalida las respuestas.
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_delete, sender=JobPosting)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=PositionRequirement)
+@receiver(post_delete, sender=PositionRequirement)
+@receiver(post_save, sender=PositionFunction)
+@receiver(post_delete, sender=PositionFunction)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=JobTitle)
+@receiver(post_delete, sender=JobTitle)
+def invalidate_public_job_board(sender, **kwargs):
+    invalidate_public_jobs()
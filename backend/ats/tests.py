@@ -1,3 +1,732 @@
-from django.test import TestCase
+import json
+import smtplib
+import warnings
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import ANY, patch
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.models import Person, PersonEmail, NationalId, PersonPhone, PhoneCarrier, PhoneCarrierCode
+from employment.models import Employment, EmploymentStatusLog
+from organization.as_of import org_snapshot
+from organization.models import Department, JobTitle, Position, PositionFunction, PositionRequirement
+from talent.models import EducationLevel, FieldOfStudy, PersonEducation
+from . import cv_search
+from .cv_search import index_pending_cvs, search_cvs
+from .duplicates import parse_national_id
+from .intake import process_pending_applications, spool_dir
+from .models import (
+    JobPosting, Candidate, CandidateEducation, CandidateLog, ApplicationIntake, OutboundEmail,
+    FunnelDailyStat, FunnelStatDay, CandidateFitProfile, CVIndexEntry
+)
+from .throttles import ApplicationPostingThrottle
+from .utils import deliver_pending_emails, enqueue_status_change_emails
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def reject_everything(path):
+    """Hook de antivirus para las pruebas (ATS_APPLICATION_VIRUS_SCANNER)"""
+    return 'Eicar-Test-Signature'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, ATS_APPLICATION_SPOOL_ROOT=str(Path(MEDIA_ROOT) / 'spool'))
+class PublicApplicationTests(TestCase):
+    """
+    Postulación pública: la vista valida el formato y los duplicados (una sola
+    consulta, ats.duplicates) y encola (ats.intake); el worker revalida y crea
+    el candidato.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.job_posting = JobPosting.objects.create(
+            title='Analista', description='-', status='PUBLISHED', published_date=date.today(), ask_education=True
+        )
+        self.carrier_code = PhoneCarrierCode.objects.create(carrier=PhoneCarrier.objects.create(name='Movilnet'), code='0416')
+
+        employee = Person.objects.create(first_name='Ana', paternal_surname='Pérez')
+        PersonEmail.objects.create(person=employee, email_address='Ana@Example.com')
+        NationalId.objects.create(person=employee, document_type='V', number='12345678')
+        PersonPhone.objects.create(person=employee, carrier_code=self.carrier_code, subscriber_number='1234567')
+
+    def apply(self, **overrides):
+        data = {
+            'job_posting': self.job_posting.pk,
+            'first_name': 'Luis',
+            'last_name': 'Gómez',
+            'email': 'luis@example.com',
+            'national_id': 'V-20.000.000',
+            'phone_area_code': self.carrier_code.pk,
+            'phone_subscriber': '765-4321',
+            'cv_file': SimpleUploadedFile('cv.pdf', b'%PDF-1.4', content_type='application/pdf'),
+            'education': json.dumps([
+                {'school_name': 'UCV', 'level_name': 'Licenciatura', 'field_name': 'Informática', 'start_date': '2015-01-01'},
+                {'school_name': 'USB', 'level_name': 'Maestría', 'field_name': 'Informática', 'start_date': '2020-01-01'},
+            ]),
+        }
+        data.update(overrides)
+        return self.client.post('/api/ats/public/apply/', data, format='multipart')
+
+    def apply_and_process(self, **overrides):
+        response = self.apply(**overrides)
+        self.assertEqual(response.status_code, 202)
+        process_pending_applications()
+        return self.client.get(f"/api/ats/public/apply/{response.data['application_id']}/").data
+
+    def test_application_is_queued_then_promoted(self):
+        response = self.apply(email=' Luis@Example.COM ')
+        self.assertEqual(response.status_code, 202)
+        intake = ApplicationIntake.objects.get(pk=response.data['application_id'])
+        self.assertEqual(intake.status, 'PENDING')
+        self.assertFalse(Candidate.objects.exists())
+
+        self.assertEqual(process_pending_applications(), {'accepted': 1, 'rejected': 0, 'retried': 0, 'failed': 0})
+        intake.refresh_from_db()
+        self.assertEqual(intake.status, 'ACCEPTED')
+        self.assertFalse(spool_dir(intake).exists())
+
+        candidate = intake.candidate
+        self.assertEqual(
+            (candidate.email, candidate.national_id, candidate.phone_subscriber),
+            ('luis@example.com', 'V-20000000', '7654321')
+        )
+        self.assertEqual(candidate.education.count(), 2)
+        self.assertEqual(self.client.get(f'/api/ats/public/apply/{intake.pk}/').data['status'], 'ACCEPTED')
+
+    def test_invalid_format_is_rejected_synchronously(self):
+        response = self.apply(phone_area_code='', phone_subscriber='', education='[]')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('phone', response.data)
+        self.assertFalse(ApplicationIntake.objects.exists())
+
+    def test_registered_identity_is_rejected_synchronously(self):
+        response = self.apply(email='ANA@example.com', national_id='12.345.678', phone_subscriber='123 4567')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'email', 'national_id', 'phone_subscriber'})
+        self.assertFalse(ApplicationIntake.objects.exists())
+
+    def test_repeated_application_to_same_posting(self):
+        self.assertEqual(self.apply_and_process()['status'], 'ACCEPTED')
+        response = self.apply(email='LUIS@example.com', national_id='V-20000001', phone_subscriber='7654322')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['email'][0], 'Ya te has postulado a esta vacante con este correo electrónico.')
+
+    def test_worker_rejects_duplicates_queued_together(self):
+        first = self.apply()
+        second = self.apply(national_id='V-20000001', phone_subscriber='7654322')
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        process_pending_applications()
+        status = self.client.get(f"/api/ats/public/apply/{second.data['application_id']}/").data
+        self.assertEqual(status['status'], 'REJECTED')
+        self.assertIn('email', status['errors'])
+
+    @override_settings(ATS_APPLICATION_VIRUS_SCANNER='ats.tests.reject_everything')
+    def test_virus_scanner_hook(self):
+        status = self.apply_and_process()
+        self.assertEqual(status['status'], 'REJECTED')
+        self.assertIn('Eicar-Test-Signature', status['errors']['cv_file'][0])
+
+    def test_rate_limit_per_posting(self):
+        with patch.object(ApplicationPostingThrottle, 'rate', '1/hour', create=True):
+            self.assertEqual(self.apply().status_code, 202)
+            self.assertEqual(self.apply(email='otro@example.com').status_code, 429)
+
+    def test_parse_national_id(self):
+        self.assertEqual(parse_national_id('v-12.345.678'), ('V', '12345678'))
+        self.assertEqual(parse_national_id('12345678'), ('V', '12345678'))
+        self.assertIsNone(parse_national_id('X-123'))
+
+
+class HireCandidatesTests(TestCase):
+    """Contratación por lotes (ats.services.hire_candidates)."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin', 'x', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        department = Department.objects.create(name='Informática')
+        self.position = Position.objects.create(
+            department=department, job_title=JobTitle.objects.create(name='Analista'), vacancies=4
+        )
+        self.job_posting = JobPosting.objects.create(
+            title='Analista', description='-', status='PUBLISHED', published_date=date.today(), position=self.position
+        )
+
+        # Ex-empleado que vuelve a postularse con la cédula escrita de otra forma
+        self.former = Person.objects.create(first_name='Ana', paternal_surname='Pérez')
+        NationalId.objects.create(person=self.former, document_type='V', number='12345678')
+        Employment.objects.bulk_create([Employment(
+            person=self.former, position=self.position, hire_date=date(2020, 1, 1),
+            end_date=date(2022, 1, 1), current_status='FIN'
+        )])
+
+        self.candidates = [
+            self.candidate(i, national_id='V-12.345.678' if i == 0 else f'V-2000000{i}')
+            for i in range(3)
+        ]
+        self.not_ready = self.candidate(9, stage='NEW')
+
+    def candidate(self, i, national_id='', stage='OFF'):
+        candidate = Candidate.objects.create(
+            job_posting=self.job_posting, first_name='Luis', last_name=f'Gómez{i}', email=f'luis{i}@example.com',
+            national_id=national_id or f'V-3000000{i}', cv_file='candidates/cv/luis.pdf', stage=stage
+        )
+        CandidateEducation.objects.bulk_create([
+            CandidateEducation(candidate=candidate, school_name='UCV', level_name='Licenciatura',
+                               field_name='Informática', start_date=date(2015, 1, 1)),
+            CandidateEducation(candidate=candidate, school_name='USB', level_name='Maestría',
+                               field_name='Informática', start_date=date(2020, 1, 1)),
+        ])
+        return candidate
+
+    def bulk_hire(self, candidates, **extra):
+        return self.client.post('/api/ats/candidates/bulk_hire/', {
+            'candidate_ids': [c.pk for c in candidates],
+            'hire_date': date.today().isoformat(),
+            'role': 'EMP', 'employment_type': 'FIJ', 'employment_status': 'ACT',
+            **extra
+        }, format='json')
+
+    def test_bulk_hire(self):
+        response = self.bulk_hire(self.candidates + [self.not_ready])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['hired_count'], 3)
+        self.assertEqual(response.data['skipped'], [{
+            'id': self.not_ready.pk,
+            'reason': 'El candidato debe estar en etapa de Oferta o Entrevista para ser contratado.'
+        }])
+
+        reused = [h for h in response.data['hired'] if h['reused_person']]
+        self.assertEqual([h['person_id'] for h in reused], [self.former.pk])
+        self.assertEqual(NationalId.objects.filter(number='12345678').count(), 1)
+        self.assertEqual(Person.objects.count(), 3)
+
+        self.assertEqual(EducationLevel.objects.count(), 2)
+        self.assertEqual(FieldOfStudy.objects.count(), 2)
+        self.assertEqual(PersonEducation.objects.count(), 6)
+        self.assertEqual(EmploymentStatusLog.objects.filter(employment__hire_date=date.today()).count(), 3)
+        self.assertEqual(set(Candidate.objects.filter(stage='HIRED').values_list('pk', flat=True)), {c.pk for c in self.candidates})
+        self.assertEqual(CandidateLog.objects.filter(action='HIRED').count(), 3)
+
+        self.position.refresh_from_db()
+        self.assertEqual(self.position.vacancies, 1)
+        self.assertEqual(response.data['remaining_vacancies'], {self.position.pk: 1})
+
+    def test_bulk_hire_respects_vacancies_and_closes_posting(self):
+        Position.objects.filter(pk=self.position.pk).update(vacancies=2)
+        manager = Position.objects.create(department=self.position.department, job_title=JobTitle.objects.create(name='Jefe'))
+        self.position.manager_positions.add(manager)
+        response = self.bulk_hire(self.candidates)
+        self.assertEqual(response.data['hired_count'], 2)
+        self.assertIn('No hay cupos disponibles', response.data['skipped'][0]['reason'])
+        self.job_posting.refresh_from_db()
+        self.assertEqual(self.job_posting.status, 'CLOSED')
+
+        # Vacantes y cierre quedan en el historial, con las líneas de reporte de la posición
+        revision = self.position.history.first()
+        self.assertEqual((revision.vacancies, revision.history_user), (0, self.admin))
+        self.assertEqual([line.to_position_id for line in revision.manager_positions.all()], [manager.pk])
+        self.assertEqual(self.job_posting.history.first().status, 'CLOSED')
+        snapshot = org_snapshot(date.today())
+        position = next(p for p in snapshot['positions'] if p['id'] == self.position.pk)
+        self.assertEqual((position['vacancies'], position['reports_to']), (0, [manager.pk]))
+
+    def test_rehire_with_active_contract_is_skipped(self):
+        Employment.objects.filter(person=self.former).update(current_status='ACT', end_date=None)
+        response = self.bulk_hire(self.candidates[:1])
+        self.assertEqual(response.data['hired_count'], 0)
+        self.assertIn('ya tiene un contrato vigente', response.data['skipped'][0]['reason'])
+
+    def test_single_hire(self):
+        response = self.client.post(f'/api/ats/candidates/{self.candidates[1].pk}/hire/', {
+            'hire_date': date.today().isoformat(), 'role': 'EMP', 'employment_type': 'FIJ', 'employment_status': 'ACT',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['reused_person'])
+        self.assertEqual(response.data['remaining_vacancies'], 3)
+        self.assertEqual(len(response.data['other_finalists']), 2)
+        self.assertEqual(OutboundEmail.objects.filter(candidate=self.candidates[1]).count(), 1)
+
+
+class StageChangeTests(TestCase):
+    """Cambios de etapa individuales y masivos validados con Candidate.STAGE_TRANSITIONS."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        job_posting = JobPosting.objects.create(title='Analista', description='-', status='PUBLISHED', published_date=date.today())
+        self.candidate = Candidate.objects.create(
+            job_posting=job_posting, first_name='Luis', last_name='Gómez', email='luis@example.com',
+            national_id='V-30000000', cv_file='candidates/cv/luis.pdf', stage='NEW'
+        )
+
+    def change(self, stage):
+        return self.client.post(f'/api/ats/candidates/{self.candidate.pk}/change-stage/', {'stage': stage, 'notes': 'ok'}, format='json')
+
+    def test_allowed_transition(self):
+        response = self.change('REV')
+        self.assertEqual(response.status_code, 200)
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.stage, 'REV')
+        self.assertTrue(CandidateLog.objects.filter(candidate=self.candidate, action='STAGE_CHANGE', stage='REV').exists())
+
+    def test_invalid_transition_is_rejected(self):
+        for stage, error in [
+            ('OFF', 'No se puede pasar de Nuevo a Oferta Enviada.'),
+            ('HIRED', 'La contratación se registra con la acción Contratar.'),
+        ]:
+            with self.subTest(stage=stage):
+                response = self.change(stage)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['error'], error)
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.stage, 'NEW')
+        self.assertFalse(CandidateLog.objects.exists())
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_bulk_uses_same_transitions(self):
+        response = self.client.post('/api/ats/candidates/bulk-change-stage/', {
+            'candidate_ids': [self.candidate.pk], 'stage': 'OFF'
+        }, format='json')
+        self.assertEqual(response.data['updated_count'], 0)
+        self.assertEqual(response.data['skipped'][0]['reason'], 'No se puede pasar de Nuevo a Oferta Enviada.')
+
+
+@override_settings(ATS_EMAIL_MAX_ATTEMPTS=3, ATS_EMAIL_RETRY_BASE_SECONDS=60)
+class OutboxDeliveryTests(TestCase):
+    """Entrega por lotes de la bandeja de salida (ats.utils.deliver_pending_emails)."""
+
+    SEND = 'django.core.mail.backends.locmem.EmailBackend.send_messages'
+
+    def setUp(self):
+        job_posting = JobPosting.objects.create(title='Analista', description='-', status='PUBLISHED', published_date=date.today())
+        self.candidates = [
+            Candidate.objects.create(
+                job_posting=job_posting, first_name='Luis', last_name=f'Gómez{i}', email=f'luis{i}@example.com',
+                national_id=f'V-3100000{i}'
+            )
+            for i in range(2)
+        ]
+        self.emails = enqueue_status_change_emails(self.candidates, 'INT')
+
+    def deliver_failing(self):
+        with patch(self.SEND, side_effect=smtplib.SMTPException('Servidor no disponible')), \
+                self.assertLogs('ats.utils', 'WARNING'):
+            return deliver_pending_emails()
+
+    def test_sends_due_emails(self):
+        OutboundEmail.objects.filter(pk=self.emails[1].pk).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(deliver_pending_emails(), {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual([m.to for m in mail.outbox], [['luis0@example.com']])
+        email = OutboundEmail.objects.get(pk=self.emails[0].pk)
+        self.assertEqual((email.status, email.attempts), ('SENT', 1))
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(OutboundEmail.objects.get(pk=self.emails[1].pk).status, 'PENDING')
+
+    def test_lease_keeps_batch_from_other_workers(self):
+        seen = {}
+
+        def send(connection, messages):
+            # Durante el envío el lote está reservado: otro worker no lo toma
+            seen['leased'] = list(OutboundEmail.objects.values_list('next_attempt_at', flat=True))
+            seen['other_worker'] = deliver_pending_emails()
+            return len(messages)
+
+        before = timezone.now()
+        with patch(self.SEND, autospec=True, side_effect=send):
+            self.assertEqual(deliver_pending_emails(), {'sent': 2, 'retried': 0, 'failed': 0})
+        self.assertEqual(seen['other_worker'], {'sent': 0, 'retried': 0, 'failed': 0})
+        for leased_until in seen['leased']:
+            self.assertGreaterEqual(leased_until, before + timedelta(minutes=10))
+
+    def test_batch_is_locked_with_skip_locked(self):
+        with patch.object(OutboundEmail.objects, 'select_for_update', wraps=OutboundEmail.objects.select_for_update) as lock:
+            deliver_pending_emails()
+        lock.assert_called_once_with(skip_locked=True)
+
+    def test_exponential_backoff(self):
+        for attempt, delay in [(1, 60), (2, 120)]:
+            before = timezone.now()
+            self.assertEqual(self.deliver_failing(), {'sent': 0, 'retried': 2, 'failed': 0})
+            email = OutboundEmail.objects.get(pk=self.emails[0].pk)
+            self.assertEqual((email.status, email.attempts, email.last_error), ('PENDING', attempt, 'Servidor no disponible'))
+            self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=delay))
+            self.assertLess(email.next_attempt_at, timezone.now() + timedelta(seconds=delay))
+            # Sin vencer el backoff no se reintenta
+            self.assertEqual(deliver_pending_emails(), {'sent': 0, 'retried': 0, 'failed': 0})
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_fails_after_max_attempts(self):
+        OutboundEmail.objects.update(attempts=2)
+        self.assertEqual(self.deliver_failing(), {'sent': 0, 'retried': 0, 'failed': 2})
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', 'attempts')), {('FAILED', 3)})
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(deliver_pending_emails(), {'sent': 0, 'retried': 0, 'failed': 0})
+        self.assertEqual(mail.outbox, [])
+
+
+class JobPostingListTests(TestCase):
+    """Listados paginados de vacantes (público y administrativo) en orden estable."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.postings = [
+            JobPosting.objects.create(
+                title=f'Vacante {i}', description='-', status='PUBLISHED', published_date=date.today()
+            )
+            for i in range(12)
+        ]
+        # Las últimas creadas pasan a ser las más antiguas, todas con el mismo
+        # created_at: el orden es por fecha y el desempate por id también es estable
+        older = [p.pk for p in self.postings[8:]]
+        JobPosting.objects.filter(pk__in=older).update(created_at=timezone.now() - timedelta(days=1))
+        self.expected = sorted((p.pk for p in self.postings[:8]), reverse=True) + sorted(older, reverse=True)
+
+    def pages(self, url):
+        ids = []
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            for page in (1, 2):
+                response = self.client.get(url, {'page': page})
+                self.assertEqual(response.status_code, 200)
+                ids += [row['id'] for row in response.data['results']]
+        return ids
+
+    def test_public_list_is_ordered(self):
+        self.assertEqual(self.pages('/api/ats/public/jobs/'), self.expected)
+
+    def test_admin_list_is_ordered(self):
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        self.assertEqual(self.pages('/api/ats/jobs/'), self.expected)
+
+
+class FunnelAnalyticsTests(TestCase):
+    """Embudo de reclutamiento (ats.analytics) sobre CandidateLog."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+
+        self.department = Department.objects.create(name='Informática')
+        position = Position.objects.create(
+            department=self.department, job_title=JobTitle.objects.create(name='Analista'), vacancies=2
+        )
+        self.job_posting = JobPosting.objects.create(
+            title='Analista', description='-', status='PUBLISHED', published_date=date.today(), position=position
+        )
+        self.now = timezone.now()
+        hired, rejected, self.waiting = [
+            Candidate.objects.create(
+                job_posting=self.job_posting, first_name='Luis', last_name=f'Gómez{i}',
+                email=f'luis{i}@example.com', national_id=f'V-3000000{i}', cv_file='candidates/cv/luis.pdf'
+            )
+            for i in range(3)
+        ]
+        Candidate.objects.update(created_at=self.days_ago(10))
+        self.log(hired, 'REV', 9)
+        self.log(hired, 'INT', 7)
+        self.log(hired, 'OFF', 6)
+        self.log(hired, 'HIRED', 5, action='HIRED')
+        self.log(rejected, 'REV', 9)
+        self.log(rejected, 'REJ', 8)
+
+    def days_ago(self, days):
+        return self.now - timedelta(days=days)
+
+    def log(self, candidate, stage, days, action='STAGE_CHANGE'):
+        entry = CandidateLog.objects.create(candidate=candidate, action=action, stage=stage)
+        CandidateLog.objects.filter(pk=entry.pk).update(timestamp=self.days_ago(days))
+
+    def report(self, **params):
+        response = self.client.get('/api/ats/jobs/funnel/', {'group_by': 'department', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_funnel_by_department(self):
+        data = self.report()
+        self.assertEqual(len(data['groups']), 1)
+        group = data['groups'][0]
+        self.assertEqual((group['id'], group['name']), (self.department.pk, 'Informática'))
+        self.assertEqual((group['applications'], group['hired']), (3, 1))
+        self.assertEqual(group['time_to_hire']['avg_hours'], 120.0)
+
+        stages = {s['stage']: s for s in group['stages']}
+        self.assertEqual(stages['NEW']['exits'], {'REV': 2})
+        self.assertEqual(stages['REV']['exits'], {'INT': 1, 'REJ': 1})
+        self.assertEqual(stages['REV']['conversion_rate'], 0.5)
+        # LAG: el tiempo en REV va desde el registro anterior del mismo candidato
+        self.assertEqual(stages['REV']['time_in_stage']['avg_hours'], 36.0)
+        self.assertEqual(stages['NEW']['time_in_stage']['avg_hours'], 24.0)
+
+    def test_closed_days_are_consolidated(self):
+        first = self.report()
+        self.assertTrue(FunnelStatDay.objects.filter(day=timezone.localdate() - timedelta(days=1)).exists())
+        self.assertEqual(FunnelDailyStat.objects.filter(to_stage='HIRED').count(), 1)
+
+        # Lo consolidado se lee de la tabla; el día en curso se calcula en vivo
+        CandidateLog.objects.filter(stage='HIRED').delete()
+        self.client.post(f'/api/ats/candidates/{self.waiting.pk}/change-stage/', {'stage': 'REV'}, format='json')
+        second = self.report()
+        self.assertEqual(second['totals']['hired'], first['totals']['hired'])
+        stages = {s['stage']: s for s in second['totals']['stages']}
+        self.assertEqual(stages['NEW']['exits'], {'REV': 3})
+
+    def test_only_missing_days_are_consolidated(self):
+        self.report()
+        applied = timezone.localdate(self.days_ago(10))
+        yesterday = timezone.localdate() - timedelta(days=1)
+        # Faltan el primer y el último día; el de la contratación (hace 5 días) queda guardado
+        FunnelStatDay.objects.filter(day__in=[applied, yesterday]).delete()
+        FunnelDailyStat.objects.filter(day=applied).delete()
+        CandidateLog.objects.filter(stage='HIRED').delete()
+
+        report = self.report()
+        self.assertEqual((report['totals']['applications'], report['totals']['hired']), (3, 1))
+        self.assertEqual(FunnelStatDay.objects.filter(day__in=[applied, yesterday]).count(), 2)
+
+        # Otra petición ya insertó las filas del día pero aún no lo marcó: no choca con la restricción
+        FunnelStatDay.objects.filter(day=applied).delete()
+        self.assertEqual(self.report()['totals']['applications'], 3)
+        self.assertEqual(FunnelDailyStat.objects.filter(day=applied).count(), 1)
+
+    def test_invalid_range(self):
+        response = self.client.get('/api/ats/jobs/funnel/', {'start': '2025-02-01', 'end': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PipelineBoardTests(TestCase):
+    """Tablero de candidatos por etapa (ats.board)."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        self.job_posting = JobPosting.objects.create(
+            title='Analista', description='-', status='PUBLISHED', published_date=date.today()
+        )
+        carrier_code = PhoneCarrierCode.objects.create(carrier=PhoneCarrier.objects.create(name='Movilnet'), code='0416')
+        self.candidates = {}
+        for i, stage in enumerate(['NEW'] * 5 + ['REV'] * 2):
+            self.candidates[i] = Candidate.objects.create(
+                job_posting=self.job_posting, first_name='Luis', last_name=f'Gómez{i}', email=f'luis{i}@example.com',
+                national_id=f'V-3000000{i}', cv_file='candidates/cv/luis.pdf', stage=stage,
+                phone_area_code=carrier_code, phone_subscriber=f'765432{i}'
+            )
+        # Todos con la misma fecha: el desempate por id mantiene el orden estable
+        Candidate.objects.update(created_at=timezone.now())
+
+    def board(self, **params):
+        response = self.client.get(f'/api/ats/jobs/{self.job_posting.pk}/board/', params)
+        self.assertEqual(response.status_code, 200)
+        return {c['stage']: c for c in response.data['columns']}
+
+    def test_board_counts_and_first_page(self):
+        columns = self.board(limit=2)
+        self.assertEqual([c for c in columns], [stage for stage, _ in Candidate.STAGE_CHOICES])
+        self.assertEqual(columns['NEW']['count'], 5)
+        self.assertEqual(columns['REV']['count'], 2)
+        self.assertEqual(columns['HIRED']['count'], 0)
+        self.assertEqual([c['id'] for c in columns['NEW']['candidates']], [self.candidates[4].pk, self.candidates[3].pk])
+        self.assertEqual(columns['NEW']['candidates'][0]['phone_area_code']['code'], '0416')
+        self.assertIsNotNone(columns['NEW']['next_cursor'])
+        self.assertIsNone(columns['REV']['next_cursor'])
+
+    def test_load_more_per_column(self):
+        cursor = self.board(limit=2)['NEW']['next_cursor']
+        seen = []
+        while cursor:
+            column = self.board(limit=2, stage='NEW', cursor=cursor)['NEW']
+            seen += [c['id'] for c in column['candidates']]
+            cursor = column['next_cursor']
+        self.assertEqual(seen, [self.candidates[i].pk for i in (2, 1, 0)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'/api/ats/jobs/{self.job_posting.pk}/board/', {'stage': 'NEW', 'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_candidate_list_without_n_plus_one(self):
+        response = self.client.get('/api/ats/candidates/', {'job_posting': self.job_posting.pk})
+        self.assertEqual(response.data['count'], 7)
+
+
+def make_docx(path, *paragraphs):
+    """DOCX mínimo (solo word/document.xml) para las pruebas de extracción."""
+    ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = ''.join(f'<w:p><w:r><w:t>{p}</w:t></w:r></w:p>' for p in paragraphs)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, 'w') as package:
+        package.writestr('word/document.xml', f'<w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CVSearchTests(TestCase):
+    """Extracción e índice de texto completo de CVs (ats.cv_search)."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        job_posting = JobPosting.objects.create(
+            title='Analista', description='-', status='PUBLISHED', published_date=date.today()
+        )
+        self.developer = self.candidate(job_posting, 0, 'POOL', 'Desarrolladora Python', 'Experiencia en Django y PostgreSQL')
+        self.accountant = self.candidate(job_posting, 1, 'NEW', 'Contador Público', 'Experiencia en auditoría')
+        self.missing = Candidate.objects.create(
+            job_posting=job_posting, first_name='Luis', last_name='Gómez2', email='luis2@example.com',
+            national_id='V-30000002', cv_file='candidates/cv/no-existe.docx'
+        )
+
+    def candidate(self, job_posting, i, stage, *paragraphs):
+        name = f'candidates/cv/cv{i}.docx'
+        make_docx(Path(MEDIA_ROOT) / name, *paragraphs)
+        return Candidate.objects.create(
+            job_posting=job_posting, first_name='Luis', last_name=f'Gómez{i}', email=f'luis{i}@example.com',
+            national_id=f'V-3000000{i}', cv_file=name, stage=stage
+        )
+
+    def search(self, **params):
+        response = self.client.get('/api/ats/candidates/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [r['id'] for r in response.data['results']]
+
+    def index(self):
+        """index_pending_cvs() con el aviso esperado por el CV que no existe."""
+        with self.assertLogs('ats.cv_search', 'WARNING') as logs:
+            result = index_pending_cvs()
+        self.assertIn('candidates/cv/no-existe.docx', logs.output[-1])
+        return result
+
+    def test_background_indexing(self):
+        self.assertEqual(self.index(), {'indexed': 2, 'empty': 0, 'failed': 1})
+        self.assertEqual(index_pending_cvs(), {'indexed': 0, 'empty': 0, 'failed': 0})
+        self.developer.refresh_from_db()
+        self.assertIn('Desarrolladora Python', self.developer.cv_text)
+        self.assertEqual(self.accountant.cv_index.text, 'contador publico experiencia en auditoria')
+
+        # Un archivo nuevo vuelve a quedar pendiente
+        make_docx(Path(MEDIA_ROOT) / 'candidates/cv/cv0-v2.docx', 'Analista de datos')
+        Candidate.objects.filter(pk=self.developer.pk).update(cv_file='candidates/cv/cv0-v2.docx')
+        self.assertEqual(index_pending_cvs()['indexed'], 1)
+        self.assertEqual(self.search(q='python'), [])
+        self.assertEqual(self.search(q='datos'), [self.developer.pk])
+
+    def test_ranked_search(self):
+        self.index()
+        self.assertEqual(self.search(q='Auditoría'), [self.accountant.pk])
+        self.assertEqual(self.search(q='desarroll django'), [self.developer.pk])
+        self.assertEqual(set(self.search(q='experiencia')), {self.developer.pk, self.accountant.pk})
+        self.assertEqual(self.search(q='experiencia', stage='POOL'), [self.developer.pk])
+        self.assertEqual(self.search(q='"OR* -'), [])
+
+        response = self.client.get('/api/ats/candidates/search/', {'q': 'python'})
+        self.assertIn('python', response.data['results'][0]['snippet'])
+
+    def test_person_cv_is_indexed(self):
+        make_docx(Path(MEDIA_ROOT) / 'cv/person/ana.docx', 'Ingeniera en Computación')
+        person = Person.objects.create(first_name='Ana', paternal_surname='Pérez', cv_file='cv/person/ana.docx')
+        self.index()
+        self.assertEqual(search_cvs('computacion', kind='person'), [(person.pk, ANY)])
+
+    def test_unreadable_cv_does_not_abort_batch(self):
+        extract = cv_search.extract_cv_text
+
+        def failing_extract(path, name=None):
+            # Ej. DOCX con un método de compresión que zipfile no soporta
+            if name == self.developer.cv_file.name:
+                raise NotImplementedError("That compression method is not supported")
+            return extract(path, name)
+
+        with patch('ats.cv_search.extract_cv_text', side_effect=failing_extract), \
+                self.assertLogs('ats.cv_search', 'WARNING') as logs:
+            self.assertEqual(index_pending_cvs(), {'indexed': 1, 'empty': 0, 'failed': 2})
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(CVIndexEntry.objects.get(candidate=self.developer).status, 'EMPTY')
+        self.assertEqual(CVIndexEntry.objects.get(candidate=self.accountant).status, 'INDEXED')
+        self.assertEqual(index_pending_cvs(), {'indexed': 0, 'empty': 0, 'failed': 0})
+
+
+class ShortlistTests(TestCase):
+    """Preselección por afinidad candidato-posición (ats.scoring)."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        self.position = Position.objects.create(
+            department=Department.objects.create(name='Informática'),
+            job_title=JobTitle.objects.create(name='Desarrollador'),
+            objective='Construir los sistemas académicos del instituto',
+        )
+        PositionRequirement.objects.create(position=self.position, description='Python y Django')
+        PositionFunction.objects.create(position=self.position, description='Desarrollar APIs REST')
+        self.job_posting = JobPosting.objects.create(
+            title='Desarrollador Backend', description='-', status='PUBLISHED',
+            published_date=date.today(), position=self.position
+        )
+        other = JobPosting.objects.create(title='Otra', description='-')
+        self.developer = self.candidate(self.job_posting, 0, 'Desarrollador Python, Django y APIs REST', 'Informática')
+        self.accountant = self.candidate(self.job_posting, 1, 'Contador público, auditoría', 'Contaduría')
+        self.pooled = self.candidate(other, 2, 'Programador Python', 'Informática', stage='POOL')
+
+    def candidate(self, job_posting, i, cv_text, field, stage='REV'):
+        candidate = Candidate.objects.create(
+            job_posting=job_posting, first_name='Luis', last_name=f'Gómez{i}', email=f'luis{i}@example.com',
+            national_id=f'V-3000000{i}', cv_file='candidates/cv/luis.pdf', cv_text=cv_text, stage=stage
+        )
+        CandidateEducation.objects.create(
+            candidate=candidate, school_name='UCV', level_name='Licenciatura', field_name=field,
+            start_date=date(2015, 1, 1)
+        )
+        return candidate
+
+    def shortlist(self, **params):
+        response = self.client.get(f'/api/ats/jobs/{self.job_posting.pk}/shortlist/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ranked_shortlist(self):
+        data = self.shortlist()
+        self.assertEqual(data['evaluated'], 2)
+        first, second = data['results']
+        self.assertEqual(first['candidate_id'], self.developer.pk)
+        self.assertEqual(first['candidate']['id'], self.developer.pk)
+        self.assertGreater(first['score'], second['score'])
+        self.assertTrue({'python', 'django'} <= set(first['matched_terms']))
+        self.assertGreater(first['education_score'], 0)
+
+        self.assertEqual(len(self.shortlist(min_score=first['score'])['results']), 1)
+
+    def test_pool_scope(self):
+        data = self.shortlist(scope='pool')
+        self.assertEqual([r['candidate_id'] for r in data['results']], [self.pooled.pk])
+
+    def test_profiles_and_scores_are_cached_by_version(self):
+        version = self.shortlist()['version']
+        self.assertEqual(CandidateFitProfile.objects.count(), 2)
+        with patch('ats.scoring.score_profiles') as score:
+            self.assertEqual(self.shortlist()['version'], version)
+            score.assert_not_called()
+
+        PositionRequirement.objects.create(position=self.position, description='Contabilidad')
+        self.assertNotEqual(self.shortlist()['version'], version)
@@ -0,0 +1,28 @@
+"""
+Límites de tasa de la postulación pública (tasas en REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']).
+
+Se aplican por IP a usuarios anónimos y autenticados por igual: el portal es
+público y un token no debe servir para saltarse el límite.
+"""
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ApplicationIPThrottle(SimpleRateThrottle):
+    """Postulaciones por IP, a cualquier vacante."""
+    scope = 'ats_apply_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class ApplicationPostingThrottle(SimpleRateThrottle):
+    """Postulaciones por IP a una misma vacante."""
+    scope = 'ats_apply_posting'
+
+    def get_cache_key(self, request, view):
+        job_posting = request.data.get('job_posting')
+        if not job_posting:
+            # Sin vacante la validación responde 400; no consume cupo
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': f"{self.get_ident(request)}:{job_posting}"}
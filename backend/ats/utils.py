@@ -1,98 +1,188 @@
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
+from datetime import timedelta
+from functools import lru_cache
 from email.mime.image import MIMEImage
+import logging
 import os
 
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Mapeo de etapas a mensajes amigables
+STAGE_MESSAGES = {
+    'REV': 'Tu aplicación ha sido revisada y hemos avanzado a la etapa de Revisión.',
+    'INT': 'Nos gustaría invitarte a una entrevista para conocerte mejor.',
+    'OFF': '¡Felicidades! Queremos hacerte una oferta formal para unirte a nuestro equipo.',
+    'HIRED': '¡Bienvenido al equipo! Has sido contratado exitosamente.',
+    'REJ': 'Gracias por tu interés en IUTIRLA. En esta ocasión hemos decidido avanzar con otros candidatos, pero mantendremos tu perfil en cuenta para futuras oportunidades.',
+    'POOL': 'Has sido seleccionado para nuestro Banco de Elegibles. Te contactaremos cuando se abra una vacante que se ajuste a tu perfil.',
+}
+
+LOGO_FILENAME = 'email-logoiutirla.webp'
+
+
+@lru_cache(maxsize=None)
+def _logo_bytes():
+    """Lee el logo una sola vez por proceso (None si no existe)."""
+    # Ruta asumiendo estructura: backend/ -> ../frontend2/public/email-logoiutirla.webp
+    logo_path = getattr(settings, 'ATS_EMAIL_LOGO_PATH', None) or os.path.join(
+        settings.BASE_DIR.parent, 'frontend2', 'public', LOGO_FILENAME
+    )
+    if not os.path.exists(logo_path):
+        logger.warning("Logo not found at %s", logo_path)
+        return None
+    with open(logo_path, 'rb') as f:
+        return f.read()
+
+
+def _logo_part():
+    data = _logo_bytes()
+    if data is None:
+        return None
+    # MIMEImage no se comparte entre mensajes; se construye desde los bytes cacheados
+    logo = MIMEImage(data)
+    logo.add_header('Content-ID', '<logoiutirla>')
+    logo.add_header('Content-Disposition', 'inline', filename=LOGO_FILENAME)
+    return logo
+
+
+@lru_cache(maxsize=None)
+def _templates(name):
+    """Plantillas (html, txt) compiladas, cacheadas por proceso."""
+    return (
+        get_template(f'ats/emails/{name}.html'),
+        get_template(f'ats/emails/{name}.txt'),
+    )
+
+
+def build_message(subject, recipient, template, context, connection=None):
+    html_template, text_template = _templates(template)
+    msg = EmailMultiAlternatives(
+        subject,
+        text_template.render(context),
+        settings.DEFAULT_FROM_EMAIL,
+        [recipient],
+        connection=connection,
+    )
+    msg.attach_alternative(html_template.render(context), "text/html")
+    logo = _logo_part()
+    if logo is not None:
+        msg.attach(logo)
+    return msg
+
+
+def _status_change_email(candidate, new_stage):
+    """Instancia (sin guardar) de OutboundEmail para un cambio de etapa."""
+    return OutboundEmail(
+        candidate=candidate,
+        recipient=candidate.email,
+        template='status_change',
+        subject=f"Actualización de tu aplicación: {candidate.job_posting.title}",
+        context={
+            'first_name': candidate.first_name,
+            'stage_message': STAGE_MESSAGES.get(new_stage, f"Tu aplicación ha cambiado al estado: {new_stage}"),
+        },
+    )
+
+
+def enqueue_status_change_email(candidate, new_stage):
+    """Encola la notificación de cambio de estado. No bloquea en SMTP."""
+    emails = enqueue_status_change_emails([candidate], new_stage)
+    return emails[0] if emails else None
+
+
+def enqueue_status_change_emails(candidates, new_stage):
+    """Encola notificaciones para varios candidatos con un solo INSERT."""
+    return OutboundEmail.objects.bulk_create(
+        [_status_change_email(c, new_stage) for c in candidates if c.email]
+    )
+
+
 def send_status_change_email(candidate, new_stage):
     """
     Envía un correo electrónico al candidato notificando el cambio de estado.
+    Envío inmediato (síncrono); las vistas usan enqueue_status_change_email.
     """
-    subject = f"Actualización de tu aplicación: {candidate.job_posting.title}"
-    
-    # Mapeo de etapas a mensajes amigables
-    stage_messages = {
-        'REV': 'Tu aplicación ha sido revisada y hemos avanzado a la etapa de Revisión.',
-        'INT': 'Nos gustaría invitarte a una entrevista para conocerte mejor.',
-        'OFF': '¡Felicidades! Queremos hacerte una oferta formal para unirte a nuestro equipo.',
-        'HIRED': '¡Bienvenido al equipo! Has sido contratado exitosamente.',
-        'REJ': 'Gracias por tu interés en IUTIRLA. En esta ocasión hemos decidido avanzar con otros candidatos, pero mantendremos tu perfil en cuenta para futuras oportunidades.',
-        'POOL': 'Has sido seleccionado para nuestro Banco de Elegibles. Te contactaremos cuando se abra una vacante que se ajuste a tu perfil.',
-    }
-    
-    stage_message = stage_messages.get(new_stage, f"Tu aplicación ha cambiado al estado: {new_stage}")
-    
-    html_message = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 8px; background-color: #ffffff; }}
-            .header {{ text-align: center; padding-bottom: 20px; border-bottom: 2px solid #f0f0f0; margin-bottom: 20px; }}
-            .logo {{ max-width: 150px; height: auto; }}
-            .content {{ padding: 0 10px; }}
-            .footer {{ margin-top: 30px; padding-top: 20px; border-top: 1px solid #f0f0f0; text-align: center; font-size: 12px; color: #888; }}
-            .button {{ display: inline-block; padding: 10px 20px; background-color: #0056b3; color: #ffffff; text-decoration: none; border-radius: 5px; margin-top: 20px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <img src="cid:logoiutirla" alt="IUTIRLA Logo" class="logo">
-            </div>
-            <div class="content">
-                <h2>Hola, {candidate.first_name}</h2>
-                <p>{stage_message}</p>
-                <p>Agradecemos tu interés en formar parte de nuestra institución.</p>
-                <p>Si tienes alguna duda, por favor no dudes en contactarnos.</p>
-            </div>
-            <div class="footer">
-                <p>&copy; <a href="https://iutirlaoficial.com/" style="color: inherit; text-decoration: none;">iutirlaoficial.com</a>. Todos los derechos reservados.</p>
-                <p>Este es un correo automático, por favor no respondas a esta dirección.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    plain_message = f"""
-    Hola {candidate.first_name},
-    
-    {stage_message}
-    
-    Saludos,
-    Equipo de RRHH - IUTIRLA
-    """
-    
-    recipient_list = [candidate.email]
-    
+    email = _status_change_email(candidate, new_stage)
     try:
-        msg = EmailMultiAlternatives(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            recipient_list
-        )
-        msg.attach_alternative(html_message, "text/html")
-        
-        # Adjuntar logo
-        # Ruta asumiendo estructura: backend/ats/utils.py -> backend/ -> ../frontend/public/logoiutirla.png
-        # Ajustamos la ruta base para llegar al frontend
-        base_dir = settings.BASE_DIR # backend/
-        logo_path = os.path.join(base_dir.parent, 'frontend2', 'public', 'email-logoiutirla.webp')
-        
-        if os.path.exists(logo_path):
-            with open(logo_path, 'rb') as f:
-                logo_data = f.read()
-                logo = MIMEImage(logo_data)
-                logo.add_header('Content-ID', '<logoiutirla>')
-                logo.add_header('Content-Disposition', 'inline', filename='email-logoiutirla.webp')
-                msg.attach(logo)
-        else:
-            print(f"Logo not found at {logo_path}")
-            
-        msg.send(fail_silently=False)
+        build_message(email.subject, email.recipient, email.template, email.context).send(fail_silently=False)
         return True
     except Exception as e:
-        print(f"Error sending email to {candidate.email}: {e}")
+        logger.error("Error sending email to %s: %s", candidate.email, e)
         return False
+
+
+def _backoff(attempts):
+    base = getattr(settings, 'ATS_EMAIL_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=base * (2 ** (attempts - 1)))
+
+
+def deliver_pending_emails(batch_size=100):
+    """
+    Entrega un lote de correos pendientes con una sola conexión SMTP.
+
+    Returns:
+        Dict: {sent, retried, failed}
+    """
+    max_attempts = getattr(settings, 'ATS_EMAIL_MAX_ATTEMPTS', 5)
+    now = timezone.now()
+
+    with transaction.atomic():
+        # skip_locked permite varios workers en PostgreSQL; SQLite lo ignora
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        # Reserva temporal: otro worker no toma estos correos mientras se envían.
+        # El envío ocurre fuera de la transacción para no bloquear la BD durante el SMTP.
+        OutboundEmail.objects.filter(pk__in=[e.pk for e in batch]).update(
+            next_attempt_at=now + timedelta(minutes=10)
+        )
+
+    if not batch:
+        return {'sent': 0, 'retried': 0, 'failed': 0}
+
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # No se pudo abrir la conexión: todo el lote se reprograma
+        logger.error("Could not open email connection: %s", e)
+        connection = None
+
+    for email in batch:
+        email.attempts += 1
+        try:
+            if connection is None:
+                raise ConnectionError("Conexión de correo no disponible")
+            msg = build_message(email.subject, email.recipient, email.template, email.context, connection)
+            connection.send_messages([msg])
+            email.status = 'SENT'
+            email.sent_at = timezone.now()
+            email.last_error = None
+            result['sent'] += 1
+        except Exception as e:
+            email.last_error = str(e)
+            if email.attempts >= max_attempts:
+                email.status = 'FAILED'
+                result['failed'] += 1
+            else:
+                email.next_attempt_at = timezone.now() + _backoff(email.attempts)
+                result['retried'] += 1
+            logger.warning("Error sending email to %s (attempt %s): %s", email.recipient, email.attempts, e)
+
+    if connection is not None:
+        connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return result
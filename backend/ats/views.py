@@ -1,23 +1,39 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.throttling import BaseThrottle
 from django.utils import timezone
-from django.db.models import Q
-from .models import JobPosting, Candidate, CandidateLog
+from django.db.models import Q, Count
+from .models import JobPosting, Candidate, CandidateLog, ApplicationIntake
 from .serializers import (
     JobPostingListSerializer,
     JobPostingDetailSerializer,
     JobPostingAdminSerializer,
-    CandidateCreateSerializer,
+    ApplicationIntakeSerializer,
+    ApplicationStatusSerializer,
     CandidateListSerializer,
     CandidateDetailSerializer,
     CandidateStageUpdateSerializer,
+    BulkStageChangeSerializer,
     HireCandidateSerializer,
+    BulkHireSerializer,
+    FunnelReportQuerySerializer,
+    PipelineBoardQuerySerializer,
+    CVSearchQuerySerializer,
+    ShortlistQuerySerializer,
     CandidateLogSerializer
 )
-from .services import hire_candidate, move_finalists_to_pool
-from .utils import send_status_change_email
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .services import hire_candidate, hire_candidates, move_finalists_to_pool, bulk_change_stage, validate_stage_change
+from .utils import enqueue_status_change_email
+from .cache import cached_public_response, public_today
+from .intake import receive_application
+from .analytics import funnel_report
+from .board import InvalidCursor, pipeline_board, stage_page
+from .cv_search import query_terms, search_cvs, snippet
+from .scoring import rank_candidates
+from .throttles import ApplicationIPThrottle, ApplicationPostingThrottle
 
 
 # --- ViewSets Públicos (Sin Autenticación) ---
@@ -29,34 +45,59 @@ class PublicJobPostingViewSet(viewsets.ReadOnlyModelViewSet):
     """
     permission_classes = [AllowAny]
     serializer_class = JobPostingListSerializer
+    # Máximo de consultas por acción (core.metrics) cuando la caché no responde
+    query_budgets = {'list': 2, 'retrieve': 3}
     
     def get_queryset(self):
         """Filtrar solo vacantes publicadas y activas"""
-        today = timezone.now().date()
-        return JobPosting.objects.filter(
+        today = public_today()
+        queryset = JobPosting.objects.filter(
             status='PUBLISHED',
             published_date__lte=today
         ).filter(
             Q(closing_date__gte=today) | Q(closing_date__isnull=True)
-        )
+        ).select_related('position__department', 'position__job_title')
+        
+        if self.action == 'retrieve':
+            return queryset.prefetch_related('position__requirements', 'position__functions')
+        # El GROUP BY del annotate descarta Meta.ordering: sin order_by la paginación no es estable
+        return queryset.annotate(candidates_count=Count('candidates')).order_by('-created_at', '-pk')
+    
+    def list(self, request, *args, **kwargs):
+        """Listado servido desde caché (ver ats.cache)"""
+        return cached_public_response(request, lambda: super(PublicJobPostingViewSet, self).list(request, *args, **kwargs))
     
     def retrieve(self, request, *args, **kwargs):
         """Devolver detalle completo de una vacante"""
-        instance = self.get_object()
-        serializer = JobPostingDetailSerializer(instance)
-        return Response(serializer.data)
+        def build():
+            instance = self.get_object()
+            serializer = JobPostingDetailSerializer(instance)
+            return Response(serializer.data)
+        return cached_public_response(request, build)
 
 
-class PublicCandidateApplicationViewSet(viewsets.GenericViewSet):
+class PublicCandidateApplicationViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     """
     ViewSet público para postulaciones.
-    Solo permite crear (POST) candidatos.
+    POST recibe la postulación y la encola (ver ats.intake); GET /<id>/ devuelve su estado.
     """
     permission_classes = [AllowAny]
-    serializer_class = CandidateCreateSerializer
+    queryset = ApplicationIntake.objects.select_related('job_posting')
+    # Recepción: vacante + duplicados + INSERT. Estado: una consulta
+    query_budgets = {'create': 3, 'retrieve': 1}
+    
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ApplicationStatusSerializer
+        return ApplicationIntakeSerializer
+    
+    def get_throttles(self):
+        if self.action == 'create':
+            return [ApplicationIPThrottle(), ApplicationPostingThrottle()]
+        return super().get_throttles()
     
     def create(self, request, *args, **kwargs):
-        """Crear una postulación (candidato)"""
+        """Recibir una postulación; el candidato se crea en segundo plano"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -68,26 +109,46 @@ class PublicCandidateApplicationViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        candidate = serializer.save()
+        intake = receive_application(
+            job_posting,
+            serializer.payload,
+            {'cv_file': serializer.validated_data['cv_file'], 'avatar': serializer.validated_data.get('avatar')},
+            client_ip=BaseThrottle().get_ident(request),
+        )
         
         return Response(
             {
-                'message': '¡Postulación enviada exitosamente!',
-                'candidate_id': candidate.id
+                'message': '¡Postulación recibida! Puedes consultar su estado con el identificador.',
+                'application_id': intake.pk,
+                'status': intake.status,
             },
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_202_ACCEPTED
         )
 
 
 # --- ViewSets Administrativos (Con Autenticación) ---
 
+def _finalist_summary(candidate):
+    return {
+        'id': candidate.id,
+        'name': f"{candidate.first_name} {candidate.last_name}",
+        'stage': candidate.get_stage_display()
+    }
+
+
 class JobPostingViewSet(viewsets.ModelViewSet):
     """
     ViewSet administrativo para gestionar vacantes.
     CRUD completo de vacantes.
     """
     permission_classes = [IsAuthenticated]
-    queryset = JobPosting.objects.all()
+    # funnel: incluye consolidar los días cerrados que falten (ats.analytics)
+    # board: conteo agrupado + ROW_NUMBER por etapa, sin importar cuántas columnas
+    # shortlist: constante; sin caché incluye reconstruir en lote los perfiles (ats.scoring)
+    query_budgets = {'funnel': 16, 'board': 4, 'shortlist': 12}
+    queryset = JobPosting.objects.select_related('position__department', 'position__job_title').annotate(
+        candidates_count=Count('candidates')
+    ).order_by('-created_at', '-pk')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -133,6 +194,85 @@ class JobPostingViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(job_posting)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def funnel(self, request):
+        """
+        Embudo de reclutamiento: postulaciones, transiciones entre etapas,
+        tasas de conversión, tiempo en cada etapa y tiempo de contratación.
+        Parámetros: start, end (por defecto los últimos 90 días), group_by
+        (job_posting, position, department) y filtros job_posting/position/department.
+        """
+        params = FunnelReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        
+        postings = None
+        filters = {
+            'pk': data.get('job_posting'),
+            'position_id': data.get('position'),
+            'position__department_id': data.get('department'),
+        }
+        filters = {field: value for field, value in filters.items() if value is not None}
+        if filters:
+            postings = JobPosting.objects.filter(**filters).values('pk')
+        
+        return Response(funnel_report(data['start'], data['end'], data['group_by'], postings))
+    
+    @action(detail=True, methods=['get'])
+    def board(self, request, pk=None):
+        """
+        Tablero kanban de la vacante: conteo y primeros `limit` candidatos de cada etapa.
+        Con `stage` y `cursor` devuelve la siguiente página de esa columna ("cargar más").
+        """
+        job_posting = self.get_object()
+        params = PipelineBoardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        context = self.get_serializer_context()
+        
+        def serialize(column):
+            column['candidates'] = CandidateListSerializer(column['candidates'], many=True, context=context).data
+            return column
+        
+        if data.get('stage'):
+            try:
+                column = stage_page(job_posting, data['stage'], data.get('cursor'), data['limit'])
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'job_posting': job_posting.pk, 'columns': [serialize(column)]})
+        
+        columns = pipeline_board(job_posting, data['limit'])
+        return Response({'job_posting': job_posting.pk, 'columns': [serialize(c) for c in columns]})
+    
+    @action(detail=True, methods=['get'])
+    def shortlist(self, request, pk=None):
+        """
+        Candidatos ordenados por afinidad con la vacante (CV y educación contra
+        requisitos, funciones y objetivo del cargo). scope=pool evalúa el banco de elegibles.
+        """
+        job_posting = self.get_object()
+        params = ShortlistQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        
+        version, ranking = rank_candidates(job_posting, data['scope'])
+        top = [r for r in ranking if r['score'] >= data['min_score']][:data['limit']]
+        candidates = Candidate.objects.select_related('job_posting', 'phone_area_code').in_bulk(
+            [r['candidate_id'] for r in top]
+        )
+        context = self.get_serializer_context()
+        results = [
+            {**r, 'candidate': CandidateListSerializer(candidates[r['candidate_id']], context=context).data}
+            for r in top if r['candidate_id'] in candidates
+        ]
+        return Response({
+            'job_posting': job_posting.pk,
+            'scope': data['scope'],
+            'version': version,
+            'evaluated': len(ranking),
+            'results': results,
+        })
 
 
 class CandidateViewSet(viewsets.ModelViewSet):
@@ -141,17 +281,23 @@ class CandidateViewSet(viewsets.ModelViewSet):
     Incluye acciones especiales para contratar y cambiar etapa.
     """
     permission_classes = [IsAuthenticated]
-    permission_classes = [IsAuthenticated]
-    queryset = Candidate.objects.select_related('job_posting').prefetch_related('education')
+    # Máximo de consultas por acción (core.metrics), con una de margen para la
+    # autenticación cuando la versión del token no está en caché
+    # hire/bulk_hire: constante sin importar cuántos candidatos se contraten
+    query_budgets = {'list': 3, 'retrieve': 3, 'search': 3, 'hire': 40, 'bulk_hire': 40}
+    queryset = Candidate.objects.select_related('job_posting', 'phone_area_code')
     
-    def log_action(self, candidate, action, details=None):
-        """Registrar una acción en el historial"""
-        user = self.request.user if self.request and hasattr(self.request, 'user') and self.request.user.is_authenticated else None
+    def _acting_user(self):
+        return self.request.user if self.request and hasattr(self.request, 'user') and self.request.user.is_authenticated else None
+    
+    def log_action(self, candidate, action, details=None, stage=None):
+        """Registrar una acción en el historial (stage: etapa resultante, para el embudo)"""
         CandidateLog.objects.create(
             candidate=candidate,
-            user=user,
+            user=self._acting_user(),
             action=action,
-            details=details
+            details=details,
+            stage=stage
         )
 
     def perform_update(self, serializer):
@@ -166,6 +312,9 @@ class CandidateViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtrar por parámetros de query"""
         queryset = super().get_queryset()
+        if self.action != 'list':
+            # El listado no muestra la educación
+            queryset = queryset.prefetch_related('education')
         
         # Filtrar por vacante
         job_posting_id = self.request.query_params.get('job_posting')
@@ -189,6 +338,12 @@ class CandidateViewSet(viewsets.ModelViewSet):
         new_stage = serializer.validated_data['stage']
         notes = serializer.validated_data.get('notes', '')
         
+        # Misma máquina de estados que bulk_change_stage
+        try:
+            validate_stage_change(new_stage, current_stage=candidate.stage)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
         # Actualizar
         candidate.stage = new_stage
         if notes:
@@ -201,16 +356,50 @@ class CandidateViewSet(viewsets.ModelViewSet):
         # Verificar que el cambio se guardó correctamente
         candidate.refresh_from_db()
         if candidate.stage == new_stage:
-            # Enviar notificación por correo
-            send_status_change_email(candidate, new_stage)
+            # Encolar notificación por correo (la entrega la hace `manage.py send_outbox`)
+            enqueue_status_change_email(candidate, new_stage)
         
         # Registrar en historial
-        self.log_action(candidate, 'STAGE_CHANGE', f"Cambio a etapa {new_stage}. Notas: {notes}")
+        self.log_action(candidate, 'STAGE_CHANGE', f"Cambio a etapa {new_stage}. Notas: {notes}", stage=new_stage)
         
         return Response(
             CandidateDetailSerializer(candidate, context={'request': request}).data
         )
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Búsqueda de texto completo en los CVs de los candidatos de todas las
+        vacantes, ordenada por relevancia. Con stage=POOL busca en el banco de elegibles.
+        """
+        params = CVSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        
+        # Una fila de más para saber si hay otra página
+        ranked = search_cvs(
+            data['q'], stage=data.get('stage'), job_posting=data.get('job_posting'),
+            limit=data['limit'] + 1, offset=data['offset']
+        )
+        has_more = len(ranked) > data['limit']
+        ranked = ranked[:data['limit']]
+        
+        candidates = Candidate.objects.select_related('job_posting', 'phone_area_code', 'cv_index').in_bulk(
+            [pk for pk, _ in ranked]
+        )
+        terms = query_terms(data['q'])
+        results = []
+        for pk, score in ranked:
+            candidate = candidates.get(pk)
+            if candidate is None:
+                continue
+            item = CandidateListSerializer(candidate, context=self.get_serializer_context()).data
+            item['score'] = round(score, 4)
+            item['snippet'] = snippet(candidate.cv_index.text, terms)
+            results.append(item)
+        
+        return Response({'results': results, 'has_more': has_more})
+    
     @action(detail=True, methods=['post'])
     def hire(self, request, pk=None):
         """
@@ -230,44 +419,64 @@ class CandidateViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         try:
-            result = hire_candidate(candidate, serializer.validated_data)
-            
-            # Enviar notificación por correo (HIR = Hired)
-            # Verificar primero
-            candidate.refresh_from_db()
-            if candidate.stage == 'HIRED':
-                send_status_change_email(candidate, 'HIRED')
-            
-            # Registrar en historial
-            self.log_action(candidate, 'HIRED', "Candidato contratado exitosamente")
-            
-            response_data = {
-                'message': 'Candidato contratado exitosamente',
-                'person_id': result['person'].id,
-                'employment_id': result['employment'].id,
-                'remaining_vacancies': result['remaining_vacancies'],
-                'other_finalists': []
-            }
-            
-            # Si hay otros finalistas, incluir información
-            if result['other_finalists']:
-                response_data['other_finalists'] = [
-                    {
-                        'id': c.id,
-                        'name': f"{c.first_name} {c.last_name}",
-                        'stage': c.get_stage_display()
-                    }
-                    for c in result['other_finalists']
-                ]
-                response_data['message'] += f". Hay {len(result['other_finalists'])} finalista(s) adicional(es)."
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
+            # Incluye historial y correo de contratación (ver ats.services.hire_candidates)
+            result = hire_candidate(candidate, serializer.validated_data, user=self._acting_user())
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_data = {
+            'message': 'Candidato contratado exitosamente',
+            'person_id': result['person_id'],
+            'employment_id': result['employment'].id,
+            'reused_person': result['reused_person'],
+            'remaining_vacancies': result['remaining_vacancies'],
+            'other_finalists': [_finalist_summary(c) for c in result['other_finalists']]
+        }
+        
+        # Si hay otros finalistas, incluir información
+        if result['other_finalists']:
+            response_data['message'] += f". Hay {len(result['other_finalists'])} finalista(s) adicional(es)."
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_hire(self, request):
+        """
+        Contratar muchos candidatos con las mismas condiciones en una sola transacción.
+        {"candidate_ids": [1, 2, 3], "hire_date": "2025-01-15", "role": "EMP",
+         "employment_type": "FIJ", "employment_status": "ACT"}
+        """
+        serializer = BulkHireSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        
+        try:
+            result = hire_candidates(
+                data.pop('candidate_ids'), data,
+                user=self._acting_user(), notify=data.pop('notify', True)
             )
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': f"{len(result['hired'])} candidato(s) contratado(s)",
+            'hired_count': len(result['hired']),
+            'hired': [
+                {
+                    'candidate_id': hire['candidate'].id,
+                    'person_id': hire['person_id'],
+                    'employment_id': hire['employment'].id,
+                    'reused_person': hire['reused_person'],
+                }
+                for hire in result['hired']
+            ],
+            'skipped': result['skipped'],
+            'remaining_vacancies': result['remaining_vacancies'],
+            'other_finalists': {
+                job_posting_id: [_finalist_summary(c) for c in finalists]
+                for job_posting_id, finalists in result['other_finalists'].items()
+            },
+        })
     
     @action(detail=False, methods=['post'])
     def move_to_pool(self, request):
@@ -280,13 +489,46 @@ class CandidateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        updated_count = move_finalists_to_pool(candidate_ids)
+        user = request.user if request.user.is_authenticated else None
+        updated_count = move_finalists_to_pool(candidate_ids, user=user)
         
         return Response({
             'message': f'{updated_count} candidato(s) movido(s) al Banco de Elegibles',
             'updated_count': updated_count
         })
 
+    @action(detail=False, methods=['post'], url_path='bulk-change-stage')
+    def bulk_change_stage(self, request):
+        """
+        Cambiar la etapa de muchos candidatos en una sola transacción.
+        Ej. rechazar a todos los que no avanzaron:
+        {"job_posting": 3, "from_stages": ["NEW", "REV"], "stage": "REJ"}
+        """
+        serializer = BulkStageChangeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        try:
+            result = bulk_change_stage(
+                data['stage'],
+                candidate_ids=data.get('candidate_ids'),
+                job_posting=data.get('job_posting'),
+                from_stages=data.get('from_stages'),
+                notes=data.get('notes', ''),
+                user=request.user if request.user.is_authenticated else None,
+                notify=data.get('notify', True),
+            )
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        updated_count = len(result['updated_ids'])
+        return Response({
+            'message': f'{updated_count} candidato(s) movido(s) a {dict(Candidate.STAGE_CHOICES)[data["stage"]]}',
+            'updated_count': updated_count,
+            'updated_ids': result['updated_ids'],
+            'skipped': result['skipped'],
+        })
+
     @action(detail=True, methods=['get'])
     def logs(self, request, pk=None):
         """Obtener historial de cambios del candidato"""
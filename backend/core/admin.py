@@ -54,4 +54,8 @@ admin.site.register(models.PersonEmail)
 admin.site.register(models.PersonPhone)
 admin.site.register(models.PersonBankAccount)
 admin.site.register(models.PersonDocument)
-admin.site.register(models.PersonNationality)
\ No newline at end of file
+admin.site.register(models.PersonNationality)
+@admin.register(models.UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'target', 'object_id', 'offset', 'size', 'status', 'created_at')
+    list_filter = ('status', 'target')
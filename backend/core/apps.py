@@ -20,3 +20,9 @@ class CoreConfig(AppConfig):
         connection_created.connect(register_sqlite_functions)
         CharField.register_lookup(Unaccent)
         TextField.register_lookup(Unaccent)
+
+        from .signals import connect_image_signals
+        connect_image_signals()
+
+        from .metrics import instrument_serializers
+        instrument_serializers()
@@ -0,0 +1,257 @@
+"""
+Benchmarks de la API sobre datos sintéticos (core.synthetic).
+
+Por cada escala (número de personas) se crea una BD desechable, se genera el
+conjunto de datos y se llama a los endpoints clave con APIClient. De cada
+endpoint se registra la latencia (varias repeticiones), el número de
+consultas y el pico de memoria de Python (tracemalloc, en una corrida aparte
+para no inflar la latencia). El resultado es un dict serializable a JSON que
+se compara entre commits con compare_results().
+"""
+
+import logging
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import F
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .metrics import RequestMetrics
+from .synthetic import SyntheticDataset
+
+
+@contextmanager
+def throwaway_database(sqlite_file=None):
+    """
+    Crea una copia vacía y migrada de la BD configurada y la destruye al salir.
+    Con SQLite, `sqlite_file` fuerza una BD en archivo (en memoria no hay WAL
+    ni concurrencia real entre hilos).
+    """
+    if sqlite_file and connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = str(sqlite_file)
+
+    setup_test_environment()
+    # Sin log rotativo de core.metrics mientras dura la medición
+    metrics_logger = logging.getLogger('core.requests')
+    handlers, metrics_logger.handlers = metrics_logger.handlers, [logging.NullHandler()]
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        metrics_logger.handlers = handlers
+        teardown_test_environment()
+
+
+def describe_database():
+    db = connection.settings_dict
+    info = {'vendor': connection.vendor, 'conn_max_age': db.get('CONN_MAX_AGE')}
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            info['journal_mode'] = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            info['synchronous'] = cursor.fetchone()[0]
+    elif 'pool' in db.get('OPTIONS', {}):
+        info['pool'] = db['OPTIONS']['pool']
+    return info
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- ENDPOINTS ---
+# Cada uno devuelve (método, url, datos) para la repetición `n`. Los de
+# escritura apuntan a un objeto distinto en cada repetición.
+
+def _hire_request(dataset, n):
+    candidate = dataset.hire_candidates[n]
+    return 'post', f'/api/ats/candidates/{candidate.pk}/hire/', {
+        'hire_date': date.today().isoformat(),
+        'role': 'EMP',
+        'employment_type': 'FIJ',
+        'employment_status': 'ACT',
+    }
+
+
+def _bulk_hire_request(dataset, n):
+    return 'post', '/api/ats/candidates/bulk_hire/', {
+        'candidate_ids': dataset.bulk_hire_batches[n],
+        'hire_date': date.today().isoformat(),
+        'role': 'EMP',
+        'employment_type': 'FIJ',
+        'employment_status': 'ACT',
+    }
+
+
+# Candidatos por llamada a bulk_hire
+BULK_HIRE_SIZE = 500
+
+ENDPOINTS = {
+    'dashboard_stats': lambda ds, n: ('get', '/api/employment/employments/dashboard_stats/', None),
+    'institutional_chart': lambda ds, n: ('get', '/api/organization/departments/institutional_chart/', None),
+    'person_list': lambda ds, n: ('get', '/api/core/persons/', None),
+    'course_list': lambda ds, n: ('get', '/api/training/courses/', None),
+    'generate_reviews': lambda ds, n: ('post', f'/api/performance/periods/{ds.review_periods[n].pk}/generate_reviews/', None),
+    'hire': _hire_request,
+    'bulk_hire': _bulk_hire_request,
+}
+
+
+def _prepare_write_targets(dataset, runs):
+    """
+    Por cada repetición: un período sin boletas, un candidato en Oferta (con
+    cupo) y un lote de BULK_HIRE_SIZE candidatos con educación, de los que uno
+    de cada cinco reutiliza la cédula de una persona existente (reingreso).
+    """
+    from ats.models import Candidate, CandidateEducation, JobPosting
+    from organization.models import Position
+    from performance.models import EvaluationPeriod
+
+    year = date.today().year
+    dataset.review_periods = EvaluationPeriod.objects.bulk_create([
+        EvaluationPeriod(
+            name=f'Benchmark {n}', start_date=date(year, 1, 1), end_date=date(year, 12, 31)
+        )
+        for n in range(runs)
+    ])
+    dataset.hire_candidates = dataset.candidates[:runs]
+    Candidate.objects.filter(pk__in=[c.pk for c in dataset.hire_candidates]).update(stage='OFF')
+    Position.objects.filter(
+        pk__in={c.job_posting.position_id for c in dataset.hire_candidates}
+    ).update(vacancies=F('vacancies') + runs)
+
+    rnd = dataset.random
+    dataset.bulk_hire_batches = []
+    for n in range(runs):
+        posting = JobPosting.objects.create(
+            title=f'Benchmark contratación {n}', description='-', status='PUBLISHED',
+            position=rnd.choice(dataset.staff_positions)
+        )
+        Position.objects.filter(pk=posting.position_id).update(vacancies=F('vacancies') + BULK_HIRE_SIZE)
+        batch = Candidate.objects.bulk_create([
+            Candidate(
+                job_posting=posting, first_name='Lote', last_name=f'Contratación {i}',
+                email=f'lote{n}.{i}@sintetico.test', stage='OFF', cv_file='candidates/cv/sintetico.pdf',
+                national_id=(
+                    f'V-{10_000_000 + rnd.randrange(dataset.persons_count)}' if i % 5 == 0
+                    else f'V-{40_000_000 + n * BULK_HIRE_SIZE + i}'
+                ),
+            )
+            for i in range(BULK_HIRE_SIZE)
+        ])
+        CandidateEducation.objects.bulk_create([
+            CandidateEducation(
+                candidate=c, school_name='Universidad Sintética', level_name=level,
+                field_name=rnd.choice(['Informática', 'Administración', 'Contaduría']), start_date=date(2015, 1, 1)
+            )
+            for c in batch for level in ('Licenciatura', 'Maestría')
+        ])
+        dataset.bulk_hire_batches.append([c.pk for c in batch])
+
+
+def _call(client, dataset, request_for, n):
+    method, url, data = request_for(dataset, n)
+    response = getattr(client, method)(url, data, format='json')
+    return response.status_code
+
+
+def run_scale(persons, endpoints, repeat=5, seed=0, log=print):
+    """Mide `endpoints` sobre una BD con `persons` personas. Devuelve el dict de resultados."""
+    from rest_framework.test import APIClient
+    from accounts.models import User
+
+    with throwaway_database():
+        started = time.perf_counter()
+        dataset = SyntheticDataset(persons=persons, seed=seed)
+        summary = dataset.generate()
+        generation_seconds = time.perf_counter() - started
+        log(f"  dataset: {persons} persons in {generation_seconds:.1f}s")
+
+        # Una corrida de memoria + repeticiones de latencia por endpoint
+        _prepare_write_targets(dataset, repeat + 1)
+        admin = User.objects.create_user('benchmark_admin', 'x', is_staff=True, is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        results = {}
+        for name in endpoints:
+            request_for = ENDPOINTS[name]
+
+            # Contador propio: connection.queries se trunca a 9000 consultas
+            queries = RequestMetrics()
+            with connection.execute_wrapper(queries):
+                tracemalloc.start()
+                try:
+                    status_code = _call(client, dataset, request_for, 0)
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+            latencies = []
+            for n in range(1, repeat + 1):
+                start = time.perf_counter()
+                _call(client, dataset, request_for, n)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            results[name] = {
+                'status': status_code,
+                'queries': queries.queries,
+                'db_ms': round(queries.db_time * 1000, 2),
+                'peak_memory_kb': round(peak / 1024, 1),
+                'runs': repeat,
+                'p50_ms': round(statistics.median(latencies), 2),
+                'min_ms': round(min(latencies), 2),
+                'max_ms': round(max(latencies), 2),
+            }
+            log(f"  {name}: p50={results[name]['p50_ms']}ms queries={queries.queries} "
+                f"peak={results[name]['peak_memory_kb']}KB status={status_code}")
+
+        return {
+            'database': describe_database(),
+            'dataset': {'rows': summary, 'generation_seconds': round(generation_seconds, 2)},
+            'endpoints': results,
+        }
+
+
+def run_benchmarks(scales, endpoints=None, repeat=5, seed=0, log=print):
+    endpoints = endpoints or list(ENDPOINTS)
+    results = {'commit': git_commit(), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeat': repeat, 'scales': {}}
+    for persons in scales:
+        log(f"Scale {persons}")
+        results['scales'][str(persons)] = run_scale(persons, endpoints, repeat=repeat, seed=seed, log=log)
+    return results
+
+
+def compare_results(baseline, current):
+    """
+    Filas (escala, endpoint, métrica, antes, ahora, ratio) para las métricas
+    presentes en ambos resultados.
+    """
+    rows = []
+    for scale, data in current['scales'].items():
+        base_scale = baseline.get('scales', {}).get(scale)
+        if not base_scale:
+            continue
+        for name, metrics in data['endpoints'].items():
+            base = base_scale['endpoints'].get(name)
+            if not base:
+                continue
+            for key in ('p50_ms', 'queries', 'peak_memory_kb'):
+                before, after = base[key], metrics[key]
+                rows.append((scale, name, key, before, after, round(after / before, 2) if before else None))
+    return rows
@@ -0,0 +1,102 @@
+"""
+Derivados de imagen (miniaturas WebP) para fotos, avatares y portadas.
+
+Cada original genera versiones reducidas que se guardan junto a él en el mismo
+storage (ej: photos/person/juan.jpg -> photos/person/juan.jpg__thumb.webp). Se crean
+al subir la imagen (señal post_save, solo si el archivo cambió, borrando los de la
+imagen anterior; ver core.signals) o, para archivos anteriores, de forma perezosa
+la primera vez que se solicitan. Las URLs resueltas se cachean.
+"""
+
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Lado mayor en píxeles de cada derivado
+RENDITIONS = {
+    'thumb': 128,   # Avatares de organigramas, listas y tarjetas
+    'medium': 480,  # Portadas de cursos, perfil
+}
+
+RENDITION_FORMAT = 'WEBP'
+RENDITION_QUALITY = 80
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def rendition_name(name, size):
+    # Se conserva la extensión: foto.jpg y foto.png no deben compartir derivado
+    return f"{name}__{size}.webp"
+
+
+def _cache_key(name, size):
+    return f"img-rendition:{name}:{size}"
+
+
+def _render(field_file, max_side):
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            img.save(buffer, RENDITION_FORMAT, quality=RENDITION_QUALITY, method=4)
+    finally:
+        field_file.close()
+    return buffer.getvalue()
+
+
+def ensure_rendition(field_file, size):
+    """
+    Devuelve el nombre (en storage) del derivado, generándolo si no existe.
+    Retorna None si el original no es una imagen legible.
+    """
+    name = rendition_name(field_file.name, size)
+    storage = field_file.storage
+    if storage.exists(name):
+        return name
+    try:
+        content = _render(field_file, RENDITIONS[size])
+    except (FileNotFoundError, UnidentifiedImageError, OSError):
+        return None
+    # save() puede renombrar si hay colisión; usamos el nombre real devuelto
+    return storage.save(name, ContentFile(content))
+
+
+def generate_renditions(field_file):
+    """Genera los derivados que falten. Un archivo nuevo tiene otro nombre, así que la caché no se invalida."""
+    if not field_file:
+        return
+    for size in RENDITIONS:
+        ensure_rendition(field_file, size)
+
+
+def delete_renditions(name, storage):
+    for size in RENDITIONS:
+        storage.delete(rendition_name(name, size))
+        cache.delete(_cache_key(name, size))
+
+
+def rendition_url(field_file, size, request=None):
+    """URL del derivado `size` (cacheada); cae al original si no se puede generar."""
+    if not field_file:
+        return None
+    key = _cache_key(field_file.name, size)
+    url = cache.get(key)
+    if url is None:
+        name = ensure_rendition(field_file, size)
+        url = field_file.storage.url(name) if name else field_file.url
+        cache.set(key, url, CACHE_TIMEOUT)
+    return request.build_absolute_uri(url) if request else url
+
+
+def rendition_urls(field_file, request=None):
+    """Dict {original, thumb, medium} listo para serializar."""
+    if not field_file:
+        return None
+    urls = {size: rendition_url(field_file, size, request) for size in RENDITIONS}
+    urls['original'] = request.build_absolute_uri(field_file.url) if request else field_file.url
+    return urls
@@ -0,0 +1,131 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+
+def hot_queries():
+    """
+    Consulta principal de cada endpoint caliente y los índices que la sirven.
+    Los valores de los filtros son irrelevantes: solo interesa el plan.
+    """
+    from ats.models import JobPosting, Candidate
+    from core.models import NationalId, PersonEmail, PersonPhone
+    from employment.identity import ACTIVE_STATUSES
+    from employment.models import Employment, EmploymentDepartmentRole, PersonDepartmentRole
+    from training.models import CourseParticipant
+
+    today = date.today()
+    return [
+        (
+            'Identity: active employments of a person',
+            Employment.objects.filter(person_id=1, current_status__in=ACTIVE_STATUSES),
+            ['emp_person_status_idx'],
+        ),
+        (
+            'Position occupancy (vacancies, org chart)',
+            Employment.objects.filter(position_id=1, current_status__in=ACTIVE_STATUSES),
+            ['emp_position_status_idx'],
+        ),
+        (
+            'Recent hires by status',
+            Employment.objects.filter(current_status='ACT', hire_date__gte=today),
+            ['emp_status_hire_idx'],
+        ),
+        (
+            'Contracts expiring by status',
+            Employment.objects.filter(current_status='ACT', end_date__lte=today),
+            ['emp_status_end_idx'],
+        ),
+        (
+            'Current managers of a department (person roles)',
+            PersonDepartmentRole.objects.filter(department_id=1, hierarchical_role='MGR', end_date__isnull=True),
+            ['pdr_dept_role_current_idx'],
+        ),
+        (
+            'Current managers of a department (employment roles)',
+            EmploymentDepartmentRole.objects.filter(department_id=1, hierarchical_role='MGR', end_date__isnull=True),
+            ['edr_dept_role_current_idx'],
+        ),
+        (
+            'ATS: candidates of a posting by stage',
+            Candidate.objects.filter(job_posting_id=1, stage='NEW'),
+            ['ats_candidate_stage_idx'],
+        ),
+        (
+            'ATS: public job board',
+            JobPosting.objects.filter(status='PUBLISHED', published_date__lte=today).filter(
+                Q(closing_date__gte=today) | Q(closing_date__isnull=True)
+            ),
+            ['ats_posting_public_idx'],
+        ),
+        (
+            'Training: enrolled participants of a course',
+            CourseParticipant.objects.filter(course_id=1, enrollment_status='ENR'),
+            ['course_part_status_idx'],
+        ),
+        (
+            'Primary national id of a person',
+            NationalId.objects.filter(person_id=1, is_primary=True),
+            ['nationalid_person_primary_idx'],
+        ),
+        (
+            'Primary email of a person',
+            PersonEmail.objects.filter(person_id=1, is_primary=True),
+            ['email_person_primary_idx'],
+        ),
+        (
+            # Ya la resuelve el índice parcial de la restricción one_primary_phone_per_person
+            'Primary phone of a person',
+            PersonPhone.objects.filter(person_id=1, is_primary=True),
+            [],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Prints the query plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL) of the main query '
+        'of each hot endpoint, without and with the indexes added for it. The "before" plan drops the '
+        'new indexes inside a transaction that is rolled back (on PostgreSQL this briefly locks the table).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-only', action='store_true', help='Only print the plan with the current indexes')
+        parser.add_argument('--analyze', action='store_true', help='Run ANALYZE first so the planner has statistics')
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        queries = hot_queries()
+        # "Antes" = sin ninguno de los índices nuevos (si no, uno compuesto suple a otro)
+        all_index_names = [name for _, _, names in queries for name in names]
+
+        for label, queryset, index_names in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+            if not index_names:
+                self.stdout.write('  served by existing indexes')
+                self._write_plan(queryset.explain())
+                continue
+            self.stdout.write(f'  indexes: {", ".join(index_names)}')
+            if not options['after_only']:
+                self.stdout.write(self.style.WARNING('  before:'))
+                self._write_plan(self._plan_without(queryset, all_index_names))
+            self.stdout.write(self.style.SUCCESS('  after:'))
+            self._write_plan(queryset.explain())
+
+    def _plan_without(self, queryset, index_names):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in index_names:
+                    cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(name)}')
+            plan = queryset.explain()
+            transaction.set_rollback(True)
+        return plan
+
+    def _write_plan(self, plan):
+        for line in plan.splitlines():
+            self.stdout.write(f'    {line}')
@@ -0,0 +1,19 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core.images import generate_renditions
+from core.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Generates missing thumbnail/WebP renditions for existing photos, avatars and course covers'
+
+    def handle(self, *args, **options):
+        for app_label, model_name, field_name in IMAGE_FIELDS:
+            model = apps.get_model(app_label, model_name)
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            count = 0
+            for instance in queryset.only('pk', field_name).iterator():
+                generate_renditions(getattr(instance, field_name))
+                count += 1
+            self.stdout.write(f'{model_name}.{field_name}: {count} image(s) processed')
+        self.stdout.write(self.style.SUCCESS('Renditions up to date.'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.synthetic import SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a synthetic HR dataset (departments, positions, persons, employments, courses, '
+        'reviews, job postings and candidates) with bulk inserts. Meant for an empty database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--persons', type=int, default=1000, help='Number of persons (default: 1000)')
+        parser.add_argument('--departments', type=int, help='Number of departments (default: persons / 50)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation')
+
+    def handle(self, *args, **options):
+        if options['interactive']:
+            answer = input(
+                f"This will insert {options['persons']} synthetic persons into '{connection.settings_dict['NAME']}'. "
+                "Type 'yes' to continue: "
+            )
+            if answer != 'yes':
+                raise CommandError('Cancelled.')
+
+        started = time.perf_counter()
+        summary = SyntheticDataset(
+            persons=options['persons'], seed=options['seed'], departments=options['departments'],
+            log=self.stdout.write
+        ).generate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {sum(summary.values())} rows in {time.perf_counter() - started:.1f}s"
+        ))
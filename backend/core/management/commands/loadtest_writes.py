@@ -0,0 +1,139 @@
+import statistics
+import threading
+import time
+from datetime import date, time as dtime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIClient
+
+from core.benchmarks import describe_database, throwaway_database
+
+User = get_user_model()
+
+SCENARIOS = ('attendance', 'stage')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures write throughput under concurrent API requests against a throwaway copy '
+        'of the configured database (SQLite WAL or PostgreSQL). Scenarios: attendance '
+        '(POST /api/training/attendance/) and stage (POST /api/ats/candidates/<id>/change-stage/).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients (default: 8)')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per client (default: 50)')
+        parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+
+    def handle(self, *args, **options):
+        threads, per_thread = options['threads'], options['requests']
+        scenarios = SCENARIOS if options['scenario'] == 'all' else (options['scenario'],)
+
+        with throwaway_database(sqlite_file=settings.BASE_DIR / 'loadtest.sqlite3'):
+            self.stdout.write(' | '.join(f'{k}={v}' for k, v in describe_database().items()))
+            data = self._seed(threads * per_thread)
+            for scenario in scenarios:
+                self._report(scenario, self._run(scenario, data, threads, per_thread))
+
+    def _seed(self, total):
+        from ats.models import JobPosting, Candidate
+        from core.models import Person
+        from training.models import Course, CourseSession, CourseParticipant
+
+        admin = User.objects.create_user('loadtest_admin', 'x', is_staff=True, is_superuser=True)
+
+        persons = Person.objects.bulk_create([
+            Person(first_name=f'Carga{i}', paternal_surname='Prueba') for i in range(total)
+        ])
+        course = Course.objects.create(name='Curso de carga', start_date=date.today(), end_date=date.today())
+        participants = CourseParticipant.objects.bulk_create([
+            CourseParticipant(course=course, person=p, enrollment_status='ENR') for p in persons
+        ])
+        session = CourseSession.objects.create(
+            course=course, topic='Sesión de carga', date=date.today(),
+            start_time=dtime(8, 0), end_time=dtime(10, 0)
+        )
+
+        posting = JobPosting.objects.create(title='Vacante de carga', description='-', status='PUBLISHED')
+        candidates = Candidate.objects.bulk_create([
+            Candidate(
+                job_posting=posting, first_name=f'Carga{i}', last_name='Prueba',
+                email=f'carga{i}@example.com', national_id=str(10000000 + i), cv_file='candidates/cv/carga.pdf'
+            )
+            for i in range(total)
+        ])
+        return {
+            'admin': admin,
+            'session_id': session.pk,
+            'participant_ids': [p.pk for p in participants],
+            'candidate_ids': [c.pk for c in candidates],
+        }
+
+    def _request(self, client, scenario, data, n):
+        if scenario == 'attendance':
+            return client.post('/api/training/attendance/', {
+                'session': data['session_id'], 'participant': data['participant_ids'][n], 'status': 'PRE'
+            }, format='json')
+        candidate_id = data['candidate_ids'][n]
+        return client.post(
+            f'/api/ats/candidates/{candidate_id}/change-stage/', {'stage': 'REV', 'notes': 'carga'}, format='json'
+        )
+
+    def _run(self, scenario, data, threads, per_thread):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker(offset):
+            client = APIClient()
+            client.force_authenticate(data['admin'])
+            own_latencies, own_errors = [], []
+            try:
+                barrier.wait()
+                for i in range(per_thread):
+                    started = time.perf_counter()
+                    try:
+                        response = self._request(client, scenario, data, offset + i)
+                        if response.status_code >= 400:
+                            own_errors.append(f'HTTP {response.status_code}')
+                    except Exception as e:
+                        own_errors.append(f'{type(e).__name__}: {e}')
+                    own_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(own_latencies)
+                    errors.extend(own_errors)
+
+        workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+        started = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return {'elapsed': time.perf_counter() - started, 'latencies': latencies, 'errors': errors}
+
+    def _report(self, scenario, result):
+        latencies = sorted(result['latencies'])
+        total = len(latencies)
+        ok = total - len(result['errors'])
+        percentiles = statistics.quantiles(latencies, n=100) if total > 1 else latencies * 99
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{scenario}'))
+        self.stdout.write(
+            f"  {total} requests in {result['elapsed']:.2f}s -> {ok / result['elapsed']:.1f} successful writes/s"
+        )
+        self.stdout.write(
+            f"  latency ms: p50={percentiles[49] * 1000:.1f} p95={percentiles[94] * 1000:.1f} "
+            f"p99={percentiles[98] * 1000:.1f} max={latencies[-1] * 1000:.1f}"
+        )
+        if result['errors']:
+            summary = {}
+            for error in result['errors']:
+                summary[error] = summary.get(error, 0) + 1
+            self.stdout.write(self.style.ERROR(f"  {len(result['errors'])} errors: {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('  0 errors'))
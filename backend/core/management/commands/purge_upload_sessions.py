@@ -0,0 +1,15 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from core.uploads import purge_stale_sessions
+
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned chunked-upload sessions and their staging files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help='Max age in hours (default: UPLOAD_SESSION_TTL)')
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options['hours']) if options['hours'] else None
+        count = purge_stale_sessions(max_age)
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} upload session(s).'))
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import ENDPOINTS, compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the key API endpoints on throwaway databases filled with synthetic data at '
+        'each scale, and writes latency, query counts and peak memory to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000',
+                            help='Comma-separated number of persons per run, e.g. 1000,10000,100000 (default: 1000)')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                            help=f'Comma-separated subset of: {", ".join(ENDPOINTS)}')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per endpoint (default: 5)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='JSON file (default: benchmarks/<commit>.json)')
+        parser.add_argument('--compare', help='Previous results JSON to compare against')
+
+    def handle(self, *args, **options):
+        scales = [int(s) for s in options['scales'].split(',') if s]
+        endpoints = [e for e in options['endpoints'].split(',') if e]
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        results = run_benchmarks(scales, endpoints, repeat=options['repeat'], seed=options['seed'], log=self.stdout.write)
+
+        output = Path(options['output'] or settings.BASE_DIR / 'benchmarks' / f"{results['commit'] or 'results'}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nCompared with {baseline.get('commit')}"))
+            for scale, name, key, before, after, ratio in compare_results(baseline, results):
+                style = self.style.ERROR if ratio and ratio > 1.1 else self.style.SUCCESS if ratio and ratio < 0.9 else str
+                self.stdout.write(style(f"  {scale:>7} {name:<20} {key:<15} {before:>10} -> {after:<10} x{ratio}"))
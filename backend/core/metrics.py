@@ -0,0 +1,213 @@
+"""
+Instrumentación por petición: número de consultas SQL, tiempo en BD, tiempo
+de serialización y latencia total, agrupados por vista/acción de DRF
+(ej. "CandidateViewSet.list").
+
+RequestMetricsMiddleware cuenta las consultas con connection.execute_wrapper y
+el tiempo de serialización se mide en Serializer.data / ListSerializer.data
+(instrument_serializers, se instala en CoreConfig.ready). Los resultados se
+publican en la cabecera Server-Timing, en el log rotativo 'core.requests' y en
+un acumulado en memoria del proceso (RequestStatsViewSet).
+
+Presupuestos de consultas: las vistas declaran `query_budgets = {'list': 5}`
+(acción -> máximo de consultas). Si se excede, se registra una advertencia; con
+QUERY_BUDGETS_ENFORCE (activo en las pruebas, ver core.test_runner) se lanza
+QueryBudgetExceeded y la prueba falla.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.requests')
+
+_current = ContextVar('request_metrics', default=None)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Una vista ejecutó más consultas que su presupuesto declarado."""
+
+
+class RequestMetrics:
+    """Acumulado de una petición. Se instala como execute_wrapper de cada conexión."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def current_metrics():
+    """Métricas de la petición en curso (None fuera del middleware)."""
+    return _current.get()
+
+
+def _timed_data(prop):
+    fget = prop.fget
+
+    def data(self):
+        metrics = _current.get()
+        # Solo se mide el serializador externo: los anidados ya quedan dentro
+        if metrics is None or metrics._serializing:
+            return fget(self)
+        metrics._serializing = True
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics._serializing = False
+
+    data._request_metrics = True
+    return property(data)
+
+
+def instrument_serializers():
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for cls in (Serializer, ListSerializer):
+        if not getattr(cls.data.fget, '_request_metrics', False):
+            cls.data = _timed_data(cls.data)
+
+
+def resolve_endpoint(view_func, method):
+    """
+    Nombre "Vista.acción" y presupuesto de consultas de la vista resuelta.
+
+    Returns:
+        Tupla (endpoint, budget); budget es None si la vista no declara uno.
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f"{view_func.__module__}.{view_func.__name__}", None
+
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    budget = (getattr(cls, 'query_budgets', None) or {}).get(action)
+    return f"{cls.__name__}.{action}", budget
+
+
+def _record(endpoint, metrics, total, status_code):
+    db_ms = metrics.db_time * 1000
+    serializer_ms = metrics.serializer_time * 1000
+    total_ms = total * 1000
+
+    with _stats_lock:
+        entry = _stats.setdefault(endpoint, {
+            'count': 0, 'errors': 0, 'queries': 0, 'max_queries': 0,
+            'db_ms': 0.0, 'serializer_ms': 0.0, 'total_ms': 0.0, 'max_ms': 0.0,
+        })
+        entry['count'] += 1
+        entry['errors'] += status_code >= 500
+        entry['queries'] += metrics.queries
+        entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+        entry['db_ms'] += db_ms
+        entry['serializer_ms'] += serializer_ms
+        entry['total_ms'] += total_ms
+        entry['max_ms'] = max(entry['max_ms'], total_ms)
+
+    logger.info(json.dumps({
+        'endpoint': endpoint,
+        'status': status_code,
+        'queries': metrics.queries,
+        'db_ms': round(db_ms, 2),
+        'serializer_ms': round(serializer_ms, 2),
+        'total_ms': round(total_ms, 2),
+    }))
+
+
+def get_stats():
+    """Acumulado por endpoint, ordenado por tiempo total consumido."""
+    with _stats_lock:
+        snapshot = {endpoint: dict(entry) for endpoint, entry in _stats.items()}
+
+    rows = []
+    for endpoint, entry in snapshot.items():
+        count = entry['count']
+        rows.append({
+            'endpoint': endpoint,
+            'count': count,
+            'errors': entry['errors'],
+            'avg_queries': round(entry['queries'] / count, 2),
+            'max_queries': entry['max_queries'],
+            'avg_db_ms': round(entry['db_ms'] / count, 2),
+            'avg_serializer_ms': round(entry['serializer_ms'] / count, 2),
+            'avg_total_ms': round(entry['total_ms'] / count, 2),
+            'max_total_ms': round(entry['max_ms'], 2),
+            'total_ms': round(entry['total_ms'], 2),
+        })
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def server_timing(metrics, total):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'ser;dur={metrics.serializer_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide cada petición que llega a una vista. Debe ir al principio de
+    MIDDLEWARE para que la latencia incluya al resto de middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        endpoint = getattr(request, '_metrics_endpoint', None)
+        if endpoint is None:
+            # No se resolvió ninguna vista (404, estáticos)
+            return response
+
+        _record(endpoint, metrics, total, response.status_code)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics, total)
+
+        budget = request._metrics_budget
+        if budget is not None and metrics.queries > budget:
+            message = f"{endpoint} ejecutó {metrics.queries} consultas (presupuesto: {budget})"
+            if settings.QUERY_BUDGETS_ENFORCE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_endpoint, request._metrics_budget = resolve_endpoint(view_func, request.method)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:42
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_historicalperson_cv_file_person_cv_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(help_text='Clave de core.uploads.UPLOAD_TARGETS (ej: course_resource)', max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Tamaño total declarado en bytes')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Bytes recibidos hasta ahora')),
+                ('checksum', models.CharField(help_text='SHA-256 (hex) del archivo completo', max_length=64)),
+                ('status', models.CharField(choices=[('PRO', 'En Progreso'), ('COM', 'Completada'), ('ERR', 'Fallida')], default='PRO', max_length=3)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nationalid',
+            index=models.Index(condition=models.Q(('is_primary', True)), fields=['person'], name='nationalid_person_primary_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personemail',
+            index=models.Index(condition=models.Q(('is_primary', True)), fields=['person'], name='email_person_primary_idx'),
+        ),
+    ]
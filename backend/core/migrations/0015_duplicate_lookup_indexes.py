@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:16
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='personemail',
+            index=models.Index(django.db.models.functions.text.Lower('email_address'), name='email_address_lower_idx'),
+        ),
+    ]
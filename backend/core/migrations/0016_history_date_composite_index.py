@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_duplicate_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicalperson',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='historicalperson',
+            index=models.Index(fields=['history_date', 'id'], name='core_histor_history_cb511f_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
+import uuid
 from django.db import models
+from django.db.models.functions import Lower
+from django.conf import settings
 from simple_history.models import HistoricalRecords
 
 # Configuración base para mensajes de error
@@ -132,6 +135,10 @@ class NationalId(models.Model):
             # REGLA 2: Esta persona solo puede tener UNO de cada categoría
             ('person', 'category'),
         ]
+        indexes = [
+            # Documento/correo principal de una persona (mismo patrón que one_primary_phone_per_person)
+            models.Index(fields=['person'], condition=models.Q(is_primary=True), name='nationalid_person_primary_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # La cédula siempre es el documento principal
@@ -177,6 +184,14 @@ class PersonEmail(models.Model):
     def __str__(self): 
         return self.email_address
 
+    class Meta:
+        indexes = [
+            # Documento/correo principal de una persona (mismo patrón que one_primary_phone_per_person)
+            models.Index(fields=['person'], condition=models.Q(is_primary=True), name='email_person_primary_idx'),
+            # Búsqueda de duplicados sin distinguir mayúsculas (ats.duplicates)
+            models.Index(Lower('email_address'), name='email_address_lower_idx'),
+        ]
+
 class PersonPhone(models.Model):
     person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name="phones")
     phone_type = models.ForeignKey(PhoneType, on_delete=models.SET_NULL, null=True)
@@ -239,4 +254,34 @@ class EmergencyContact(models.Model):
     relationship = models.ForeignKey(RelationshipType, on_delete=models.SET_NULL, null=True)
     phone_carrier_code = models.ForeignKey(PhoneCarrierCode, on_delete=models.SET_NULL, null=True)
     phone_number = models.CharField(max_length=10)
-    is_primary = models.BooleanField(default=False)
\ No newline at end of file
+    is_primary = models.BooleanField(default=False)
+
+# --- CARGAS POR PARTES ---
+class UploadSession(models.Model):
+    """
+    Carga reanudable (estilo tus) de un archivo grande hacia un FileField existente.
+    Los bytes se acumulan en UPLOAD_STAGING_ROOT y solo se mueven al almacenamiento
+    definitivo cuando el checksum SHA-256 coincide.
+    """
+    class Status(models.TextChoices):
+        IN_PROGRESS = 'PRO', 'En Progreso'
+        COMPLETED = 'COM', 'Completada'
+        FAILED = 'ERR', 'Fallida'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    target = models.CharField(max_length=50, help_text="Clave de core.uploads.UPLOAD_TARGETS (ej: course_resource)")
+    object_id = models.PositiveBigIntegerField()
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Tamaño total declarado en bytes")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes recibidos hasta ahora")
+    checksum = models.CharField(max_length=64, help_text="SHA-256 (hex) del archivo completo")
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.IN_PROGRESS)
+    error = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self): return f"{self.filename} ({self.offset}/{self.size})"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
+from django.db.models import Prefetch
 from datetime import date
 import re 
 
@@ -10,9 +11,30 @@ from .models import (
     NationalId, EmailType, PersonEmail, PhoneType, PhoneCarrier, 
     PhoneCarrierCode, PersonPhone, Bank, BankAccountType, PersonBankAccount, 
     PersonDocument, RelationshipType, PersonNationality, 
-    Dependent, EmergencyContact
+    Dependent, EmergencyContact, UploadSession
 )
 
+# --- CAMPOS REUTILIZABLES ---
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """URLs por tamaño (thumb, medium, original) de un ImageField. Ver core.images."""
+    def to_representation(self, value):
+        from .images import rendition_urls
+        return rendition_urls(value, self.context.get('request'))
+
+# --- DOCUMENTO PRINCIPAL (listados sin N+1) ---
+def prefetch_primary_national_id(lookup='person__national_ids'):
+    """Prefetch del documento principal; el resultado queda en person.primary_national_ids."""
+    return Prefetch(lookup, queryset=NationalId.objects.filter(is_primary=True), to_attr='primary_national_ids')
+
+
+def primary_national_id(person):
+    """Documento principal de `person`: del prefetch si existe, si no una consulta."""
+    prefetched = getattr(person, 'primary_national_ids', None)
+    if prefetched is not None:
+        return prefetched[0] if prefetched else None
+    return person.national_ids.filter(is_primary=True).first()
+
+
 # --- FUNCIONES DE UTILIDAD ---
 def title_case_cleaner(value):
     if not value: return ""
@@ -624,10 +646,11 @@ class PersonListSerializer(serializers.ModelSerializer):
     primary_email = serializers.SerializerMethodField()
     primary_phone = serializers.SerializerMethodField()
     hiring_search = serializers.SerializerMethodField()
+    photo_renditions = ImageRenditionsField(source='photo')
 
     class Meta:
         model = Person
-        fields = ['id', 'photo', 'full_name', 'primary_document', 'primary_email', 'primary_phone', 'hiring_search']
+        fields = ['id', 'photo', 'photo_renditions', 'full_name', 'primary_document', 'primary_email', 'primary_phone', 'hiring_search']
     
     def get_full_name(self, obj): return f"{obj.first_name} {obj.paternal_surname}".strip()
     
@@ -658,6 +681,7 @@ class PersonSerializer(serializers.ModelSerializer):
     primary_email = serializers.SerializerMethodField()
     primary_phone = serializers.SerializerMethodField()
     photo = serializers.FileField(required=False, allow_null=True)
+    photo_renditions = ImageRenditionsField(source='photo')
     gender_name = serializers.CharField(source='gender.name', read_only=True)
     country_of_birth_name = serializers.CharField(source='country_of_birth.name', read_only=True)
     hiring_search = serializers.SerializerMethodField()
@@ -874,4 +898,43 @@ class PersonNationalitySerializer(serializers.ModelSerializer):
     class Meta: model = PersonNationality; fields = '__all__'
 
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'target', 'object_id', 'filename', 'size', 'offset', 'checksum', 'status', 'error', 'created_at']
+        read_only_fields = ['offset', 'status', 'error']
+
+    def validate_size(self, value):
+        from django.conf import settings
+        if value <= 0:
+            raise serializers.ValidationError("El tamaño debe ser mayor a cero.")
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"El archivo excede el máximo permitido ({settings.UPLOAD_MAX_SIZE} bytes).")
+        return value
+
+    def validate_checksum(self, value):
+        if not re.fullmatch(r"[0-9a-fA-F]{64}", value):
+            raise serializers.ValidationError("El checksum debe ser un SHA-256 en hexadecimal.")
+        return value.lower()
+
+    def validate_filename(self, value):
+        import os
+        name = os.path.basename(value.replace('\\', '/')).strip()
+        if not name:
+            raise serializers.ValidationError("Nombre de archivo inválido.")
+        return name
 
+    def validate(self, data):
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from .uploads import get_target_field, get_target_instance
+        from rest_framework.exceptions import NotFound
+        try:
+            get_target_field(data['target'])
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({"target": e.messages})
+        try:
+            get_target_instance(data['target'], data['object_id'], user=self.context['request'].user)
+        except DjangoValidationError as e:
+            # Registro inexistente o ajeno: 404 sin distinguir
+            raise NotFound(e.messages[0])
+        return data
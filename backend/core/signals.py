@@ -0,0 +1,59 @@
+from django.apps import apps
+from django.db.models.signals import post_init, post_save, post_delete
+from .images import generate_renditions, delete_renditions
+
+# Campos de imagen que generan derivados: (app_label, modelo, campo)
+IMAGE_FIELDS = [
+    ('core', 'Person', 'photo'),
+    ('ats', 'Candidate', 'avatar'),
+    ('training', 'Course', 'cover_image'),
+]
+
+# Nombre no cargado (campo diferido con only()/defer())
+UNKNOWN = object()
+
+
+def _loaded_name(instance, field_name):
+    # Sin pasar por el descriptor: post_init corre en cada fila cargada
+    if field_name not in instance.__dict__:
+        return UNKNOWN
+    value = instance.__dict__[field_name]
+    return getattr(value, 'name', value) or ''
+
+
+def _make_receivers(field_name):
+    def on_init(sender, instance, **kwargs):
+        instance.__dict__.setdefault('_rendition_sources', {})[field_name] = _loaded_name(instance, field_name)
+
+    def on_save(sender, instance, created, raw=False, **kwargs):
+        # Las fixtures (raw) no tienen archivos en disco
+        if raw:
+            return
+        field_file = getattr(instance, field_name)
+        sources = instance.__dict__.setdefault('_rendition_sources', {})
+        previous = sources.get(field_name, UNKNOWN)
+        # Guardar sin cambiar el archivo no toca el storage
+        if not created and previous == (field_file.name or ''):
+            return
+        # Al reemplazar o quitar la imagen, los derivados de la anterior ya no sirven
+        if not created and previous and previous is not UNKNOWN:
+            delete_renditions(previous, field_file.storage)
+        generate_renditions(field_file)
+        sources[field_name] = field_file.name or ''
+
+    def on_delete(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        if field_file:
+            delete_renditions(field_file.name, field_file.storage)
+
+    return on_init, on_save, on_delete
+
+
+def connect_image_signals():
+    for app_label, model_name, field_name in IMAGE_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        on_init, on_save, on_delete = _make_receivers(field_name)
+        uid = f"renditions-{app_label}-{model_name}-{field_name}"
+        post_init.connect(on_init, sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,351 @@
+"""
+Generador de datos sintéticos de RRHH para pruebas de carga y benchmarks.
+
+Todo se inserta con bulk_create por lotes (sin save() ni señales por fila, y
+sin registros de simple_history), de modo que 100k personas se generan en
+segundos. Pensado para una BD vacía o desechable (ver core.benchmarks): los
+documentos, correos y teléfonos se numeran de forma correlativa y chocarían
+con datos reales.
+
+Escala a partir del número de personas:
+- Departamentos en árbol; por departamento una posición jefe y varias
+  posiciones subordinadas (manager_positions -> jefe del departamento, y el
+  jefe -> jefe del departamento padre)
+- Personas con cédula, correo y teléfono principal
+- Contratos (90% activos) con historial de estatus
+- Cursos con módulos, lecciones, participantes y progreso
+- Períodos de evaluación con boletas y detalle por competencia
+- Vacantes publicadas con candidatos
+"""
+
+import random
+from datetime import date, time, timedelta
+
+from django.db import transaction
+
+BATCH_SIZE = 2000
+
+FIRST_NAMES = [
+    'Juan', 'María', 'Pedro', 'Ana', 'Luis', 'Carmen', 'José', 'Laura', 'Miguel', 'Elena',
+    'Carlos', 'Sofía', 'Andrés', 'Valentina', 'Jorge', 'Gabriela', 'Ricardo', 'Daniela',
+]
+SURNAMES = [
+    'García', 'Rodríguez', 'Martínez', 'Hernández', 'López', 'González', 'Pérez', 'Sánchez',
+    'Ramírez', 'Torres', 'Flores', 'Rivas', 'Méndez', 'Castillo', 'Rojas', 'Guzmán',
+]
+JOB_TITLES = [
+    'Analista', 'Asistente', 'Coordinador', 'Especialista', 'Técnico', 'Auxiliar',
+    'Supervisor', 'Docente', 'Secretario', 'Operador', 'Planificador', 'Consultor',
+]
+MANAGER_TITLE = 'Jefe de Departamento'
+
+
+class SyntheticDataset:
+    """
+    Genera un conjunto de datos completo para `persons` personas.
+
+    Uso:
+        summary = SyntheticDataset(persons=10000, seed=1).generate()
+    """
+
+    def __init__(self, persons=1000, seed=0, departments=None, log=None):
+        self.persons_count = persons
+        self.departments_count = departments or max(5, persons // 50)
+        self.random = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.today = date.today()
+        self.summary = {}
+
+    def generate(self):
+        with transaction.atomic():
+            self._catalogs()
+            self._organization()
+            self._persons()
+            self._employments()
+            self._training()
+            self._performance()
+            self._recruitment()
+        return self.summary
+
+    def _bulk(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        key = model._meta.label
+        self.summary[key] = self.summary.get(key, 0) + len(created)
+        self.log(f"  {key}: {len(created)}")
+        return created
+
+    # --- CATÁLOGOS ---
+
+    def _catalogs(self):
+        from core.models import Gender, PhoneCarrier, PhoneCarrierCode
+
+        self.genders = [Gender.objects.get_or_create(name=name)[0] for name in ('Masculino', 'Femenino')]
+        carrier, _ = PhoneCarrier.objects.get_or_create(name='Sintética')
+        self.carrier_codes = [
+            PhoneCarrierCode.objects.get_or_create(carrier=carrier, code=code)[0]
+            for code in ('0412', '0414', '0416', '0424')
+        ]
+
+    # --- ORGANIZACIÓN ---
+
+    def _organization(self):
+        from organization.models import Department, JobTitle, Position
+        from organization.hierarchy import rebuild_closure
+
+        titles = {
+            name: JobTitle.objects.get_or_create(name=name)[0]
+            for name in JOB_TITLES + [MANAGER_TITLE]
+        }
+
+        # Se insertan por niveles para poder apuntar al padre ya creado
+        departments = self._bulk(Department, [Department(name=f'Departamento Sintético 0')])
+        while len(departments) < self.departments_count:
+            level = [
+                Department(name=f'Departamento Sintético {len(departments) + i}', parent=self.random.choice(departments))
+                for i in range(min(len(departments) * 3, self.departments_count - len(departments)))
+            ]
+            departments += self._bulk(Department, level)
+        self.departments = departments
+        # bulk_create no dispara las señales que mantienen la jerarquía
+        rebuild_closure()
+
+        self.manager_positions = self._bulk(Position, [
+            Position(department=dept, job_title=titles[MANAGER_TITLE], is_manager=True, vacancies=0)
+            for dept in departments
+        ])
+        manager_by_dept = {p.department_id: p for p in self.manager_positions}
+
+        staff = []
+        for dept in departments:
+            for name in self.random.sample(JOB_TITLES, self.random.randint(3, 6)):
+                staff.append(Position(department=dept, job_title=titles[name], vacancies=0))
+        self.staff_positions = self._bulk(Position, staff)
+
+        through = Position.manager_positions.through
+        links = [
+            through(from_position_id=p.pk, to_position_id=manager_by_dept[p.department_id].pk)
+            for p in self.staff_positions
+        ]
+        links += [
+            through(from_position_id=p.pk, to_position_id=manager_by_dept[dept.parent_id].pk)
+            for p, dept in zip(self.manager_positions, departments) if dept.parent_id
+        ]
+        self._bulk(through, links)
+
+    # --- PERSONAS ---
+
+    def _persons(self):
+        from core.models import Person, NationalId, PersonEmail, PersonPhone
+
+        rnd = self.random
+        persons = self._bulk(Person, [
+            Person(
+                first_name=rnd.choice(FIRST_NAMES),
+                paternal_surname=rnd.choice(SURNAMES),
+                maternal_surname=rnd.choice(SURNAMES),
+                gender=rnd.choice(self.genders),
+                birthdate=self.today - timedelta(days=rnd.randint(20 * 365, 60 * 365)),
+            )
+            for _ in range(self.persons_count)
+        ])
+        self.persons = persons
+
+        self._bulk(NationalId, [
+            NationalId(person=p, category='CEDULA', document_type='V', number=str(10_000_000 + i), is_primary=True)
+            for i, p in enumerate(persons)
+        ])
+        self._bulk(PersonEmail, [
+            PersonEmail(person=p, email_address=f'persona{i}@sintetico.test', is_primary=True)
+            for i, p in enumerate(persons)
+        ])
+        codes = len(self.carrier_codes)
+        self._bulk(PersonPhone, [
+            PersonPhone(
+                person=p, carrier_code=self.carrier_codes[i % codes],
+                subscriber_number=f'{i // codes:07d}', is_primary=True
+            )
+            for i, p in enumerate(persons)
+        ])
+
+    # --- CONTRATOS ---
+
+    def _employments(self):
+        from employment.models import Employment, EmploymentStatusLog
+        from employment.workforce import rebuild_workforce_stats
+        from organization.models import Position
+
+        rnd = self.random
+        employments = []
+        occupied = {}
+
+        # Un jefe por departamento; el resto repartido en las posiciones subordinadas
+        persons = list(self.persons)
+        for position in self.manager_positions:
+            if not persons:
+                break
+            employments.append(self._employment(persons.pop(), position, active=True))
+            occupied[position.pk] = occupied.get(position.pk, 0) + 1
+        for person in persons:
+            position = rnd.choice(self.staff_positions)
+            active = rnd.random() < 0.9
+            employments.append(self._employment(person, position, active))
+            occupied[position.pk] = occupied.get(position.pk, 0) + active
+        self.employments = self._bulk(Employment, employments)
+        self.active_employments = [e for e in self.employments if e.current_status == 'ACT']
+        self.manager_by_dept = {
+            e.position.department_id: e.person for e in self.employments
+            if e.position.is_manager and e.current_status == 'ACT'
+        }
+
+        # Una vacante libre por posición además de las ocupadas
+        for position in self.manager_positions + self.staff_positions:
+            position.vacancies = occupied.get(position.pk, 0) + 1
+        Position.objects.bulk_update(self.manager_positions + self.staff_positions, ['vacancies'], batch_size=BATCH_SIZE)
+
+        logs = []
+        for e in self.employments:
+            logs.append(EmploymentStatusLog(employment=e, status='ACT', start_date=e.hire_date, reason='Ingreso'))
+            if e.current_status != 'ACT':
+                logs.append(EmploymentStatusLog(employment=e, status=e.current_status, start_date=e.end_date, reason='Egreso'))
+            elif rnd.random() < 0.1:
+                leave = e.hire_date + timedelta(days=rnd.randint(1, 300))
+                logs.append(EmploymentStatusLog(employment=e, status='PER', start_date=leave, reason='Permiso'))
+                logs.append(EmploymentStatusLog(employment=e, status='ACT', start_date=leave + timedelta(days=15), reason='Reintegro'))
+        self._bulk(EmploymentStatusLog, logs)
+        # bulk_create no dispara las señales que mantienen las series de dotación
+        rebuild_workforce_stats()
+
+    def _employment(self, person, position, active):
+        from employment.models import Employment
+
+        rnd = self.random
+        hire_date = self.today - timedelta(days=rnd.randint(30, 15 * 365))
+        employment = Employment(
+            person=person,
+            position=position,
+            role='MGR' if position.is_manager else 'EMP',
+            employment_type='FIJ',
+            current_status='ACT' if active else 'FIN',
+            hire_date=hire_date,
+        )
+        if active and rnd.random() < 0.2:
+            # Contratos a término que vencen en los próximos meses
+            employment.employment_type = 'TMP'
+            employment.end_date = self.today + timedelta(days=rnd.randint(1, 180))
+        elif not active:
+            employment.end_date = hire_date + timedelta(days=rnd.randint(30, (self.today - hire_date).days))
+            employment.exit_reason = 'REN'
+        return employment
+
+    # --- FORMACIÓN ---
+
+    def _training(self):
+        from training.models import (
+            Course, CourseModule, CourseLesson, CourseSession, CourseParticipant, LessonProgress
+        )
+
+        rnd = self.random
+        courses = self._bulk(Course, [
+            Course(
+                name=f'Curso Sintético {i}',
+                start_date=self.today - timedelta(days=30),
+                end_date=self.today + timedelta(days=30),
+                modality=rnd.choice(['PRE', 'VIR', 'ASY']),
+                status='EJE',
+                max_participants=50,
+                instructor=rnd.choice(self.persons),
+            )
+            for i in range(max(3, self.persons_count // 100))
+        ])
+        modules = self._bulk(CourseModule, [
+            CourseModule(course=c, name=f'Módulo {m + 1}', order=m) for c in courses for m in range(3)
+        ])
+        lessons = self._bulk(CourseLesson, [
+            CourseLesson(module=mod, title=f'Lección {n + 1}', order=n, duration_minutes=30)
+            for mod in modules for n in range(4)
+        ])
+        self._bulk(CourseSession, [
+            CourseSession(course=c, topic='Sesión inicial', date=c.start_date, start_time=time(8), end_time=time(10))
+            for c in courses
+        ])
+
+        lessons_by_course = {}
+        for lesson, mod in zip(lessons, [mod for mod in modules for _ in range(4)]):
+            lessons_by_course.setdefault(mod.course_id, []).append(lesson)
+
+        participants = []
+        for course in courses:
+            for person in rnd.sample(self.persons, min(len(self.persons), rnd.randint(10, 40))):
+                participants.append(CourseParticipant(
+                    course=course, person=person, enrollment_status=rnd.choice(['ENR', 'ENR', 'ENR', 'REQ'])
+                ))
+        participants = self._bulk(CourseParticipant, participants)
+
+        self._bulk(LessonProgress, [
+            LessonProgress(enrollment=p, lesson=lesson, completed=True)
+            for p in participants if p.enrollment_status == 'ENR'
+            for lesson in lessons_by_course[p.course_id][:rnd.randint(0, 12)]
+        ])
+
+    # --- DESEMPEÑO ---
+
+    def _performance(self):
+        from performance.models import EvaluationPeriod, Competency, PerformanceReview, ReviewDetail
+
+        year = self.today.year
+        past, self.open_period = self._bulk(EvaluationPeriod, [
+            EvaluationPeriod(name=f'Sintético {year - 1}', start_date=date(year - 1, 1, 1), end_date=date(year - 1, 12, 31), is_active=False),
+            EvaluationPeriod(name=f'Sintético {year}', start_date=date(year, 1, 1), end_date=date(year, 12, 31)),
+        ])
+        competencies = self._bulk(Competency, [
+            Competency(name=f'Competencia {category.label}', category=category.value)
+            for category in Competency.Category
+        ])
+
+        reviews = []
+        for e in self.active_employments:
+            evaluator = self.manager_by_dept.get(e.position.department_id)
+            if evaluator and evaluator.pk != e.person_id:
+                reviews.append(PerformanceReview(
+                    period=past, employment=e, evaluator=evaluator, status='ENV',
+                    final_score=round(self.random.uniform(2, 5), 2)
+                ))
+        reviews = self._bulk(PerformanceReview, reviews)
+        self._bulk(ReviewDetail, [
+            ReviewDetail(review=r, competency=c, score=self.random.randint(1, 5))
+            for r in reviews for c in competencies
+        ])
+
+    # --- RECLUTAMIENTO ---
+
+    def _recruitment(self):
+        from ats.models import JobPosting, Candidate
+
+        rnd = self.random
+        postings = self._bulk(JobPosting, [
+            JobPosting(
+                title=f'Vacante Sintética {i}',
+                description='Vacante generada para pruebas de rendimiento.',
+                position=rnd.choice(self.staff_positions),
+                status='PUBLISHED',
+                published_date=self.today - timedelta(days=rnd.randint(0, 30)),
+                closing_date=self.today + timedelta(days=rnd.randint(1, 60)),
+            )
+            for i in range(max(2, self.persons_count // 200))
+        ])
+        self.job_postings = postings
+
+        candidates = []
+        for posting in postings:
+            for n in range(rnd.randint(10, 30)):
+                index = len(candidates)
+                candidates.append(Candidate(
+                    job_posting=posting,
+                    first_name=rnd.choice(FIRST_NAMES),
+                    last_name=rnd.choice(SURNAMES),
+                    email=f'candidato{index}@sintetico.test',
+                    national_id=f'V-{30_000_000 + index}',
+                    cv_file='candidates/cv/sintetico.pdf',
+                    stage=rnd.choice(['NEW', 'REV', 'INT', 'OFF']),
+                ))
+        self.candidates = self._bulk(Candidate, candidates)
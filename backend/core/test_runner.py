@@ -0,0 +1,16 @@
+import logging
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runner de pruebas del proyecto: los presupuestos de consultas de las vistas
+    (core.metrics) hacen fallar la prueba y no se escribe el log de métricas.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGETS_ENFORCE = True
+        logging.getLogger('core.requests').handlers = [logging.NullHandler()]
@@ -1,3 +1,340 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from collections import Counter
+from datetime import date
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from ats.models import JobPosting, Candidate
+from ats.views import CandidateViewSet
+from employment.models import Employment
+from organization.models import Department, DepartmentClosure, JobTitle, Position
+from training.models import Course, CourseParticipant, CourseResource
+from . import metrics, uploads
+from .images import rendition_name, rendition_url
+from .synthetic import SyntheticDataset
+from .models import Person, NationalId, PersonDocument, UploadSession
+
+
+class HotEndpointDataMixin:
+    """Varias filas por endpoint: un N+1 suma consultas y rompe el presupuesto."""
+    ROWS = 4
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset_stats()
+        self.admin = User.objects.create_user('admin', 'x', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        department = Department.objects.create(name='Informática')
+        boss_position = Position.objects.create(department=department, job_title=JobTitle.objects.create(name='Jefe'))
+        position = Position.objects.create(
+            department=department, job_title=JobTitle.objects.create(name='Analista'), vacancies=self.ROWS
+        )
+        position.manager_positions.add(boss_position)
+
+        self.course = Course.objects.create(name='Curso', start_date=date.today(), end_date=date.today())
+        self.job_posting = JobPosting.objects.create(
+            title='Analista', description='-', status='PUBLISHED', published_date=date.today(), position=position
+        )
+        persons = [Person.objects.create(first_name='Ana', paternal_surname=f'Pérez{i}') for i in range(self.ROWS)]
+        for i, person in enumerate(persons):
+            NationalId.objects.create(person=person, number=f'1000000{i}')
+            CourseParticipant.objects.create(course=self.course, person=person)
+            Candidate.objects.create(
+                job_posting=self.job_posting, first_name='Ana', last_name=f'Pérez{i}',
+                email=f'ana{i}@example.com', national_id=f'1000000{i}', cv_file='candidates/cv/ana.pdf'
+            )
+        # bulk_create: sin full_clean ni ajuste de vacantes de Employment.save
+        self.employments = Employment.objects.bulk_create([
+            Employment(person=person, position=position, hire_date=date.today()) for person in persons
+        ])
+
+
+class QueryBudgetTests(HotEndpointDataMixin, TestCase):
+    """Los endpoints calientes se mantienen dentro de su query_budgets (ver core.test_runner)."""
+
+    def test_employment_endpoints(self):
+        self.assertEqual(self.client.get('/api/employment/employments/').status_code, 200)
+        response = self.client.get(f'/api/employment/employments/{self.employments[0].pk}/')
+        self.assertEqual(response.data['person_document'], 'V-10000000')
+
+    def test_course_participants(self):
+        response = self.client.get(f'/api/training/participants/?course={self.course.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row['person_id_document'] for row in response.data['results']},
+            {f'V-1000000{i}' for i in range(self.ROWS)}
+        )
+
+    def test_candidates(self):
+        response = self.client.get(f'/api/ats/candidates/?job_posting={self.job_posting.pk}')
+        self.assertEqual(response.status_code, 200)
+        candidate_id = response.data['results'][0]['id']
+        self.assertEqual(self.client.get(f'/api/ats/candidates/{candidate_id}/').status_code, 200)
+
+    def test_public_job_board(self):
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get('/api/ats/public/jobs/').status_code, 200)
+        self.assertEqual(anonymous.get(f'/api/ats/public/jobs/{self.job_posting.pk}/').status_code, 200)
+
+
+class RequestMetricsTests(HotEndpointDataMixin, TestCase):
+    ROWS = 2
+
+    def test_exceeding_budget_fails(self):
+        with patch.object(CandidateViewSet, 'query_budgets', {'list': 1}):
+            with self.assertRaises(metrics.QueryBudgetExceeded):
+                self.client.get('/api/ats/candidates/')
+
+    @override_settings(QUERY_BUDGETS_ENFORCE=False)
+    def test_exceeding_budget_only_warns_outside_tests(self):
+        with patch.object(CandidateViewSet, 'query_budgets', {'list': 1}):
+            with self.assertLogs('core.requests', level='WARNING'):
+                self.assertEqual(self.client.get('/api/ats/candidates/').status_code, 200)
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    def test_server_timing_and_stats(self):
+        response = self.client.get('/api/ats/candidates/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", ser;dur=[\d.]+, total;dur=[\d.]+$')
+
+        stats = {row['endpoint']: row for row in self.client.get('/api/core/request-stats/').data}
+        self.assertEqual(stats['CandidateViewSet.list']['count'], 1)
+        self.assertGreater(stats['CandidateViewSet.list']['avg_serializer_ms'], 0)
+
+        self.assertEqual(self.client.post('/api/core/request-stats/reset/').status_code, 204)
+        self.assertEqual(
+            [row['endpoint'] for row in self.client.get('/api/core/request-stats/').data],
+            ['RequestStatsViewSet.reset']
+        )
+
+    def test_stats_require_admin(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('empleado', 'x'))
+        self.assertEqual(client.get('/api/core/request-stats/').status_code, 403)
+
+
+class FileAccessTests(TestCase):
+    """Descargas y cargas por partes solo para staff, el dueño o el instructor del curso (core.uploads)."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media, UPLOAD_STAGING_ROOT=str(Path(self.media) / 'staging'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = Person.objects.create(first_name='Ana', paternal_surname='Pérez')
+        self.instructor = Person.objects.create(first_name='Luis', paternal_surname='Gómez')
+        self.owner_user = User.objects.create_user('ana', 'x', person=self.owner)
+        self.instructor_user = User.objects.create_user('luis', 'x', person=self.instructor)
+        self.stranger = User.objects.create_user('eva', 'x', person=Person.objects.create(first_name='Eva', paternal_surname='Rojas'))
+        self.staff = User.objects.create_user('admin', 'x', is_staff=True)
+
+        Person.objects.filter(pk=self.owner.pk).update(cv_file=self.media_file('cv/person/ana.pdf'))
+        self.document = PersonDocument.objects.create(person=self.owner, file=self.media_file('documents/person/ana.pdf'))
+        course = Course.objects.create(name='Curso', start_date=date.today(), end_date=date.today(), instructor=self.instructor)
+        self.resource = CourseResource.objects.create(course=course, name='Guía', file=self.media_file('training/resources/guia.pdf'))
+        position = Position.objects.create(department=Department.objects.create(name='RRHH'), job_title=JobTitle.objects.create(name='Analista'))
+        posting = JobPosting.objects.create(title='Analista', description='-', status='PUBLISHED', published_date=date.today(), position=position)
+        self.candidate = Candidate.objects.create(
+            job_posting=posting, first_name='Juan', last_name='Díaz', email='juan@example.com', national_id='20000000'
+        )
+        Candidate.objects.filter(pk=self.candidate.pk).update(cv_file=self.media_file('candidates/cv/juan.pdf'))
+
+    def media_file(self, name):
+        path = Path(self.media) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'%PDF-1.4 ' + name.encode())
+        return name
+
+    def status_for(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(url)
+        if response.streaming:
+            # Consumir el contenido cierra el archivo sin emitir request_finished (que cerraría la conexión)
+            b''.join(response.streaming_content)
+        return response.status_code
+
+    def test_download_permissions(self):
+        cases = {
+            f'/api/core/files/person_cv/{self.owner.pk}/': {self.owner_user: 200, self.stranger: 404, self.staff: 200},
+            f'/api/core/files/person_document/{self.document.pk}/': {self.owner_user: 200, self.stranger: 404},
+            f'/api/core/files/course_resource/{self.resource.pk}/': {self.instructor_user: 200, self.owner_user: 404},
+            f'/api/core/files/candidate_cv/{self.candidate.pk}/': {self.owner_user: 404, self.staff: 200},
+        }
+        for url, expected in cases.items():
+            for user, code in expected.items():
+                with self.subTest(url=url, user=user.username):
+                    self.assertEqual(self.status_for(user, url), code)
+
+    def test_upload_requires_access_to_target(self):
+        content = b'nuevo CV'
+        session = {
+            'target': 'person_cv', 'object_id': self.owner.pk, 'filename': 'cv.pdf',
+            'size': len(content), 'checksum': hashlib.sha256(content).hexdigest(),
+        }
+        client = APIClient()
+        client.force_authenticate(self.stranger)
+        self.assertEqual(client.post('/api/core/uploads/', session, format='json').status_code, 404)
+        self.assertEqual(
+            client.post('/api/core/uploads/', {**session, 'target': 'candidate_cv', 'object_id': self.candidate.pk}, format='json').status_code,
+            404
+        )
+
+        client.force_authenticate(self.owner_user)
+        response = client.post('/api/core/uploads/', session, format='json')
+        self.assertEqual(response.status_code, 201)
+        url = f"/api/core/uploads/{response.data['id']}/"
+        response = client.generic('PATCH', url, content, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(client.post(url + 'complete/').status_code, 200)
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.cv_file.read(), content)
+
+    def upload_session(self, content, **fields):
+        return UploadSession.objects.create(
+            user=self.owner_user, target='person_cv', object_id=self.owner.pk, filename='cv.pdf',
+            size=len(content), checksum=hashlib.sha256(content).hexdigest(), **fields
+        )
+
+    def test_chunk_io_runs_outside_transactions(self):
+        content = b'x' * 1000
+        session = self.upload_session(content)
+        depth = len(connection.atomic_blocks)
+        reads = []
+
+        class Stream(BytesIO):
+            def read(stream, size=-1):
+                reads.append(len(connection.atomic_blocks))
+                return super().read(size)
+
+        uploads.append_chunk(session.pk, 0, Stream(content), len(content))
+        self.assertEqual(set(reads), {depth})
+
+        file_sha256 = uploads.file_sha256
+
+        def hash_file(path):
+            reads.append(len(connection.atomic_blocks))
+            return file_sha256(path)
+
+        reads.clear()
+        with patch.object(uploads, 'file_sha256', side_effect=hash_file):
+            _, instance = uploads.finalize_upload(session.pk)
+        self.assertEqual(reads, [depth])
+        self.assertEqual(instance.cv_file.read(), content)
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).status, UploadSession.Status.COMPLETED)
+
+    def test_concurrent_chunk_loses_the_offset(self):
+        content = b'x' * 1000
+        session = self.upload_session(content)
+
+        class Stream(BytesIO):
+            def read(stream, size=-1):
+                # Otra petición avanzó la sesión mientras se leía este bloque
+                UploadSession.objects.filter(pk=session.pk).update(offset=500)
+                return super().read(size)
+
+        with self.assertRaises(ValidationError):
+            uploads.append_chunk(session.pk, 0, Stream(content), len(content))
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).offset, 500)
+
+    def test_finalizing_failed_session_without_file_is_gone(self):
+        content = b'x' * 10
+        session = self.upload_session(
+            content, offset=len(content), status=UploadSession.Status.FAILED, error="El checksum SHA-256 no coincide."
+        )
+        client = APIClient()
+        client.force_authenticate(self.owner_user)
+        response = client.post(f'/api/core/uploads/{session.pk}/complete/')
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.data['error'], "El checksum SHA-256 no coincide.")
+
+
+class ImageRenditionTests(TestCase):
+    """Derivados WebP de core.images: uno por original, aunque compartan nombre base."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def photo(self, name, color, image_format):
+        buffer = BytesIO()
+        Image.new('RGB', (600, 300), color).save(buffer, image_format)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_rendition_name_keeps_extension(self):
+        self.assertEqual(rendition_name('photos/person/foto.jpg', 'thumb'), 'photos/person/foto.jpg__thumb.webp')
+        self.assertNotEqual(rendition_name('foto.jpg', 'thumb'), rendition_name('foto.png', 'thumb'))
+
+    def test_same_base_name_gets_its_own_renditions(self):
+        red = Person.objects.create(first_name='Ana', paternal_surname='Pérez', photo=self.photo('foto.jpg', 'red', 'JPEG'))
+        blue = Person.objects.create(first_name='Luis', paternal_surname='Gómez', photo=self.photo('foto.png', 'blue', 'PNG'))
+
+        for person, channel in ((red, 0), (blue, 2)):
+            with self.subTest(photo=person.photo.name):
+                url = rendition_url(person.photo, 'thumb')
+                self.assertEqual(url, person.photo.storage.url(rendition_name(person.photo.name, 'thumb')))
+                with Image.open(Path(self.media) / rendition_name(person.photo.name, 'thumb')) as thumb:
+                    self.assertEqual(thumb.format, 'WEBP')
+                    self.assertEqual(max(thumb.size), 128)
+                    self.assertGreater(thumb.convert('RGB').getpixel((10, 10))[channel], 200)
+
+    def test_renditions_follow_file_changes(self):
+        person = Person.objects.create(first_name='Ana', paternal_surname='Pérez', photo=self.photo('foto.jpg', 'red', 'JPEG'))
+        old_thumb = Path(self.media) / rendition_name(person.photo.name, 'thumb')
+        self.assertTrue(old_thumb.exists())
+
+        # Guardar otros campos no vuelve a tocar el storage
+        person = Person.objects.get(pk=person.pk)
+        person.first_name = 'Ana María'
+        with patch('core.signals.generate_renditions') as generate, patch('core.signals.delete_renditions') as delete:
+            person.save()
+        generate.assert_not_called()
+        delete.assert_not_called()
+
+        # Al reemplazar la foto se generan los nuevos derivados y se borran los anteriores
+        person.photo = self.photo('nueva.png', 'blue', 'PNG')
+        person.save()
+        self.assertFalse(old_thumb.exists())
+        self.assertTrue((Path(self.media) / rendition_name(person.photo.name, 'thumb')).exists())
+
+
+class SyntheticDatasetTests(TestCase):
+    """Prueba de humo del generador de datos sintéticos (core.synthetic) a escala mínima."""
+
+    def test_small_dataset(self):
+        summary = SyntheticDataset(persons=50, seed=1).generate()
+
+        self.assertEqual(summary['core.Person'], 50)
+        self.assertEqual(summary['core.NationalId'], 50)
+        self.assertEqual(summary['employment.Employment'], 50)
+        self.assertEqual(summary['organization.Department'], 5)
+        for label in ('training.Course', 'performance.PerformanceReview', 'ats.JobPosting', 'ats.Candidate'):
+            self.assertGreater(summary.get(label, 0), 0, label)
+        for model, count in [(Person, 50), (Employment, 50), (Department, 5)]:
+            self.assertEqual(model.objects.count(), count)
+
+        # Jerarquía y vacantes coherentes: cada departamento en la clausura y
+        # cada posición con una vacante libre además de los contratos activos
+        self.assertEqual(DepartmentClosure.objects.filter(depth=0).count(), 5)
+        active = Counter(Employment.objects.filter(current_status='ACT').values_list('position_id', flat=True))
+        for position_id, vacancies in Position.objects.values_list('id', 'vacancies'):
+            self.assertEqual(vacancies, active[position_id] + 1)
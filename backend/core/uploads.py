@@ -0,0 +1,307 @@
+"""
+Cargas reanudables por partes y descargas en streaming de archivos grandes.
+
+El cliente abre una UploadSession indicando el destino (modelo + FileField),
+envía el archivo en bloques con PATCH (cabecera Upload-Offset, estilo tus) y
+al terminar solicita la verificación del checksum. Nada pasa por el parser
+multipart de DRF: cada bloque se copia del stream de la petición directo al
+directorio de staging.
+
+La E/S (leer el bloque de la red, calcular el hash) nunca ocurre dentro de una
+transacción: con SQLite (transaction_mode IMMEDIATE) una transacción abierta
+retiene el bloqueo de escritura de toda la base. La sesión se valida, la E/S
+se hace sin bloqueos y el estado se actualiza después de forma condicional.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import UploadSession
+
+# Tamaño de bloque para leer/escribir en disco (no el tamaño del chunk HTTP)
+IO_BLOCK_SIZE = 64 * 1024
+
+# Destinos permitidos: clave pública -> (app_label, modelo, campo)
+UPLOAD_TARGETS = {
+    'course_resource': ('training', 'CourseResource', 'file'),
+    'person_cv': ('core', 'Person', 'cv_file'),
+    'person_document': ('core', 'PersonDocument', 'file'),
+    'candidate_cv': ('ats', 'Candidate', 'cv_file'),
+    'certification_document': ('talent', 'CertificationDocument', 'file'),
+}
+
+# Quién además del staff puede leer o reemplazar el archivo: lookup desde el
+# registro destino hasta el person_id del usuario (None: solo staff)
+TARGET_OWNER_LOOKUPS = {
+    'course_resource': 'course__instructor_id',
+    'person_cv': 'pk',
+    'person_document': 'person_id',
+    'candidate_cv': None,
+    'certification_document': 'certification__person_id',
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_target_field(target):
+    """Devuelve (Modelo, nombre_campo) para una clave de UPLOAD_TARGETS."""
+    if target not in UPLOAD_TARGETS:
+        raise ValidationError(f"Destino de carga inválido: {target}")
+    app_label, model_name, field_name = UPLOAD_TARGETS[target]
+    return apps.get_model(app_label, model_name), field_name
+
+
+def accessible_targets(model, target, user):
+    """Registros del destino que `user` puede leer o reemplazar: staff, el dueño o el instructor del curso."""
+    queryset = model.objects.all()
+    if user is None or user.is_staff:
+        return queryset
+    lookup = TARGET_OWNER_LOOKUPS.get(target)
+    if not lookup or not user.person_id:
+        return queryset.none()
+    return queryset.filter(**{lookup: user.person_id})
+
+
+def get_target_instance(target, object_id, user=None):
+    """
+    Registro destino y nombre del campo. Si se indica `user`, solo entre los
+    registros a los que tiene acceso (uno ajeno se trata igual que uno inexistente).
+    """
+    model, field_name = get_target_field(target)
+    try:
+        return accessible_targets(model, target, user).get(pk=object_id), field_name
+    except model.DoesNotExist:
+        raise ValidationError(f"No existe el registro {object_id} para el destino '{target}'.")
+
+
+def staging_path(session):
+    return Path(settings.UPLOAD_STAGING_ROOT) / f"{session.pk}.part"
+
+
+class StagedFile(File):
+    """
+    Archivo ya presente en disco. Exponer temporary_file_path() hace que
+    FileSystemStorage lo mueva (rename) en lugar de copiarlo byte a byte.
+    """
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class UploadGone(ValidationError):
+    """La sesión falló y su archivo de staging ya no existe: hay que iniciar otra carga."""
+
+
+def append_chunk(session_id, offset, stream, length):
+    """
+    Escribe un bloque en el archivo de staging.
+
+    La sesión se valida, el bloque se copia sin transacción abierta y el
+    offset avanza con un UPDATE condicional (WHERE offset = el esperado): de
+    dos PATCH simultáneos con el mismo offset solo uno avanza, y si el archivo
+    quedara dañado por la carrera el checksum final lo rechaza.
+
+    Args:
+        session_id: UUID de la UploadSession
+        offset: valor de la cabecera Upload-Offset enviado por el cliente
+        stream: objeto con read() (request.stream)
+        length: bytes a leer del stream (Content-Length)
+
+    Returns:
+        UploadSession actualizada
+
+    Raises:
+        ValidationError: si el offset no coincide o el bloque excede el tamaño declarado
+    """
+    session = UploadSession.objects.get(pk=session_id)
+
+    if session.status != UploadSession.Status.IN_PROGRESS:
+        raise ValidationError("La carga ya fue finalizada.")
+    if offset != session.offset:
+        raise ValidationError(f"Offset inválido: se esperaba {session.offset}.")
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise ValidationError(f"El bloque excede el máximo de {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.")
+    if session.offset + length > session.size:
+        raise ValidationError("El bloque excede el tamaño declarado del archivo.")
+
+    path = staging_path(session)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    with open(path, 'r+b' if path.exists() else 'wb') as f:
+        # Descarta cualquier resto de un intento anterior interrumpido
+        f.seek(session.offset)
+        f.truncate()
+        while written < length:
+            block = stream.read(min(IO_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            f.write(block)
+            written += len(block)
+
+    moved = UploadSession.objects.filter(
+        pk=session.pk, offset=session.offset, status=UploadSession.Status.IN_PROGRESS
+    ).update(offset=session.offset + written, updated_at=timezone.now())
+    if not moved:
+        raise ValidationError("Otra petición modificó la carga al mismo tiempo.")
+    session.offset += written
+    return session
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(IO_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize_upload(session_id):
+    """
+    Verifica el checksum y mueve el archivo al FileField de destino.
+
+    El hash y el traslado del archivo ocurren sin transacción abierta; solo la
+    asignación al registro y el cierre de la sesión se hacen con la fila
+    bloqueada, tras comprobar que nadie la finalizó mientras tanto.
+
+    Returns:
+        Tupla (session, instancia_destino)
+
+    Raises:
+        UploadGone: si la sesión falló y ya no tiene archivo de staging
+        ValidationError: si está finalizada o incompleta
+    """
+    session = UploadSession.objects.get(pk=session_id)
+
+    if session.status == UploadSession.Status.COMPLETED:
+        raise ValidationError("La carga ya fue finalizada.")
+    path = staging_path(session)
+    if session.status == UploadSession.Status.FAILED and not path.exists():
+        raise UploadGone(session.error or "La carga falló; inicie una nueva.")
+    if session.offset != session.size:
+        raise ValidationError(f"Carga incompleta: {session.offset}/{session.size} bytes recibidos.")
+
+    try:
+        checksum = file_sha256(path)
+    except FileNotFoundError:
+        raise UploadGone("El archivo de la carga ya no existe; inicie una nueva.")
+    if checksum != session.checksum.lower():
+        UploadSession.objects.filter(pk=session.pk).exclude(status=UploadSession.Status.COMPLETED).update(
+            status=UploadSession.Status.FAILED, error="El checksum SHA-256 no coincide.", updated_at=timezone.now()
+        )
+        path.unlink(missing_ok=True)
+        session.refresh_from_db()
+        return session, None
+
+    instance, field_name = get_target_instance(session.target, session.object_id, user=session.user)
+    field = instance._meta.get_field(field_name)
+    # FileSystemStorage mueve el archivo (StagedFile); otro backend lo copia
+    with open(path, 'rb') as f:
+        name = field.storage.save(
+            field.generate_filename(instance, session.filename), StagedFile(f), max_length=field.max_length
+        )
+    path.unlink(missing_ok=True)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == UploadSession.Status.COMPLETED or session.offset != session.size:
+            field.storage.delete(name)
+            raise ValidationError("La carga ya fue finalizada.")
+        setattr(instance, field_name, name)
+        instance.save()
+        session.status = UploadSession.Status.COMPLETED
+        session.error = None
+        session.save(update_fields=['status', 'error', 'updated_at'])
+    return session, instance
+
+
+def purge_stale_sessions(max_age=None):
+    """Elimina sesiones sin completar más antiguas que UPLOAD_SESSION_TTL y sus archivos."""
+    max_age = max_age or settings.UPLOAD_SESSION_TTL
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - max_age).exclude(
+        status=UploadSession.Status.COMPLETED
+    )
+    count = 0
+    for session in stale.iterator():
+        staging_path(session).unlink(missing_ok=True)
+        count += 1
+    stale.delete()
+    return count
+
+
+# --- DESCARGAS ---
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(IO_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def serve_file(request, field_file, as_attachment=True):
+    """
+    Sirve un FieldFile sin mantener ocupado al worker más de lo necesario.
+
+    MEDIA_SENDFILE_BACKEND:
+        'django'   -> FileResponse/StreamingHttpResponse con soporte de Range
+        'xsendfile'-> cabecera X-Sendfile (Apache mod_xsendfile)
+        'nginx'    -> cabecera X-Accel-Redirect bajo MEDIA_SENDFILE_PREFIX
+    """
+    filename = os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = 'attachment' if as_attachment else 'inline'
+    backend = settings.MEDIA_SENDFILE_BACKEND
+
+    if backend in ('xsendfile', 'nginx'):
+        response = HttpResponse(content_type=content_type)
+        if backend == 'xsendfile':
+            response['X-Sendfile'] = field_file.path
+        else:
+            response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX.rstrip('/') + '/' + field_file.name
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+        return response
+
+    path = field_file.path
+    size = os.path.getsize(path)
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+
+    if match and (match.group(1) or match.group(2)):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Sufijo: los últimos N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    else:
+        response = FileResponse(open(path, 'rb'), as_attachment=as_attachment, filename=filename, content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -36,6 +36,13 @@ router.register(r'person-nationalities', views.PersonNationalityViewSet)
 router.register(r'dependents', views.DependentViewSet)
 router.register(r'emergency-contacts', views.EmergencyContactViewSet)
 
+# Archivos grandes
+router.register(r'uploads', views.UploadSessionViewSet, basename='upload-session')
+router.register(r'files', views.FileDownloadViewSet, basename='file-download')
+
+# Métricas por endpoint (solo administradores)
+router.register(r'request-stats', views.RequestStatsViewSet, basename='request-stats')
+
 urlpatterns = [
     path('', include(router.urls)),
 ]
\ No newline at end of file
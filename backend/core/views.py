@@ -1,7 +1,9 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, mixins
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from .models import (
     Person, Gender, MaritalStatus, Country,
     DisabilityGroup, DisabilityType, DisabilityStatus,
@@ -9,7 +11,7 @@ from .models import (
     NationalId, EmailType, PersonEmail, PhoneType, PhoneCarrier, 
     PhoneCarrierCode, PersonPhone, Bank, BankAccountType, PersonBankAccount, 
     PersonDocument, RelationshipType, PersonNationality, 
-    Dependent, EmergencyContact
+    Dependent, EmergencyContact, UploadSession
 )
 from .serializers import (
     PersonSerializer, PersonListSerializer, GenderSerializer, MaritalStatusSerializer, 
@@ -22,9 +24,11 @@ from .serializers import (
     BankSerializer, BankAccountTypeSerializer, PersonBankAccountSerializer, 
     PersonDocumentSerializer, RelationshipTypeSerializer, 
     PersonNationalitySerializer,
-    DependentSerializer, EmergencyContactSerializer
+    DependentSerializer, EmergencyContactSerializer, UploadSessionSerializer
 )
 from .filters import UnaccentSearchFilter
+from . import uploads
+from . import metrics
 
 class PersonViewSet(viewsets.ModelViewSet):
     queryset = Person.objects.all().order_by('-created_at')
@@ -65,41 +69,16 @@ class PersonViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        # Extraer número de cédula limpio (sin puntos ni guiones)
-        doc_number = primary_doc.number.replace('.', '').replace('-', '').strip()
-        
-        # 3. Generar Username: Primera Letra Nombre + Primer Apellido + Últimos 4 dígitos Cédula
-        # Normalizamos para quitar acentos y caracteres especiales
-        import unicodedata
-        def normalize_text(text):
-            return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn').lower()
-
-        first_initial = normalize_text(person.first_name[0])
-        surname = normalize_text(person.paternal_surname)
-        last_4_digits = doc_number[-4:].zfill(4)
-        
-        base_username = f"{first_initial}{surname}{last_4_digits}"
-        username = base_username
-        
-        # 4. Manejo de colisiones (aunque la fórmula es bastante única)
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-            
-        # 5. Crear Usuario usando la cédula como contraseña inicial
+        # 3. Generar Username (accounts.usernames) y crear el usuario
+        #    con la cédula como contraseña inicial
+        from accounts.usernames import clean_document_number, create_user_for_person
+        doc_number = clean_document_number(primary_doc.number)
+
         try:
-            user = User.objects.create_user(
-                username=username,
-                password=doc_number,  # Contraseña inicial = número de cédula
-                person=person,
-                is_active=True
-            )
+            user = create_user_for_person(person, doc_number, is_active=True)
             return Response({
                 "message": "Usuario creado exitosamente.",
-                "username": username,
+                "username": user.username,
                 "user_id": user.id
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -392,4 +371,106 @@ class EmergencyContactViewSet(viewsets.ModelViewSet):
         if person_id:
             queryset = queryset.filter(person=person_id)
         return queryset
-    
\ No newline at end of file
+    
+
+
+# --- CARGAS POR PARTES Y DESCARGAS ---
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Carga reanudable de archivos grandes (protocolo estilo tus).
+
+    1. POST   /uploads/                 {target, object_id, filename, size, checksum}
+    2. PATCH  /uploads/{id}/            cuerpo binario + cabecera Upload-Offset (repetir)
+       HEAD   /uploads/{id}/            devuelve Upload-Offset para reanudar tras un corte
+    3. POST   /uploads/{id}/complete/   verifica SHA-256 y asigna el archivo al registro
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = UploadSession.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def _with_offset_headers(self, response, session):
+        response['Upload-Offset'] = str(session.offset)
+        response['Upload-Length'] = str(session.size)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return self._with_offset_headers(Response(self.get_serializer(session).data), session)
+
+    def partial_update(self, request, pk=None):
+        """Recibe un bloque. No se accede a request.data para evitar el parser multipart."""
+        session = self.get_object()
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'Cabeceras Upload-Offset y Content-Length requeridas.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = uploads.append_chunk(session.pk, offset, request.stream, length)
+        except DjangoValidationError as e:
+            session.refresh_from_db()
+            response = Response({'error': e.messages[0]}, status=status.HTTP_409_CONFLICT)
+            return self._with_offset_headers(response, session)
+
+        return self._with_offset_headers(Response(status=status.HTTP_204_NO_CONTENT), session)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        session = self.get_object()
+        try:
+            session, _ = uploads.finalize_upload(session.pk)
+        except uploads.UploadGone as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_410_GONE)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = self.get_serializer(session).data
+        if session.status != UploadSession.Status.COMPLETED:
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+
+class FileDownloadViewSet(viewsets.ViewSet):
+    """
+    Descarga autenticada de archivos. Sirve en streaming con soporte de Range o
+    delega al servidor web (X-Sendfile / X-Accel-Redirect) según MEDIA_SENDFILE_BACKEND.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=False, methods=['get'], url_path=r'(?P<target>[a-z_]+)/(?P<object_id>[0-9]+)')
+    def download(self, request, target=None, object_id=None):
+        try:
+            instance, field_name = uploads.get_target_instance(target, object_id, user=request.user)
+        except DjangoValidationError:
+            raise Http404
+        field_file = getattr(instance, field_name)
+        if not field_file:
+            raise Http404
+        as_attachment = request.query_params.get('inline') != 'true'
+        return uploads.serve_file(request, field_file, as_attachment=as_attachment)
+
+
+class RequestStatsViewSet(viewsets.ViewSet):
+    """
+    Métricas acumuladas por endpoint en este proceso (core.metrics).
+    GET /request-stats/  ·  POST /request-stats/reset/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        return Response(metrics.get_stats())
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        metrics.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,13 @@
 from django.contrib import admin
-from .models import Employment, EmploymentStatusLog, EmploymentDepartmentRole
+from .models import Employment, EmploymentStatusLog, EmploymentDepartmentRole, ContractExpiryRun
 
 # Registrar los modelos en el admin de Django
 admin.site.register(Employment)
 admin.site.register(EmploymentStatusLog)
-admin.site.register(EmploymentDepartmentRole)
\ No newline at end of file
+admin.site.register(EmploymentDepartmentRole)
+
+
+@admin.register(ContractExpiryRun)
+class ContractExpiryRunAdmin(admin.ModelAdmin):
+    list_display = ('run_date', 'expired_count', 'vacancies_freed', 'users_deactivated', 'error_count', 'finished_at')
+    readonly_fields = [f.name for f in ContractExpiryRun._meta.fields]
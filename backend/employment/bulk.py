@@ -0,0 +1,266 @@
+"""
+Cierre y renovación masiva de contratos (cambio de período académico).
+
+Los contratos se eligen por ids o por filtro (departamento con o sin sus
+subdepartamentos, tipo de contrato y rango de end_date). La validación se hace
+sobre el conjunto, con unas pocas consultas en lugar de full_clean() y la
+búsqueda de duplicados por fila, y cada contrato recibe su resultado ('ok' o
+'error' con el motivo). Los válidos se escriben en una sola transacción, con
+escrituras por lotes de CHUNK_SIZE:
+
+1. bulk_update con historial de los contratos.
+2. Vacantes con historial (organization.history.shift_vacancies).
+3. Registros de estatus (bulk_create) y series de dotación.
+4. Cuentas: al cerrar se desactivan las que quedan sin contrato vigente (y se
+   revocan sus tokens); al reactivar un contrato vencido se vuelven a activar.
+
+Un contrato con errores no impide procesar el resto. Con dry_run solo se
+devuelve el reporte.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from simple_history.utils import bulk_update_with_history
+
+from organization.history import shift_vacancies
+
+from .identity import ACTIVE_STATUSES, invalidate_identity
+from .models import Employment, EmploymentStatusLog, EmploymentStatusChoices
+from .workforce import apply_status_logs
+
+CHUNK_SIZE = 200
+
+TERMINATION_REASON = "Cierre masivo de contratos"
+
+RENEWAL_REASON = "Renovación masiva de contratos"
+
+
+def select_employments(ids=None, department=None, include_subdepartments=True,
+                       employment_type=None, end_date_from=None, end_date_to=None):
+    """Contratos elegidos por ids y/o filtros (todos opcionales, se combinan con AND)."""
+    queryset = Employment.objects.all()
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+    if department is not None:
+        if include_subdepartments:
+            from organization.models import Department
+            queryset = queryset.filter(position__department__in=Department.objects.descendants_of(department).values('pk'))
+        else:
+            queryset = queryset.filter(position__department_id=department)
+    if employment_type:
+        queryset = queryset.filter(employment_type=employment_type)
+    if end_date_from:
+        queryset = queryset.filter(end_date__gte=end_date_from)
+    if end_date_to:
+        queryset = queryset.filter(end_date__lte=end_date_to)
+    return queryset
+
+
+def deactivate_accounts(person_ids):
+    """Desactiva las cuentas de las personas sin ningún otro contrato vigente y revoca sus tokens."""
+    from accounts.models import User
+    from accounts.tokens import revoke_tokens
+
+    users = User.objects.filter(person_id__in=person_ids, is_active=True).exclude(
+        Exists(Employment.objects.filter(person=OuterRef('person_id'), current_status__in=ACTIVE_STATUSES))
+    )
+    user_ids = list(users.values_list('pk', flat=True))
+    if user_ids:
+        User.objects.filter(pk__in=user_ids).update(is_active=False)
+        revoke_tokens(User.objects.filter(pk__in=user_ids))
+    return user_ids
+
+
+def _activate_accounts(person_ids):
+    from accounts.models import User
+
+    return User.objects.filter(person_id__in=person_ids, is_active=False).update(is_active=True)
+
+
+def _load(queryset):
+    """Relee los contratos bloqueados: otro proceso pudo cambiarlos entre la selección y la escritura."""
+    return list(
+        queryset.select_related('person', 'position__job_title', 'position__department')
+        .select_for_update(of=('self',)).order_by('id')
+    )
+
+
+def _result(employment, error=None):
+    return {
+        'id': employment.pk,
+        'person_name': str(employment.person),
+        'position': str(employment.position),
+        'status': 'error' if error else 'ok',
+        'error': error,
+    }
+
+
+def _report(employments, errors, requested_ids, **summary):
+    """Reporte por contrato (incluye los ids pedidos que no existen) y totales."""
+    results = [_result(employment, errors.get(employment.pk)) for employment in employments]
+    found = {employment.pk for employment in employments}
+    results += [
+        {'id': pk, 'person_name': None, 'position': None, 'status': 'error', 'error': "Contrato no encontrado."}
+        for pk in requested_ids if pk not in found
+    ]
+    failed = sum(1 for row in results if row['status'] == 'error')
+    return {
+        'results': results,
+        'summary': {'requested': len(results), 'processed': len(results) - failed, 'failed': failed, **summary},
+    }
+
+
+def _write(employments, fields, change_reason, logs):
+    bulk_update_with_history(
+        employments, Employment, fields, batch_size=CHUNK_SIZE, default_change_reason=change_reason,
+    )
+    apply_status_logs(EmploymentStatusLog.objects.bulk_create(logs, batch_size=CHUNK_SIZE))
+    person_ids = {employment.person_id for employment in employments}
+    transaction.on_commit(lambda: [invalidate_identity(person_id) for person_id in person_ids])
+    return person_ids
+
+
+@transaction.atomic
+def terminate_employments(queryset, end_date, exit_reason, exit_notes=None, deactivate_users=True,
+                          requested_ids=(), dry_run=False):
+    """
+    Finaliza los contratos vigentes de `queryset` y devuelve sus vacantes.
+
+    Returns:
+        Dict: {results: [{id, person_name, position, status, error}],
+        summary: {requested, processed, failed, vacancies_freed, users_deactivated, dry_run}}
+    """
+    if not requested_ids:
+        # Por filtro solo interesan los vigentes; por ids se informa cada uno
+        queryset = queryset.filter(current_status__in=ACTIVE_STATUSES)
+    employments = _load(queryset)
+    errors = {}
+    for employment in employments:
+        if employment.current_status not in ACTIVE_STATUSES:
+            errors[employment.pk] = f"El contrato no está vigente ({employment.get_current_status_display()})."
+        elif end_date < employment.hire_date:
+            errors[employment.pk] = "La fecha de egreso no puede ser anterior a la fecha de ingreso."
+    valid = [employment for employment in employments if employment.pk not in errors]
+
+    user_ids = []
+    if valid and not dry_run:
+        today = timezone.localdate()
+        for employment in valid:
+            employment.current_status = EmploymentStatusChoices.TERMINATED
+            employment.end_date = end_date
+            employment.exit_reason = exit_reason
+            employment.exit_notes = exit_notes
+        # Mismo texto que el registro de estatus de Employment.save()
+        reason = valid[0].get_exit_reason_display() + (f" ({exit_notes})" if exit_notes else "")
+        person_ids = _write(
+            valid, ['current_status', 'end_date', 'exit_reason', 'exit_notes'], TERMINATION_REASON,
+            [
+                EmploymentStatusLog(employment=employment, status=employment.current_status, start_date=today, reason=reason)
+                for employment in valid
+            ],
+        )
+        shift_vacancies(Counter(employment.position_id for employment in valid), change_reason=TERMINATION_REASON)
+        if deactivate_users:
+            user_ids = deactivate_accounts(person_ids)
+
+    return _report(
+        employments, errors, requested_ids,
+        vacancies_freed=len(valid), users_deactivated=len(user_ids), dry_run=dry_run,
+    )
+
+
+def _is_expired(employment):
+    return (
+        employment.current_status == EmploymentStatusChoices.TERMINATED
+        and employment.exit_reason == Employment.ExitReason.END_CONTRACT
+    )
+
+
+@transaction.atomic
+def renew_employments(queryset, end_date, employment_type=None, activate_users=True, requested_ids=(),
+                      expired_between=None, dry_run=False):
+    """
+    Extiende hasta `end_date` los contratos de `queryset` (y opcionalmente
+    cambia su tipo). Se renuevan los vigentes y los finalizados por fin de
+    contrato, que se reactivan ocupando de nuevo una vacante de su posición.
+
+    Un contrato vencido solo se reactiva si se pidió por id o si su end_date
+    cae en `expired_between` (desde, hasta); por filtro sin ese rango solo se
+    renuevan los vigentes, para no revivir contratos de períodos anteriores.
+
+    Returns:
+        Dict: {results: [{id, person_name, position, status, error}],
+        summary: {requested, processed, failed, reactivated, vacancies_taken, users_activated, dry_run}}
+    """
+    if not requested_ids:
+        renewable = Q(current_status__in=ACTIVE_STATUSES)
+        if expired_between:
+            renewable |= Q(
+                current_status=EmploymentStatusChoices.TERMINATED, exit_reason=Employment.ExitReason.END_CONTRACT,
+                end_date__range=expired_between,
+            )
+        queryset = queryset.filter(renewable)
+    employments = _load(queryset)
+    errors = {}
+    for employment in employments:
+        if employment.current_status not in ACTIVE_STATUSES and not _is_expired(employment):
+            errors[employment.pk] = f"No se puede renovar un contrato en estatus {employment.get_current_status_display()}."
+        elif employment.end_date is None:
+            errors[employment.pk] = "El contrato no tiene fecha de egreso: no requiere renovación."
+        elif end_date <= employment.end_date:
+            errors[employment.pk] = "La nueva fecha de egreso debe ser posterior a la actual."
+
+    # Reactivaciones: sin otro contrato vigente en la misma posición y con vacante disponible
+    expired = [e for e in employments if e.pk not in errors and _is_expired(e)]
+    if expired:
+        occupied = set(
+            Employment.objects.filter(
+                current_status__in=ACTIVE_STATUSES,
+                person_id__in={e.person_id for e in expired},
+                position_id__in={e.position_id for e in expired},
+            ).values_list('person_id', 'position_id')
+        )
+        available = {e.position_id: e.position.vacancies for e in expired}
+        for employment in expired:
+            key = (employment.person_id, employment.position_id)
+            if key in occupied:
+                errors[employment.pk] = "La persona ya tiene un contrato vigente en esta posición."
+            elif available[employment.position_id] <= 0:
+                errors[employment.pk] = "La posición no tiene vacantes disponibles."
+            else:
+                occupied.add(key)
+                available[employment.position_id] -= 1
+    valid = [employment for employment in employments if employment.pk not in errors]
+    reactivated = [employment for employment in valid if _is_expired(employment)]
+
+    users_activated = 0
+    if valid and not dry_run:
+        today = timezone.localdate()
+        for employment in reactivated:
+            employment.current_status = EmploymentStatusChoices.ACTIVE
+            employment.exit_reason = None
+            employment.exit_notes = None
+        for employment in valid:
+            employment.end_date = end_date
+            if employment_type:
+                employment.employment_type = employment_type
+        reason = f"{RENEWAL_REASON} hasta {end_date:%d/%m/%Y}"
+        _write(
+            valid, ['current_status', 'end_date', 'employment_type', 'exit_reason', 'exit_notes'], RENEWAL_REASON,
+            [
+                EmploymentStatusLog(employment=employment, status=employment.current_status, start_date=today, reason=reason)
+                for employment in valid
+            ],
+        )
+        taken = Counter(employment.position_id for employment in reactivated)
+        shift_vacancies({position_id: -amount for position_id, amount in taken.items()}, change_reason=RENEWAL_REASON)
+        if activate_users and reactivated:
+            users_activated = _activate_accounts({employment.person_id for employment in reactivated})
+
+    return _report(
+        employments, errors, requested_ids,
+        reactivated=len(reactivated), vacancies_taken=len(reactivated), users_activated=users_activated, dry_run=dry_run,
+    )
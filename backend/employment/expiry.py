@@ -0,0 +1,169 @@
+"""
+Vencimiento automático de contratos temporales y pasantías.
+
+El comando nocturno `process_contract_expiry` busca con una sola consulta por
+rango sobre el índice (current_status, end_date) los contratos vigentes con
+end_date anterior a la fecha de proceso y, por lotes, en una transacción cada
+uno:
+
+1. Los pasa a Finalizado con motivo "Fin de Contrato" (bulk_update con historial).
+2. Devuelve sus vacantes, con historial de las posiciones.
+3. Crea los registros de estatus y actualiza las series de dotación.
+4. Desactiva (si se pide) las cuentas de quienes se quedan sin contrato vigente
+   y revoca sus tokens.
+
+Cada ejecución queda en ContractExpiryRun con el resumen: contratos cerrados,
+vacantes liberadas, cuentas desactivadas, errores y los contratos que vencen
+en los próximos días.
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from simple_history.utils import bulk_update_with_history
+
+from organization.history import shift_vacancies
+
+from .bulk import deactivate_accounts
+from .identity import ACTIVE_STATUSES, invalidate_identity
+from .models import (
+    Employment, EmploymentStatusLog, EmploymentTypeChoices, EmploymentStatusChoices, ContractExpiryRun
+)
+from .workforce import apply_status_logs
+
+logger = logging.getLogger(__name__)
+
+EXPIRING_TYPES = [EmploymentTypeChoices.TEMPORARY, EmploymentTypeChoices.INTERNSHIP]
+
+BATCH_SIZE = 200
+
+EXPIRY_REASON = "Fin de Contrato (Tiempo Cumplido) - vencimiento automático"
+
+
+def expiring_contracts(until):
+    """Contratos temporales y pasantías vigentes con end_date hasta `until` (inclusive)."""
+    return Employment.objects.filter(
+        current_status__in=ACTIVE_STATUSES,
+        end_date__lte=until,
+        employment_type__in=EXPIRING_TYPES,
+    )
+
+
+def _summary(employment):
+    return {
+        'id': employment.pk,
+        'person_id': employment.person_id,
+        'person_name': str(employment.person),
+        'position': str(employment.position),
+        'employment_type': employment.employment_type,
+        'end_date': employment.end_date.isoformat(),
+    }
+
+
+def _with_names(queryset):
+    return queryset.select_related('person', 'position__job_title', 'position__department').order_by('end_date', 'id')
+
+
+@transaction.atomic
+def expire_batch(ids, today, deactivate_users=True):
+    """
+    Cierra un lote de contratos vencidos.
+
+    Returns:
+        Dict: {expired: [resumen por contrato], vacancies_freed, users_deactivated}
+    """
+    # Se releen bloqueados: otro proceso pudo cerrarlos entre la búsqueda y el lote
+    employments = list(
+        _with_names(expiring_contracts(today - timedelta(days=1)).filter(pk__in=ids)).select_for_update(of=('self',))
+    )
+    if not employments:
+        return {'expired': [], 'vacancies_freed': 0, 'users_deactivated': 0}
+
+    for employment in employments:
+        employment.current_status = EmploymentStatusChoices.TERMINATED
+        employment.exit_reason = employment.exit_reason or Employment.ExitReason.END_CONTRACT
+    bulk_update_with_history(
+        employments, Employment, ['current_status', 'exit_reason'],
+        batch_size=BATCH_SIZE, default_change_reason=EXPIRY_REASON,
+    )
+
+    freed = Counter(employment.position_id for employment in employments)
+    shift_vacancies(freed, change_reason=EXPIRY_REASON)
+
+    logs = EmploymentStatusLog.objects.bulk_create([
+        EmploymentStatusLog(
+            employment=employment,
+            status=EmploymentStatusChoices.TERMINATED,
+            start_date=today,
+            reason=EXPIRY_REASON,
+        )
+        for employment in employments
+    ])
+    apply_status_logs(logs)
+
+    person_ids = {employment.person_id for employment in employments}
+    user_ids = deactivate_accounts(person_ids) if deactivate_users else []
+    transaction.on_commit(lambda: [invalidate_identity(person_id) for person_id in person_ids])
+
+    return {
+        'expired': [_summary(employment) for employment in employments],
+        'vacancies_freed': sum(freed.values()),
+        'users_deactivated': len(user_ids),
+    }
+
+
+def process_contract_expiry(today=None, notice_days=None, deactivate_users=None, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Cierra los contratos vencidos antes de `today` y arma el resumen.
+
+    Args:
+        today: Fecha de proceso (por defecto hoy)
+        notice_days: Días hacia adelante para listar los próximos vencimientos
+        deactivate_users: Desactivar las cuentas que quedan sin contrato vigente
+        dry_run: Solo armar el resumen, sin cambios ni registro de la ejecución
+
+    Returns:
+        ContractExpiryRun (sin guardar si dry_run)
+    """
+    today = today or timezone.localdate()
+    if notice_days is None:
+        notice_days = settings.CONTRACT_EXPIRY_NOTICE_DAYS
+    if deactivate_users is None:
+        deactivate_users = settings.CONTRACT_EXPIRY_DEACTIVATE_USERS
+
+    run = ContractExpiryRun(run_date=today)
+    if not dry_run:
+        run.save()
+    report = {'expired': [], 'upcoming': [], 'errors': []}
+
+    expired = _with_names(expiring_contracts(today - timedelta(days=1)))
+    if dry_run:
+        report['expired'] = [_summary(employment) for employment in expired]
+    else:
+        ids = list(expired.values_list('id', flat=True))
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            try:
+                result = expire_batch(batch, today, deactivate_users)
+            except DatabaseError as e:
+                logger.exception("Contract expiry batch failed")
+                report['errors'].append({'ids': batch, 'error': str(e)})
+                continue
+            report['expired'] += result['expired']
+            run.vacancies_freed += result['vacancies_freed']
+            run.users_deactivated += result['users_deactivated']
+
+    upcoming = expiring_contracts(today + timedelta(days=notice_days)).filter(end_date__gte=today)
+    report['upcoming'] = [_summary(employment) for employment in _with_names(upcoming)]
+
+    run.expired_count = len(report['expired'])
+    run.error_count = len(report['errors'])
+    run.report = report
+    run.finished_at = timezone.now()
+    if not dry_run:
+        run.save()
+    return run
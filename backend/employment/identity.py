@@ -0,0 +1,180 @@
+"""
+Contexto de identidad del usuario autenticado ("quién soy").
+
+Persona, contratos activos, posiciones, departamentos y banderas de jefatura
+se cargan una sola vez por petición (IdentityMiddleware expone request.identity
+de forma perezosa) y se guardan en caché por persona durante
+IDENTITY_CACHE_TIMEOUT segundos. Las señales de employment.signals borran la
+entrada de la persona afectada, o incrementan la versión global cuando cambia
+la estructura (posiciones, departamentos, cargos).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    Employment, EmploymentDepartmentRole, PersonDepartmentRole,
+    EmploymentStatusChoices, HierarchicalRoleChoices, RoleChoices
+)
+
+ACTIVE_STATUSES = [
+    EmploymentStatusChoices.ACTIVE,
+    EmploymentStatusChoices.SUSPENDED,
+    EmploymentStatusChoices.LEAVE,
+    EmploymentStatusChoices.REST,
+]
+
+VERSION_KEY = 'identity:version'
+
+
+class Identity:
+    """
+    Datos del usuario actual, ya resueltos. Las listas solo contienen
+    contratos vigentes (ver is_active_status), ordenados por fecha de ingreso descendente.
+    """
+
+    def __init__(self, person=None, employments=(), managed_department_ids=()):
+        self.person = person
+        self.person_id = person.pk if person else None
+        self.employments = list(employments)
+        self.managed_department_ids = set(managed_department_ids)
+
+        self.positions = []
+        self.departments = []
+        for emp in self.employments:
+            if emp.position not in self.positions:
+                self.positions.append(emp.position)
+            dept = emp.position.department
+            if dept and dept not in self.departments:
+                self.departments.append(dept)
+
+        self.position_ids = {p.pk for p in self.positions}
+        self.department_ids = {d.pk for d in self.departments}
+        self.employment_ids = {e.pk for e in self.employments}
+        # Sillas con responsabilidad de supervisión (posición gerencial o rol funcional Manager)
+        self.manager_position_ids = {
+            e.position_id for e in self.employments
+            if e.position.is_manager or e.role == RoleChoices.MANAGER
+        }
+        # Gerencias: roles jerárquicos vigentes + departamentos de las posiciones gerenciales
+        self.managed_department_ids |= {
+            e.position.department_id for e in self.employments
+            if e.position.is_manager and e.position.department_id
+        }
+
+    @property
+    def has_person(self):
+        return self.person is not None
+
+    @property
+    def employment(self):
+        """Contrato activo principal (el más reciente) o None."""
+        return self.employments[0] if self.employments else None
+
+    @property
+    def department(self):
+        """Departamento del contrato principal o None."""
+        emp = self.employment
+        return emp.position.department if emp else None
+
+    @property
+    def is_manager(self):
+        return bool(self.manager_position_ids or self.managed_department_ids)
+
+    def manages_department(self, department_id):
+        return department_id in self.managed_department_ids
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def _cache_key(person_id):
+    return f"identity:{get_version()}:{person_id}"
+
+
+def invalidate_identity(person_id):
+    """Descarta el contexto cacheado de una persona."""
+    if person_id:
+        cache.delete(_cache_key(person_id))
+
+
+def invalidate_all_identities():
+    """Invalida el contexto de todos los usuarios (cambio de estructura)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, get_version() + 1, None)
+
+
+def build_identity(person_id):
+    """Consulta la BD y arma el Identity de una persona."""
+    from core.models import Person
+
+    person = Person.objects.filter(pk=person_id).first()
+    if person is None:
+        return Identity()
+
+    employments = Employment.objects.filter(
+        person_id=person_id,
+        current_status__in=ACTIVE_STATUSES
+    ).select_related(
+        'position__department', 'position__job_title'
+    ).prefetch_related(
+        'position__manager_positions__job_title'
+    ).order_by('-hire_date', '-id')
+    employments = list(employments)
+
+    today = timezone.now().date()
+    current = Q(end_date__isnull=True) | Q(end_date__gte=today)
+    managed = set(
+        PersonDepartmentRole.objects.filter(
+            current,
+            person_id=person_id,
+            hierarchical_role=HierarchicalRoleChoices.MANAGER,
+            start_date__lte=today
+        ).values_list('department_id', flat=True)
+    )
+    if employments:
+        managed |= set(
+            EmploymentDepartmentRole.objects.filter(
+                current,
+                employment__in=[e.pk for e in employments],
+                hierarchical_role=HierarchicalRoleChoices.MANAGER,
+                start_date__lte=today
+            ).values_list('department_id', flat=True)
+        )
+
+    return Identity(person, employments, managed)
+
+
+def identity_for(user):
+    """Identity del usuario (desde caché si está disponible)."""
+    person_id = getattr(user, 'person_id', None)
+    if not user or not user.is_authenticated or not person_id:
+        return Identity()
+
+    key = _cache_key(person_id)
+    identity = cache.get(key)
+    if identity is None:
+        identity = build_identity(person_id)
+        cache.set(key, identity, settings.IDENTITY_CACHE_TIMEOUT)
+    return identity
+
+
+def get_identity(request):
+    """
+    request.identity si IdentityMiddleware está activo; si no (ej. pruebas con
+    RequestFactory), se resuelve y se guarda en la petición.
+    """
+    identity = getattr(request, 'identity', None)
+    if identity is None:
+        identity = identity_for(request.user)
+        request.identity = identity
+    return identity
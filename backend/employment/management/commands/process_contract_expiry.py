@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employment.expiry import BATCH_SIZE, process_contract_expiry
+
+
+class Command(BaseCommand):
+    help = (
+        'Closes temporary and internship contracts whose end date has passed: marks them finished, '
+        'returns their vacancies, logs the status change and deactivates accounts left without an '
+        'active contract. Run nightly; each run is stored as a ContractExpiryRun digest.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Processing date (YYYY-MM-DD, default: today)')
+        parser.add_argument(
+            '--notice-days', type=int, default=settings.CONTRACT_EXPIRY_NOTICE_DAYS,
+            help=f'Days ahead to list upcoming expirations (default: {settings.CONTRACT_EXPIRY_NOTICE_DAYS})'
+        )
+        parser.add_argument('--keep-users', action='store_true', help='Do not deactivate user accounts')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help=f'Contracts per transaction (default: {BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Only print what would be done')
+
+    def handle(self, *args, **options):
+        run = process_contract_expiry(
+            today=options['date'],
+            notice_days=options['notice_days'],
+            deactivate_users=False if options['keep_users'] else None,
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+        )
+        report = run.report
+        verb = 'Would expire' if options['dry_run'] else 'Expired'
+
+        self.stdout.write(f'{verb} {run.expired_count} contract(s) as of {run.run_date}:')
+        for item in report['expired']:
+            self.stdout.write(f"  #{item['id']} {item['person_name']} - {item['position']} (ended {item['end_date']})")
+        if report['upcoming']:
+            self.stdout.write(f"Expiring in the next {options['notice_days']} day(s): {len(report['upcoming'])}")
+            for item in report['upcoming']:
+                self.stdout.write(f"  #{item['id']} {item['person_name']} - {item['position']} ({item['end_date']})")
+        for error in report['errors']:
+            self.stderr.write(self.style.ERROR(f"Batch {error['ids'][0]}..{error['ids'][-1]} failed: {error['error']}"))
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Run #{run.pk}: {run.expired_count} expired, {run.vacancies_freed} vacancies freed, '
+                f'{run.users_deactivated} account(s) deactivated, {run.error_count} error(s).'
+            ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from employment.workforce import rebuild_workforce_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the monthly headcount/turnover table (WorkforceMonthlyStat) from EmploymentStatusLog. '
+        'New status logs update it incrementally; run nightly to pick up deletions and backdated changes.'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_workforce_stats()
+        self.stdout.write(self.style.SUCCESS(f'Workforce series rebuilt: {rows} rows'))
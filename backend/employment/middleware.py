@@ -0,0 +1,19 @@
+from django.utils.functional import SimpleLazyObject
+
+from .identity import identity_for
+
+
+class IdentityMiddleware:
+    """
+    Expone request.identity (employment.identity.Identity) de forma perezosa.
+
+    Se evalúa en el primer acceso, es decir dentro de la vista, cuando DRF ya
+    autenticó la petición (JWT) y asignó request.user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.identity = SimpleLazyObject(lambda: identity_for(request.user))
+        return self.get_response(request)
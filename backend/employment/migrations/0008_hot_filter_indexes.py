@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_hot_filter_indexes'),
+        ('employment', '0007_historicalpersondepartmentrole_persondepartmentrole'),
+        ('organization', '0009_historicalposition_is_manager_position_is_manager'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employment',
+            index=models.Index(fields=['person', 'current_status'], name='emp_person_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employment',
+            index=models.Index(fields=['position', 'current_status'], name='emp_position_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employment',
+            index=models.Index(fields=['current_status', 'hire_date'], name='emp_status_hire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employment',
+            index=models.Index(fields=['current_status', 'end_date'], name='emp_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employmentdepartmentrole',
+            index=models.Index(condition=models.Q(('end_date__isnull', True)), fields=['department', 'hierarchical_role'], name='edr_dept_role_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='persondepartmentrole',
+            index=models.Index(condition=models.Q(('end_date__isnull', True)), fields=['department', 'hierarchical_role'], name='pdr_dept_role_current_idx'),
+        ),
+    ]
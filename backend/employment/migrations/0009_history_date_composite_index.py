@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_history_date_composite_index'),
+        ('employment', '0008_hot_filter_indexes'),
+        ('organization', '0011_as_of_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicalemployment',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='historicalemploymentdepartmentrole',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='historicalpersondepartmentrole',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='historicalemployment',
+            index=models.Index(fields=['history_date', 'id'], name='employment__history_cf4abc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalemploymentdepartmentrole',
+            index=models.Index(fields=['history_date', 'id'], name='employment__history_c6baff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalpersondepartmentrole',
+            index=models.Index(fields=['history_date', 'id'], name='employment__history_7fd784_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employment', '0009_history_date_composite_index'),
+        ('organization', '0011_as_of_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkforceMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('hires', models.PositiveIntegerField(default=0, verbose_name='Ingresos')),
+                ('exits', models.PositiveIntegerField(default=0, verbose_name='Egresos')),
+                ('exits_by_reason', models.JSONField(default=dict, verbose_name='Egresos por Motivo')),
+                ('exit_tenure_days', models.BigIntegerField(default=0)),
+                ('hire_day_balance', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estadística Mensual de Dotación',
+                'verbose_name_plural': 'Estadísticas Mensuales de Dotación',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employmentstatuslog',
+            index=models.Index(fields=['employment', 'start_date'], name='emp_statuslog_timeline_idx'),
+        ),
+        migrations.AddField(
+            model_name='workforcemonthlystat',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workforce_stats', to='organization.department', verbose_name='Departamento'),
+        ),
+        migrations.AddIndex(
+            model_name='workforcemonthlystat',
+            index=models.Index(fields=['month', 'department'], name='emp_workforce_month_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employment', '0010_workforce_monthly_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractExpiryRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField(verbose_name='Fecha de Proceso')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expired_count', models.PositiveIntegerField(default=0, verbose_name='Contratos Vencidos')),
+                ('vacancies_freed', models.PositiveIntegerField(default=0, verbose_name='Vacantes Liberadas')),
+                ('users_deactivated', models.PositiveIntegerField(default=0, verbose_name='Cuentas Desactivadas')),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('report', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'verbose_name': 'Proceso de Vencimiento de Contratos',
+                'verbose_name_plural': 'Procesos de Vencimiento de Contratos',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
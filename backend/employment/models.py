@@ -138,6 +138,14 @@ class Employment(models.Model):
     class Meta:
         verbose_name = "Expediente Laboral"
         ordering = ['-hire_date']
+        indexes = [
+            # Contratos vigentes de una persona (identidad) y ocupación de una posición
+            models.Index(fields=['person', 'current_status'], name='emp_person_status_idx'),
+            models.Index(fields=['position', 'current_status'], name='emp_position_status_idx'),
+            # Ingresos y vencimientos por estado (reportes y alertas de contratos)
+            models.Index(fields=['current_status', 'hire_date'], name='emp_status_hire_idx'),
+            models.Index(fields=['current_status', 'end_date'], name='emp_status_end_idx'),
+        ]
 
     def __str__(self):
         return f"{self.person} - {self.position}"
@@ -167,6 +175,11 @@ class Employment(models.Model):
                     'current_status': f"Conflicto: {self.person} ya tiene un contrato vigente ({conflict.get_current_status_display()}) en el cargo '{self.position}'. Debe finalizar el anterior primero."
                 })
 
+            # 3. REACTIVACIÓN: vuelve a ocupar una vacante, igual que la renovación masiva (employment.bulk)
+            if self.pk and self.__original_status and not is_active_status(self.__original_status) \
+                    and self.position.vacancies <= 0:
+                raise ValidationError({'current_status': "La posición no tiene vacantes disponibles."})
+
     def save(self, *args, **kwargs):
         self.full_clean()
         
@@ -203,6 +216,19 @@ class Employment(models.Model):
             # Si es 0, técnicamente no debería haber pasado la validación del serializer/clean,
             # pero por seguridad no restamos más allá de 0.
 
+        # 4B. CIERRE O REACTIVACIÓN DE UN CONTRATO EXISTENTE
+        # Al dejar de estar vigente libera su vacante (igual que delete(), el vencimiento
+        # automático y el cierre masivo de employment.bulk); al reactivarse la vuelve a ocupar
+        # (clean() ya rechazó la reactivación en una posición sin vacantes).
+        elif status_changed and original_status:
+            was_active = is_active_status(original_status)
+            if was_active and not is_active_status(self.current_status):
+                self.position.vacancies += 1
+                self.position.save()
+            elif not was_active and is_active_status(self.current_status):
+                self.position.vacancies -= 1
+                self.position.save()
+
         # 5. GUARDADO REAL EN BASE DE DATOS
         super().save(*args, **kwargs)
         
@@ -279,11 +305,76 @@ class EmploymentStatusLog(models.Model):
     class Meta:
         verbose_name = "Historial de Estatus"
         ordering = ['-created_at']
+        indexes = [
+            # Línea de tiempo de cada contrato (employment.workforce)
+            models.Index(fields=['employment', 'start_date'], name='emp_statuslog_timeline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employment} - {self.get_status_display()} desde {self.start_date}"
 
 
+class WorkforceMonthlyStat(models.Model):
+    """
+    Ingresos y egresos agregados por mes y departamento (ver employment.workforce).
+    La dotación de cualquier mes es la suma acumulada de ingresos menos egresos.
+    """
+
+    month = models.DateField(verbose_name="Mes", help_text="Primer día del mes")
+    department = models.ForeignKey(
+        'organization.Department',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='workforce_stats',
+        verbose_name="Departamento"
+    )
+    hires = models.PositiveIntegerField(default=0, verbose_name="Ingresos")
+    exits = models.PositiveIntegerField(default=0, verbose_name="Egresos")
+    # {ExitReason: cantidad}
+    exits_by_reason = models.JSONField(default=dict, verbose_name="Egresos por Motivo")
+    # Suma de la antigüedad (días) de quienes egresaron en el mes
+    exit_tenure_days = models.BigIntegerField(default=0)
+    # Suma de date.toordinal() de las fechas de ingreso de los que entran menos
+    # la de los que salen: con la suma acumulada se obtiene la antigüedad promedio
+    hire_day_balance = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Estadística Mensual de Dotación"
+        verbose_name_plural = "Estadísticas Mensuales de Dotación"
+        indexes = [
+            models.Index(fields=['month', 'department'], name='emp_workforce_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.department_id}: +{self.hires} -{self.exits}"
+
+
+
+class ContractExpiryRun(models.Model):
+    """
+    Ejecución del proceso nocturno de vencimiento de contratos (ver
+    employment.expiry): qué contratos cerró, qué vacantes liberó, qué cuentas
+    desactivó y qué contratos vencen pronto.
+    """
+
+    run_date = models.DateField(verbose_name="Fecha de Proceso")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expired_count = models.PositiveIntegerField(default=0, verbose_name="Contratos Vencidos")
+    vacancies_freed = models.PositiveIntegerField(default=0, verbose_name="Vacantes Liberadas")
+    users_deactivated = models.PositiveIntegerField(default=0, verbose_name="Cuentas Desactivadas")
+    error_count = models.PositiveIntegerField(default=0)
+    # {'expired': [...], 'upcoming': [...], 'errors': [...]}
+    report = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        verbose_name = "Proceso de Vencimiento de Contratos"
+        verbose_name_plural = "Procesos de Vencimiento de Contratos"
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.run_date}: {self.expired_count} vencido(s)"
+
 
 # --- 4. ROL JERÁRQUICO EN DEPARTAMENTO ---
 
@@ -347,6 +438,14 @@ class EmploymentDepartmentRole(models.Model):
         verbose_name_plural = "Roles Jerárquicos en Departamentos"
         unique_together = ('employment', 'department', 'start_date')
         ordering = ['-start_date']
+        indexes = [
+            # Gerentes vigentes de un departamento
+            models.Index(
+                fields=['department', 'hierarchical_role'],
+                condition=models.Q(end_date__isnull=True),
+                name='edr_dept_role_current_idx',
+            ),
+        ]
 
     def __str__(self):
         role_display = self.get_hierarchical_role_display()
@@ -439,6 +538,14 @@ class PersonDepartmentRole(models.Model):
         verbose_name_plural = "Roles Jerárquicos por Persona"
         unique_together = ('person', 'department', 'start_date')
         ordering = ['-start_date']
+        indexes = [
+            # Gerentes vigentes de un departamento
+            models.Index(
+                fields=['department', 'hierarchical_role'],
+                condition=models.Q(end_date__isnull=True),
+                name='pdr_dept_role_current_idx',
+            ),
+        ]
 
     def __str__(self):
         role_display = self.get_hierarchical_role_display()
@@ -1,14 +1,19 @@
 from rest_framework import serializers
 from django.db.models import Q
+from datetime import timedelta
 from django.utils import timezone
 from django.db import transaction
-from core.serializers import check_uniqueness, title_case_cleaner, validate_text_with_spaces, validate_min_length
+from core.serializers import (
+    check_uniqueness, title_case_cleaner, validate_text_with_spaces, validate_min_length, ImageRenditionsField,
+    primary_national_id
+)
 # Importamos utilidades y modelos necesarios de las apps correctas:
 from organization.models import Position 
 from .models import (
     Employment, EmploymentStatusLog, EmploymentDepartmentRole, PersonDepartmentRole,
-    is_active_status, EmploymentStatusChoices, HierarchicalRoleChoices
+    is_active_status, EmploymentStatusChoices, EmploymentTypeChoices, HierarchicalRoleChoices
 )
+from .identity import ACTIVE_STATUSES
 
 # --- Serializer de Status Log ---
 
@@ -29,6 +34,10 @@ class EmploymentStatusLogSerializer(serializers.ModelSerializer):
             })
         return data
 
+def _position_title(position):
+    return position.job_title.name if position.job_title else str(position)
+
+
 # --- SERIALIZADOR DE ESCRITURA Y LECTURA ÚNICA (Employment) ---
 
 class EmploymentSerializer(serializers.ModelSerializer):
@@ -49,6 +58,7 @@ class EmploymentSerializer(serializers.ModelSerializer):
     department_name = serializers.SerializerMethodField()
     department_id = serializers.SerializerMethodField()
     person_photo = serializers.SerializerMethodField()
+    person_photo_renditions = ImageRenditionsField(source='person.photo')
 
     class Meta:
         model = Employment
@@ -124,7 +134,12 @@ class EmploymentSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'position': f'La posición "{str(position_obj)}" está completa ({current_occupancy}/{max_vacancies}). No hay vacantes disponibles.'
                 })
-        
+
+        # Reactivar un contrato finalizado vuelve a ocupar una vacante (ver Employment.clean)
+        elif self.instance and current_status and is_active_status(current_status) \
+                and not is_active_status(self.instance.current_status) and position.vacancies <= 0:
+            raise serializers.ValidationError({'current_status': "La posición no tiene vacantes disponibles."})
+
         return data
 
     def get_person_full_name(self, obj):
@@ -132,7 +147,7 @@ class EmploymentSerializer(serializers.ModelSerializer):
 
     def get_person_document(self, obj):
         if obj.person:
-            doc = obj.person.national_ids.filter(is_primary=True).first()
+            doc = primary_national_id(obj.person)
             if doc:
                 return f"{doc.document_type}-{doc.number}"
         return "Sin Documento"
@@ -152,30 +167,29 @@ class EmploymentSerializer(serializers.ModelSerializer):
         if not obj.position:
             return None
 
-        # Support for ManyToMany manager_positions
+        # Support for ManyToMany manager_positions: primer contrato activo en
+        # cualquiera de las posiciones jefe, en una sola consulta
         boss_positions = obj.position.manager_positions.all()
-        
-        if not boss_positions.exists():
-            return None
+        boss = Employment.objects.filter(
+            position__in=boss_positions,
+            current_status__in=ACTIVE_STATUSES
+        ).select_related('person', 'position__job_title').order_by('position_id', '-hire_date').first()
+
+        if boss:
+            return {
+                "id": boss.person.id,
+                "name": str(boss.person),
+                "position": _position_title(boss.position)
+            }
 
-        # Iterate through all boss positions to find an active boss
-        for boss_position in boss_positions:
-            boss_employments = boss_position.employments.all()
-            
-            for emp in boss_employments:
-                if is_active_status(emp.current_status):
-                    return {
-                        "id": emp.person.id,
-                        "name": str(emp.person),
-                        "position": boss_position.title
-                    }
-        
         # If boss positions exist but no one is active
-        first_boss_pos = boss_positions.first()
+        first_boss_pos = boss_positions.select_related('job_title').first()
+        if not first_boss_pos:
+            return None
         return {
             "id": None,
             "name": "VACANTE",
-            "position": first_boss_pos.title if first_boss_pos else "Sin Jefe"
+            "position": _position_title(first_boss_pos)
         }
 
     def get_position_full_name(self, obj):
@@ -321,7 +335,7 @@ class EmploymentDepartmentRoleSerializer(serializers.ModelSerializer):
         """
         if obj.person:
             # Usamos la relación inversa 'national_ids' definida en core.models
-            doc = obj.person.national_ids.filter(is_primary=True).first()
+            doc = primary_national_id(obj.person)
             if doc:
                 return f"{doc.document_type}-{doc.number}"
         return "Sin Documento"
@@ -393,7 +407,7 @@ class EmployeeListSerializer(serializers.ModelSerializer):
         """
         if obj.person:
             # Usamos la relación inversa 'national_ids' definida en core.models
-            doc = obj.person.national_ids.filter(is_primary=True).first()
+            doc = primary_national_id(obj.person)
             if doc:
                 return f"{doc.document_type}-{doc.number}"
         return "Sin Documento"
@@ -540,3 +554,71 @@ class PersonDepartmentRoleSerializer(serializers.ModelSerializer):
         # Crear el nuevo rol
         new_role = PersonDepartmentRole.objects.create(**validated_data)
         return new_role
+
+
+class WorkforceSeriesQuerySerializer(serializers.Serializer):
+    """Parámetros de la serie de dotación y rotación (employment.workforce)"""
+    MAX_MONTHS = 120
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    department = serializers.IntegerField(required=False)
+    include_subdepartments = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        data.setdefault('end', timezone.localdate())
+        data.setdefault('start', data['end'].replace(day=1) - timedelta(days=335))
+        if data['start'] > data['end']:
+            raise serializers.ValidationError("La fecha inicial no puede ser posterior a la final.")
+        months = (data['end'].year - data['start'].year) * 12 + data['end'].month - data['start'].month + 1
+        if months > self.MAX_MONTHS:
+            raise serializers.ValidationError(f"El rango no puede superar {self.MAX_MONTHS} meses.")
+        return data
+
+
+class BulkEmploymentSelectionSerializer(serializers.Serializer):
+    """Selección de contratos para las acciones masivas (employment.bulk): ids o filtros"""
+    MAX_IDS = 1000
+
+    employment_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=MAX_IDS
+    )
+    department = serializers.IntegerField(required=False)
+    include_subdepartments = serializers.BooleanField(default=True)
+    employment_type = serializers.ChoiceField(choices=EmploymentTypeChoices.choices, required=False)
+    end_date_from = serializers.DateField(required=False)
+    end_date_to = serializers.DateField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    FILTERS = ('department', 'employment_type', 'end_date_from', 'end_date_to')
+
+    def validate(self, data):
+        if not data.get('employment_ids') and not any(field in data for field in self.FILTERS):
+            raise serializers.ValidationError("Indique los contratos (employment_ids) o al menos un filtro.")
+        if data.get('end_date_from') and data.get('end_date_to') and data['end_date_from'] > data['end_date_to']:
+            raise serializers.ValidationError("La fecha inicial no puede ser posterior a la final.")
+        if data.get('employment_ids'):
+            data['employment_ids'] = list(dict.fromkeys(data['employment_ids']))
+        return data
+
+
+class BulkTerminateSerializer(BulkEmploymentSelectionSerializer):
+    end_date = serializers.DateField()
+    exit_reason = serializers.ChoiceField(choices=Employment.ExitReason.choices)
+    exit_notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    deactivate_users = serializers.BooleanField(default=True)
+
+
+class BulkRenewSerializer(BulkEmploymentSelectionSerializer):
+    end_date = serializers.DateField()
+    new_employment_type = serializers.ChoiceField(choices=EmploymentTypeChoices.choices, required=False)
+    activate_users = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        data = super().validate(data)
+        # Por filtro, el rango de end_date delimita qué contratos vencidos se reactivan
+        if not data.get('employment_ids') and not (data.get('end_date_from') and data.get('end_date_to')):
+            raise serializers.ValidationError(
+                "Para renovar por filtro indique el rango de fechas de egreso (end_date_from y end_date_to)."
+            )
+        return data
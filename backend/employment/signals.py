@@ -0,0 +1,54 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from core.models import Person
+from organization.models import Position, Department, JobTitle
+from .models import Employment, EmploymentStatusLog, PersonDepartmentRole, EmploymentDepartmentRole
+from .identity import invalidate_identity, invalidate_all_identities
+from .workforce import apply_status_logs
+
+
+# --- Invalidación del contexto de identidad (employment.identity) ---
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def invalidate_person_identity(sender, instance, **kwargs):
+    invalidate_identity(instance.pk)
+
+
+@receiver(post_save, sender=Employment)
+@receiver(post_delete, sender=Employment)
+@receiver(post_save, sender=PersonDepartmentRole)
+@receiver(post_delete, sender=PersonDepartmentRole)
+def invalidate_owner_identity(sender, instance, **kwargs):
+    invalidate_identity(instance.person_id)
+
+
+@receiver(post_save, sender=EmploymentDepartmentRole)
+@receiver(post_delete, sender=EmploymentDepartmentRole)
+def invalidate_employment_role_identity(sender, instance, **kwargs):
+    # En un borrado en cascada el contrato ya no existe; su propia señal invalida
+    person_id = Employment.objects.filter(pk=instance.employment_id).values_list('person_id', flat=True).first()
+    invalidate_identity(person_id)
+
+
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=JobTitle)
+@receiver(post_delete, sender=JobTitle)
+def invalidate_structure_identities(sender, **kwargs):
+    invalidate_all_identities()
+
+
+@receiver(m2m_changed, sender=Position.manager_positions.through)
+def invalidate_reporting_lines(sender, **kwargs):
+    invalidate_all_identities()
+
+
+# --- Series de dotación (employment.workforce) ---
+
+@receiver(post_save, sender=EmploymentStatusLog)
+def update_workforce_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        apply_status_logs([instance])
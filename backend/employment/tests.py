@@ -1,3 +1,459 @@
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.models import Person
+from organization.models import Department, JobTitle, Position
+from .bulk import renew_employments, select_employments, terminate_employments
+from .expiry import EXPIRY_REASON, process_contract_expiry
+from .identity import identity_for
+from .models import (
+    ContractExpiryRun, Employment, EmploymentDepartmentRole, EmploymentStatusLog, PersonDepartmentRole,
+    WorkforceMonthlyStat
+)
+from .workforce import rebuild_workforce_stats, workforce_series
+
+
+class WorkforceSeriesTests(TestCase):
+    """Series de dotación y rotación desde EmploymentStatusLog (employment.workforce)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        self.parent = Department.objects.create(name='Académico')
+        self.child = Department.objects.create(name='Ingeniería', parent=self.parent)
+        title = JobTitle.objects.create(name='Profesor')
+        self.parent_position = Position.objects.create(department=self.parent, job_title=title, vacancies=5)
+        self.child_position = Position.objects.create(department=self.child, job_title=title, vacancies=5)
+
+        self.hire(self.parent_position, date(2024, 1, 10))
+        self.hire(self.child_position, date(2024, 2, 5))
+        leaver = self.hire(self.child_position, date(2024, 2, 20))
+        leaver.current_status = 'FIN'
+        leaver.exit_reason = Employment.ExitReason.RESIGNATION
+        leaver.end_date = date(2024, 4, 15)
+        leaver.save()
+        # Una suspensión no mueve la dotación
+        suspended = Employment.objects.get(position=self.parent_position)
+        suspended.current_status = 'SUS'
+        suspended.save()
+        # Contrato cargado sin registros de estatus
+        Employment.objects.bulk_create([Employment(
+            person=Person.objects.create(first_name='Luis', paternal_surname='Gómez'),
+            position=self.parent_position, hire_date=date(2024, 3, 1),
+            end_date=date(2024, 5, 31), current_status='FIN'
+        )])
+
+    def hire(self, position, hire_date):
+        person = Person.objects.create(first_name='Ana', paternal_surname=f'Pérez {hire_date}')
+        return Employment.objects.create(person=person, position=position, hire_date=hire_date, current_status='ACT')
+
+    def rows(self):
+        return sorted(
+            (s.month, s.department_id, s.hires, s.exits, s.exits_by_reason, s.exit_tenure_days, s.hire_day_balance)
+            for s in WorkforceMonthlyStat.objects.all()
+        )
+
+    def test_monthly_series(self):
+        series = workforce_series(date(2024, 1, 1), date(2024, 6, 30))
+        months = {m['month'].month: m for m in series['months']}
+        self.assertEqual([months[i]['closing_headcount'] for i in range(1, 7)], [1, 3, 4, 3, 2, 2])
+        self.assertEqual(months[4]['exits_by_reason'], {'REN': 1})
+        self.assertEqual(months[5]['exits_by_reason'], {'FIN': 1})
+        self.assertEqual(months[4]['avg_exit_tenure_days'], 55)
+        self.assertEqual(months[1]['avg_tenure_days'], 21)
+        self.assertEqual(months[4]['turnover_rate'], round(1 / 3.5, 4))
+        self.assertEqual(series['totals']['hires'], 4)
+        self.assertEqual(series['totals']['exits'], 2)
+        self.assertEqual([r['reason'] for r in series['totals']['exits_by_reason']], ['REN', 'FIN'])
+
+        later = workforce_series(date(2024, 3, 1), date(2024, 3, 31))
+        self.assertEqual(later['months'][0]['opening_headcount'], 3)
+
+        child = workforce_series(date(2024, 1, 1), date(2024, 6, 30), departments=[self.child.pk])
+        self.assertEqual([m['closing_headcount'] for m in child['months']], [0, 2, 2, 1, 1, 1])
+
+    def test_incremental_update_matches_rebuild(self):
+        rebuild_workforce_stats()
+        self.hire(self.child_position, date(2024, 3, 10))
+        leaver = Employment.objects.get(position=self.child_position, hire_date=date(2024, 2, 5))
+        leaver.current_status = 'DES'
+        leaver.end_date = date(2024, 6, 1)
+        leaver.save()
+        incremental = self.rows()
+        rebuild_workforce_stats()
+        self.assertEqual(incremental, self.rows())
+
+    def test_endpoint(self):
+        url = '/api/employment/employments/workforce-series/'
+        rebuild_workforce_stats()
+        response = self.client.get(url, {'start': '2024-01-01', 'end': '2024-06-30', 'department': self.parent.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals']['closing_headcount'], 2)
+
+        response = self.client.get(url, {
+            'start': '2024-01-01', 'end': '2024-06-30', 'department': self.parent.pk, 'include_subdepartments': 'false'
+        })
+        self.assertEqual([m['closing_headcount'] for m in response.data['months']], [1, 1, 2, 2, 1, 1])
+
+        response = self.client.get(url, {'start': '2024-06-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ContractExpiryTests(TestCase):
+    """Vencimiento automático de contratos temporales y pasantías (employment.expiry)."""
+
+    TODAY = date(2025, 6, 1)
+
+    def setUp(self):
+        department = Department.objects.create(name='Académico')
+        title = JobTitle.objects.create(name='Asistente')
+        self.position = Position.objects.create(department=department, job_title=title, vacancies=5)
+        self.other_position = Position.objects.create(department=department, job_title=JobTitle.objects.create(name='Auxiliar'))
+
+        self.temporary = self.contract('Ana', 'TMP', date(2025, 5, 31))
+        self.intern = self.contract('Luis', 'PAS', date(2025, 5, 20))
+        self.upcoming = self.contract('Eva', 'TMP', date(2025, 6, 10))
+        self.permanent = self.contract('Juan', 'FIJ', date(2025, 5, 1))
+        # El pasante tiene además un contrato fijo vigente: su cuenta sigue activa
+        Employment.objects.create(
+            person=self.intern.person, position=self.other_position, hire_date=date(2024, 1, 1),
+            employment_type='FIJ', current_status='ACT'
+        )
+        self.ana = User.objects.create_user('ana', 'x', person=self.temporary.person)
+        self.luis = User.objects.create_user('luis', 'x', person=self.intern.person)
+
+    def contract(self, name, employment_type, end_date):
+        return Employment.objects.create(
+            person=Person.objects.create(first_name=name, paternal_surname='Rojas'), position=self.position,
+            hire_date=date(2025, 1, 1), end_date=end_date, employment_type=employment_type, current_status='ACT'
+        )
+
+    def test_expires_contracts_in_bulk(self):
+        vacancies = Position.objects.get(pk=self.position.pk).vacancies
+        token_version = self.ana.token_version
+        run = process_contract_expiry(today=self.TODAY, notice_days=15)
+
+        self.assertEqual(run.expired_count, 2)
+        self.assertEqual(sorted(item['id'] for item in run.report['expired']), sorted([self.temporary.pk, self.intern.pk]))
+        self.assertEqual([item['id'] for item in run.report['upcoming']], [self.upcoming.pk])
+        for employment in (self.temporary, self.intern):
+            employment.refresh_from_db()
+            self.assertEqual((employment.current_status, employment.exit_reason), ('FIN', 'FIN'))
+            self.assertEqual(employment.history.first().history_change_reason, EXPIRY_REASON)
+            self.assertTrue(EmploymentStatusLog.objects.filter(employment=employment, status='FIN', start_date=self.TODAY).exists())
+        self.permanent.refresh_from_db()
+        self.assertEqual(self.permanent.current_status, 'ACT')
+        self.assertEqual(Position.objects.get(pk=self.position.pk).vacancies, vacancies + 2)
+        revision = self.position.history.first()
+        self.assertEqual((revision.vacancies, revision.history_change_reason), (vacancies + 2, EXPIRY_REASON))
+
+        self.ana.refresh_from_db()
+        self.luis.refresh_from_db()
+        self.assertFalse(self.ana.is_active)
+        self.assertEqual(self.ana.token_version, token_version + 1)
+        self.assertTrue(self.luis.is_active)
+        self.assertEqual((run.vacancies_freed, run.users_deactivated), (2, 1))
+        self.assertEqual(ContractExpiryRun.objects.get().pk, run.pk)
+
+        # Una segunda ejecución no encuentra nada
+        self.assertEqual(process_contract_expiry(today=self.TODAY).expired_count, 0)
+
+    def test_dry_run_and_command(self):
+        out = StringIO()
+        call_command('process_contract_expiry', '--date', '2025-06-01', '--dry-run', stdout=out)
+        self.assertIn('Would expire 2 contract(s)', out.getvalue())
+        self.temporary.refresh_from_db()
+        self.assertEqual(self.temporary.current_status, 'ACT')
+        self.assertFalse(ContractExpiryRun.objects.exists())
+
+        call_command('process_contract_expiry', '--date', '2025-06-01', '--keep-users', stdout=out)
+        self.assertIn('2 expired, 2 vacancies freed, 0 account(s) deactivated', out.getvalue())
+        self.ana.refresh_from_db()
+        self.assertTrue(self.ana.is_active)
+
+
+class BulkContractTests(TestCase):
+    """Cierre y renovación masiva de contratos (employment.bulk)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        self.faculty = Department.objects.create(name='Facultad')
+        self.school = Department.objects.create(name='Escuela', parent=self.faculty)
+        title = JobTitle.objects.create(name='Docente')
+        self.position = Position.objects.create(department=self.school, job_title=title, vacancies=5)
+        self.other_position = Position.objects.create(department=self.faculty, job_title=title, vacancies=5)
+
+        self.ana = self.contract('Ana', self.position, 'TMP', date(2025, 7, 31))
+        self.luis = self.contract('Luis', self.position, 'PAS', date(2025, 7, 15))
+        self.eva = self.contract('Eva', self.other_position, 'TMP', date(2025, 7, 31))
+        self.juan = self.contract('Juan', self.position, 'FIJ', None)
+        self.ana_user = User.objects.create_user('ana', 'x', person=self.ana.person)
+
+    def contract(self, name, position, employment_type, end_date):
+        return Employment.objects.create(
+            person=Person.objects.create(first_name=name, paternal_surname='Rojas'), position=position,
+            hire_date=date(2025, 3, 1), end_date=end_date, employment_type=employment_type, current_status='ACT'
+        )
+
+    def vacancies(self):
+        return Position.objects.get(pk=self.position.pk).vacancies
+
+    def test_terminate_by_filter(self):
+        url = '/api/employment/employments/bulk-terminate/'
+        payload = {
+            'department': self.school.pk, 'employment_type': 'TMP', 'end_date_to': '2025-07-31',
+            'end_date': '2025-07-31', 'exit_reason': 'FIN', 'exit_notes': 'Cierre de semestre',
+        }
+        vacancies = self.vacancies()
+        response = self.client.post(url, {**payload, 'dry_run': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.ana.pk])
+        self.ana.refresh_from_db()
+        self.assertEqual(self.ana.current_status, 'ACT')
+
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['summary'], {
+            'requested': 1, 'processed': 1, 'failed': 0, 'vacancies_freed': 1, 'users_deactivated': 1, 'dry_run': False
+        })
+        self.ana.refresh_from_db()
+        self.assertEqual((self.ana.current_status, self.ana.exit_reason, self.ana.end_date), ('FIN', 'FIN', date(2025, 7, 31)))
+        self.assertEqual(
+            EmploymentStatusLog.objects.filter(employment=self.ana).latest('id').reason,
+            'Fin de Contrato (Tiempo Cumplido) (Cierre de semestre)'
+        )
+        self.assertEqual(self.vacancies(), vacancies + 1)
+        self.ana_user.refresh_from_db()
+        self.assertFalse(self.ana_user.is_active)
+
+        # Por filtro ya no queda nada vigente
+        self.assertEqual(self.client.post(url, payload, format='json').data['results'], [])
+
+    def test_single_and_bulk_terminate_free_vacancies_with_history(self):
+        vacancies = self.vacancies()
+        response = self.client.post(f'/api/employment/employments/{self.luis.pk}/terminate/', {
+            'end_date': '2025-07-15', 'exit_reason': 'FIN'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.vacancies(), vacancies + 1)
+
+        self.client.post('/api/employment/employments/bulk-terminate/', {
+            'employment_ids': [self.ana.pk], 'end_date': '2025-07-31', 'exit_reason': 'FIN'
+        }, format='json')
+        self.assertEqual(self.vacancies(), vacancies + 2)
+        self.assertEqual(
+            list(self.position.history.values_list('vacancies', flat=True)[:2]), [vacancies + 2, vacancies + 1]
+        )
+
+        # Reactivar por la vía individual vuelve a ocupar la vacante
+        luis = Employment.objects.get(pk=self.luis.pk)
+        luis.current_status = 'ACT'
+        luis.save()
+        self.assertEqual(self.vacancies(), vacancies + 1)
+
+    def test_single_reactivation_rejects_full_position(self):
+        """Sin vacantes, la reactivación individual falla igual que la masiva."""
+        self.client.post(f'/api/employment/employments/{self.luis.pk}/terminate/', {
+            'end_date': '2025-07-15', 'exit_reason': 'FIN'
+        }, format='json')
+        Position.objects.filter(pk=self.position.pk).update(vacancies=0)
+
+        response = self.client.patch(
+            f'/api/employment/employments/{self.luis.pk}/', {'current_status': 'ACT'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['current_status'], ['La posición no tiene vacantes disponibles.'])
+
+        luis = Employment.objects.get(pk=self.luis.pk)
+        luis.current_status = 'ACT'
+        with self.assertRaisesMessage(ValidationError, 'La posición no tiene vacantes disponibles.'):
+            luis.save()
+        self.assertEqual(Employment.objects.get(pk=self.luis.pk).current_status, 'FIN')
+        self.assertEqual(self.vacancies(), 0)
+
+    def test_terminate_by_ids_reports_each_row(self):
+        response = self.client.post('/api/employment/employments/bulk-terminate/', {
+            'employment_ids': [self.luis.pk, self.eva.pk, 999999, self.luis.pk],
+            'end_date': '2025-03-15', 'exit_reason': 'REN', 'deactivate_users': False,
+        }, format='json')
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[self.luis.pk]['status'], 'ok')
+        self.assertEqual(rows[999999]['error'], 'Contrato no encontrado.')
+
+        response = self.client.post('/api/employment/employments/bulk-terminate/', {
+            'employment_ids': [self.luis.pk], 'end_date': '2025-01-01', 'exit_reason': 'REN',
+        }, format='json')
+        self.assertEqual(response.data['results'][0]['error'], 'El contrato no está vigente (Finalizado).')
+
+        response = self.client.post('/api/employment/employments/bulk-terminate/', {
+            'employment_ids': [self.juan.pk], 'end_date': '2025-01-01', 'exit_reason': 'REN',
+        }, format='json')
+        self.assertEqual(response.data['summary']['failed'], 1)
+        self.juan.refresh_from_db()
+        self.assertEqual(self.juan.current_status, 'ACT')
+
+    def test_renew_and_reactivate(self):
+        process_contract_expiry(today=date(2025, 7, 20))
+        self.luis.refresh_from_db()
+        self.assertEqual(self.luis.current_status, 'FIN')
+        # Vencido en un período anterior: queda fuera del rango pedido
+        old = Employment.objects.create(
+            person=Person.objects.create(first_name='Olga', paternal_surname='Rojas'), position=self.position,
+            hire_date=date(2024, 3, 1), end_date=date(2024, 12, 31), employment_type='TMP',
+            current_status='FIN', exit_reason='FIN',
+        )
+        vacancies = self.vacancies()
+
+        # Por filtro, sin rango de fechas de egreso no se renueva nada
+        url = '/api/employment/employments/bulk-renew/'
+        response = self.client.post(url, {'department': self.faculty.pk, 'end_date': '2025-12-15'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(renew_employments(select_employments(department=self.faculty.pk), date(2025, 12, 15),
+                                           dry_run=True)['summary']['reactivated'], 0)
+
+        response = self.client.post(url, {
+            'department': self.faculty.pk, 'end_date_from': '2025-07-01', 'end_date_to': '2025-07-31',
+            'end_date': '2025-12-15',
+        }, format='json')
+        report = response.data
+        rows = {row['id']: row for row in report['results']}
+        self.assertEqual(sorted(rows), sorted([self.ana.pk, self.luis.pk, self.eva.pk]))
+        self.assertEqual(report['summary']['reactivated'], 1)
+        self.luis.refresh_from_db()
+        self.assertEqual((self.luis.current_status, self.luis.exit_reason, self.luis.end_date), ('ACT', None, date(2025, 12, 15)))
+        self.assertEqual(self.vacancies(), vacancies - 1)
+        old.refresh_from_db()
+        self.assertEqual(old.current_status, 'FIN')
+        self.ana.refresh_from_db()
+        self.assertEqual(self.ana.end_date, date(2025, 12, 15))
+        self.assertTrue(self.ana.history.filter(history_change_reason='Renovación masiva de contratos').exists())
+
+        response = self.client.post(url, {'employment_ids': [self.juan.pk], 'end_date': '2025-12-15'}, format='json')
+        self.assertEqual(response.data['results'][0]['error'], 'El contrato no tiene fecha de egreso: no requiere renovación.')
+
+        # La nueva fecha debe ser posterior a la vigente
+        response = self.client.post('/api/employment/employments/bulk-renew/', {
+            'employment_ids': [self.ana.pk], 'end_date': '2025-12-01', 'new_employment_type': 'FIJ',
+        }, format='json')
+        self.assertEqual(response.data['results'][0]['error'], 'La nueva fecha de egreso debe ser posterior a la actual.')
+
+    def test_renew_checks_duplicates_and_vacancies(self):
+        self.luis.current_status = 'FIN'
+        self.luis.exit_reason = 'FIN'
+        self.luis.save()
+        # Otro contrato vigente de Luis en la misma posición
+        Employment.objects.create(
+            person=self.luis.person, position=self.position, hire_date=date(2025, 7, 16), current_status='ACT'
+        )
+        report = renew_employments(select_employments(ids=[self.luis.pk]), date(2025, 12, 15), requested_ids=[self.luis.pk])
+        self.assertEqual(report['results'][0]['error'], 'La persona ya tiene un contrato vigente en esta posición.')
+
+        self.ana.current_status = 'FIN'
+        self.ana.exit_reason = 'FIN'
+        self.ana.save()
+        Position.objects.filter(pk=self.position.pk).update(vacancies=0)
+        report = renew_employments(select_employments(ids=[self.ana.pk]), date(2025, 12, 15), requested_ids=[self.ana.pk])
+        self.assertEqual(report['results'][0]['error'], 'La posición no tiene vacantes disponibles.')
+
+    def test_requires_selection_and_staff(self):
+        response = self.client.post('/api/employment/employments/bulk-renew/', {'end_date': '2025-12-15'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(self.ana_user)
+        response = self.client.post('/api/employment/employments/bulk-renew/', {
+            'employment_ids': [self.ana.pk], 'end_date': '2025-12-15'
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class IdentityCacheTests(TestCase):
+    """Invalidación del contexto de identidad cacheado (employment.identity, employment.signals)."""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name='Finanzas')
+        self.other_department = Department.objects.create(name='Compras')
+        self.position = Position.objects.create(
+            department=self.department, job_title=JobTitle.objects.create(name='Analista'), vacancies=3
+        )
+        self.person = Person.objects.create(first_name='Ana', paternal_surname='Pérez')
+        self.user = User.objects.create_user('ana', 'x', person=self.person)
+        self.employment = Employment.objects.create(
+            person=self.person, position=self.position, hire_date=date(2024, 1, 1), current_status='ACT'
+        )
+
+    def identity(self):
+        return identity_for(self.user)
+
+    def assertCached(self):
+        self.identity()
+        with self.assertNumQueries(0):
+            return self.identity()
+
+    def test_cached_identity(self):
+        identity = self.assertCached()
+        self.assertEqual(identity.employment_ids, {self.employment.pk})
+        self.assertEqual(identity.department_ids, {self.department.pk})
+
+    def test_employment_changes_invalidate(self):
+        self.assertCached()
+        employment = Employment.objects.get(pk=self.employment.pk)
+        employment.current_status = 'FIN'
+        employment.exit_reason = Employment.ExitReason.RESIGNATION
+        employment.end_date = date(2024, 6, 30)
+        employment.save()
+        self.assertEqual(self.identity().employment_ids, set())
+
+        second = Employment.objects.create(
+            person=self.person, position=self.position, hire_date=date(2024, 7, 1), current_status='ACT'
+        )
+        self.assertEqual(self.identity().employment_ids, {second.pk})
+        second.delete()
+        self.assertEqual(self.identity().employment_ids, set())
+
+    def test_bulk_termination_invalidates_on_commit(self):
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            terminate_employments(
+                select_employments(ids=[self.employment.pk]), date(2024, 6, 30),
+                Employment.ExitReason.RESIGNATION, deactivate_users=False, requested_ids=[self.employment.pk]
+            )
+        self.assertIsNone(self.identity().employment)
+
+    def test_person_role_changes_invalidate(self):
+        self.assertCached()
+        role = PersonDepartmentRole.objects.create(
+            person=self.person, department=self.other_department, hierarchical_role='MGR', start_date=date(2024, 1, 1)
+        )
+        self.assertTrue(self.identity().manages_department(self.other_department.pk))
+        role.delete()
+        self.assertFalse(self.identity().is_manager)
+
+    def test_employment_role_changes_invalidate(self):
+        self.assertCached()
+        role = EmploymentDepartmentRole.objects.create(
+            employment=self.employment, department=self.other_department, hierarchical_role='MGR',
+            start_date=date(2024, 1, 1)
+        )
+        self.assertEqual(self.identity().managed_department_ids, {self.other_department.pk})
+        role.end_date = date(2024, 2, 1)
+        role.save()
+        self.assertEqual(self.identity().managed_department_ids, set())
+
+    def test_structure_changes_invalidate(self):
+        self.assertCached()
+        self.position.is_manager = True
+        self.position.save()
+        self.assertEqual(self.identity().managed_department_ids, {self.department.pk})
 
-# Create your tests here.
+        manager = Position.objects.create(department=self.department, job_title=JobTitle.objects.create(name='Gerente'))
+        self.assertCached()
+        self.position.manager_positions.add(manager)
+        self.assertEqual([p.pk for p in self.identity().employment.position.manager_positions.all()], [manager.pk])
@@ -12,13 +12,22 @@ from .models import (
 from .serializers import (
     EmploymentSerializer, EmployeeListSerializer, EmploymentStatusLogSerializer,
     EmploymentDepartmentRoleSerializer, PersonDepartmentRoleSerializer,
-    EmployeePositionDataSerializer # Nuevo serializer
+    EmployeePositionDataSerializer, # Nuevo serializer
+    WorkforceSeriesQuerySerializer, BulkTerminateSerializer, BulkRenewSerializer
 )
 from core.filters import UnaccentSearchFilter
+from core.images import rendition_url
+from core.serializers import prefetch_primary_national_id
+from .identity import get_identity, ACTIVE_STATUSES
+from .workforce import workforce_series
+from .bulk import select_employments, terminate_employments, renew_employments
 
 class EmploymentViewSet(viewsets.ModelViewSet):
     queryset = Employment.objects.all()
     serializer_class = EmploymentSerializer
+    # Máximo de consultas por acción (core.metrics), con una de margen para la
+    # autenticación cuando la versión del token no está en caché
+    query_budgets = {'list': 4, 'retrieve': 6, 'workforce': 4, 'bulk_terminate': 25, 'bulk_renew': 21}
     permission_classes = [permissions.IsAuthenticated] # Cambiado a IsAuthenticated para que my_org_chart funcione para empleados normales
 
     def get_queryset(self):
@@ -33,8 +42,9 @@ class EmploymentViewSet(viewsets.ModelViewSet):
                 'person', 
                 'position', 
                 'position__department',
+                'position__job_title',
                 'person__user_account' # Para saber si tiene usuario
-            )
+            ).prefetch_related(prefetch_primary_national_id())
         
         # Si NO es admin, solo debería ver su propio contrato (excepto en my_org_chart que tiene su lógica propia)
         # Pero como el frontend de Admin Panel usa este endpoint para listar todo,
@@ -87,7 +97,62 @@ class EmploymentViewSet(viewsets.ModelViewSet):
             return Response(self.get_serializer(employment).data)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
-        
+
+    # --- ACCIÓN 1B: CIERRE Y RENOVACIÓN MASIVOS (fin de período) ---
+    def _bulk_selection(self, data):
+        return select_employments(
+            ids=data.get('employment_ids'),
+            department=data.get('department'),
+            include_subdepartments=data['include_subdepartments'],
+            employment_type=data.get('employment_type'),
+            end_date_from=data.get('end_date_from'),
+            end_date_to=data.get('end_date_to'),
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-terminate')
+    def bulk_terminate(self, request):
+        """
+        Finaliza varios contratos vigentes a la vez. Recibe employment_ids o
+        filtros (department, include_subdepartments, employment_type,
+        end_date_from, end_date_to), end_date, exit_reason, exit_notes,
+        deactivate_users (por defecto true) y dry_run. Devuelve el resultado
+        de cada contrato y los totales.
+        """
+        if not request.user.is_staff:
+            return Response({"error": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+
+        params = BulkTerminateSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(terminate_employments(
+            self._bulk_selection(data), data['end_date'], data['exit_reason'],
+            exit_notes=data.get('exit_notes'), deactivate_users=data['deactivate_users'],
+            requested_ids=data.get('employment_ids') or (), dry_run=data['dry_run'],
+        ))
+
+    @action(detail=False, methods=['post'], url_path='bulk-renew')
+    def bulk_renew(self, request):
+        """
+        Extiende hasta end_date varios contratos (vigentes o vencidos por fin
+        de contrato, que se reactivan). Recibe la misma selección que
+        bulk-terminate (por filtro, end_date_from y end_date_to son obligatorios
+        y acotan los vencidos a reactivar), end_date, new_employment_type,
+        activate_users (por defecto true) y dry_run.
+        """
+        if not request.user.is_staff:
+            return Response({"error": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+
+        params = BulkRenewSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        window = (data['end_date_from'], data['end_date_to']) if 'end_date_from' in data and 'end_date_to' in data else None
+        return Response(renew_employments(
+            self._bulk_selection(data), data['end_date'], employment_type=data.get('new_employment_type'),
+            activate_users=data['activate_users'], requested_ids=data.get('employment_ids') or (),
+            expired_between=window,
+            dry_run=data['dry_run'],
+        ))
+
     # --- ACCIÓN 2: DASHBOARD (KPIs) ---
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
@@ -141,123 +206,118 @@ class EmploymentViewSet(viewsets.ModelViewSet):
             "expiring_soon": expiring_list
         })
 
+    @action(detail=False, methods=['get'], url_path='workforce-series')
+    def workforce(self, request):
+        """
+        Serie mensual de dotación, ingresos, egresos, rotación, motivos de
+        salida y antigüedad. Parámetros: start, end (por defecto los últimos
+        12 meses), department e include_subdepartments (por defecto true).
+        """
+        if not request.user.is_staff:
+            return Response({"error": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+
+        params = WorkforceSeriesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        departments = None
+        if data.get('department') is not None:
+            from organization.models import Department
+            if data['include_subdepartments']:
+                departments = Department.objects.descendants_of(data['department']).values('pk')
+            else:
+                departments = [data['department']]
+
+        return Response(workforce_series(data['start'], data['end'], departments))
+
     # --- ACCIÓN 3: MI ORGANIGRAMA (Para el empleado) ---
     @action(detail=False, methods=['get'])
     def my_org_chart(self, request):
         """
         Devuelve jefe, compañeros y subordinados del usuario logueado.
         """
-        user = request.user
-        if not hasattr(user, 'person'):
+        identity = get_identity(request)
+        if not identity.has_person:
             return Response({"error": "Sin perfil de empleado"}, status=404)
 
-        # Mi empleo activo
-        my_jobs = Employment.objects.filter(
-            person=user.person
-        ).select_related('position__department', 'position__manager_position')
-        
-        my_job = None
-        for job in my_jobs:
-            if is_active_status(job.current_status):
-                my_job = job
-                break
-
+        # Mi empleo activo (principal)
+        my_job = identity.employment
         if not my_job:
             return Response({"error": "No tienes contrato activo."}, status=404)
 
         data = {
             "me": {
-                "name": str(user.person),
-                "position": my_job.position.name,
+                "name": str(identity.person),
+                "position": _position_name(my_job.position),
                 "department": my_job.position.department.name if my_job.position.department else "Sin Depto",
-                "photo": user.person.photo.url if user.person.photo else None
+                "photo": rendition_url(identity.person.photo, 'thumb')
             },
             "boss": None,
             "peers": [],
             "subordinates": []
         }
 
-        # Jefe
-        boss_pos = my_job.position.manager_position
-        if boss_pos:
-            boss_employments = Employment.objects.filter(
-                position=boss_pos
-            ).select_related('person')
-            
-            boss_employment = None
-            for emp in boss_employments:
-                if is_active_status(emp.current_status):
-                    boss_employment = emp
-                    break
-            
+        # Jefe (manager_positions es ManyToMany: se toma el primero, ya precargado en el contexto)
+        boss_positions = list(my_job.position.manager_positions.all())
+        if boss_positions:
+            boss_pos = boss_positions[0]
+            boss_employment = Employment.objects.filter(
+                position=boss_pos,
+                current_status__in=ACTIVE_STATUSES
+            ).select_related('person').first()
+
             if boss_employment:
                 data["boss"] = {
                     "name": str(boss_employment.person),
-                    "position": boss_pos.name,
-                    "photo": boss_employment.person.photo.url if boss_employment.person.photo else None
+                    "position": _position_name(boss_pos),
+                    "photo": rendition_url(boss_employment.person.photo, 'thumb')
                 }
             else:
-                 data["boss"] = {"name": "VACANTE", "position": boss_pos.name, "photo": None}
+                 data["boss"] = {"name": "VACANTE", "position": _position_name(boss_pos), "photo": None}
 
         # Compañeros (Mismo Depto)
-        if my_job.position.department:
-            all_peers = Employment.objects.filter(
-                position__department=my_job.position.department
-            ).exclude(id=my_job.id).select_related('person', 'position')[:20]  # Traemos más para filtrar
-
-            peers = [p for p in all_peers if is_active_status(p.current_status)][:10]
+        if my_job.position.department_id:
+            peers = Employment.objects.filter(
+                position__department_id=my_job.position.department_id,
+                current_status__in=ACTIVE_STATUSES
+            ).exclude(person_id=identity.person_id).select_related('person', 'position__job_title')[:10]
 
             data["peers"] = [{
                 "name": str(p.person),
-                "position": p.position.name,
-                "photo": p.person.photo.url if p.person.photo else None
+                "position": _position_name(p.position),
+                "photo": rendition_url(p.person.photo, 'thumb')
             } for p in peers]
 
         # Subordinados (Si soy jefe)
-        all_subordinates = Employment.objects.filter(
-            position__manager_position=my_job.position
-        ).select_related('person', 'position')
-
-        subordinates = [s for s in all_subordinates if is_active_status(s.current_status)]
+        subordinates = Employment.objects.filter(
+            position__manager_positions=my_job.position,
+            current_status__in=ACTIVE_STATUSES
+        ).select_related('person', 'position__job_title')
 
         data["subordinates"] = [{
             "name": str(s.person),
-            "position": s.position.name,
-            "photo": s.person.photo.url if s.person.photo else None
+            "position": _position_name(s.position),
+            "photo": rendition_url(s.person.photo, 'thumb')
         } for s in subordinates]
 
         return Response(data)
     
     @action(detail=False, methods=['get'])
     def my_departments(self, request):
-        user = request.user
-        if not hasattr(user, 'person'):
+        identity = get_identity(request)
+        if not identity.has_person:
             return Response([])
 
-        my_employments = Employment.objects.filter(
-            person=user.person
-        ).select_related('position', 'position__department', 'position__job_title')
-        
-        # Filtrar solo activos
-        active_employments = [e for e in my_employments if is_active_status(e.current_status)]
-
         departments_map = {}
 
-        for emp in active_employments:
+        for emp in identity.employments:
             dept = emp.position.department
             dept_id = dept.id if dept else 0
             dept_name = dept.name if dept else "Sin Departamento Asignado"
             dept_desc = getattr(dept, 'description', 'Área general.') if dept else "Posición fuera de estructura."
 
             # Determinamos el nombre del cargo de forma segura
-            pos_name = emp.position.name
-            
-            # Si pos_name es None, intentamos usar el Job Title o un fallback
-            if not pos_name:
-                if emp.position.job_title:
-                    pos_name = emp.position.job_title.name
-                else:
-                    pos_name = "Cargo Sin Nombre"
+            pos_name = _position_name(emp.position)
 
             if dept_id in departments_map:
                 if pos_name not in departments_map[dept_id]['positions_list']:
@@ -287,14 +347,15 @@ class EmploymentViewSet(viewsets.ModelViewSet):
         Retorna los empleos activos del usuario con detalle de posición (Objetivo, Funciones).
         Usado en la página "Datos del Puesto".
         """
-        user = request.user
-        if not hasattr(user, 'person'):
+        identity = get_identity(request)
+        if not identity.employment_ids:
             return Response([])
 
-        # Buscar empleos activos asociados a la persona
-        my_employments = Employment.objects.filter(
-            person=user.person
+        # Los contratos activos ya se conocen: solo se cargan los detalles para el serializer
+        active_employments = Employment.objects.filter(
+            id__in=identity.employment_ids
         ).select_related(
+            'person',
             'position', 
             'position__department', 
             'position__job_title'
@@ -303,13 +364,17 @@ class EmploymentViewSet(viewsets.ModelViewSet):
             'position__manager_positions'  # Para supervisor info (ManyToMany)
         )
         
-        # Filtrar solo activos usando helper
-        active_employments = [e for e in my_employments if is_active_status(e.current_status)]
-        
         serializer = EmployeePositionDataSerializer(active_employments, many=True, context={'request': request})
         return Response(serializer.data)
 
 
+def _position_name(position):
+    """Nombre del cargo (JobTitle) o un texto de respaldo"""
+    if position.job_title:
+        return position.job_title.name
+    return "Cargo Sin Nombre"
+
+
 # Viewset para logs
 class EmploymentStatusLogViewSet(viewsets.ModelViewSet):
     queryset = EmploymentStatusLog.objects.all()
@@ -0,0 +1,332 @@
+"""
+Series de dotación y rotación a partir de EmploymentStatusLog.
+
+Los registros de estatus se recorren en una sola pasada ordenada por
+(departamento, contrato, fecha) con .iterator(): cada contrato solo necesita
+su estatus anterior y cada departamento sus meses, así la memoria no crece con
+el número de registros. Los eventos son:
+
+- Ingreso: pasar de ningún estatus o uno inactivo a uno de ACTIVE_STATUSES.
+  Se fecha con Employment.hire_date si es el primer registro del contrato.
+- Egreso: pasar de un estatus activo a uno inactivo. Si es el último registro
+  del contrato se fecha con Employment.end_date (la fecha efectiva de salida).
+- Los cambios entre estatus activos (permiso, reposo...) no mueven la dotación.
+
+Los contratos sin registros (cargas masivas antiguas) se reconstruyen desde
+hire_date/end_date y se intercalan en la misma pasada.
+
+Los eventos se agregan por mes y departamento en WorkforceMonthlyStat. La
+dotación de un mes es la suma acumulada de ingresos menos egresos, por lo que
+cada registro nuevo solo toca el mes de su evento (apply_status_logs, desde la
+señal post_save o tras un bulk_create). Si se borran contratos, se cambian
+motivos de salida o fechas hacia atrás, ejecutar `refresh_workforce_stats`.
+"""
+
+import heapq
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Sum
+from django.db.models.functions import Coalesce
+
+from .identity import ACTIVE_STATUSES
+from .models import Employment, EmploymentStatusLog, WorkforceMonthlyStat
+
+CHUNK_SIZE = 2000
+
+# Motivo de salida si el contrato no lo indica: el del estatus, o "Otro"
+EXIT_REASON_BY_STATUS = {
+    'REN': Employment.ExitReason.RESIGNATION,
+    'DES': Employment.ExitReason.DISMISSAL,
+    'FIN': Employment.ExitReason.END_CONTRACT,
+}
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _month_end(month):
+    return _next_month(month) - timedelta(days=1)
+
+
+def _stream_key(row):
+    department_id, employment_id = row[0], row[1]
+    return (department_id is not None, department_id or 0, employment_id)
+
+
+# --- EVENTOS ---
+
+def _log_rows(employment_ids=None):
+    logs = EmploymentStatusLog.objects.order_by(
+        F('employment__position__department_id').asc(nulls_first=True), 'employment_id', 'start_date', 'id'
+    )
+    if employment_ids is not None:
+        logs = logs.filter(employment_id__in=employment_ids)
+    return logs.values_list(
+        'employment__position__department_id', 'employment_id', 'status', 'start_date',
+        'employment__hire_date', 'employment__end_date', 'employment__exit_reason'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _unlogged_rows():
+    """Filas equivalentes para los contratos sin EmploymentStatusLog."""
+    employments = Employment.objects.order_by(
+        F('position__department_id').asc(nulls_first=True), 'id'
+    ).filter(~Exists(EmploymentStatusLog.objects.filter(employment=OuterRef('pk'))))
+    for department_id, pk, status, hire_date, end_date, reason in employments.values_list(
+        'position__department_id', 'id', 'current_status', 'hire_date', 'end_date', 'exit_reason'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        yield department_id, pk, ACTIVE_STATUSES[0], hire_date, hire_date, end_date, reason
+        if status not in ACTIVE_STATUSES:
+            yield department_id, pk, status, end_date or hire_date, hire_date, end_date, reason
+
+
+def status_events(rows, previous=None):
+    """
+    Convierte filas ordenadas por (departamento, contrato, fecha) en eventos.
+
+    Args:
+        rows: Iterable de (department_id, employment_id, status, start_date,
+            hire_date, end_date, exit_reason)
+        previous: {employment_id: estatus previo} para procesar solo registros
+            nuevos (None si el contrato no tenía registros)
+
+    Yields:
+        (department_id, kind, event_date, hire_date, exit_reason); kind es 'hire' o 'exit'
+    """
+    previous = previous or {}
+    for (_, employment_id), group in groupby(rows, key=lambda row: (row[0], row[1])):
+        status_before = previous.get(employment_id)
+        first = status_before is None
+        row = next(group)
+        while row is not None:
+            following = next(group, None)
+            department_id, _, status, day, hire_date, end_date, reason = row
+            was_active = status_before in ACTIVE_STATUSES
+            is_active = status in ACTIVE_STATUSES
+            if is_active and not was_active:
+                yield department_id, 'hire', hire_date if first else day, hire_date, None
+            elif was_active and not is_active:
+                if following is None and end_date:
+                    day = end_date
+                yield department_id, 'exit', day, hire_date, reason or EXIT_REASON_BY_STATUS.get(status, Employment.ExitReason.OTHER)
+            status_before, first, row = status, False, following
+
+
+def _new_stat(month, department_id):
+    return WorkforceMonthlyStat(month=month, department_id=department_id, exits_by_reason={})
+
+
+def _add(stat, kind, event_date, hire_date, reason):
+    if kind == 'hire':
+        stat.hires += 1
+        stat.hire_day_balance += hire_date.toordinal()
+    else:
+        stat.exits += 1
+        stat.hire_day_balance -= hire_date.toordinal()
+        stat.exit_tenure_days += max((event_date - hire_date).days, 0)
+        stat.exits_by_reason[reason] = stat.exits_by_reason.get(reason, 0) + 1
+
+
+def monthly_stats(events):
+    """
+    Agrupa eventos (ordenados por departamento) en WorkforceMonthlyStat sin
+    guardar, entregando los meses de un departamento al terminar con él.
+    """
+    for department_id, department_events in groupby(events, key=lambda event: event[0]):
+        months = {}
+        for _, kind, event_date, hire_date, reason in department_events:
+            month = month_start(event_date)
+            if month not in months:
+                months[month] = _new_stat(month, department_id)
+            _add(months[month], kind, event_date, hire_date, reason)
+        yield from months.values()
+
+
+# --- MATERIALIZACIÓN ---
+
+@transaction.atomic
+def rebuild_workforce_stats():
+    """
+    Recalcula WorkforceMonthlyStat completo en una pasada.
+
+    Returns:
+        Número de filas guardadas
+    """
+    rows = heapq.merge(_log_rows(), _unlogged_rows(), key=_stream_key)
+    WorkforceMonthlyStat.objects.all().delete()
+    total, batch = 0, []
+    for stat in monthly_stats(status_events(rows)):
+        batch.append(stat)
+        if len(batch) >= CHUNK_SIZE:
+            WorkforceMonthlyStat.objects.bulk_create(batch)
+            total, batch = total + len(batch), []
+    WorkforceMonthlyStat.objects.bulk_create(batch)
+    return total + len(batch)
+
+
+def ensure_workforce_stats():
+    """Construye la tabla la primera vez (vacía pero con registros de estatus)."""
+    if not WorkforceMonthlyStat.objects.exists() and (
+        EmploymentStatusLog.objects.exists() or Employment.objects.exists()
+    ):
+        rebuild_workforce_stats()
+
+
+def apply_status_logs(logs):
+    """
+    Suma a WorkforceMonthlyStat los eventos de registros de estatus recién
+    creados. No hace nada si la tabla aún no se construyó (la primera consulta
+    de la serie la construye completa).
+    """
+    if logs and WorkforceMonthlyStat.objects.exists():
+        _apply_status_logs(logs)
+
+
+@transaction.atomic
+def _apply_status_logs(logs):
+    new_ids = {log.pk for log in logs}
+
+    # Estatus previo de cada contrato: el de su último registro anterior al primero nuevo
+    previous, new_rows = {}, []
+    timeline = EmploymentStatusLog.objects.filter(
+        employment_id__in={log.employment_id for log in logs}
+    ).order_by('employment_id', 'start_date', 'id').values_list(
+        'id', 'employment__position__department_id', 'employment_id', 'status', 'start_date',
+        'employment__hire_date', 'employment__end_date', 'employment__exit_reason'
+    )
+    seen_new = set()
+    for pk, *row in timeline:
+        employment_id = row[1]
+        if pk in new_ids:
+            seen_new.add(employment_id)
+            new_rows.append(tuple(row))
+        elif employment_id not in seen_new:
+            previous[employment_id] = row[2]
+
+    deltas = {}
+    for department_id, kind, event_date, hire_date, reason in status_events(sorted(new_rows, key=_stream_key), previous):
+        key = (month_start(event_date), department_id)
+        if key not in deltas:
+            deltas[key] = _new_stat(*key)
+        _add(deltas[key], kind, event_date, hire_date, reason)
+
+    for (month, department_id), delta in deltas.items():
+        stat = WorkforceMonthlyStat.objects.select_for_update().filter(
+            month=month, department_id=department_id
+        ).first()
+        if stat is None:
+            delta.save()
+            continue
+        reasons = Counter(stat.exits_by_reason)
+        reasons.update(delta.exits_by_reason)
+        WorkforceMonthlyStat.objects.filter(pk=stat.pk).update(
+            hires=F('hires') + delta.hires,
+            exits=F('exits') + delta.exits,
+            exit_tenure_days=F('exit_tenure_days') + delta.exit_tenure_days,
+            hire_day_balance=F('hire_day_balance') + delta.hire_day_balance,
+            exits_by_reason=dict(reasons),
+        )
+
+
+# --- SERIES ---
+
+def _rate(count, base):
+    return round(count / base, 4) if base else None
+
+
+def workforce_series(start, end, departments=None):
+    """
+    Serie mensual de dotación, ingresos, egresos y rotación.
+
+    Args:
+        start, end: Fechas; se toman los meses que las contienen
+        departments: QuerySet/lista de ids de Department para filtrar (opcional)
+
+    Returns:
+        Dict: {start, end, totals, months: [{month, opening_headcount, hires,
+        exits, closing_headcount, turnover_rate, exits_by_reason,
+        avg_tenure_days, avg_exit_tenure_days}]}
+    """
+    ensure_workforce_stats()
+    first, last = month_start(start), month_start(end)
+    stats = WorkforceMonthlyStat.objects.order_by()
+    if departments is not None:
+        stats = stats.filter(department__in=departments)
+
+    # Saldo acumulado hasta el mes anterior al rango
+    opening = stats.filter(month__lt=first).aggregate(
+        hires=Coalesce(Sum('hires'), 0),
+        exits=Coalesce(Sum('exits'), 0),
+        hire_day_balance=Coalesce(Sum('hire_day_balance'), 0),
+    )
+
+    by_month = {}
+    for month, hires, exits, reasons, tenure, balance in stats.filter(month__range=(first, last)).values_list(
+        'month', 'hires', 'exits', 'exits_by_reason', 'exit_tenure_days', 'hire_day_balance'
+    ):
+        row = by_month.setdefault(month, {'hires': 0, 'exits': 0, 'reasons': Counter(), 'tenure': 0, 'balance': 0})
+        row['hires'] += hires
+        row['exits'] += exits
+        row['reasons'].update(reasons)
+        row['tenure'] += tenure
+        row['balance'] += balance
+
+    headcount = opening['hires'] - opening['exits']
+    balance = opening['hire_day_balance']
+    months, totals = [], {'hires': 0, 'exits': 0, 'reasons': Counter(), 'tenure': 0, 'average_headcount': 0}
+    month = first
+    while month <= last:
+        row = by_month.get(month, {'hires': 0, 'exits': 0, 'reasons': Counter(), 'tenure': 0, 'balance': 0})
+        closing = headcount + row['hires'] - row['exits']
+        balance += row['balance']
+        average = (headcount + closing) / 2
+        # Antigüedad del personal activo al cierre: sum(fin de mes - ingreso) / dotación
+        tenure = (closing * _month_end(month).toordinal() - balance) / closing if closing > 0 else None
+        months.append({
+            'month': month,
+            'opening_headcount': headcount,
+            'hires': row['hires'],
+            'exits': row['exits'],
+            'closing_headcount': closing,
+            'turnover_rate': _rate(row['exits'], average),
+            'exits_by_reason': dict(row['reasons']),
+            'avg_tenure_days': round(tenure, 1) if tenure is not None else None,
+            'avg_exit_tenure_days': round(row['tenure'] / row['exits'], 1) if row['exits'] else None,
+        })
+        totals['hires'] += row['hires']
+        totals['exits'] += row['exits']
+        totals['reasons'].update(row['reasons'])
+        totals['tenure'] += row['tenure']
+        totals['average_headcount'] += average
+        headcount = closing
+        month = _next_month(month)
+
+    average_headcount = totals['average_headcount'] / len(months)
+    labels = dict(Employment.ExitReason.choices)
+    return {
+        'start': first,
+        'end': _month_end(last),
+        'totals': {
+            'opening_headcount': months[0]['opening_headcount'],
+            'closing_headcount': months[-1]['closing_headcount'],
+            'average_headcount': round(average_headcount, 1),
+            'hires': totals['hires'],
+            'exits': totals['exits'],
+            'turnover_rate': _rate(totals['exits'], average_headcount),
+            'avg_exit_tenure_days': round(totals['tenure'] / totals['exits'], 1) if totals['exits'] else None,
+            'exits_by_reason': [
+                {'reason': reason, 'label': labels.get(reason, reason), 'count': count,
+                 'rate': _rate(count, average_headcount)}
+                for reason, count in totals['reasons'].most_common()
+            ],
+        },
+        'months': months,
+    }
@@ -0,0 +1,224 @@
+"""
+Estructura organizativa "a la fecha" a partir de las tablas de historial
+(simple_history).
+
+Para cada modelo se toma la última revisión de cada id con fecha anterior al
+cierre del día pedido:
+
+    ROW_NUMBER() OVER (PARTITION BY id ORDER BY history_date DESC, history_id DESC) = 1
+
+sobre un rango de history_date (índice compuesto (history_date, id), ver
+SIMPLE_HISTORY_DATE_INDEX), sin reproducir el historial fila por fila. Si esa
+revisión es un borrado ('-'), el registro no existía ese día.
+
+- Departamentos y cargos: HistoricalDepartment, HistoricalJobTitle
+- Posiciones: HistoricalPosition; las líneas de reporte salen de la copia de
+  manager_positions guardada con cada revisión (registrada desde la migración
+  organization 0011; antes se toma como línea base la de la última revisión)
+- Ocupantes: HistoricalEmployment con estatus activo e ingreso hasta esa fecha
+
+Los registros sin ninguna revisión (creados con bulk_create) se toman tal como
+están hoy si ya existían en esa fecha.
+
+Las fotos de días cerrados no cambian, así que se guardan en caché por fecha;
+el día en curso se calcula siempre.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Department, JobTitle, Position, HistoricalPosition_manager_positions
+
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _day_end(day):
+    """Inicio (hora local) del día siguiente: las revisiones deben ser anteriores."""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), timezone.get_current_timezone())
+
+
+def revisions_as_of(model, moment, fields):
+    """
+    Filas vigentes de `model` en `moment`: {id: {campo: valor}}.
+
+    Toma la última revisión de cada id en el historial y completa con los
+    registros actuales que no tienen historial pero ya existían.
+    """
+    history = model.history.model
+    latest = history.objects.order_by().filter(history_date__lt=moment).annotate(
+        revision=Window(
+            RowNumber(), partition_by=[F('id')], order_by=[F('history_date').desc(), F('history_id').desc()]
+        )
+    ).filter(revision=1).values('id', 'history_id', 'history_type', *fields)
+    rows = {row['id']: row for row in latest if row.pop('history_type') != '-'}
+
+    untracked = model.objects.order_by().filter(created_at__lt=moment).filter(
+        ~Exists(history.objects.filter(id=OuterRef('pk')))
+    ).values('id', *fields)
+    for row in untracked:
+        rows[row['id']] = {'history_id': None, **row}
+    return rows
+
+
+def _reporting_lines(positions):
+    """{position_id: [ids de las posiciones a las que reporta]} según la revisión vigente."""
+    history_ids = [row['history_id'] for row in positions.values() if row['history_id']]
+    lines = defaultdict(list)
+    for from_id, to_id in HistoricalPosition_manager_positions.objects.filter(
+        history_id__in=history_ids
+    ).order_by('to_position_id').values_list('from_position_id', 'to_position_id'):
+        if to_id in positions:
+            lines[from_id].append(to_id)
+    # Posiciones sin historial: sus líneas actuales
+    untracked = [pk for pk, row in positions.items() if not row['history_id']]
+    if untracked:
+        for from_id, to_id in Position.manager_positions.through.objects.filter(
+            from_position_id__in=untracked
+        ).values_list('from_position_id', 'to_position_id'):
+            if to_id in positions:
+                lines[from_id].append(to_id)
+    return lines
+
+
+def build_snapshot(day):
+    """
+    Estructura organizativa al cierre de `day`.
+
+    Returns:
+        Dict: {date, totals, departments: [{id, name, parent_id, positions,
+        vacancies, headcount}], positions: [{id, department_id, job_title,
+        vacancies, is_manager, reports_to, occupants}]}
+    """
+    from core.models import Person
+    from employment.identity import ACTIVE_STATUSES
+    from employment.models import Employment
+
+    moment = _day_end(day)
+    departments = revisions_as_of(Department, moment, ['name', 'parent_id'])
+    titles = revisions_as_of(JobTitle, moment, ['name'])
+    positions = revisions_as_of(Position, moment, ['department_id', 'job_title_id', 'vacancies', 'is_manager'])
+    employments = revisions_as_of(Employment, moment, ['person_id', 'position_id', 'current_status', 'hire_date'])
+    lines = _reporting_lines(positions)
+
+    occupants = defaultdict(list)
+    active = [
+        e for e in employments.values()
+        if e['current_status'] in ACTIVE_STATUSES and e['hire_date'] <= day and e['position_id'] in positions
+    ]
+    names = {
+        person.pk: str(person)
+        for person in Person.objects.filter(pk__in={e['person_id'] for e in active}).only('first_name', 'paternal_surname')
+    }
+    for e in sorted(active, key=lambda e: (e['hire_date'], e['id'])):
+        occupants[e['position_id']].append({
+            'employment_id': e['id'],
+            'person_id': e['person_id'],
+            'name': names.get(e['person_id'], ''),
+            'status': e['current_status'],
+        })
+
+    by_department = defaultdict(lambda: {'positions': 0, 'vacancies': 0, 'headcount': 0})
+    position_rows = []
+    for pk, row in sorted(positions.items()):
+        department_id = row['department_id'] if row['department_id'] in departments else None
+        title = titles.get(row['job_title_id'])
+        position_rows.append({
+            'id': pk,
+            'department_id': department_id,
+            'job_title': title['name'] if title else None,
+            'vacancies': row['vacancies'],
+            'is_manager': row['is_manager'],
+            'reports_to': lines.get(pk, []),
+            'occupants': occupants.get(pk, []),
+        })
+        totals = by_department[department_id]
+        totals['positions'] += 1
+        totals['vacancies'] += row['vacancies']
+        totals['headcount'] += len(occupants.get(pk, []))
+
+    department_rows = [
+        {
+            'id': pk,
+            'name': row['name'],
+            'parent_id': row['parent_id'] if row['parent_id'] in departments else None,
+            **by_department[pk],
+        }
+        for pk, row in sorted(departments.items(), key=lambda item: item[1]['name'])
+    ]
+    return {
+        'date': day,
+        'totals': {
+            'departments': len(department_rows),
+            'positions': len(position_rows),
+            'vacancies': sum(p['vacancies'] for p in position_rows),
+            'headcount': sum(len(p['occupants']) for p in position_rows),
+        },
+        'departments': department_rows,
+        'positions': position_rows,
+    }
+
+
+def org_snapshot(day):
+    """build_snapshot con caché para los días cerrados."""
+    if day >= timezone.localdate():
+        return build_snapshot(day)
+    key = f'org:as_of:{day.isoformat()}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(day)
+        cache.set(key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
+
+
+def compare_snapshots(before, after):
+    """
+    Diferencias entre dos fotos de org_snapshot.
+
+    Returns:
+        Dict: {start, end, totals: {campo: {before, after, delta}},
+        departments: {added, removed, renamed, moved},
+        positions: {added, removed}, headcount: [{id, name, before, after, delta}]}
+    """
+    old = {d['id']: d for d in before['departments']}
+    new = {d['id']: d for d in after['departments']}
+    old_positions = {p['id'] for p in before['positions']}
+    new_positions = {p['id'] for p in after['positions']}
+
+    headcount = []
+    for pk in sorted(old.keys() | new.keys(), key=lambda pk: (new.get(pk) or old[pk])['name']):
+        was = old[pk]['headcount'] if pk in old else 0
+        now = new[pk]['headcount'] if pk in new else 0
+        if was != now:
+            headcount.append({'id': pk, 'name': (new.get(pk) or old[pk])['name'], 'before': was, 'after': now, 'delta': now - was})
+
+    return {
+        'start': before['date'],
+        'end': after['date'],
+        'totals': {
+            key: {'before': before['totals'][key], 'after': after['totals'][key],
+                  'delta': after['totals'][key] - before['totals'][key]}
+            for key in before['totals']
+        },
+        'departments': {
+            'added': [new[pk] for pk in sorted(new.keys() - old.keys())],
+            'removed': [old[pk] for pk in sorted(old.keys() - new.keys())],
+            'renamed': [
+                {'id': pk, 'before': old[pk]['name'], 'after': new[pk]['name']}
+                for pk in sorted(old.keys() & new.keys()) if old[pk]['name'] != new[pk]['name']
+            ],
+            'moved': [
+                {'id': pk, 'name': new[pk]['name'], 'before': old[pk]['parent_id'], 'after': new[pk]['parent_id']}
+                for pk in sorted(old.keys() & new.keys()) if old[pk]['parent_id'] != new[pk]['parent_id']
+            ],
+        },
+        'positions': {
+            'added': sorted(new_positions - old_positions),
+            'removed': sorted(old_positions - new_positions),
+        },
+        'headcount': headcount,
+    }
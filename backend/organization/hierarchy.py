@@ -0,0 +1,155 @@
+"""
+Mantenimiento de la tabla de clausura de departamentos (DepartmentClosure).
+
+Cada departamento tiene una fila por cada ancestro (y una consigo mismo), así
+"este departamento y todo lo que cuelga de él" es un JOIN sin recursión:
+Department.objects.descendants_of(dept), ancestors_of(dept), with_depth().
+
+- Alta: se copian las filas de los ancestros del padre (1 SELECT + 1 INSERT).
+- Ciclos: validate_parent() rechaza el cambio antes de guardar la fila
+  (Department.clean() y pre_save).
+- Movimiento: se borran los vínculos del subárbol con sus ancestros externos
+  y se insertan los nuevos como producto cruzado, en lote, sin importar el
+  tamaño del subárbol.
+- Borrado: Department.parent es SET_NULL, así que los hijos pasan a ser
+  raíces; se desvinculan sus subárboles de los ancestros del borrado.
+
+rebuild_closure() reconstruye todo desde Department.parent (migración,
+bulk_create de datos sintéticos, `manage.py rebuild_department_tree`). loaddata
+la llama una sola vez al terminar (organization/management/commands/loaddata.py).
+
+subtree_rollup() totaliza posiciones, vacantes y personal activo de cada
+subárbol agrupando por ancestro sobre la tabla de clausura.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Department, DepartmentClosure
+
+
+def insert_node(department):
+    """Agrega los vínculos de un departamento recién creado (aún sin hijos)."""
+    links = [DepartmentClosure(ancestor_id=department.pk, descendant_id=department.pk, depth=0)]
+    if department.parent_id:
+        links += [
+            DepartmentClosure(ancestor_id=ancestor_id, descendant_id=department.pk, depth=depth + 1)
+            for ancestor_id, depth in DepartmentClosure.objects.filter(
+                descendant_id=department.parent_id
+            ).values_list('ancestor_id', 'depth')
+        ]
+    DepartmentClosure.objects.bulk_create(links)
+
+
+def _subtree(department_id):
+    """[(descendant_id, depth)] del subárbol, incluido el propio departamento."""
+    return list(DepartmentClosure.objects.filter(ancestor_id=department_id).values_list('descendant_id', 'depth'))
+
+
+def validate_parent(department):
+    """
+    Raises:
+        ValidationError: si el padre de `department` es él mismo o uno de sus
+        subdepartamentos
+    """
+    if not (department.pk and department.parent_id):
+        return
+    if department.parent_id == department.pk or DepartmentClosure.objects.filter(
+        ancestor_id=department.pk, descendant_id=department.parent_id
+    ).exists():
+        raise ValidationError({
+            'parent': "Un departamento no puede depender de sí mismo ni de uno de sus subdepartamentos."
+        })
+
+
+@transaction.atomic
+def move_subtree(department):
+    """
+    Reubica el subárbol de `department` bajo su `parent_id` actual. El padre
+    ya fue validado (validate_parent) antes de guardar la fila.
+    """
+    subtree = _subtree(department.pk)
+    if not subtree:
+        # Sin vínculos (p. ej. creado con bulk_create): se trata como alta
+        insert_node(department)
+        return
+    subtree_ids = [pk for pk, _ in subtree]
+
+    # Vínculos con los ancestros anteriores (los internos del subárbol no cambian)
+    DepartmentClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+    if department.parent_id:
+        ancestors = DepartmentClosure.objects.filter(
+            descendant_id=department.parent_id
+        ).values_list('ancestor_id', 'depth')
+        DepartmentClosure.objects.bulk_create([
+            DepartmentClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ], batch_size=1000)
+
+
+def detach_subtrees(department):
+    """
+    Antes de borrar `department`: sus hijos quedarán como raíces (SET_NULL),
+    así que sus subárboles dejan de descender de los ancestros del borrado.
+    Los vínculos con el propio departamento se van por CASCADE.
+    """
+    below = DepartmentClosure.objects.filter(ancestor_id=department.pk, depth__gt=0).values('descendant_id')
+    above = DepartmentClosure.objects.filter(descendant_id=department.pk, depth__gt=0).values('ancestor_id')
+    DepartmentClosure.objects.filter(descendant_id__in=below, ancestor_id__in=above).delete()
+
+
+@transaction.atomic
+def rebuild_closure():
+    """Reconstruye la tabla completa desde Department.parent. Devuelve el número de filas."""
+    parents = dict(Department.objects.values_list('id', 'parent_id'))
+    links = []
+    for department_id in parents:
+        node, depth, seen = department_id, 0, set()
+        while node is not None and node not in seen:
+            seen.add(node)
+            links.append(DepartmentClosure(ancestor_id=node, descendant_id=department_id, depth=depth))
+            node, depth = parents.get(node), depth + 1
+    DepartmentClosure.objects.all().delete()
+    DepartmentClosure.objects.bulk_create(links, batch_size=1000)
+    return len(links)
+
+
+def subtree_rollup(department):
+    """
+    Totales por subárbol de `department` y de cada uno de sus descendientes:
+    cada fila suma lo del departamento y todo lo que cuelga de él.
+
+    Returns:
+        Lista de dicts {id, name, parent_id, depth, positions, vacancies,
+        headcount} en orden de profundidad; depth es relativa a `department`
+    """
+    from employment.identity import ACTIVE_STATUSES
+
+    nodes = [
+        {'id': pk, 'name': name, 'parent_id': parent_id, 'depth': depth}
+        for pk, name, parent_id, depth in DepartmentClosure.objects.filter(ancestor=department)
+        .order_by('depth', 'descendant__name')
+        .values_list('descendant_id', 'descendant__name', 'descendant__parent_id', 'depth')
+    ]
+    # Vínculos (ancestro -> descendiente) con el ancestro dentro del subárbol
+    links = DepartmentClosure.objects.order_by().filter(
+        ancestor_id__in=DepartmentClosure.objects.filter(ancestor=department).values('descendant_id')
+    ).values('ancestor_id')
+    positions = {
+        row['ancestor_id']: row
+        for row in links.annotate(
+            positions=Count('descendant__position'), vacancies=Sum('descendant__position__vacancies')
+        )
+    }
+    headcount = dict(
+        links.filter(descendant__position__employments__current_status__in=ACTIVE_STATUSES)
+        .annotate(total=Count('descendant__position__employments')).values_list('ancestor_id', 'total')
+    )
+    for node in nodes:
+        totals = positions.get(node['id'], {})
+        node['positions'] = totals.get('positions', 0)
+        node['vacancies'] = totals.get('vacancies') or 0
+        node['headcount'] = headcount.get(node['id'], 0)
+    return nodes
@@ -0,0 +1,50 @@
+"""
+Escrituras en lote de Position que conservan el historial.
+
+Position.objects.bulk_update() no crea revisiones en HistoricalPosition, y
+bulk_update_with_history (simple_history) crea la revisión pero no la copia de
+manager_positions que Position.save() guarda con cada una (m2m_fields). La
+estructura a la fecha (organization.as_of) lee vacantes y líneas de reporte de
+la última revisión, así que ambas deben escribirse juntas.
+"""
+
+from django.db import transaction
+
+from .models import Position, HistoricalPosition_manager_positions
+
+
+@transaction.atomic
+def bulk_update_positions(positions, fields, user=None, change_reason=None):
+    """
+    bulk_update de `positions` con una revisión por posición y la copia de sus
+    líneas de reporte: tres consultas sin importar cuántas posiciones sean.
+    """
+    if not positions:
+        return
+    Position.objects.bulk_update(positions, fields)
+    revisions = Position.history.bulk_history_create(
+        positions, update=True, default_user=user, default_change_reason=change_reason,
+    )
+    revision_of = {revision.id: revision.history_id for revision in revisions}
+    HistoricalPosition_manager_positions.objects.bulk_create([
+        HistoricalPosition_manager_positions(
+            id=pk, history_id=revision_of[from_id], from_position_id=from_id, to_position_id=to_id
+        )
+        for pk, from_id, to_id in Position.manager_positions.through.objects.filter(
+            from_position_id__in=revision_of
+        ).values_list('id', 'from_position_id', 'to_position_id')
+    ])
+
+
+@transaction.atomic
+def shift_vacancies(deltas, user=None, change_reason=None):
+    """
+    Suma a cada posición su delta de vacantes ({position_id: delta}), con
+    historial. Las posiciones se leen bloqueadas: el valor escrito parte del
+    vigente aunque otro proceso lo haya cambiado.
+    """
+    position_ids = [pk for pk, delta in deltas.items() if delta]
+    positions = list(Position.objects.select_for_update().filter(pk__in=position_ids).order_by('pk'))
+    for position in positions:
+        position.vacancies += deltas[position.pk]
+    bulk_update_positions(positions, ['vacancies'], user=user, change_reason=change_reason)
@@ -0,0 +1,14 @@
+from django.core.management.commands.loaddata import Command as LoadDataCommand
+
+from organization.hierarchy import rebuild_closure
+from organization.models import Department
+
+
+class Command(LoadDataCommand):
+    help = LoadDataCommand.help + ' Rebuilds the department closure table once if departments were loaded.'
+
+    def loaddata(self, fixture_labels):
+        super().loaddata(fixture_labels)
+        # Las señales ignoran los guardados raw: una sola reconstrucción, dentro de la misma transacción
+        if Department in self.models:
+            rebuild_closure()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from organization.hierarchy import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the department closure table (DepartmentClosure) from Department.parent. '
+        'Only needed after bulk loads that bypass model signals.'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f'Department hierarchy rebuilt: {rows} links'))
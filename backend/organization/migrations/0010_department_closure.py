@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Department = apps.get_model('organization', 'Department')
+    DepartmentClosure = apps.get_model('organization', 'DepartmentClosure')
+    parents = dict(Department.objects.values_list('id', 'parent_id'))
+    links = []
+    for department_id in parents:
+        node, depth, seen = department_id, 0, set()
+        while node is not None and node not in seen:
+            seen.add(node)
+            links.append(DepartmentClosure(ancestor_id=node, descendant_id=department_id, depth=depth))
+            node, depth = parents.get(node), depth + 1
+    DepartmentClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0009_historicalposition_is_manager_position_is_manager'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(help_text='Niveles entre el ancestro y el descendiente')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='organization.department')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='organization.department')),
+            ],
+            options={
+                'verbose_name': 'Relación Jerárquica de Departamento',
+                'verbose_name_plural': 'Relaciones Jerárquicas de Departamentos',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='org_closure_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='org_closure_unique')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+import django.db.models.deletion
+import simple_history.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_reporting_lines(apps, schema_editor):
+    """
+    Línea base: las líneas de reporte actuales quedan asociadas a la última
+    revisión de cada posición (antes no se registraban en el historial).
+    """
+    Position = apps.get_model('organization', 'Position')
+    HistoricalPosition = apps.get_model('organization', 'HistoricalPosition')
+    HistoricalLine = apps.get_model('organization', 'HistoricalPosition_manager_positions')
+    latest = {}
+    for history_id, position_id in HistoricalPosition.objects.order_by('history_date', 'history_id').values_list('history_id', 'id'):
+        latest[position_id] = history_id
+    HistoricalLine.objects.bulk_create([
+        HistoricalLine(id=pk, history_id=latest[from_id], from_position_id=from_id, to_position_id=to_id)
+        for pk, from_id, to_id in Position.manager_positions.through.objects.values_list('id', 'from_position_id', 'to_position_id')
+        if from_id in latest
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0010_department_closure'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricalPosition_manager_positions',
+            fields=[
+                ('id', models.BigIntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
+                ('m2m_history_id', models.AutoField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'verbose_name': 'HistoricalPosition_manager_positions',
+            },
+            bases=(simple_history.models.HistoricalChanges, models.Model),
+        ),
+        migrations.AlterField(
+            model_name='historicaldepartment',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='historicaljobtitle',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='historicalposition',
+            name='history_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='historicaldepartment',
+            index=models.Index(fields=['history_date', 'id'], name='organizatio_history_bf074b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicaljobtitle',
+            index=models.Index(fields=['history_date', 'id'], name='organizatio_history_df2ae4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalposition',
+            index=models.Index(fields=['history_date', 'id'], name='organizatio_history_10cae0_idx'),
+        ),
+        migrations.AddField(
+            model_name='historicalposition_manager_positions',
+            name='from_position',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_tablespace='', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='organization.position'),
+        ),
+        migrations.AddField(
+            model_name='historicalposition_manager_positions',
+            name='history',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='organization.historicalposition'),
+        ),
+        migrations.AddField(
+            model_name='historicalposition_manager_positions',
+            name='to_position',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_tablespace='', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='organization.position'),
+        ),
+        migrations.RunPython(snapshot_reporting_lines, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,28 @@
 from django.db import models
+from django.db.models import Count
 from simple_history.models import HistoricalRecords
 
+
+class DepartmentQuerySet(models.QuerySet):
+    """Consultas de jerarquía sobre la tabla de clausura (DepartmentClosure)."""
+
+    def descendants_of(self, department, include_self=True):
+        links = {'ancestor_links__ancestor': department}
+        if not include_self:
+            links['ancestor_links__depth__gt'] = 0
+        return self.filter(**links)
+
+    def ancestors_of(self, department, include_self=False):
+        links = {'descendant_links__descendant': department}
+        if not include_self:
+            links['descendant_links__depth__gt'] = 0
+        return self.filter(**links)
+
+    def with_depth(self):
+        """Anota `depth`: 0 para las raíces, 1 para sus hijos, etc."""
+        return self.annotate(depth=Count('ancestor_links') - 1)
+
+
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='subdepartments')
@@ -10,9 +32,46 @@ class Department(models.Model):
     # Historial de cambios
     history = HistoricalRecords()
 
+    objects = DepartmentQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Padre al cargar: la señal post_save solo mueve el subárbol si cambió
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    def clean(self):
+        from .hierarchy import validate_parent
+        validate_parent(self)
+
     def __str__(self):
         return self.name
 
+
+class DepartmentClosure(models.Model):
+    """
+    Tabla de clausura de Department.parent: una fila por cada par
+    (ancestro, descendiente), incluido el par del departamento consigo mismo
+    (depth 0). La mantiene organization.hierarchy desde las señales de Department.
+    """
+    ancestor = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField(help_text="Niveles entre el ancestro y el descendiente")
+
+    class Meta:
+        verbose_name = "Relación Jerárquica de Departamento"
+        verbose_name_plural = "Relaciones Jerárquicas de Departamentos"
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='org_closure_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='org_closure_descendant_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
 class JobTitle(models.Model):
     name = models.CharField(max_length=100, unique=True)
     # description field removed
@@ -58,8 +117,8 @@ class Position(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    # Historial de cambios
-    history = HistoricalRecords()
+    # Historial de cambios (incluye las líneas de reporte, para organization.as_of)
+    history = HistoricalRecords(m2m_fields=[manager_positions])
 
     class Meta:
         unique_together = ('department', 'job_title')
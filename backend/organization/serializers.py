@@ -1,3 +1,4 @@
+from django.utils import timezone
 from rest_framework import serializers
 from core.serializers import check_uniqueness, title_case_cleaner, validate_alphanumeric_with_spaces
 from .models import Department, JobTitle, Position, PositionRequirement, PositionFunction
@@ -36,6 +37,10 @@ class DepartmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 "parent": "Un departamento no puede ser su propio departamento padre (referencia circular)."
             })
+        if self.instance and parent and Department.objects.descendants_of(self.instance).filter(pk=parent.pk).exists():
+            raise serializers.ValidationError({
+                "parent": "El departamento padre no puede ser uno de sus subdepartamentos (referencia circular)."
+            })
         return data
 
 class JobTitleSerializer(serializers.ModelSerializer):
@@ -135,3 +140,27 @@ class PositionSerializer(serializers.ModelSerializer):
             self, data, Position, ('department', 'job_title'),
             error_template='Ya existe una posición con este cargo en {department}.'
         )
+
+
+class OrgSnapshotQuerySerializer(serializers.Serializer):
+    """Parámetros de la estructura a la fecha (organization.as_of)"""
+    date = serializers.DateField(required=False)
+
+    def validate_date(self, value):
+        if value > timezone.localdate():
+            raise serializers.ValidationError("La fecha no puede ser futura.")
+        return value
+
+
+class OrgCompareQuerySerializer(serializers.Serializer):
+    """Parámetros de la comparación entre dos fechas (organization.as_of)"""
+    start = serializers.DateField()
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        data.setdefault('end', timezone.localdate())
+        if data['end'] > timezone.localdate():
+            raise serializers.ValidationError("La fecha no puede ser futura.")
+        if data['start'] > data['end']:
+            raise serializers.ValidationError("La fecha inicial no puede ser posterior a la final.")
+        return data
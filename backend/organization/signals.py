@@ -0,0 +1,34 @@
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+from .models import Department
+from .hierarchy import detach_subtrees, insert_node, move_subtree, validate_parent
+
+
+def _parent_changed(instance):
+    return getattr(instance, '_loaded_parent_id', object()) != instance.parent_id
+
+
+@receiver(pre_save, sender=Department)
+def validate_department_parent(sender, instance, raw=False, **kwargs):
+    """Rechaza los ciclos antes de escribir la fila (post_save sería tarde)."""
+    if not raw and not instance._state.adding and _parent_changed(instance):
+        validate_parent(instance)
+
+
+@receiver(post_save, sender=Department)
+def update_department_closure(sender, instance, created, raw=False, **kwargs):
+    """Mantiene DepartmentClosure al crear o mover un departamento."""
+    if raw:
+        # loaddata: el padre puede llegar después que el hijo; la tabla se
+        # reconstruye una vez al final (management/commands/loaddata.py)
+        return
+    if created:
+        insert_node(instance)
+    elif _parent_changed(instance):
+        move_subtree(instance)
+    instance._loaded_parent_id = instance.parent_id
+
+
+@receiver(pre_delete, sender=Department)
+def detach_department_subtrees(sender, instance, **kwargs):
+    detach_subtrees(instance)
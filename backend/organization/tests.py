@@ -1,3 +1,213 @@
+import json
+import shutil
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.models import Person
+from employment.models import Employment
+from .as_of import org_snapshot
+from .hierarchy import rebuild_closure
+from .models import Department, DepartmentClosure, JobTitle, Position
+
+
+class DepartmentHierarchyTests(TestCase):
+    """Tabla de clausura de Department.parent (organization.hierarchy)."""
+
+    def setUp(self):
+        # Rectorado > Académico > (Ingeniería > Sistemas, Ciencias)
+        self.root = Department.objects.create(name='Rectorado')
+        self.academic = Department.objects.create(name='Académico', parent=self.root)
+        self.engineering = Department.objects.create(name='Ingeniería', parent=self.academic)
+        self.systems = Department.objects.create(name='Sistemas', parent=self.engineering)
+        self.sciences = Department.objects.create(name='Ciencias', parent=self.academic)
+        self.admin = Department.objects.create(name='Administración', parent=self.root)
+
+    def names(self, queryset):
+        return sorted(queryset.values_list('name', flat=True))
+
+    def links(self):
+        return set(DepartmentClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def test_descendants_ancestors_and_depth(self):
+        self.assertEqual(
+            self.names(Department.objects.descendants_of(self.academic)),
+            ['Académico', 'Ciencias', 'Ingeniería', 'Sistemas']
+        )
+        self.assertEqual(self.names(Department.objects.descendants_of(self.engineering, include_self=False)), ['Sistemas'])
+        self.assertEqual(self.names(Department.objects.ancestors_of(self.systems)), ['Académico', 'Ingeniería', 'Rectorado'])
+        depths = dict(Department.objects.with_depth().values_list('name', 'depth'))
+        self.assertEqual(depths['Rectorado'], 0)
+        self.assertEqual(depths['Sistemas'], 3)
+
+    def test_move_subtree(self):
+        self.engineering.parent = self.admin
+        with self.assertNumQueries(9):
+            self.engineering.save()
+        self.assertEqual(self.names(Department.objects.ancestors_of(self.systems)), ['Administración', 'Ingeniería', 'Rectorado'])
+        self.assertEqual(self.names(Department.objects.descendants_of(self.academic)), ['Académico', 'Ciencias'])
+        # El resultado coincide con reconstruir desde cero
+        moved = self.links()
+        rebuild_closure()
+        self.assertEqual(moved, self.links())
+
+    def test_save_without_move_keeps_links(self):
+        before = self.links()
+        self.engineering.name = 'Ingeniería y Tecnología'
+        self.engineering.save()
+        Department.objects.get(pk=self.systems.pk).save()
+        self.assertEqual(before, self.links())
+
+    def test_move_to_root(self):
+        self.engineering.parent = None
+        self.engineering.save()
+        self.assertEqual(self.names(Department.objects.ancestors_of(self.systems)), ['Ingeniería'])
+
+    def test_cycle_rejected(self):
+        self.academic.parent = self.systems
+        with self.assertRaises(ValidationError) as ctx:
+            self.academic.full_clean()
+        self.assertIn('parent', ctx.exception.message_dict)
+        with self.assertRaises(ValidationError):
+            self.academic.save()
+        # Se rechaza antes de escribir la fila
+        self.assertEqual(Department.objects.get(pk=self.academic.pk).parent_id, self.root.pk)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True, is_superuser=True))
+        response = client.patch(f'/api/organization/departments/{self.academic.pk}/', {'parent': self.systems.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.data)
+
+    def test_loaddata_rebuilds_once(self):
+        # El hijo llega antes que el padre
+        timestamps = {'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-01T00:00:00Z'}
+        fixture = Path(tempfile.mkdtemp()) / 'departments.json'
+        self.addCleanup(shutil.rmtree, fixture.parent)
+        fixture.write_text(json.dumps([
+            {'model': 'organization.department', 'pk': 901, 'fields': {'name': 'Hijo', 'parent': 902, **timestamps}},
+            {'model': 'organization.department', 'pk': 902, 'fields': {'name': 'Padre', 'parent': self.root.pk, **timestamps}},
+        ]))
+        with patch('organization.management.commands.loaddata.rebuild_closure', wraps=rebuild_closure) as rebuild:
+            call_command('loaddata', str(fixture), verbosity=0)
+        rebuild.assert_called_once()
+        self.assertEqual(self.names(Department.objects.ancestors_of(901)), ['Padre', 'Rectorado'])
+
+    def test_delete_detaches_children(self):
+        self.engineering.delete()
+        self.systems.refresh_from_db()
+        self.assertIsNone(self.systems.parent_id)
+        self.assertEqual(list(Department.objects.ancestors_of(self.systems)), [])
+        self.assertEqual(self.names(Department.objects.descendants_of(self.root)), ['Académico', 'Administración', 'Ciencias', 'Rectorado'])
+
+    def test_rollup(self):
+        title = JobTitle.objects.create(name='Analista')
+        positions = {
+            dept: Position.objects.create(department=dept, job_title=title, vacancies=vacancies)
+            for dept, vacancies in [(self.academic, 1), (self.systems, 3), (self.sciences, 2)]
+        }
+        person = Person.objects.create(first_name='Ana', paternal_surname='Pérez')
+        Employment.objects.bulk_create([
+            Employment(person=person, position=positions[self.systems], hire_date=date(2020, 1, 1), current_status='ACT'),
+            Employment(person=person, position=positions[self.systems], hire_date=date(2018, 1, 1),
+                       end_date=date(2019, 1, 1), current_status='FIN'),
+            Employment(person=person, position=positions[self.sciences], hire_date=date(2021, 1, 1), current_status='ACT'),
+        ])
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        response = client.get(f'/api/organization/departments/{self.academic.pk}/rollup/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['name']: row for row in response.data['departments']}
+        self.assertEqual(list(rows), ['Académico', 'Ciencias', 'Ingeniería', 'Sistemas'])
+        self.assertEqual(
+            {k: rows['Académico'][k] for k in ('depth', 'positions', 'vacancies', 'headcount')},
+            {'depth': 0, 'positions': 3, 'vacancies': 6, 'headcount': 2}
+        )
+        self.assertEqual((rows['Ingeniería']['positions'], rows['Ingeniería']['headcount']), (1, 1))
+        self.assertEqual((rows['Sistemas']['depth'], rows['Sistemas']['vacancies']), (2, 3))
+
+
+class OrgAsOfTests(TestCase):
+    """Estructura organizativa a la fecha desde el historial (organization.as_of)."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'x', is_staff=True))
+        self.root = Department.objects.create(name='Rectorado')
+        self.it = Department.objects.create(name='Informática', parent=self.root)
+        self.closed = Department.objects.create(name='Archivo', parent=self.root)
+        title = JobTitle.objects.create(name='Analista')
+        self.manager = Position.objects.create(department=self.root, job_title=JobTitle.objects.create(name='Rector'), is_manager=True)
+        self.analyst = Position.objects.create(department=self.it, job_title=title, vacancies=2)
+        self.analyst.manager_positions.add(self.manager)
+        person = Person.objects.create(first_name='Ana', paternal_surname='Pérez')
+        self.employment = Employment.objects.create(
+            person=person, position=self.analyst, hire_date=date(2024, 1, 15), current_status='ACT'
+        )
+        # Todo lo anterior ocurrió el 1 de febrero de 2024
+        backdate = timezone.make_aware(datetime(2024, 2, 1, 9, 0))
+        for model in (Department, JobTitle, Position, Employment):
+            model.history.update(history_date=backdate)
+
+        # Cambios posteriores
+        self.it.name = 'Tecnología'
+        self.it.parent = None
+        self.it.save()
+        self.closed.delete()
+        self.analyst.manager_positions.clear()
+        self.employment.current_status = 'FIN'
+        self.employment.save()
+        Department.objects.create(name='Calidad')
+
+    def test_past_snapshot(self):
+        snapshot = org_snapshot(date(2024, 3, 1))
+        departments = {d['name']: d for d in snapshot['departments']}
+        self.assertEqual(sorted(departments), ['Archivo', 'Informática', 'Rectorado'])
+        self.assertEqual(departments['Informática']['parent_id'], self.root.pk)
+        self.assertEqual(departments['Informática']['headcount'], 1)
+        analyst = next(p for p in snapshot['positions'] if p['id'] == self.analyst.pk)
+        self.assertEqual(analyst['reports_to'], [self.manager.pk])
+        self.assertEqual(analyst['job_title'], 'Analista')
+        self.assertEqual(analyst['occupants'][0]['name'], 'Ana Pérez')
+        self.assertEqual(snapshot['totals'], {'departments': 3, 'positions': 2, 'vacancies': 2, 'headcount': 1})
+
+        self.assertEqual(org_snapshot(date(2024, 1, 1))['totals']['departments'], 0)
+
+    def test_current_snapshot(self):
+        snapshot = org_snapshot(timezone.localdate())
+        self.assertEqual(sorted(d['name'] for d in snapshot['departments']), ['Calidad', 'Rectorado', 'Tecnología'])
+        analyst = next(p for p in snapshot['positions'] if p['id'] == self.analyst.pk)
+        self.assertEqual((analyst['reports_to'], analyst['occupants']), ([], []))
+
+    def test_past_snapshots_are_cached(self):
+        org_snapshot(date(2024, 3, 1))
+        with self.assertNumQueries(0):
+            org_snapshot(date(2024, 3, 1))
+
+    def test_compare_endpoint(self):
+        response = self.client.get('/api/organization/departments/compare/', {'start': '2024-03-01'})
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual([d['name'] for d in data['departments']['added']], ['Calidad'])
+        self.assertEqual([d['name'] for d in data['departments']['removed']], ['Archivo'])
+        self.assertEqual(data['departments']['renamed'], [{'id': self.it.pk, 'before': 'Informática', 'after': 'Tecnología'}])
+        self.assertEqual(data['departments']['moved'][0]['before'], self.root.pk)
+        self.assertEqual(data['headcount'], [{'id': self.it.pk, 'name': 'Tecnología', 'before': 1, 'after': 0, 'delta': -1}])
+        self.assertEqual(data['totals']['headcount']['delta'], -1)
 
-# Create your tests here.
+        cache.clear()
+        response = self.client.get('/api/organization/departments/as-of/', {'date': '2024-03-01'})
+        self.assertEqual(response.data['totals']['headcount'], 1)
+        response = self.client.get('/api/organization/departments/as-of/', {'date': '2099-01-01'})
+        self.assertEqual(response.status_code, 400)
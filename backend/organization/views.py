@@ -2,10 +2,16 @@ from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from django.utils import timezone
 from .models import Department, JobTitle, Position, PositionRequirement, PositionFunction
-from .serializers import DepartmentSerializer, JobTitleSerializer, PositionSerializer, PositionRequirementSerializer, PositionFunctionSerializer
+from .serializers import (
+    DepartmentSerializer, JobTitleSerializer, PositionSerializer, PositionRequirementSerializer, PositionFunctionSerializer,
+    OrgSnapshotQuerySerializer, OrgCompareQuerySerializer
+)
+from .as_of import org_snapshot, compare_snapshots
 
 from core.filters import UnaccentSearchFilter
+from core.images import rendition_url
 
 class DepartmentViewSet(viewsets.ModelViewSet):
     queryset = Department.objects.all()
@@ -13,68 +19,59 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
     filter_backends = [UnaccentSearchFilter]
     search_fields = ['name']
+    query_budgets = {'rollup': 4, 'as_of': 10, 'compare': 20}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?within=<id>: el departamento y todo su subárbol
+        within = self.request.query_params.get('within')
+        if self.action == 'list' and within and within.isdigit():
+            queryset = queryset.descendants_of(within)
+        return queryset
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_departments(self, request):
         """
         Returns departments where the authenticated user has active employment.
         """
-        from employment.models import Employment, is_active_status
+        from employment.models import Employment
+        from employment.identity import get_identity, ACTIVE_STATUSES
         
-        # Get user's active employments
-        # User -> Person relationship uses related_name='user_account'
-        active_employments = Employment.objects.filter(
-            person__user_account=request.user
-        ).select_related('position__department', 'position__job_title', 'person')
+        # Contratos activos del usuario (contexto de identidad de la petición)
+        identity = get_identity(request)
+        if not identity.departments:
+            return Response([])
         
-        # Filter only active employments
-        active_employments = [emp for emp in active_employments if is_active_status(emp.current_status)]
+        # Ocupantes activos de las posiciones gerenciales de esos departamentos, en una sola consulta
+        managers = {}
+        manager_emps = Employment.objects.filter(
+            position__department_id__in=identity.department_ids,
+            position__is_manager=True,
+            current_status__in=ACTIVE_STATUSES
+        ).select_related('person', 'position__department', 'position__job_title').order_by('position_id', '-hire_date')
+        for manager_emp in manager_emps:
+            managers.setdefault(manager_emp.position.department_id, {
+                'name': str(manager_emp.person),
+                'position': str(manager_emp.position)
+            })
         
         # Extract unique departments
         departments_data = []
         seen_dept_ids = set()
         
-        for emp in active_employments:
-            if emp.position and emp.position.department:
-                dept = emp.position.department
-                if dept.id not in seen_dept_ids:
-                    seen_dept_ids.add(dept.id)
-                    
-                    # Find manager of this department
-                    manager_info = None
-                    # Look for positions marked as manager in this department
-                    manager_positions = Position.objects.filter(
-                        department=dept,
-                        is_manager=True
-                    ).select_related('job_title')
-                    
-                    for manager_pos in manager_positions:
-                        # Find who currently occupies this manager position
-                        manager_emps = Employment.objects.filter(
-                            position=manager_pos
-                        ).select_related('person')
-                        
-                        for manager_emp in manager_emps:
-                            if is_active_status(manager_emp.current_status):
-                                manager_info = {
-                                    'name': str(manager_emp.person),
-                                    'position': str(manager_pos)
-                                }
-                                break
-                        if manager_info:
-                            break
-                    
-                    departments_data.append({
-                        'id': dept.id,
-                        'name': dept.name,
-                        'manager': manager_info,
-                        'user_position': str(emp.position),
-                    })
+        for emp in identity.employments:
+            dept = emp.position.department
+            if dept and dept.id not in seen_dept_ids:
+                seen_dept_ids.add(dept.id)
+                departments_data.append({
+                    'id': dept.id,
+                    'name': dept.name,
+                    'manager': managers.get(dept.id),
+                    'user_position': str(emp.position),
+                })
         
         return Response(departments_data)
     
-        return Response(departments_data)
-    
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def institutional_chart(self, request):
         """
@@ -107,10 +104,8 @@ class DepartmentViewSet(viewsets.ModelViewSet):
                 ).select_related('person').first()
                 
                 if manager_emp and is_active_status(manager_emp.current_status):
-                    # Get absolute photo URL
-                    photo_url = None
-                    if manager_emp.person.photo:
-                        photo_url = request.build_absolute_uri(manager_emp.person.photo.url)
+                    # Miniatura (no el original) para el avatar del organigrama
+                    photo_url = rendition_url(manager_emp.person.photo, 'thumb', request)
                     
                     manager_info = {
                         'id': manager_emp.person.id,
@@ -181,10 +176,8 @@ class DepartmentViewSet(viewsets.ModelViewSet):
                     primary_email = emp.person.emails.filter(is_primary=True).first()
                     email = primary_email.email_address if primary_email else None
                     
-                    # Get absolute photo URL
-                    photo_url = None
-                    if emp.person.photo:
-                        photo_url = request.build_absolute_uri(emp.person.photo.url)
+                    # Miniatura (no el original) para el avatar del organigrama
+                    photo_url = rendition_url(emp.person.photo, 'thumb', request)
                     
                     occupants.append({
                         'id': emp.person.id,
@@ -218,6 +211,43 @@ class DepartmentViewSet(viewsets.ModelViewSet):
             'positions': positions_data
         })
     
+    @action(detail=False, methods=['get'], url_path='as-of')
+    def as_of(self, request):
+        """
+        Estructura organizativa al cierre de una fecha (por defecto hoy):
+        departamentos, posiciones, líneas de reporte y ocupantes activos.
+        Parámetro: date (YYYY-MM-DD).
+        """
+        params = OrgSnapshotQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(org_snapshot(params.validated_data.get('date') or timezone.localdate()))
+
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        """
+        Cambios de estructura y dotación entre dos fechas (ej. interanual).
+        Parámetros: start y end (YYYY-MM-DD, end por defecto hoy).
+        """
+        params = OrgCompareQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(compare_snapshots(org_snapshot(data['start']), org_snapshot(data['end'])))
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def rollup(self, request, pk=None):
+        """
+        Posiciones, vacantes y personal activo del departamento y de cada
+        subdepartamento, totalizados por subárbol.
+        """
+        from .hierarchy import subtree_rollup
+
+        department = self.get_object()
+        return Response({
+            'id': department.id,
+            'name': department.name,
+            'departments': subtree_rollup(department),
+        })
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated], url_path='export-org-chart')
     def export_org_chart(self, request, pk=None):
         """
@@ -6,6 +6,7 @@ from django.db.models import Q, Count, F
 from .models import EvaluationPeriod, Competency, PerformanceReview, ReviewDetail
 from .serializers import EvaluationPeriodSerializer, CompetencySerializer, PerformanceReviewSerializer, ReviewDetailSerializer
 from employment.models import Employment
+from employment.identity import get_identity
 
 class EvaluationPeriodViewSet(viewsets.ModelViewSet):
     queryset = EvaluationPeriod.objects.all()
@@ -136,14 +137,15 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        identity = get_identity(self.request)
         queryset = PerformanceReview.objects.all()
 
         # 1. FILTRO DE SEGURIDAD BASE (Quién puede ver qué en general)
         if not user.is_staff:
-            if hasattr(user, 'person'):
+            if identity.has_person:
                 queryset = queryset.filter(
-                    Q(evaluator=user.person) |          # Soy el Jefe
-                    Q(employment__person=user.person)   # Soy el Empleado
+                    Q(evaluator_id=identity.person_id) |          # Soy el Jefe
+                    Q(employment__person_id=identity.person_id)   # Soy el Empleado
                 )
             else:
                 return PerformanceReview.objects.none()
@@ -153,15 +155,15 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
         
         if scope == 'received':
             # CASO: "Mis Evaluaciones" (Soy el empleado)
-            if hasattr(user, 'person'):
-                queryset = queryset.filter(employment__person=user.person)
+            if identity.has_person:
+                queryset = queryset.filter(employment__person_id=identity.person_id)
             else:
                 return PerformanceReview.objects.none() # Admin sin persona no tiene evaluaciones propias
                 
         elif scope == 'given':
             # CASO: "Mi Equipo" (Soy el jefe)
-            if hasattr(user, 'person'):
-                queryset = queryset.filter(evaluator=user.person)
+            if identity.has_person:
+                queryset = queryset.filter(evaluator_id=identity.person_id)
         
         # 3. FILTRO POR DEPARTAMENTO (Existente)
         dept_id = self.request.query_params.get('department')
@@ -180,26 +182,18 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
         basado en la JERARQUÍA y su ROL FUNCIONAL.
         """
         user = request.user
+        identity = get_identity(request)
         
-        if not hasattr(user, 'person'):
+        if not identity.has_person and not user.is_staff:
             return Response([])
 
-        # Definimos los roles funcionales que otorgan permiso de supervisión
-        # 🚨 IMPORTANTE: Estos nombres deben coincidir exactamente con los que has creado en la tabla 'Role'
-        SUPERVISORY_ROLES = ['Manager', 'Supervisor', 'Gerente', 'Director'] 
+        # 1. Posiciones activas que ocupa este usuario con responsabilidad de supervisión
+        #    (posición gerencial o rol funcional Manager), ya resueltas en el contexto de identidad
+        user_manager_positions = identity.manager_position_ids
 
-        # 1. Identificar todas las POSICIONES activas que ocupa este usuario Y que tienen rol de JEFE
-        user_manager_positions = Employment.objects.filter(
-            person=user.person,
-            current_status__is_active_relationship=True,
-            # CRÍTICO: Filtramos por el nombre del rol (Employment.role.name)
-            role__name__in=SUPERVISORY_ROLES 
-        ).values_list('position_id', flat=True)
-
-        
         # 2. Si el usuario no tiene ninguna posición activa de Manager, no ve equipos.
         # (Excepción: El Admin puede ver todo)
-        if not user_manager_positions.exists() and not user.is_staff:
+        if not user_manager_positions and not user.is_staff:
             return Response([])
         
         # 3. Definir el QuerySet Base
@@ -210,8 +204,8 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
             # Si es Gerente/Supervisor, solo ve las evaluaciones de subordinados que reportan a SUS posiciones
             # La evaluación del subordinado debe reportar a una de las sillas que yo ocupo
             base_qs = PerformanceReview.objects.filter(
-                employment__position__manager_position__in=user_manager_positions,
-                evaluator=user.person # Filtro de seguridad adicional: solo si me asignaron como evaluador
+                employment__position__manager_positions__in=user_manager_positions,
+                evaluator_id=identity.person_id # Filtro de seguridad adicional: solo si me asignaron como evaluador
             )
         
         # 4. Agrupar y contar (El proceso de agrupamiento sigue igual)
@@ -219,8 +213,8 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
             dept_id=F('employment__position__department__id'),
             dept_name=F('employment__position__department__name')
         ).annotate(
-            total=Count('id'),
-            pending=Count('id', filter=Q(status='BOR'))
+            total=Count('id', distinct=True),
+            pending=Count('id', filter=Q(status='BOR'), distinct=True)
         ).order_by('dept_name')
 
         return Response(list(teams))
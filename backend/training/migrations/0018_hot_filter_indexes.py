@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_hot_filter_indexes'),
+        ('training', '0017_remove_courselesson_file_remove_courselesson_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseparticipant',
+            index=models.Index(fields=['course', 'enrollment_status'], name='course_part_status_idx'),
+        ),
+    ]
@@ -210,6 +210,10 @@ class CourseParticipant(models.Model):
     
     class Meta:
         unique_together = ('course', 'person')
+        indexes = [
+            # Inscritos / solicitudes pendientes de un curso
+            models.Index(fields=['course', 'enrollment_status'], name='course_part_status_idx'),
+        ]
 
     def __str__(self): return f"{self.person} en {self.course}"
 
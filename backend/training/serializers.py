@@ -8,7 +8,10 @@ from core.serializers import (
     sentence_case_cleaner, 
     check_uniqueness,
     validate_text_with_spaces,
-    validate_min_length
+    validate_min_length,
+    ImageRenditionsField,
+    prefetch_primary_national_id,
+    primary_national_id
 )
 from .models import (
     Course, CourseResource, CourseSession, CourseParticipant, AttendanceRecord,
@@ -36,8 +39,13 @@ class ParticipantListSerializer(serializers.ModelSerializer):
         model = CourseParticipant
         fields = ['id', 'person_id', 'person_name', 'person_id_document', 'enrollment_status', 'enrollment_status_name', 'academic_status', 'academic_status_name', 'grade', 'created_at', 'course']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Persona y su documento principal en dos consultas para todo el listado."""
+        return queryset.select_related('person').prefetch_related(prefetch_primary_national_id())
+
     def get_person_id_document(self, obj):
-        primary_id = obj.person.national_ids.filter(is_primary=True).first()
+        primary_id = primary_national_id(obj.person)
         if primary_id:
             return f"{primary_id.document_type}-{primary_id.number}"
         return "S/C"
@@ -280,6 +288,7 @@ class CourseSerializer(serializers.ModelSerializer):
     is_full = serializers.BooleanField(read_only=True)
     modality_display = serializers.CharField(source='get_modality_display', read_only=True)
     status_name = serializers.CharField(source='get_status_display', read_only=True)
+    cover_image_renditions = ImageRenditionsField(source='cover_image')
     
     # 🔧 REFACTOR: Instructor como campo editable + campos de solo lectura para display
     instructor = serializers.PrimaryKeyRelatedField(
@@ -399,7 +408,7 @@ class CourseSerializer(serializers.ModelSerializer):
 
     def get_students(self, obj):
         # 🔧 REFACTOR: Todos los participants son estudiantes ahora
-        qs = obj.participants.select_related('person')
+        qs = ParticipantListSerializer.setup_eager_loading(obj.participants.all())
         return ParticipantListSerializer(qs, many=True).data
 
     def get_instructor_id_document(self, obj):
@@ -13,6 +13,7 @@ from .serializers import (
 from django.db.models import Q
 from .permissions import IsInstructorOrAdmin
 from . import services  # 🆕 NEW: Import business logic services
+from employment.identity import get_identity
 
 class CourseViewSet(viewsets.ModelViewSet):
     serializer_class = CourseSerializer
@@ -27,18 +28,15 @@ class CourseViewSet(viewsets.ModelViewSet):
             return queryset
             
         # 2. Empleados (Lógica Híbrida con Privacy)
-        if hasattr(user, 'person'):
-            person = user.person
-            # Obtener el departamento del empleo activo (ACT, SUS, PER, REP)
-            active_employment = person.employments.filter(
-                current_status__in=['ACT', 'SUS', 'PER', 'REP']
-            ).first()
-            
-            user_department = active_employment.position.department if active_employment and active_employment.position else None
+        identity = get_identity(self.request)
+        if identity.has_person:
+            person_id = identity.person_id
+            # Departamento del empleo activo (ACT, SUS, PER, REP), resuelto en el contexto de identidad
+            user_department = identity.department
             
             return queryset.filter(
                 # CONDICIÓN A: Soy participante (Instructor o Estudiante)
-                Q(participants__person=person) |
+                Q(participants__person_id=person_id) |
                 
                 # CONDICIÓN B: El curso está abierto y es público
                 Q(
@@ -47,11 +45,11 @@ class CourseViewSet(viewsets.ModelViewSet):
                 ) |
                 
                 # CONDICIÓN C: El curso es privado pero soy del mismo departamento
-                Q(
+                (Q(
                     status__in=[Course.Status.SCHEDULED, Course.Status.IN_PROGRESS],
                     is_public=False,
                     department=user_department
-                ) if user_department else Q(pk__in=[])  # Si no tiene department, no aplica
+                ) if user_department else Q(pk__in=[]))  # Si no tiene department, no aplica
             ).distinct()
             
         return Course.objects.none()
@@ -482,6 +480,9 @@ class CourseParticipantViewSet(viewsets.ModelViewSet):
     """
     serializer_class = CourseParticipantSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Máximo de consultas por acción (core.metrics): count + página + cédulas,
+    # más una de autenticación cuando la versión del token no está en caché
+    query_budgets = {'list': 4, 'retrieve': 3}
 
     def get_serializer_class(self):
         """Use ParticipantListSerializer for list/retrieve to include person_id_document"""
@@ -490,8 +491,8 @@ class CourseParticipantViewSet(viewsets.ModelViewSet):
         return CourseParticipantSerializer
 
     def get_queryset(self):
-        # OPTIMIZACIÓN: Cargar la persona junto con el participante
-        queryset = CourseParticipant.objects.select_related('person')
+        # OPTIMIZACIÓN: Cargar la persona y su cédula junto con el participante
+        queryset = ParticipantListSerializer.setup_eager_loading(CourseParticipant.objects.all())
         
         # Filtro por curso
         course_id = self.request.query_params.get('course')
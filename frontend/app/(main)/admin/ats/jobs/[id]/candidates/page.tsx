@@ -34,7 +34,7 @@ import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { ArrowLeft, Loader2, Eye, UserCheck, Users, Search } from "lucide-react";
 import Link from "next/link";
-import { Candidate, JobPosting, CANDIDATE_STAGE_LABELS, CandidateStage } from "@/types/ats";
+import { Candidate, JobPosting, CANDIDATE_STAGE_LABELS, CANDIDATE_STAGE_TRANSITIONS, CandidateStage } from "@/types/ats";
 import { CatalogHeader } from "@/components/CatalogHeader";
 
 import apiClient from "@/lib/apiClient";
@@ -118,7 +118,7 @@ export default function JobCandidatesPage() {
             setSelectedCandidate(null);
             setNewStage("");
         } catch (error: any) {
-            alert(error.message || "Error al cambiar la etapa");
+            alert(error.response?.data?.error || error.message || "Error al cambiar la etapa");
         } finally {
             setChangingStage(false);
         }
@@ -207,7 +207,11 @@ export default function JobCandidatesPage() {
             }
         }
 
-        if (newStage && newStage !== candidate.stage) {
+        if (newStage && newStage !== candidate.stage && !CANDIDATE_STAGE_TRANSITIONS[candidate.stage].includes(newStage)) {
+            toast.error("Cambio de etapa no permitido", {
+                description: `No se puede pasar de ${CANDIDATE_STAGE_LABELS[candidate.stage]} a ${CANDIDATE_STAGE_LABELS[newStage]}.`
+            });
+        } else if (newStage && newStage !== candidate.stage) {
             setPendingMove({ candidate, stage: newStage });
             setConfirmMoveDialogOpen(true);
         }
@@ -378,12 +382,17 @@ export default function JobCandidatesPage() {
                                         <SelectItem
                                             key={stage}
                                             value={stage}
-                                            disabled={stage === selectedCandidate.stage}
+                                            disabled={!CANDIDATE_STAGE_TRANSITIONS[selectedCandidate.stage].includes(stage)}
                                         >
                                             {CANDIDATE_STAGE_LABELS[stage]}
                                         </SelectItem>
                                     ))}
-                                    <SelectItem value="REJ">Rechazado</SelectItem>
+                                    <SelectItem
+                                        value="REJ"
+                                        disabled={!CANDIDATE_STAGE_TRANSITIONS[selectedCandidate.stage].includes("REJ")}
+                                    >
+                                        Rechazado
+                                    </SelectItem>
                                 </SelectContent>
                             </Select>
                         </div>
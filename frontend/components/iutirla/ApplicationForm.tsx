@@ -53,6 +53,36 @@ const baseSchema = z.object({
 
 // Schema dinámico se construirá en el componente
 
+// La postulación se valida y se crea en segundo plano: consultamos su estado
+// hasta que el worker la resuelva (máximo POLL_MAX_ATTEMPTS consultas)
+const POLL_INTERVAL_MS = 2000;
+const POLL_MAX_ATTEMPTS = 30;
+
+interface ApplicationStatus {
+    id: string;
+    status: "PENDING" | "ACCEPTED" | "REJECTED" | "FAILED";
+    errors: Record<string, unknown>;
+}
+
+async function waitForApplication(applicationId: string): Promise<ApplicationStatus | null> {
+    for (let attempt = 0; attempt < POLL_MAX_ATTEMPTS; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        const response = await fetch(`http://localhost:8000/api/ats/public/apply/${applicationId}/`);
+        if (!response.ok) continue;
+        const data: ApplicationStatus = await response.json();
+        if (data.status !== "PENDING") return data;
+    }
+    return null;
+}
+
+// Errores de DRF ({campo: [mensajes]}, con listas anidadas para educación) en una lista plana
+function flattenErrors(errors: unknown): string[] {
+    if (typeof errors === "string") return [errors];
+    if (Array.isArray(errors)) return errors.flatMap(flattenErrors);
+    if (errors && typeof errors === "object") return Object.values(errors).flatMap(flattenErrors);
+    return [];
+}
+
 interface ApplicationFormProps {
     jobId: number;
     askEducation: boolean;
@@ -64,6 +94,7 @@ export default function ApplicationForm({
 }: ApplicationFormProps) {
     const [isSubmitting, setIsSubmitting] = useState(false);
     const [submitSuccess, setSubmitSuccess] = useState(false);
+    const [stillProcessing, setStillProcessing] = useState(false);
     const [submitErrors, setSubmitErrors] = useState<string[]>([]);
 
     // Opciones para selectores
@@ -226,6 +257,17 @@ export default function ApplicationForm({
                 throw new Error(errorMessage);
             }
 
+            // 202: la postulación quedó en cola; esperamos el resultado de la validación completa
+            const { application_id } = await response.json();
+            const result = await waitForApplication(application_id);
+
+            if (result && result.status !== "ACCEPTED") {
+                const resultErrors = flattenErrors(result.errors);
+                setSubmitErrors(resultErrors.length > 0 ? resultErrors : ["No se pudo procesar la postulación. Por favor intenta de nuevo."]);
+                return;
+            }
+
+            setStillProcessing(result === null);
             setSubmitSuccess(true);
             reset();
             setEducation([]);
@@ -246,7 +288,9 @@ export default function ApplicationForm({
                     </div>
                     <h3 className="mb-2 text-xl font-bold text-slate-900">¡Postulación Enviada!</h3>
                     <p className="text-slate-600">
-                        Hemos recibido tu aplicación. Te contactaremos pronto.
+                        {stillProcessing
+                            ? "Hemos recibido tu aplicación y la estamos procesando. Te contactaremos pronto."
+                            : "Hemos recibido tu aplicación. Te contactaremos pronto."}
                     </p>
                     <Button
                         variant="outline"
@@ -583,7 +627,7 @@ export default function ApplicationForm({
                     {isSubmitting ? (
                         <>
                             <Loader2 className="mr-2 h-5 w-5 animate-spin" />
-                            Enviando...
+                            Enviando y verificando...
                         </>
                     ) : (
                         <>
@@ -26,6 +26,36 @@ interface JobPosting {
     department_name: string | null;
 }
 
+// La postulación se valida y se crea en segundo plano: consultamos su estado
+// hasta que el worker la resuelva (máximo POLL_MAX_ATTEMPTS consultas)
+const POLL_INTERVAL_MS = 2000;
+const POLL_MAX_ATTEMPTS = 30;
+
+interface ApplicationStatus {
+    id: string;
+    status: "PENDING" | "ACCEPTED" | "REJECTED" | "FAILED";
+    errors: Record<string, unknown>;
+}
+
+async function waitForApplication(applicationId: string): Promise<ApplicationStatus | null> {
+    for (let attempt = 0; attempt < POLL_MAX_ATTEMPTS; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        const res = await fetch(`http://localhost:8000/api/ats/public/apply/${applicationId}/`);
+        if (!res.ok) continue;
+        const data: ApplicationStatus = await res.json();
+        if (data.status !== "PENDING") return data;
+    }
+    return null;
+}
+
+// Errores de DRF ({campo: [mensajes]}, con listas anidadas para educación) en una lista plana
+function flattenErrors(errors: unknown): string[] {
+    if (typeof errors === "string") return [errors];
+    if (Array.isArray(errors)) return errors.flatMap(flattenErrors);
+    if (errors && typeof errors === "object") return Object.values(errors).flatMap(flattenErrors);
+    return [];
+}
+
 export default function ApplyJobPage() {
     const params = useParams();
     const router = useRouter();
@@ -242,7 +272,24 @@ export default function ApplyJobPage() {
                 throw new Error(JSON.stringify(errorData));
             }
 
-            toast.success("¡Postulación enviada exitosamente!", { id: toastId });
+            // 202: la postulación quedó en cola; esperamos el resultado de la validación completa
+            const { application_id } = await res.json();
+            toast.loading("Verificando postulación...", { id: toastId });
+            const result = await waitForApplication(application_id);
+
+            if (result && result.status !== "ACCEPTED") {
+                const resultErrors = flattenErrors(result.errors);
+                toast.dismiss(toastId);
+                (resultErrors.length > 0 ? resultErrors : ["No se pudo procesar la postulación. Por favor intenta de nuevo."])
+                    .forEach(err => toast.error(err));
+                return;
+            }
+
+            if (result === null) {
+                toast.success("Postulación recibida. La estamos procesando y te contactaremos pronto.", { id: toastId });
+            } else {
+                toast.success("¡Postulación enviada exitosamente!", { id: toastId });
+            }
             router.push("/portal/jobs");
         } catch (error: any) {
             console.error(error);
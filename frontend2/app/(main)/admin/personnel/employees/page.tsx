@@ -22,6 +22,10 @@ import {
     AlertDialogTitle,
 } from "@/components/ui/alert-dialog";
 
+// Espera máxima por el job de creación de cuentas: ~10 minutos
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_POLL_ATTEMPTS = 400;
+
 export default function EmployeesPage() {
     const [hasPendingAccounts, setHasPendingAccounts] = useState(false);
     const [pendingCount, setPendingCount] = useState(0);
@@ -47,9 +51,27 @@ export default function EmployeesPage() {
     const handleBulkCreate = async () => {
         setIsCreating(true);
         try {
-            const response = await apiClient.post("/api/accounts/users/bulk_create_employee_accounts/");
+            // El backend procesa la creación en segundo plano; consultamos el job hasta que termine
+            let { data: job } = await apiClient.post("/api/accounts/users/bulk_create_employee_accounts/");
+            for (let attempt = 0; (job.status === "PEN" || job.status === "RUN") && attempt < JOB_POLL_ATTEMPTS; attempt++) {
+                await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+                ({ data: job } = await apiClient.get(`/api/accounts/users/provisioning-jobs/${job.id}/`));
+            }
+
+            if (job.status === "PEN" || job.status === "RUN") {
+                toast.info("La creación de cuentas sigue en proceso", {
+                    description: `Procesadas ${job.processed} de ${job.total}. Vuelva a consultar más tarde.`
+                });
+                setShowConfirmDialog(false);
+                return;
+            }
+
+            if (job.status === "ERR") {
+                throw new Error(job.error);
+            }
 
-            const { created_count, error_count, errors } = response.data;
+            const { created_count, error_count } = job;
+            const errors = job.report?.errors ?? [];
 
             if (created_count > 0) {
                 toast.success(`${created_count} cuenta(s) creada(s) exitosamente`);
@@ -69,7 +91,7 @@ export default function EmployeesPage() {
         } catch (error: any) {
             console.error("Error creating accounts:", error);
             toast.error("Error al crear cuentas", {
-                description: error.response?.data?.detail || "Ocurrió un error inesperado"
+                description: error.response?.data?.detail || error.message || "Ocurrió un error inesperado"
             });
         } finally {
             setIsCreating(false);
@@ -28,7 +28,7 @@ import {
     AlertDialogTitle,
 } from "@/components/ui/alert-dialog";
 import { CandidateCard, SortableCandidateCard } from "./KanbanComponents";
-import { Candidate, CandidateStage, CANDIDATE_STAGE_LABELS } from "@/types/ats";
+import { Candidate, CandidateStage, CANDIDATE_STAGE_LABELS, CANDIDATE_STAGE_TRANSITIONS } from "@/types/ats";
 import apiClient from "@/lib/api-client";
 import { toast } from "sonner";
 import { cn } from "@/lib/utils";
@@ -57,6 +57,8 @@ interface AccordionColumnProps {
     onHover: (stage: CandidateStage) => void;
     children: React.ReactNode;
     count: number;
+    // Durante un arrastre, la etapa no es un destino permitido para la tarjeta
+    disabled: boolean;
 }
 
 function AccordionDroppableColumn({
@@ -65,9 +67,11 @@ function AccordionDroppableColumn({
     onHover,
     children,
     count,
+    disabled,
 }: AccordionColumnProps) {
     const { setNodeRef } = useDroppable({
         id: stage,
+        disabled,
     });
 
     return (
@@ -81,7 +85,8 @@ function AccordionDroppableColumn({
                 isActive ? "bg-slate-50 dark:bg-slate-900" : STAGE_COLORS[stage], // Active: Neutral BG. Inactive: Colored Spine.
                 isActive
                     ? "flex-3 opacity-100 md:w-[350px] md:flex-none"
-                    : "flex-1 opacity-90 hover:opacity-100 cursor-pointer md:flex-1 text-white" // Text white for colored spines
+                    : "flex-1 opacity-90 hover:opacity-100 cursor-pointer md:flex-1 text-white", // Text white for colored spines
+                disabled && "opacity-30 hover:opacity-30 cursor-not-allowed"
             )}
         >
             {isActive ? (
@@ -164,7 +169,7 @@ export function JobKanbanBoard({ jobId }: JobKanbanBoardProps) {
 
     const handleDragOver = (event: DragOverEvent) => {
         const { over } = event;
-        if (over && STAGES.includes(over.id as CandidateStage)) {
+        if (over && STAGES.includes(over.id as CandidateStage) && !isBlockedTarget(over.id as CandidateStage)) {
             setActiveStage(over.id as CandidateStage);
         }
     };
@@ -181,6 +186,15 @@ export function JobKanbanBoard({ jobId }: JobKanbanBoardProps) {
 
         if (!currentCandidate || currentCandidate.stage === newStage) return;
 
+        if (!CANDIDATE_STAGE_TRANSITIONS[currentCandidate.stage].includes(newStage)) {
+            toast.error("Cambio de etapa no permitido", {
+                description: newStage === 'HIRED'
+                    ? "La contratación se registra con la acción Contratar."
+                    : `No se puede pasar de ${CANDIDATE_STAGE_LABELS[currentCandidate.stage]} a ${CANDIDATE_STAGE_LABELS[newStage]}.`
+            });
+            return;
+        }
+
         // Trigger confirmation dialog
         setPendingMove({ candidateId, newStage });
     };
@@ -210,12 +224,18 @@ export function JobKanbanBoard({ jobId }: JobKanbanBoardProps) {
             mutate();
         } catch (error: any) {
             console.error("Error changing stage:", error);
-            toast.error("Error al mover candidato");
+            toast.error("Error al mover candidato", {
+                description: error.response?.data?.error || error.message
+            });
             mutate(); // Revert
         }
     };
 
     const activeCandidate = candidates?.find(c => c.id === activeId);
+    // Columnas a las que la tarjeta arrastrada no puede pasar (se atenúan y no aceptan la tarjeta)
+    const isBlockedTarget = (stage: CandidateStage) =>
+        !!activeCandidate && stage !== activeCandidate.stage
+        && !CANDIDATE_STAGE_TRANSITIONS[activeCandidate.stage].includes(stage);
     const groupedCandidates = groupCandidatesByStage(candidates);
 
     if (!candidates) return <div className="p-8 text-center">Cargando tablero...</div>;
@@ -241,6 +261,7 @@ export function JobKanbanBoard({ jobId }: JobKanbanBoardProps) {
                                 isActive={stage === activeStage}
                                 onHover={setActiveStage}
                                 count={stageCandidates.length}
+                                disabled={isBlockedTarget(stage)}
                             >
                                 <SortableContext items={candidateIds} strategy={verticalListSortingStrategy}>
                                     {stageCandidates.map((candidate) => (
@@ -75,6 +75,18 @@ export const CANDIDATE_STAGE_LABELS: Record<CandidateStage, string> = {
     POOL: 'Banco de Elegibles',
 };
 
+// Cambios de etapa permitidos (espejo de Candidate.STAGE_TRANSITIONS en el backend).
+// HIRED no es destino: la contratación se registra con la acción Contratar.
+export const CANDIDATE_STAGE_TRANSITIONS: Record<CandidateStage, CandidateStage[]> = {
+    NEW: ['REV', 'INT', 'REJ', 'POOL'],
+    REV: ['NEW', 'INT', 'REJ', 'POOL'],
+    INT: ['REV', 'OFF', 'REJ', 'POOL'],
+    OFF: ['INT', 'REJ', 'POOL'],
+    REJ: ['REV', 'POOL'],
+    POOL: ['REV', 'INT', 'REJ'],
+    HIRED: [],
+};
+
 export const JOB_STATUS_LABELS: Record<JobPostingStatus, string> = {
     DRAFT: 'Borrador',
     PUBLISHED: 'Publicada',